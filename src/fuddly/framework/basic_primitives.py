@@ -27,6 +27,17 @@ import string
 import array
 
 from fuddly.framework.global_resources import convert_to_internal_repr
+from fuddly.libs.external_modules import numpy_module, numpy
+
+#: int: number of corrupted positions from which :func:`corrupt_bytes` and
+#: :func:`corrupt_bits` rely on the vectorized engine
+VECTORIZED_CORRUPTION_THRESHOLD = 64
+#: int: maximum size (in bytes) of a batch of variants built at once by the vectorized engine
+CORRUPTION_BATCH_SIZE = 1 << 24
+#: int: maximum number of variants within a batch
+CORRUPTION_BATCH_VARIANTS = 256
+
+_ctrl_chars = bytes(list(range(0, 32)) + [0x7f])
 
 def rand_string(size=None, min=1, max=10, str_set=string.printable):
 
@@ -46,13 +57,16 @@ def rand_string(size=None, min=1, max=10, str_set=string.printable):
 
 def corrupt_bytes(s, p=0.01, n=None, ctrl_char=False):
     """Corrupt a given percentage or number of bytes from a string"""
-    s = bytearray(s)
     l = len(s)
     if n is None:
         n = max(1,int(l*p))
+    if numpy_module and n >= VECTORIZED_CORRUPTION_THRESHOLD:
+        return next(iter_corrupted_bytes(s, nb=1, n=n, ctrl_char=ctrl_char))
+
+    s = bytearray(s)
     for i in random.sample(range(l), n):
         if ctrl_char:
-            s[i] = random.choice([x for x in range(0,32)] + [0x7f])
+            s[i] = random.choice(_ctrl_chars)
         else:
             s[i] = (s[i]+random.randint(1,255))%256
 
@@ -60,10 +74,13 @@ def corrupt_bytes(s, p=0.01, n=None, ctrl_char=False):
 
 def corrupt_bits(s, p=0.01, n=None, ascii=False):
     """Flip a given percentage or number of bits from a string"""
-    s = bytearray(s)
     l = len(s)*8
     if n is None:
         n = max(1,int(l*p))
+    if numpy_module and n >= VECTORIZED_CORRUPTION_THRESHOLD:
+        return next(iter_corrupted_bits(s, nb=1, n=n, ascii=ascii))
+
+    s = bytearray(s)
     for i in random.sample(range(l), n):
         s[i//8] ^= 1 << (i%8)
         if ascii:
@@ -71,6 +88,125 @@ def corrupt_bits(s, p=0.01, n=None, ascii=False):
 
     return bytes(s)
 
+def _sample_positions(rng, k, population, n):
+    # draw @n distinct positions for each of the @k variants
+    if n * 2 > population:
+        return numpy.stack([rng.choice(population, n, replace=False) for _ in range(k)])
+
+    positions = rng.integers(0, population, size=(k, n))
+    while n > 1:
+        positions.sort(axis=1)
+        duplicates = positions[:, 1:] == positions[:, :-1]
+        nb_duplicates = numpy.count_nonzero(duplicates)
+        if not nb_duplicates:
+            break
+        positions[:, 1:][duplicates] = rng.integers(0, population, size=nb_duplicates)
+    return positions
+
+def _iter_corrupted_variants(s, nb, population, n, corrupt_batch, fallback):
+    if not numpy_module:
+        while nb is None or nb > 0:
+            yield fallback()
+            if nb is not None:
+                nb -= 1
+        return
+
+    # the generator follows the state of the random module, so that random.seed() still
+    # makes test cases reproducible
+    rng = numpy.random.default_rng(random.getrandbits(64))
+    base = numpy.frombuffer(s, dtype=numpy.uint8)
+    batch_size = max(1, min(CORRUPTION_BATCH_VARIANTS, CORRUPTION_BATCH_SIZE // max(1, len(s))))
+    while nb is None or nb > 0:
+        k = batch_size if nb is None else min(nb, batch_size)
+        variants = numpy.tile(base, (k, 1))
+        positions = _sample_positions(rng, k, population, n)
+        rows = numpy.repeat(numpy.arange(k), n)
+        corrupt_batch(rng, variants, rows, positions.ravel())
+        for v in variants:
+            yield v.tobytes()
+        if nb is not None:
+            nb -= k
+
+def iter_corrupted_bytes(s, nb=None, p=0.01, n=None, ctrl_char=False):
+    """
+    Generate variants of a string, each one with a given percentage or number of corrupted
+    bytes (refer to :func:`corrupt_bytes`). The variants are built in batches from the
+    original string, with vectorized operations if numpy is available.
+
+    Args:
+        s (bytes): the string to corrupt
+        nb (int): number of variants to generate (endless if ``None``)
+        p (float): percentage of bytes to corrupt in each variant
+        n (int): number of bytes to corrupt in each variant (override ``p``)
+        ctrl_char (bool): replace the corrupted bytes by control characters
+
+    Returns:
+        generator: the corrupted variants (bytes)
+    """
+    s = bytes(s)
+    l = len(s)
+    if n is None:
+        n = max(1,int(l*p))
+    if n > l:
+        raise ValueError('cannot corrupt {:d} bytes of a {:d}-byte string'.format(n, l))
+
+    def corrupt_batch(rng, variants, rows, positions):
+        if ctrl_char:
+            ctrl = numpy.frombuffer(_ctrl_chars, dtype=numpy.uint8)
+            variants[rows, positions] = ctrl[rng.integers(0, len(ctrl), size=len(rows))]
+        else:
+            variants[rows, positions] += rng.integers(1, 256, size=len(rows), dtype=numpy.uint8)
+
+    return _iter_corrupted_variants(s, nb, l, n, corrupt_batch,
+                                    lambda: corrupt_bytes(s, n=n, ctrl_char=ctrl_char))
+
+def iter_corrupted_bits(s, nb=None, p=0.01, n=None, ascii=False):
+    """
+    Generate variants of a string, each one with a given percentage or number of flipped
+    bits (refer to :func:`corrupt_bits`). The variants are built in batches from the
+    original string, with vectorized operations if numpy is available.
+
+    Args:
+        s (bytes): the string to corrupt
+        nb (int): number of variants to generate (endless if ``None``)
+        p (float): percentage of bits to flip in each variant
+        n (int): number of bits to flip in each variant (override ``p``)
+        ascii (bool): enforce the corrupted bytes to be ascii 7bits
+
+    Returns:
+        generator: the corrupted variants (bytes)
+    """
+    s = bytes(s)
+    l = len(s)*8
+    if n is None:
+        n = max(1,int(l*p))
+    if n > l:
+        raise ValueError('cannot flip {:d} bits of a {:d}-byte string'.format(n, len(s)))
+
+    def corrupt_batch(rng, variants, rows, positions):
+        # several flipped bits may belong to the same byte, thus the masks of the (distinct)
+        # bits are summed up by byte
+        byte_idx = rows * variants.shape[1] + (positions >> 3)
+        order = numpy.argsort(byte_idx, kind='stable')
+        byte_idx = byte_idx[order]
+        masks = numpy.left_shift(1, positions[order] & 7).astype(numpy.uint8)
+        bounds = numpy.flatnonzero(numpy.diff(byte_idx, prepend=-1))
+        flat = variants.reshape(-1)
+        flat[byte_idx[bounds]] ^= numpy.add.reduceat(masks, bounds, dtype=numpy.uint8)
+        if ascii:
+            flat[byte_idx[bounds]] &= 0x7f
+
+    return _iter_corrupted_variants(s, nb, l, n, corrupt_batch,
+                                    lambda: corrupt_bits(s, n=n, ascii=ascii))
+
+def corrupt_bytes_bulk(s, nb, p=0.01, n=None, ctrl_char=False):
+    """Return a list of @nb variants of a string (refer to :func:`iter_corrupted_bytes`)"""
+    return list(iter_corrupted_bytes(s, nb=nb, p=p, n=n, ctrl_char=ctrl_char))
+
+def corrupt_bits_bulk(s, nb, p=0.01, n=None, ascii=False):
+    """Return a list of @nb variants of a string (refer to :func:`iter_corrupted_bits`)"""
+    return list(iter_corrupted_bits(s, nb=nb, p=p, n=n, ascii=ascii))
+
 def calc_parity_bit(x):
     """return 0 if the number of bits is even, otherwise returns 1"""
     bit = 0
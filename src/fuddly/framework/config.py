@@ -130,6 +130,8 @@ aligned: False
 aligned_options.batch_mode: False
 aligned_options.hide_cursor: True
 aligned_options.prompt_height: 3
+producer.workers: 0
+producer.lookahead: 4
 
 ;;  [send_loop.doc]
 ;;  self: Configuration applicable to the 'send_loop' command.
@@ -139,6 +141,9 @@ aligned_options.prompt_height: 3
                      (when using 'send_loop -1 <generator>').
 ;;  aligned_options.hide_cursor: Attempt to reduce blinking by hiding cursor.
 ;;  aligned_options.prompt_height: Estimation of prompt's height.
+;;  producer.workers: Number of worker processes that pre-generate the data while
+                     the previous ones are sent (also used by 'multi_send'). 0 to disable.
+;;  producer.lookahead: Maximum number of data pre-generated by each worker.
 
 ''')
 
@@ -160,6 +165,21 @@ after_data_id = 60
       more than the amount of seconds specified in this parameter, it won't be considered to be
       related to this last registered data. 
 
+[sql]
+journal_mode = WAL
+synchronous = NORMAL
+batch.max_stmts = 1000
+
+;;  [sql.doc]
+;;  self: Configuration applicable to the SQL handler of the FmkDB.
+;;
+;;  journal_mode: SQLite journal mode of the FmkDB (DELETE, TRUNCATE, PERSIST, MEMORY, WAL, OFF).
+;;  synchronous: SQLite synchronization level (OFF, NORMAL, FULL, EXTRA). With NORMAL
+      and the WAL journal mode, a crash of the OS may roll back the last transactions
+      but won't corrupt the FmkDB.
+;;  batch.max_stmts: maximum number of queued SQL statements committed within the same
+      transaction.
+
 ''')
 
 
@@ -22,17 +22,21 @@
 ################################################################################
 
 import copy
+import functools
 from typing import Tuple, List
 
-import z3
-
 from fuddly.libs.external_modules import *
-if z3_module:
-    from z3 import *
 
 import fuddly.framework.global_resources as gr
 
-_Z3_MODEL_NOT_COMPUTED = 1
+@functools.lru_cache(maxsize=None)
+def _get_z3_namespace():
+    # The relations of the Z3 constraints are evaluated with the z3 API in scope
+    return {k: v for k, v in vars(z3).items() if not k.startswith('_')}
+
+@functools.lru_cache(maxsize=1024)
+def _compile_relation(relation):
+    return compile(relation, '<z3 constraint>', 'eval')
 
 class ConstraintError(Exception): pass
 class CSPDefinitionError(Exception): pass
@@ -156,8 +160,17 @@ class CSP(object):
     _default_model = None  # used in the context of python-constraint
     _exhausted_solutions = None
     _is_solution_queried = False
+    _solver_base_key = None
+    _z3_formulas = None
+    _z3_domain_constraints = None
+    _pycst_domains = None
     highlight_variables = None
 
+    # Maximum number of Z3 solutions enumerated within a same region of the variable domains.
+    # Beyond that, the region is split in two, so that the blocking clauses which prevent
+    # the solver from returning a solution twice do not pile up.
+    z3_solutions_per_region = 32
+
     z3_problem = None
 
     def __init__(self, constraints: Constraint or Z3Constraint or List[Constraint or Z3Constraint],
@@ -231,10 +244,10 @@ class CSP(object):
         #       f'\n --> variable types: {self._var_types}'
         #       f'\n --> domains: {self._var_domain}')
 
-        if self.z3_problem:
-            self._solver = Solver()
-        else:
+        if not self.z3_problem:
             self._problem = cst.Problem()
+        # Note: the Z3 solver is kept, as the constraints that have not changed are not
+        # added again (refer to _setup_z3_solver())
 
         self._checked_with_default_values = False
         self._default_value_constraints_added = False
@@ -323,88 +336,136 @@ class CSP(object):
 
         return self._model
 
-    def _solve_constraints(self):
-        default_value_constraints = []
-        known_vars = set()
-        if isinstance(self._constraints[0], Z3Constraint):
-            for c in self._constraints:
-                relation = c.relation
-                for v in c.vars:
-                    if v not in known_vars:
-                        known_vars.add(v)
-                        z3var = self._z3vars[v]
-                        dom = self._var_domain[v]
-                        default = self._var_default_value.get(v)
-                        v_type = self._var_types.get(v)
-                        if v_type is None or v_type is z3.Int:
-                            if not self._checked_with_default_values and default is not None:
-                                default_value_constraints.append(z3var == default)
+    def _get_z3_formula(self, c):
+        if not c.is_relation_translated:
+            relation = c.relation
+            tmp_vars = []
+            for v in c.vars:
+                tmp_vars.append('!?'+v)
+            for v, tmp_v in zip(c.vars, tmp_vars):
+                relation = relation.replace(v, tmp_v)
+            for v, tmp_v in zip(c.vars, tmp_vars):
+                relation = relation.replace(tmp_v, 'self._z3vars["'+ v +'"]')
+            c.provide_translated_relation(relation)
+
+        key = (c.relation, tuple(self._var_types.get(v) for v in c.vars))
+        z3formula = self._z3_formulas.get(key)
+        if z3formula is None:
+            try:
+                z3formula = eval(_compile_relation(c.relation), dict(_get_z3_namespace(), self=self))
+            except z3.Z3Exception:
+                # this case can happen if some variable types have been changed by a disruptor
+                # to generate specific test cases. (For instance tTYPE will change a vt.INT into
+                # a vt.String to add specific cases mixing integers and separators.)
+                # In such cases, it does not make sense to add a constraint anyway.
+                self._checked_with_default_values = True
+                raise CSPDefinitionError(f'\nVariable types in the constraint formula are not consistent'
+                                         f' (root cause: incorrect data model or some fuzzing is'
+                                         f' performed?)'
+                                         f'\n --> Z3 formula: {c.relation}'
+                                         f'\n --> variables: {self._vars}'
+                                         f'\n --> variable types: {self._var_types}'
+                                         f'\n --> domains: {self._var_domain}')
+            self._z3_formulas[key] = z3formula
 
-                            if isinstance(dom, tuple) and len(dom) == 2:
-                                min, max = dom
-                                self._solver.add(And([min <= z3var, z3var <= max]))
-                            else:
-                                self._solver.add(Or([z3var == value for value in dom]))
+        return z3formula
 
-                        elif v_type is z3.String:
-                            if not self._checked_with_default_values and default is not None:
-                                default_value_constraints.append(
-                                    z3var == gr.unconvert_from_internal_repr(default))
+    def _get_z3_domain_constraint(self, var):
+        dom = self._var_domain[var]
+        v_type = self._var_types.get(var)
+        if isinstance(dom, tuple) and len(dom) == 2 and v_type is not z3.String:
+            key = (var, v_type, 'range', dom)
+        else:
+            key = (var, v_type, 'values', tuple(dom))
+
+        z3_cst = self._z3_domain_constraints.get(key)
+        if z3_cst is None:
+            z3var = self._z3vars[var]
+            if v_type is None or v_type is z3.Int:
+                if isinstance(dom, tuple) and len(dom) == 2:
+                    min, max = dom
+                    z3_cst = z3.And([min <= z3var, z3var <= max])
+                else:
+                    z3_cst = z3.Or([z3var == value for value in dom])
+            elif v_type is z3.String:
+                z3_cst = z3.Or([z3var == gr.unconvert_from_internal_repr(value) for value in dom])
+            else:
+                raise NotImplementedError
 
-                            self._solver.add(
-                                Or([z3var == gr.unconvert_from_internal_repr(value) for value in dom]))
+            if len(self._z3_domain_constraints) >= 256:
+                self._z3_domain_constraints.clear()
+            self._z3_domain_constraints[key] = z3_cst
 
-                        else:
-                            raise NotImplementedError
+        return z3_cst
 
-                if not c.is_relation_translated:
-                    tmp_vars = []
-                    for v in c.vars:
-                        tmp_vars.append('!?'+v)
-                    for v, tmp_v in zip(c.vars, tmp_vars):
-                        relation = relation.replace(v, tmp_v)
-                    for v, tmp_v in zip(c.vars, tmp_vars):
-                        relation = relation.replace(tmp_v, 'self._z3vars["'+ v +'"]')
+    def _setup_z3_solver(self):
+        """
+        The constraint formulas are asserted at the base level of the solver, and the variable
+        domains within a scope on top of it. Thus, as long as the formulas and the variable
+        types do not change, a reset only drops the latter scope.
+        """
+        if self._z3_formulas is None:
+            self._z3_formulas = {}
+            self._z3_domain_constraints = {}
 
-                if not c.is_relation_translated:
-                    c.provide_translated_relation(relation)
+        def get_base_key():
+            return tuple((c.relation, tuple(self._var_types.get(v) for v in c.vars))
+                         for c in self._constraints)
 
-                try:
-                    z3formula = eval(c.relation)
-                except z3types.Z3Exception:
-                    # this case can happen if some variable types have been changed by a disruptor
-                    # to generate specific test cases. (For instance tTYPE will change a vt.INT into
-                    # a vt.String to add specific cases mixing integers and separators.)
-                    # In such cases, it does not make sense to add a constraint anyway.
-                    self._checked_with_default_values = True
-                    raise CSPDefinitionError(f'\nVariable types in the constraint formula are not consistent'
-                                             f' (root cause: incorrect data model or some fuzzing is'
-                                             f' performed?)'
-                                             f'\n --> Z3 formula: {c.relation}'
-                                             f'\n --> variables: {self._vars}'
-                                             f'\n --> variable types: {self._var_types}'
-                                             f'\n --> domains: {self._var_domain}')
-                else:
-                    self._solver.add(z3formula)
+        if self._solver is None or get_base_key() != self._solver_base_key:
+            self._solver = None
+            solver = z3.Solver()
+            for c in self._constraints:
+                solver.add(self._get_z3_formula(c))
+            self._solver = solver
+            # the relations are translated once the formulas are built
+            self._solver_base_key = get_base_key()
+        elif self._solver.num_scopes() > 0:
+            self._solver.pop(self._solver.num_scopes())
+
+        self._solver.push()
+        default_value_constraints = []
+        for v in self._vars:
+            z3var = self._z3vars[v]
+            self._solver.add(self._get_z3_domain_constraint(v))
+            default = self._var_default_value.get(v)
+            if not self._checked_with_default_values and default is not None:
+                if self._var_types.get(v) is z3.String:
+                    default = gr.unconvert_from_internal_repr(default)
+                default_value_constraints.append(z3var == default)
+
+        return default_value_constraints
+
+    def _get_pycst_domain(self, var):
+        dom = self._var_domain[var]
+        if isinstance(dom, tuple) and len(dom) == 2:
+            if self._pycst_domains is None:
+                self._pycst_domains = {}
+            pycst_dom = self._pycst_domains.get(dom)
+            if pycst_dom is None:
+                pycst_dom = self._pycst_domains[dom] = list(range(dom[0], dom[1] + 1))
+            return pycst_dom
+        else:
+            return dom
 
-            if not self._checked_with_default_values and default_value_constraints:
-                self._solver.push()
-                for z3_cst in default_value_constraints:
-                    self._solver.add(z3_cst)
-                self._default_value_constraints_added = True
+    def _solve_constraints(self):
+        if self.z3_problem:
+            default_value_constraints = self._setup_z3_solver()
+            self._solutions = self._iter_z3_solutions(default_value_constraints)
+            self._checked_with_default_values = True
 
         else:
+            known_vars = set()
             for c in self._constraints:
                 for v in c.vars:
                     if v not in known_vars:
                         known_vars.add(v)
-                        dom = self._var_domain[v]
                         default = self._var_default_value.get(v)
                         if not self._checked_with_default_values and default is not None:
                             dom = [default]
                             self._default_value_constraints_added = True
-                        elif isinstance(dom, tuple) and len(dom) == 2:
-                            dom = range(dom[0], dom[1] + 1)
+                        else:
+                            dom = self._get_pycst_domain(v)
 
                         try:
                             self._problem.addVariable(v, dom)
@@ -414,12 +475,6 @@ class CSP(object):
                             pass
                 self._problem.addConstraint(c.relation, c.vars)
 
-
-        if self.z3_problem:
-            self._solutions = _Z3_MODEL_NOT_COMPUTED
-            self._checked_with_default_values = True
-
-        else:
             try:
                 self._solutions = self._problem.getSolutionIter()
             except TypeError:
@@ -432,36 +487,125 @@ class CSP(object):
             finally:
                 self._checked_with_default_values = True
 
-
-    def _next_solution(self):
-        z3mdl = self._solutions
-        if z3mdl is _Z3_MODEL_NOT_COMPUTED:
-            r = self._solver.check()
-            if r == sat:
-                self._solutions = self._solver.model()
-                return self._next_solution()
+    def _iter_z3_solutions(self, default_value_constraints):
+        """
+        Enumerate the solutions of the Z3 problem, the first one complying with the default
+        values if any.
+
+        The domains of the variables are recursively split into regions (by halving the widest
+        domain) as soon as a region provides more than `z3_solutions_per_region` solutions.
+        Each region is solved within its own solver scope, and only the solutions already
+        found in it need to be blocked. Thus, the cost of each solution does not grow with
+        the number of solutions already provided.
+        """
+        solver = self._solver
+        z3vars = [self._z3vars[v] for v in self._vars]
+        is_str = [self._var_types.get(v) is z3.String for v in self._vars]
+
+        def get_model():
+            z3mdl = solver.model()
+            values = tuple(z3mdl.eval(z3var, model_completion=True) for z3var in z3vars)
+            solver.add(z3.Or([z3var != val for z3var, val in zip(z3vars, values)]))
+            values = tuple(val.as_string() if s else val.as_long()
+                           for val, s in zip(values, is_str))
+            return values, dict(zip(self._vars, values))
+
+        found = []
+        if default_value_constraints:
+            solver.push()
+            solver.add(default_value_constraints)
+            if solver.check() != z3.sat:
+                return
+            values, mdl = get_model()
+            found.append(values)
+            solver.pop()
+            yield mdl
+
+        # a region is defined by the index range of each variable within its domain
+        domains = []
+        for v, s in zip(self._vars, is_str):
+            dom = self._var_domain[v]
+            if isinstance(dom, tuple) and len(dom) == 2 and not s:
+                domains.append(None)
             else:
-                raise CSPUnsat()
+                domains.append([gr.unconvert_from_internal_repr(d) for d in dom] if s else list(dom))
 
-        else:
-            self._solutions = _Z3_MODEL_NOT_COMPUTED
-            if self._default_value_constraints_added:
-                # assert self._checked_with_default_values
-                self._solver.pop()
-                self._default_value_constraints_added = False
-            self._solver.add(Or([z3v != z3mdl[z3v] for z3v in self._z3vars.values()]))
-            mdl = {}
-            for var in z3mdl:
-                var_str = str(var)
-                v_type = self._var_types.get(var_str)
-                if v_type is None or v_type is z3.Int:
-                    mdl[var_str] = z3mdl[var].as_long()
-                elif v_type is z3.String:
-                    mdl[var_str] = z3mdl[var].as_string()
+        def index_ranges():
+            for dom, v in zip(domains, self._vars):
+                if dom is None:
+                    yield self._var_domain[v]
                 else:
-                    raise NotImplementedError
-            return mdl
+                    yield (0, len(dom) - 1)
+
+        value_indexes = [None if dom is None else {d: i for i, d in enumerate(dom)}
+                         for dom in domains]
+
+        def is_in_region(values, region):
+            for val, (lo, hi), idx in zip(values, region, value_indexes):
+                if idx is not None:
+                    val = idx.get(val)
+                    if val is None:
+                        return False
+                if not (lo <= val <= hi):
+                    return False
+            return True
+
+        def region_constraints(region):
+            for z3var, dom, (lo, hi), full in zip(z3vars, domains, region, index_ranges()):
+                if (lo, hi) == full:
+                    continue
+                if dom is None:
+                    yield z3.And([lo <= z3var, z3var <= hi])
+                else:
+                    yield z3.Or([z3var == val for val in dom[lo:hi + 1]])
+
+        def split_region(region):
+            # the variables with interval domains are preferred, as their regions are cheaper
+            # to express
+            widths = [(dom is None, hi - lo) for (lo, hi), dom in zip(region, domains)]
+            widest = max(range(len(widths)), key=widths.__getitem__)
+            if widths[widest][1] == 0:
+                return None
+            lo, hi = region[widest]
+            mid = lo + widths[widest][1] // 2
+            region = list(region)
+            region[widest] = (lo, mid)
+            low_region = tuple(region)
+            region[widest] = (mid + 1, hi)
+            return low_region, tuple(region)
+
+        # each region comes with the solutions already found within it
+        regions = [(tuple(index_ranges()), found)]
+        while regions:
+            region, found = regions.pop()
+            solver.push()
+            solver.add(list(region_constraints(region)))
+            for values in found:
+                solver.add(z3.Or([z3var != val for z3var, val in zip(z3vars, values)]))
+
+            while solver.check() == z3.sat:
+                values, mdl = get_model()
+                found.append(values)
+                yield mdl
+                if len(found) >= self.z3_solutions_per_region:
+                    subregions = split_region(region)
+                    if subregions is not None:
+                        low_region, high_region = subregions
+                        low_found = []
+                        high_found = []
+                        for values in found:
+                            (low_found if is_in_region(values, low_region) else high_found).append(values)
+                        regions.append((high_region, high_found))
+                        regions.append((low_region, low_found))
+                        break
+
+            solver.pop()
 
+    def _next_solution(self):
+        try:
+            return next(self._solutions)
+        except StopIteration:
+            raise CSPUnsat()
 
     def next_solution(self):
         if self._solutions is None or self._exhausted_solutions:
@@ -580,6 +724,8 @@ class CSP(object):
         #       f'\n --> domains: {self._var_domain}')
         new_csp._var_node_mapping = copy.copy(self._var_node_mapping)
         new_csp._solutions = None # the generator cannot be copied
+        new_csp._solver = None # the Z3 solver state is specific to each CSP
+        new_csp._solver_base_key = None
         new_csp._model = copy.copy(self._model)
         new_csp._default_model = copy.copy(self._default_model)
         new_csp._constraints = []
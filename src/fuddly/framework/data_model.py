@@ -21,7 +21,17 @@
 #
 ################################################################################
 
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import multiprocessing
+import pickle
 import threading
+import time
+import types
+import zlib
 
 from fuddly.framework import global_resources as gr
 from fuddly.framework.data import *
@@ -30,6 +40,418 @@ from fuddly.framework.node_builder import NodeBuilder
 from fuddly.libs.external_modules import *
 from fuddly.libs.utils import Accumulator
 
+#### Data Model Caches
+
+# The state of a data model is only snapshotted if building it takes longer than
+# BUILD_SNAPSHOT_MIN_TIME seconds, and if the snapshot is not bigger than
+# BUILD_SNAPSHOT_MAX_SIZE bytes (refer to DataModel.load_data_model())
+BUILD_SNAPSHOT_MIN_TIME = 0.1
+BUILD_SNAPSHOT_MAX_SIZE = 64 * 2**20
+
+_data_model_signatures = {}
+
+def get_data_model_signature(dm):
+    """
+    Returns:
+        bytes: digest of the fuddly version and of the source files of the data model
+        (all the python files of its directory, e.g., its strategy) and of the node abstraction.
+    """
+    dm_cls = type(dm)
+    signature = _data_model_signatures.get(dm_cls)
+    if signature is None:
+        h = hashlib.sha256()
+        h.update(gr.fuddly_version.encode())
+        h.update(sys.version.encode())
+        files = set()
+        for cls in dm_cls.__mro__[:-1]:
+            files.add(inspect.getfile(cls))
+        dm_folder = os.path.dirname(inspect.getfile(dm_cls))
+        files.update(os.path.join(dm_folder, f) for f in os.listdir(dm_folder) if f.endswith('.py'))
+        for module in ('fuddly.framework.node', 'fuddly.framework.value_types'):
+            files.add(inspect.getfile(sys.modules[module]))
+        for f in sorted(files):
+            with open(f, 'rb') as src:
+                h.update(src.read())
+        signature = _data_model_signatures[dm_cls] = h.digest()
+    return signature
+
+
+def _is_local_object(obj):
+    if isinstance(obj, types.FunctionType):
+        return '<locals>' in obj.__qualname__
+    else:
+        return not isinstance(obj, type) and '<locals>' in type(obj).__qualname__
+
+
+class _SharedObjects(object):
+    """
+    Registry of the objects referenced by the atoms of a data model that cannot be pickled,
+    because they are functions or class instances defined locally (e.g., the lambdas and
+    the CRC helpers used by generator nodes). The atoms absorbed from the samples
+    refer to them through a key that remains the same from one fuddly session to another
+    as long as the data model does not change. If the key is ambiguous (e.g., closures created
+    within a loop), the object identity is used, which is only valid within the current session.
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_key = {}
+        self.ambiguous_keys = set()
+
+    @staticmethod
+    def _get_key(obj):
+        if isinstance(obj, types.FunctionType):
+            code = obj.__code__
+            desc = repr((code.co_firstlineno, list(code.co_positions())))
+        else:
+            try:
+                desc = repr(sorted(vars(obj).items()))
+            except TypeError:
+                desc = ''
+        qualname = getattr(obj, '__qualname__', type(obj).__qualname__)
+        return '{:s}:{:s}:{:s}'.format(getattr(obj, '__module__', ''), qualname,
+                                       hashlib.sha1(desc.encode()).hexdigest())
+
+    def add(self, obj):
+        if id(obj) in self.by_id:
+            return
+        key = self._get_key(obj)
+        self.by_id[id(obj)] = (key, obj)
+        if key in self.by_key:
+            self.ambiguous_keys.add(key)
+        else:
+            self.by_key[key] = obj
+
+    def get_ref(self, obj):
+        entry = self.by_id.get(id(obj))
+        if entry is None:
+            return None
+        key = entry[0]
+        return ('id', id(obj)) if key in self.ambiguous_keys else ('key', key)
+
+    def get_object(self, ref):
+        kind, val = ref
+        try:
+            if kind == 'key' and val not in self.ambiguous_keys:
+                return self.by_key[val]
+            elif kind == 'id':
+                return self.by_id[val][1]
+        except KeyError:
+            pass
+        raise pickle.UnpicklingError('unknown shared object: {!r}'.format(ref))
+
+
+def _resolve_shared_object(ref):
+    # only used as a marker, refer to _AtomUnpickler.find_class()
+    raise pickle.UnpicklingError('shared objects are only resolved by _AtomUnpickler')
+
+
+class _AtomPickler(pickle.Pickler):
+
+    def __init__(self, file, shared_objects, register=False):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.shared_objects = shared_objects
+        self.register = register
+        self.session_bound = False
+
+    def reducer_override(self, obj):
+        # unlike persistent_id(), not called for the builtin containers and scalars
+        if isinstance(obj, DataModel):
+            # the Env of an atom refers to its data model (or a copy of it)
+            return _resolve_shared_object, (('dm', obj.name),)
+        elif not _is_local_object(obj):
+            return NotImplemented
+
+        if self.register:
+            self.shared_objects.add(obj)
+        ref = self.shared_objects.get_ref(obj)
+        if ref is None:
+            # pickling will fail on this unknown local object
+            return NotImplemented
+        elif ref[0] == 'id':
+            self.session_bound = True
+        return _resolve_shared_object, (ref,)
+
+
+class _AtomUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, dm, shared_objects):
+        pickle.Unpickler.__init__(self, file)
+        self.dm = dm
+        self.shared_objects = shared_objects
+
+    def _resolve_shared_object(self, ref):
+        if ref[0] == 'dm':
+            if ref[1] == self.dm.name:
+                return self.dm
+            elif self.dm._dm_db is not None and ref[1] in self.dm._dm_db:
+                return self.dm._dm_db[ref[1]]
+            else:
+                raise pickle.UnpicklingError('unknown data model: {!r}'.format(ref[1]))
+        else:
+            return self.shared_objects.get_object(ref)
+
+    def find_class(self, module, name):
+        if module == __name__ and name == '_resolve_shared_object':
+            return self._resolve_shared_object
+        else:
+            return pickle.Unpickler.find_class(self, module, name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_data_model_pickler_class():
+    # Defined on first use, as subclassing triggers the (lazy) import of cloudpickle
+
+    class _DataModelPickler(cloudpickle.Pickler):
+        """
+        Pickle the local objects of a data model by value, and refer to the
+        data models (refer to :class:`_AtomUnpickler`).
+        """
+
+        def __init__(self, file):
+            cloudpickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def reducer_override(self, obj):
+            if isinstance(obj, DataModel):
+                return _resolve_shared_object, (('dm', obj.name),)
+            else:
+                return cloudpickle.Pickler.reducer_override(self, obj)
+
+    return _DataModelPickler
+
+
+class _SnapshotTooLarge(Exception):
+    pass
+
+
+class _BoundedBytesIO(io.BytesIO):
+
+    def __init__(self, max_size):
+        io.BytesIO.__init__(self)
+        self.max_size = max_size
+
+    def write(self, data):
+        if self.tell() + len(data) > self.max_size:
+            raise _SnapshotTooLarge
+        return io.BytesIO.write(self, data)
+
+
+class _NullFile(object):
+    def write(self, data):
+        pass
+
+
+_sample_importer = None
+
+def _init_import_worker(importer):
+    global _sample_importer
+    _sample_importer = importer
+
+def _import_sample(args):
+    idx, name = args
+    try:
+        output, atom = _sample_importer.absorb(idx, name)
+        return _sample_importer.dumps(output, atom)
+    except Exception:
+        # the sample will be absorbed again by the main process, which will handle the error
+        return None
+
+
+class SampleImporter(object):
+    """
+    Create the atoms of a data model from the samples of a directory, by absorbing them
+    in worker processes and by keeping the absorbed atoms in an on-disk cache.
+
+    Parallel import is opt-in (``nb_workers`` greater than 1), as the workers are forked from
+    the fuddly process once the data model is built, and forking a process running threads is
+    only safe if the absorber does not rely on them. The workers send back the absorbed atoms in a compressed pickled form, except for the objects of the
+    data model that cannot be pickled which are only referenced (refer to :class:`_SharedObjects`).
+    If an atom cannot be transferred that way, or if the absorption fails in a worker,
+    the sample is absorbed again by the main process.
+
+    The cache is located within the fuddly cache folder. Its entries are keyed by the
+    content, the name and the index of the sample, and by the version of fuddly and of the data model
+    (the source files of the data model and of the node abstraction), so that only new or modified
+    samples are absorbed when the data model is loaded again. The least recently used entries
+    are evicted when the cache of the data model exceeds ``CACHE_MAX_SIZE`` bytes.
+    """
+
+    CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, dm, absorber, nb_workers=1, use_cache=True):
+        """
+        Args:
+            dm (DataModel): data model whose samples are imported
+            absorber (callable): function creating an atom from a sample
+              (refer to :meth:`DataModel.create_atom_from_raw_data`)
+            nb_workers (int): number of worker processes. 1 to absorb the samples within
+              the current process
+            use_cache (bool): use the import cache
+        """
+        self.dm = dm
+        self.absorber = absorber
+        self.nb_workers = max(1, nb_workers)
+        # the cache keys could not distinguish closures
+        self.use_cache = use_cache and '<locals>' not in getattr(absorber, '__qualname__', '<locals>')
+        self.cache_folder = os.path.join(gr.cache_folder, 'imported_data', str(dm))
+        self.path = None
+        self.shared_objects = None
+
+    @staticmethod
+    def is_parallel_import_supported():
+        return 'fork' in multiprocessing.get_all_start_methods()
+
+    def _collect_shared_objects(self):
+        self.shared_objects = _SharedObjects()
+        atoms = list(self.dm._dm_hashtable.values())
+        if self.dm._atoms_for_abs:
+            atoms += [atom for atom, _ in self.dm._atoms_for_abs.values()]
+        for atom in atoms:
+            try:
+                _AtomPickler(_NullFile(), self.shared_objects, register=True).dump(atom)
+            except Exception:
+                # the atoms derived from this one won't be transferable
+                pass
+
+    def _get_cache_path(self, idx, name, data):
+        h = hashlib.sha256(get_data_model_signature(self.dm))
+        h.update(self.absorber.__qualname__.encode())
+        h.update('{:d}:{:s}:'.format(idx, name).encode())
+        h.update(data)
+        return os.path.join(self.cache_folder, h.hexdigest())
+
+    def absorb(self, idx, name, echo=False):
+        with open(os.path.join(self.path, name), 'rb') as f:
+            data = f.read()
+        # the messages of the absorber are kept in order to be displayed again
+        # when the atom is retrieved from the cache
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                atom = self.absorber(data, idx, name)
+        finally:
+            if echo:
+                sys.stdout.write(output.getvalue())
+        return output.getvalue(), atom
+
+    def dumps(self, output, atom):
+        f = io.BytesIO()
+        pickler = _AtomPickler(f, self.shared_objects)
+        pickler.dump((output, atom))
+        return zlib.compress(f.getvalue(), 1), pickler.session_bound
+
+    def loads(self, entry):
+        return _AtomUnpickler(io.BytesIO(zlib.decompress(entry)), self.dm, self.shared_objects).load()
+
+    def _read_cache(self, cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                entry = self.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # invalid entry, e.g., refers to shared objects that do not exist anymore
+            os.remove(cache_path)
+            return None
+        # the modification time of the entries tracks their last use (refer to _evict_cache())
+        try:
+            os.utime(cache_path)
+        except FileNotFoundError:
+            pass
+        return entry
+
+    def _write_cache(self, cache_path, entry):
+        if not os.path.exists(self.cache_folder):
+            os.makedirs(self.cache_folder)
+        tmp_path = cache_path + '.tmp{:d}'.format(os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(entry)
+        os.replace(tmp_path, cache_path)
+
+    def _evict_cache(self):
+        entries = []
+        for entry in os.scandir(self.cache_folder):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if cache_size <= self.CACHE_MAX_SIZE:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            cache_size -= size
+
+    def import_files(self, path, filenames):
+        """
+        Args:
+            path (str): directory of the samples
+            filenames (list): names of the samples to import. Their indexes within this list
+              are provided to the absorber.
+
+        Returns:
+            dict: the atoms created from the samples, by sample names
+        """
+        if not filenames:
+            return {}
+
+        self.path = path
+        self._collect_shared_objects()
+
+        cache_paths = {}
+        cached = {}
+        pending = []
+        for idx, name in enumerate(filenames):
+            if self.use_cache:
+                with open(os.path.join(path, name), 'rb') as f:
+                    cache_paths[idx] = self._get_cache_path(idx, name, f.read())
+                cached[idx] = self._read_cache(cache_paths[idx])
+                if cached[idx] is not None:
+                    continue
+            pending.append((idx, name))
+
+        with contextlib.ExitStack() as stack:
+            if self.nb_workers > 1 and len(pending) > 1 and self.is_parallel_import_supported():
+                ctx = multiprocessing.get_context('fork')
+                pool = stack.enter_context(
+                    ctx.Pool(min(self.nb_workers, len(pending)),
+                             initializer=_init_import_worker, initargs=(self,)))
+                results = pool.imap(_import_sample, pending)
+            else:
+                results = (None for _ in pending)
+
+            atoms = {}
+            for idx, name in enumerate(filenames):
+                if cached.get(idx) is not None:
+                    output, atom = cached[idx]
+                    sys.stdout.write(output)
+                else:
+                    ret = next(results)
+                    if ret is None:
+                        output, atom = self.absorb(idx, name, echo=True)
+                        if self.use_cache:
+                            try:
+                                ret = self.dumps(output, atom)
+                            except Exception:
+                                ret = None
+                    else:
+                        output, atom = self.loads(ret[0])
+                        sys.stdout.write(output)
+                    if self.use_cache and ret is not None and not ret[1]:
+                        self._write_cache(cache_paths[idx], ret[0])
+                if atom is not None:
+                    atoms[name] = atom
+
+        if self.use_cache and os.path.exists(self.cache_folder):
+            self._evict_cache()
+
+        return atoms
+
 #### Data Model Abstraction
 
 class DataModel(object):
@@ -42,6 +464,18 @@ class DataModel(object):
 
     knowledge_source = None
 
+    # Number of worker processes absorbing the samples of the data model. The samples are
+    # absorbed by the fuddly process if 1 (refer to SampleImporter before increasing it)
+    import_workers = 1
+    # Keep the atoms created from the samples, so that only new or modified samples
+    # are absorbed the next time the data model is loaded
+    import_cache = True
+    # Keep a snapshot of the data model once built, so that build_data_model() is only
+    # called again if the data model changes (refer to load_data_model())
+    build_cache = True
+
+    _build_snapshot_excluded_attrs = ('_dm_db', '_built', '_dm_access_lock', '_build_dependencies')
+
     def pre_build(self):
         """
         This method is called when a data model is loaded.
@@ -269,6 +703,7 @@ class DataModel(object):
         self._decoded_data = None
         self._included_data_models = None
         self._dm_access_lock = threading.Lock()
+        self._build_dependencies = None
 
     def _backend(self, atom):
         if isinstance(atom, (Node, dict)):
@@ -310,6 +745,8 @@ class DataModel(object):
             raise ValueError('Requested atom does not exist!')
 
     def get_external_atom(self, dm_name, data_id, name=None):
+        if self._build_dependencies is not None:
+            self._build_dependencies.add(dm_name)
         dm = self._dm_db[dm_name]
         dm.load_data_model(self._dm_db)
         try:
@@ -320,14 +757,112 @@ class DataModel(object):
         return atom
 
     def load_data_model(self, dm_db):
+        """
+        Build the data model and create atoms from the samples, if it is not already done.
+
+        Once built, a snapshot of the data model is kept within the fuddly cache folder
+        (if the ``cloudpickle`` module is available), and restored instead of calling
+        :meth:`build_data_model` the next time the data model is loaded. The snapshot is
+        discarded if the source files of the data model change (refer to
+        :func:`get_data_model_signature`), or if the data models it depends on (through
+        :meth:`get_external_atom`) or their samples change. Note that the data models which
+        are quickly built or whose snapshot is too big are not snapshotted.
+
+        Args:
+            dm_db (dict): the data models by name
+        """
         self.pre_build()
         if not self._built:
             self._dm_db = dm_db
-            self.build_data_model()
+            restored = self._restore_build_snapshot()
+            if not restored:
+                self._build_dependencies = set()
+                start = time.time()
+                try:
+                    self.build_data_model()
+                    build_time = time.time() - start
+                    dependencies = self._build_dependencies
+                finally:
+                    self._build_dependencies = None
+                if restored is not None and build_time >= BUILD_SNAPSHOT_MIN_TIME:
+                    self._save_build_snapshot(dependencies)
             raw_data = self.import_file_contents(extension=self.file_extension)
             self.register(*raw_data.values())
             self._built = True
 
+    def _get_build_snapshot_path(self):
+        return os.path.join(gr.cache_folder, 'data_models', str(self))
+
+    def _get_build_digest(self):
+        # identify what a data model depending on this one could have retrieved from it
+        h = hashlib.sha256(get_data_model_signature(self))
+        for entry in sorted(os.scandir(self.get_import_directory_path()), key=lambda e: e.name):
+            if entry.is_file():
+                st = entry.stat()
+                h.update('{:s}:{:d}:{:d};'.format(entry.name, st.st_size, st.st_mtime_ns).encode())
+        return h.digest()
+
+    def _save_build_snapshot(self, dependencies):
+        deps = {name: self._dm_db[name]._get_build_digest() for name in dependencies}
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in self._build_snapshot_excluded_attrs}
+        f = _BoundedBytesIO(BUILD_SNAPSHOT_MAX_SIZE)
+        try:
+            _get_data_model_pickler_class()(f).dump(state)
+            payload = zlib.compress(f.getvalue(), 1)
+        except Exception:
+            # too big or not picklable, only remember it to not try again
+            payload = None
+
+        path = self._get_build_snapshot_path()
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        tmp_path = path + '.tmp{:d}'.format(os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((get_data_model_signature(self), deps, payload), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _restore_build_snapshot(self):
+        """
+        Returns:
+            bool: ``True`` if the data model has been restored from its snapshot, ``False``
+            if it has to be built, and ``None`` if it has to be built but cannot be snapshotted
+        """
+        if not self.build_cache or not cloudpickle_module:
+            return None
+
+        path = self._get_build_snapshot_path()
+        try:
+            with open(path, 'rb') as f:
+                signature, deps, payload = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception:
+            os.remove(path)
+            return False
+
+        if signature != get_data_model_signature(self):
+            return False
+        for name, digest in deps.items():
+            dm = self._dm_db.get(name)
+            if dm is None:
+                return False
+            dm.load_data_model(self._dm_db)
+            if dm._get_build_digest() != digest:
+                return False
+        if payload is None:
+            return None
+
+        try:
+            state = _AtomUnpickler(io.BytesIO(zlib.decompress(payload)), self, None).load()
+        except Exception:
+            os.remove(path)
+            return False
+
+        self.__dict__.update(state)
+        return True
+
     def merge_with(self, data_model):
         if self._included_data_models is None:
             self._included_data_models = {}
@@ -357,7 +892,29 @@ class DataModel(object):
             idx += 1
 
     def import_file_contents(self, extension=None, absorber=None,
-                             subdir=None, path=None, filename=None):
+                             subdir=None, path=None, filename=None,
+                             nb_workers=None, use_cache=None):
+        """
+        Create atoms from the files of a directory (by default ``imported_data/<data_model_name>``).
+
+        The files can be absorbed by worker processes and the resulting atoms are cached on disk
+        (refer to :class:`SampleImporter`).
+
+        Args:
+            extension (str): extension of the files to import. The data model
+              file extension is used if ``None``.
+            absorber (callable): function creating an atom from a file content.
+              :meth:`create_atom_from_raw_data` is used if ``None``.
+            subdir (str): sub-directory of ``imported_data`` to import files from.
+            path (str): directory to import files from, prevails over ``subdir``.
+            filename (str): if provided, only this file is imported.
+            nb_workers (int): number of worker processes. :attr:`import_workers` is used
+              if ``None``.
+            use_cache (bool): use the import cache. :attr:`import_cache` is used if ``None``.
+
+        Returns:
+            dict: the created atoms, by file names
+        """
 
         if absorber is None:
             absorber = self.create_atom_from_raw_data
@@ -383,16 +940,14 @@ class DataModel(object):
             files = list(filter(is_good_file_by_ext, files))
         else:
             files = list(filter(is_good_file_by_fname, files))
-        msgs = {}
 
-        for idx, name in enumerate(files):
-            with open(os.path.join(path, name), 'rb') as f:
-                buff = f.read()
-                d_abs = absorber(buff, idx, name)
-                if d_abs is not None:
-                    msgs[name] = d_abs
+        if nb_workers is None:
+            nb_workers = self.import_workers
+        if use_cache is None:
+            use_cache = self.import_cache
 
-        return msgs
+        importer = SampleImporter(self, absorber, nb_workers=nb_workers, use_cache=use_cache)
+        return importer.import_files(path, files)
 
     def get_import_directory_path(self, subdir=None):
         if subdir is None:
@@ -0,0 +1,173 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import multiprocessing
+import queue
+import random
+import traceback
+import warnings
+
+from fuddly.framework.data import Data
+from fuddly.framework.global_resources import Error
+
+
+class _DetachedLogger(object):
+    """
+    Stand-in for the framework Logger within the producer processes. The Logger of the
+    main process owns the log files and its handler thread is not inherited, so everything
+    is dropped here. Errors are forwarded to the main process alongside the test cases.
+    """
+
+    display_on_term = False
+
+    def __bool__(self):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def _produce_test_cases(fmk, data_desc_list, worker_idx, nb_workers, seed, out_queue):
+    fmk.lg = _DetachedLogger()
+    fmk.fmkDB.detach()
+
+    case_idx = worker_idx
+    while True:
+        random.seed(seed + case_idx)
+        data_list = []
+        try:
+            for d_desc in data_desc_list:
+                data = fmk.handle_data_desc(d_desc, resolve_dataprocess=True)
+                if data is None:
+                    data = Data()
+                    data.make_unusable()
+                else:
+                    # only the serialized bytes and the data maker steps are sent back
+                    data.update_from(data.to_bytes())
+                    data.cleanup_all_callbacks()
+                data_list.append(data)
+            errors = fmk.get_error()
+        except Exception:
+            out_queue.put((None, [Error("The data producer #{:d} has crashed!\n{:s}"
+                                        .format(worker_idx, traceback.format_exc()),
+                                        code=Error.UserCodeError)]))
+            return
+
+        out_queue.put((data_list, errors))
+        case_idx += nb_workers
+
+
+class DataProducer(object):
+    """
+    Pre-generate test cases in worker processes, from the data maker chains described
+    by a list of :class:`framework.data.DataProcess`.
+
+    The workers are forked from the framework process, thus they share the loaded
+    data model and data makers in the state they are when :meth:`start` is called.
+    Each test case is built with its own random seed (``seed`` + case number), and the
+    workers build the test cases in a round-robin fashion. Test cases are then retrieved
+    in order through :meth:`get_next`, each one being a list of raw :class:`framework.data.Data`
+    (one per data process) that keep the history and the information of the data makers.
+
+    Note:
+        If the data maker chains are not stateless, only one worker shall be used, which
+        still enables to build the next test cases while the current one is sent.
+        The state of the data makers of the framework process is not affected.
+    """
+
+    def __init__(self, fmk, data_desc_list, nb_workers=1, lookahead=4, seed=None):
+        """
+        Args:
+            fmk (FmkPlumbing): the framework
+            data_desc_list (list): list of :class:`framework.data.DataProcess`
+            nb_workers (int): number of worker processes
+            lookahead (int): maximum number of test cases built in advance by each worker
+            seed (int): base seed of the test cases. Randomly chosen if ``None``
+        """
+        self._fmk = fmk
+        self._data_desc_list = data_desc_list
+        self.nb_workers = max(1, nb_workers)
+        self.lookahead = max(1, lookahead)
+        self.seed = random.getrandbits(32) if seed is None else seed
+
+        self._workers = []
+        self._queues = []
+        self._case_idx = 0
+
+    @staticmethod
+    def is_supported():
+        return 'fork' in multiprocessing.get_all_start_methods()
+
+    def start(self):
+        ctx = multiprocessing.get_context('fork')
+        self._case_idx = 0
+        with warnings.catch_warnings():
+            # The workers neither rely on the framework threads nor on their locks
+            # (the Logger and the FmkDB are detached from them).
+            warnings.simplefilter('ignore', DeprecationWarning)
+            for idx in range(self.nb_workers):
+                q = ctx.Queue(maxsize=self.lookahead)
+                w = ctx.Process(target=_produce_test_cases, name='data_producer_{:d}'.format(idx),
+                                args=(self._fmk, self._data_desc_list, idx, self.nb_workers,
+                                      self.seed, q),
+                                daemon=True)
+                w.start()
+                self._queues.append(q)
+                self._workers.append(w)
+
+    def stop(self):
+        for w in self._workers:
+            if w.is_alive():
+                w.terminate()
+        for w in self._workers:
+            w.join()
+        for q in self._queues:
+            q.cancel_join_thread()
+            q.close()
+        self._workers = []
+        self._queues = []
+
+    def get_next(self):
+        """
+        Returns:
+            tuple: the data list of the next test case and the list of the errors
+            raised while building it. The data list is ``None`` if the responsible worker
+            is not running anymore.
+        """
+        idx = self._case_idx % self.nb_workers
+        q = self._queues[idx]
+        w = self._workers[idx]
+        while True:
+            try:
+                ret = q.get(timeout=0.1)
+            except queue.Empty:
+                if not w.is_alive() and q.empty():
+                    return None, [Error("The data producer #{:d} is not running anymore!".format(idx),
+                                        code=Error.FmkError)]
+            else:
+                break
+
+        data_list, errors = ret
+        if data_list is not None:
+            self._case_idx += 1
+        return data_list, errors
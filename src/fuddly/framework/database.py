@@ -27,6 +27,17 @@ import re
 import math
 import threading
 import copy
+import contextlib
+import functools
+import collections
+import io
+import json
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.request import pathname2url
 from datetime import datetime, date, timedelta
 from typing import Optional
 
@@ -70,19 +81,22 @@ def register_adapters_and_converters():
 register_adapters_and_converters()
 
 
+@functools.lru_cache(maxsize=64)
+def _compile_regexp(expr):
+    return re.compile(expr)
+
 def regexp(expr, item):
-    reg = re.compile(expr)
     if item is None:
         return False
-    robj = reg.search(item)
+    robj = _compile_regexp(expr).search(item)
     return robj is not None
 
 def regexp_bin(expr, item):
-    expr = bytes(expr)
-    reg = re.compile(expr)
     if item is None:
         return False
-    robj = reg.search(item)
+    if isinstance(item, str):
+        item = item.encode(gr.internal_repr_codec)
+    robj = _compile_regexp(bytes(expr)).search(item)
     return robj is not None
 
 
@@ -154,6 +168,32 @@ class Database(object):
 
     DDL_fname = 'fmk_db.sql'
 
+    SCHEMA_VERSION = 2
+
+    # Statements upgrading the schema of a fmkDB to a version from the previous one. The
+    # schema version is stored within the fmkDB (PRAGMA user_version) and the upgrades are
+    # applied when the fmkDB is opened. Note that STEPS.DATA_ID does not need an index, as
+    # it is the first column of the primary key of STEPS.
+    SCHEMA_UPGRADES = {
+        1: [
+            "CREATE INDEX IF NOT EXISTS DATA_PRJ_NAME_IDX ON DATA (PRJ_NAME, TARGET);",
+            "CREATE INDEX IF NOT EXISTS DATA_SENT_DATE_IDX ON DATA (SENT_DATE);",
+            "CREATE INDEX IF NOT EXISTS STEPS_DATA_ID_SRC_IDX ON STEPS (DATA_ID_SRC);",
+            "CREATE INDEX IF NOT EXISTS FEEDBACK_DATA_ID_IDX ON FEEDBACK (DATA_ID);",
+            "CREATE INDEX IF NOT EXISTS FEEDBACK_SOURCE_IDX ON FEEDBACK (SOURCE);",
+            "CREATE INDEX IF NOT EXISTS FEEDBACK_STATUS_IDX ON FEEDBACK (STATUS, DATA_ID);",
+            "CREATE INDEX IF NOT EXISTS COMMENTS_DATA_ID_IDX ON COMMENTS (DATA_ID);",
+            "CREATE INDEX IF NOT EXISTS FMKINFO_DATA_ID_IDX ON FMKINFO (DATA_ID);",
+            "CREATE INDEX IF NOT EXISTS ANALYSIS_DATA_ID_IDX ON ANALYSIS (DATA_ID, DATE);",
+            "CREATE INDEX IF NOT EXISTS ASYNC_DATA_CURRENT_DATA_ID_IDX ON ASYNC_DATA (CURRENT_DATA_ID);",
+        ],
+        2: [
+            "CREATE TABLE IF NOT EXISTS PERF (ID INTEGER PRIMARY KEY ASC AUTOINCREMENT, DATE TIMESTAMP, "
+            "PRJ_NAME TEXT REFERENCES PROJECT (NAME), STAGE TEXT, REF TEXT, COUNT INTEGER, TOTAL REAL, "
+            "MIN REAL, MAX REAL, P50 REAL, P99 REAL);",
+        ],
+    }
+
     DEFAULT_DB_NAME = 'fmkDB.db'
     DEFAULT_DM_NAME = '__DEFAULT_DATAMODEL'
     DEFAULT_GTYPE_NAME = '__DEFAULT_GTYPE'
@@ -163,20 +203,33 @@ class Database(object):
     OUTCOME_DATA = 2
 
     FEEDBACK_TRAIL_TIME_WINDOW = 10 # seconds
+    DB_EXPORT_TIMEOUT = 30 # seconds to wait for the FmkDB to be unlocked
+    EXPORT_MANIFEST_NAME = 'manifest.json'
 
-    def __init__(self, fmkdb_path=None):
+    def __init__(self, fmkdb_path=None, read_only=False):
+        """
+        Args:
+            fmkdb_path (str): path of the fmkDB. The default fmkDB is used if ``None``
+            read_only (bool): if ``True``, the fmkDB is opened in read-only mode, thus its
+              journal mode and its schema are left as is. A fmkDB that cannot be written
+              is also opened in this mode.
+        """
 
         self.name = Database.DEFAULT_DB_NAME
         if fmkdb_path is None:
             self.fmk_db_path = os.path.join(gr.fuddly_data_folder, self.name)
         else:
             self.fmk_db_path = os.path.expanduser(fmkdb_path)
+        self.read_only = read_only
 
         self._ref_names = {}
 
         self.config = None
         self.enabled = False
 
+        # ExecutionProfiler measuring the execution of the SQL statement batches (if any)
+        self.perf = None
+
         self.fbk_timeout_re = re.compile('.*feedback timeout = (.*)s$')
 
         # self.current_project = None
@@ -195,10 +248,6 @@ class Database(object):
         # self._thread_initialized = threading.Event()
         # self._sql_stmt_submitted_cond = threading.Condition()
         # self._sql_stmt_list = []
-        # self._sql_stmt_handled = threading.Event()
-        #
-        # self._sql_stmt_outcome_lock = threading.Lock()
-        # self._sql_stmt_outcome = None
         #
         # self._sync_lock = threading.Lock()
 
@@ -210,6 +259,10 @@ class Database(object):
     def _is_valid(self, connection, cursor):
         valid = False
         with connection:
+            cursor.execute("select name from sqlite_master WHERE type='table'")
+            existing_tables = [x[0] for x in cursor.fetchall()]
+            cursor.execute("PRAGMA user_version;")
+            version = cursor.fetchone()[0]
             tmp_con = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES)
             with open(gr.fmk_folder + self.DDL_fname) as fd:
                 fmk_db_sql = fd.read()
@@ -222,6 +275,9 @@ class Database(object):
                 for t in tables:
                     cur.execute('select * from {!s}'.format(t))
                     self._ref_names[t] = list(map(lambda x: x[0], cur.description))
+                    if t not in existing_tables and version < self.SCHEMA_VERSION:
+                        # the table will be created by the schema upgrade
+                        continue
                     cursor.execute('select * from {!s}'.format(t))
                     names = list(map(lambda x: x[0], cursor.description))
                     if self._ref_names[t] != names:
@@ -235,9 +291,47 @@ class Database(object):
     def column_names_from(self, table):
         return self._ref_names[table]
 
+    def _upgrade_schema(self, connection, cursor, new_db=False):
+        cursor.execute("PRAGMA user_version;")
+        version = cursor.fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+
+        if not new_db:
+            print("*** Upgrading the FmkDB schema from version {:d} to {:d} (it may take a while "
+                  "for large databases) ***".format(version, self.SCHEMA_VERSION))
+        with connection:
+            for v in range(version + 1, self.SCHEMA_VERSION + 1):
+                for stmt in self.SCHEMA_UPGRADES[v]:
+                    cursor.execute(stmt)
+            cursor.execute("PRAGMA user_version = {:d};".format(self.SCHEMA_VERSION))
+
+    def _is_writable(self):
+        # WAL mode also needs to create files next to the fmkDB
+        return os.access(self.fmk_db_path, os.W_OK) \
+            and os.access(os.path.dirname(os.path.abspath(self.fmk_db_path)), os.W_OK)
+
     def _sql_handler(self):
-        if os.path.isfile(self.fmk_db_path):
-            connection = sqlite3.connect(self.fmk_db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        new_db = not os.path.isfile(self.fmk_db_path)
+        read_only = self.read_only
+        if not new_db and not read_only and not self._is_writable():
+            print("\n*** WARNING: the FmkDB '{:s}' cannot be written, it is opened in read-only "
+                  "mode".format(self.fmk_db_path))
+            read_only = True
+
+        if new_db and read_only:
+            print("\n*** ERROR: the FmkDB '{:s}' does not exist".format(self.fmk_db_path))
+            self._ok = False
+            self._thread_initialized.set()
+            return
+        elif not new_db:
+            if read_only:
+                db_uri = 'file:{:s}?mode=ro'.format(pathname2url(self.fmk_db_path))
+                connection = sqlite3.connect(db_uri, uri=True,
+                                             detect_types=sqlite3.PARSE_DECLTYPES)
+            else:
+                connection = sqlite3.connect(self.fmk_db_path,
+                                             detect_types=sqlite3.PARSE_DECLTYPES)
             cursor = connection.cursor()
             self._ok = self._is_valid(connection, cursor)
         else:
@@ -249,6 +343,27 @@ class Database(object):
                 cursor.executescript(fmk_db_sql)
                 self._ok = True
 
+        try:
+            journal_mode = self.config.sql.journal_mode
+            synchronous = self.config.sql.synchronous
+            max_batch_size = max(1, int(self.config.sql.batch.max_stmts))
+        except (AttributeError, TypeError, ValueError):
+            # configuration file created by a previous fuddly version
+            journal_mode, synchronous, max_batch_size = 'WAL', 'NORMAL', 1000
+
+        # the fmkDB is only configured and upgraded when opened for writing
+        if self._ok and not read_only:
+            try:
+                cursor.execute("PRAGMA journal_mode = {!s};".format(journal_mode))
+                cursor.execute("PRAGMA synchronous = {!s};".format(synchronous))
+            except sqlite3.Error as e:
+                print("\n*** ERROR[SQL:{:s}] while configuring the FmkDB".format(e.args[0]))
+
+            try:
+                self._upgrade_schema(connection, cursor, new_db=new_db)
+            except sqlite3.Error as e:
+                print("\n*** ERROR[SQL:{:s}] while upgrading the FmkDB schema".format(e.args[0]))
+
         self._thread_initialized.set()
 
         if not self._ok:
@@ -260,66 +375,114 @@ class Database(object):
         while True:
 
             with self._sql_stmt_submitted_cond:
-                if self._sql_handler_stop_event.is_set() and not self._sql_stmt_list:
+                while not self._sql_stmt_list and not self._sql_handler_stop_event.is_set():
+                    self._sql_stmt_submitted_cond.wait()
+
+                if not self._sql_stmt_list:
                     break
-                self._sql_stmt_submitted_cond.wait(0.001)
 
-                if self._sql_stmt_list:
-                    sql_stmts = self._sql_stmt_list
-                    self._sql_stmt_list = []
-                else:
-                    continue
-
-            last_stmt_error = True
-            for stmt in sql_stmts:
-                sql_stmt, sql_params, outcome_type, sql_error = stmt
-                try:
-                    if sql_params is None:
-                        cursor.execute(sql_stmt)
-                    else:
-                        cursor.execute(sql_stmt, sql_params)
-                    connection.commit()
-                except sqlite3.Error as e:
-                    connection.rollback()
-                    print("\n*** ERROR[SQL:{:s}] ".format(e.args[0])+sql_error)
-                    last_stmt_error = True
-                else:
-                    last_stmt_error = False
-
-            if outcome_type is not None:
-                with self._sql_stmt_outcome_lock:
-                    if self._sql_stmt_outcome is not None:
-                        print("\n*** WARNING: SQL statement outcomes have not been consumed."
-                              "\n    Will be overwritten!")
-
-                    if last_stmt_error:
-                        self._sql_stmt_outcome = None
-                    elif outcome_type == Database.OUTCOME_ROWID:
-                        self._sql_stmt_outcome = cursor.lastrowid
-                    elif outcome_type == Database.OUTCOME_DATA:
-                        self._sql_stmt_outcome = cursor.fetchall()
-                    else:
-                        print("\n*** ERROR: Unrecognized outcome type request")
-                        self._sql_stmt_outcome = None
+                sql_stmts = self._sql_stmt_list[:max_batch_size]
+                del self._sql_stmt_list[:max_batch_size]
 
-                self._sql_stmt_handled.set()
+            # All the statements of a batch are executed within the same transaction, and the
+            # futures are only resolved once it is committed.
+            perf_measure = self.perf.measure('fmkdb_batch') if self.perf is not None \
+                else contextlib.nullcontext()
+            with perf_measure:
+                outcomes = self._execute_sql_batch(connection, cursor, sql_stmts)
 
-            self._sql_handler_stop_event.wait(0.001)
+            for future, outcome in outcomes:
+                future.set_result(outcome)
 
         if connection:
             connection.close()
 
+    def _execute_sql_batch(self, connection, cursor, sql_stmts):
+        outcomes = []
+        for sql_stmt, sql_params, outcome_type, sql_error, future in sql_stmts:
+            if sql_stmt is None:
+                # only used by Database.sync()
+                outcomes.append((future, None))
+                continue
+            try:
+                if connection.in_transaction and not self._is_transactional_stmt(sql_stmt):
+                    # some statements cannot be executed within a transaction (e.g., VACUUM)
+                    connection.commit()
+                if sql_params is None:
+                    cursor.execute(sql_stmt)
+                else:
+                    cursor.execute(sql_stmt, sql_params)
+                if outcome_type is None:
+                    outcome = None
+                elif outcome_type == Database.OUTCOME_ROWID:
+                    outcome = cursor.lastrowid
+                elif outcome_type == Database.OUTCOME_DATA:
+                    # rows are computed while being fetched, thus errors may be raised here
+                    outcome = cursor.fetchall()
+                else:
+                    print("\n*** ERROR: Unrecognized outcome type request")
+                    outcome = None
+            except sqlite3.Error as e:
+                # only the changes of the failing statement are discarded
+                print("\n*** ERROR[SQL:{:s}] ".format(e.args[0])+sql_error)
+                outcome = None
+
+            if future is not None:
+                outcomes.append((future, outcome))
+
+        try:
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            print("\n*** ERROR[SQL:{:s}] while committing a transaction to the FmkDB"
+                  .format(e.args[0]))
+            outcomes = [(future, None) for future, _ in outcomes]
+
+        return outcomes
+
+    @staticmethod
+    def _is_transactional_stmt(stmt):
+        return stmt.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE', 'REPLAC', 'SELECT')
+
     def _stop_sql_handler(self):
         with self._sync_lock:
-            self._sql_handler_stop_event.set()
+            with self._sql_stmt_submitted_cond:
+                self._sql_handler_stop_event.set()
+                self._sql_stmt_submitted_cond.notify()
             self._sql_handler_thread.join()
 
+    def submit_sql_stmt_async(self, stmt, params=None, outcome_type: Optional[int] = None,
+                              error_msg='') -> Optional[Future]:
+        """
+        This method is the only one that should submit request to the threaded SQL handler.
+        The statements are executed in their submission order and committed by batches.
+
+        Args:
+            stmt (str): SQL statement
+            params (tuple): parameters
+            outcome_type (int): type of the expected outcomes. If `None`, no outcomes are expected
+            error_msg (str): specific error message to display in case of an error
+
+        Returns:
+            `None` if no outcomes are expected, otherwise a :class:`concurrent.futures.Future`
+            whose result will be the outcomes (or `None` if the statement has failed) once the
+            statement is committed
+        """
+        future = None if outcome_type is None else Future()
+        with self._sql_stmt_submitted_cond:
+            if self._sql_handler_stop_event.is_set():
+                if future is not None:
+                    future.set_result(None)
+                return future
+            self._sql_stmt_list.append((stmt, params, outcome_type, error_msg, future))
+            self._sql_stmt_submitted_cond.notify()
+
+        return future
 
     def submit_sql_stmt(self, stmt, params=None, outcome_type: Optional[int] = None, error_msg=''):
         """
-        This method is the only one that should submit request to the threaded SQL handler.
-        It is also synchronized to guarantee request order (especially needed when you wait for
-        the outcomes of your submitted SQL statement).
+        Submit an SQL statement to the threaded SQL handler (refer to
+        :meth:`Database.submit_sql_stmt_async`) and wait for its outcomes if some are expected.
 
         Args:
             stmt (str): SQL statement
@@ -330,23 +493,31 @@ class Database(object):
         Returns:
             `None` or the expected outcomes
         """
-        with self._sync_lock:
+        future = self.submit_sql_stmt_async(stmt, params=params, outcome_type=outcome_type,
+                                            error_msg=error_msg)
+        return None if future is None else future.result()
 
-            with self._sql_stmt_submitted_cond:
-                self._sql_stmt_list.append((stmt, params, outcome_type, error_msg))
-                self._sql_stmt_submitted_cond.notify()
-
-            if outcome_type is not None:
-                # If we care about outcomes, then we are sure to get outcomes from the just
-                # submitted SQL statement as this method is 'synchronized'.
-                while not self._sql_stmt_handled.is_set():
-                    self._sql_stmt_handled.wait(0.001)
-                self._sql_stmt_handled.clear()
+    def detach(self):
+        """
+        To be called within a forked process, as the SQL handler thread is not inherited.
+        The FmkDB is then disabled and the SQL statements submitted afterwards are ignored.
+        """
+        self._sql_stmt_submitted_cond = threading.Condition()
+        self._sql_stmt_list = []
+        self._sql_handler_stop_event.set()
+        self.enabled = False
 
-                with self._sql_stmt_outcome_lock:
-                    ret = self._sql_stmt_outcome
-                    self._sql_stmt_outcome = None
-                    return ret
+    def sync(self):
+        """
+        Wait until all the SQL statements submitted so far are committed to the FmkDB.
+        """
+        future = Future()
+        with self._sql_stmt_submitted_cond:
+            if self._sql_handler_stop_event.is_set():
+                return
+            self._sql_stmt_list.append((None, None, None, None, future))
+            self._sql_stmt_submitted_cond.notify()
+        future.result()
 
     def start(self):
         self.current_project = None
@@ -364,9 +535,6 @@ class Database(object):
         self._thread_initialized = threading.Event()
         self._sql_stmt_submitted_cond = threading.Condition()
         self._sql_stmt_list = []
-        self._sql_stmt_handled = threading.Event()
-        self._sql_stmt_outcome_lock = threading.Lock()
-        self._sql_stmt_outcome = None
 
         self._sync_lock = threading.Lock()
 
@@ -412,6 +580,42 @@ class Database(object):
     def execute_sql_statement(self, sql_stmt, params=None):
         return self.submit_sql_stmt(sql_stmt, params=params, outcome_type=Database.OUTCOME_DATA)
 
+    def iter_sql_statement(self, sql_stmt, params=None, chunk_size=1000):
+        """
+        Iterate over the records of a SELECT statement without loading the whole result set
+        in memory. Contrary to :meth:`Database.execute_sql_statement`, the statement is not
+        executed by the SQL handler thread, but through a dedicated read-only connection whose
+        cursor is consumed by chunks of `chunk_size` records. The statements submitted
+        before the call are committed first.
+
+        Args:
+            sql_stmt (str): SQL statement
+            params (tuple): parameters
+            chunk_size (int): maximum number of records fetched at once
+
+        Returns:
+            a generator of records
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size should be strictly positive')
+
+        self.sync()
+        db_uri = 'file:{:s}?mode=ro'.format(pathname2url(self.fmk_db_path))
+        connection = sqlite3.connect(db_uri, uri=True, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     timeout=self.DB_EXPORT_TIMEOUT, check_same_thread=False)
+        try:
+            connection.create_function("REGEXP", 2, regexp)
+            connection.create_function("BINREGEXP", 2, regexp_bin)
+            cursor = connection.cursor()
+            cursor.execute(sql_stmt, () if params is None else params)
+            while True:
+                records = cursor.fetchmany(chunk_size)
+                if not records:
+                    break
+                yield from records
+        finally:
+            connection.close()
+
 
     def insert_data_model(self, dm_name):
         stmt = "INSERT INTO DATAMODEL(NAME) VALUES(?)"
@@ -610,7 +814,27 @@ class Database(object):
         err_msg = 'while inserting a value into table ANALYSIS!'
         self.submit_sql_stmt(stmt, params=params, error_msg=err_msg)
 
-    def fetch_data(self, start_id=1, end_id=-1):
+    def insert_perf_stats(self, date, prj_name, stage, ref, stats):
+        """
+        Args:
+            date (datetime.datetime): date of the export
+            prj_name (str): name of the current project
+            stage (str): name of the stage of the test case pipeline
+            ref (str): reference of the element the statistics relate to (e.g., a data maker or
+              a target), or None for the statistics of the whole stage
+            stats (dict): statistics as provided by :meth:`framework.profiler.StageStats.to_dict`
+        """
+        if not self.enabled:
+            return None
+
+        stmt = "INSERT INTO PERF(DATE,PRJ_NAME,STAGE,REF,COUNT,TOTAL,MIN,MAX,P50,P99)"\
+               " VALUES(?,?,?,?,?,?,?,?,?,?)"
+        params = (date, prj_name, stage, ref, stats['count'], stats['total'], stats['min'],
+                  stats['max'], stats['p50'], stats['p99'])
+        err_msg = 'while inserting a value into table PERF!'
+        self.submit_sql_stmt(stmt, params=params, error_msg=err_msg)
+
+    def _get_fetch_data_stmt(self, start_id, end_id):
         ign_end_id = '--' if end_id < 1 else ''
 
         stmt = \
@@ -627,9 +851,21 @@ class Database(object):
             WHERE DATA.ID >= {sid:d} {ign_eid:s} AND DATA.ID <= {eid:d}
             '''.format(sid = start_id, eid = end_id, ign_eid = ign_end_id)
 
+        return stmt
+
+    def fetch_data(self, start_id=1, end_id=-1):
+        stmt = self._get_fetch_data_stmt(start_id, end_id)
         ret = self.submit_sql_stmt(stmt, outcome_type=Database.OUTCOME_DATA)
         return ret
 
+    def iter_data(self, start_id=1, end_id=-1, chunk_size=1000):
+        """
+        Same as :meth:`Database.fetch_data` but the records are streamed
+        (refer to :meth:`Database.iter_sql_statement`).
+        """
+        stmt = self._get_fetch_data_stmt(start_id, end_id)
+        return self.iter_sql_statement(stmt, chunk_size=chunk_size)
+
 
     def _get_color_function(self, colorized):
         if not colorized:
@@ -1121,27 +1357,91 @@ class Database(object):
         print(title + content)
 
 
-    def export_data(self, first, last=None, colorized=True):
-        colorize = self._get_color_function(colorized)
+    _TAR_MODES = (('.tar', 'w'), ('.tar.gz', 'w:gz'), ('.tgz', 'w:gz'),
+                  ('.tar.bz2', 'w:bz2'), ('.tar.xz', 'w:xz'))
 
-        if last is not None:
-            records = self.execute_sql_statement(
-                "SELECT ID, TYPE, DM_NAME, SENT_DATE, CONTENT FROM DATA "
-                "WHERE {start:d} <= ID and ID <= {end:d};".format(start=first,
-                                                                  end=last)
-            )
+    @staticmethod
+    def _open_export_archive(archive):
+        """
+        Returns:
+            the opened archive and a function adding a member from its name, a file object
+            providing its content, and its size
+        """
+        if archive.lower().endswith('.zip'):
+            arc = zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED)
+            def add_member(name, fileobj, size):
+                with arc.open(name, 'w') as member:
+                    shutil.copyfileobj(fileobj, member)
+            return arc, add_member
+
+        for ext, mode in Database._TAR_MODES:
+            if archive.lower().endswith(ext):
+                break
         else:
-            records = self.execute_sql_statement(
-                "SELECT ID, TYPE, DM_NAME, SENT_DATE, CONTENT FROM DATA "
-                "WHERE ID == {data_id:d};".format(data_id=first)
-            )
+            raise ValueError('unsupported archive format: {!s}'.format(archive))
 
-        if records:
-            base_dir = gr.exported_data_folder
-            prev_export_date = None
-            export_cpt = 0
-            data_id = first
+        arc = tarfile.open(archive, mode)
+        def add_member(name, fileobj, size):
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = int(datetime.now().timestamp())
+            arc.addfile(info, fileobj)
+        return arc, add_member
+
+    @staticmethod
+    def _write_exported_file(path, content):
+        with open(path, 'wb') as fd:
+            fd.write(content)
+
+    def export_data(self, first, last=None, colorized=True, archive=None, nb_writers=1,
+                    chunk_size=1000):
+        """
+        Export data from the FmkDB. The records are streamed (refer to
+        :meth:`Database.iter_sql_statement`), thus the memory footprint does not depend on the
+        number of exported data.
 
+        Args:
+            first (int): ID of the first data to export
+            last (int): ID of the last data to export. If `None`, only the data `first` is exported
+            colorized (bool): colorize the output
+            archive (str): if provided, data are exported within this archive instead of the
+              ``exported_data`` folder. The format is deduced from the extension (``.zip``,
+              ``.tar``, ``.tar.gz``, ``.tgz``, ``.tar.bz2``, ``.tar.xz``). The archive also
+              contains a JSON manifest describing each exported data.
+            nb_writers (int): number of threads writing the exported files (ignored for archives)
+            chunk_size (int): maximum number of records fetched at once from the FmkDB
+
+        Returns:
+            int: the number of exported data
+        """
+        colorize = self._get_color_function(colorized)
+
+        if nb_writers < 1:
+            raise ValueError('nb_writers should be strictly positive')
+        if archive is not None and \
+                not archive.lower().endswith(('.zip',) + tuple(ext for ext, _ in self._TAR_MODES)):
+            raise ValueError('unsupported archive format: {!s}'.format(archive))
+
+        records = self.iter_sql_statement(
+            "SELECT ID, TYPE, DM_NAME, SENT_DATE, CONTENT FROM DATA "
+            "WHERE ? <= ID AND ID <= ? ORDER BY ID;",
+            params=(first, first if last is None else last),
+            chunk_size=chunk_size
+        )
+
+        base_dir = gr.exported_data_folder
+        prev_export_date = None
+        export_cpt = 0
+        nb_exported = 0
+
+        arc = add_member = manifest = None
+        created_dirs = set()
+        writers = pending_writes = None
+        if archive is None and nb_writers > 1:
+            writers = ThreadPoolExecutor(max_workers=nb_writers)
+            pending_writes = collections.deque()
+
+        try:
             for rec in records:
                 data_id, data_type, dm_name, sent_date, content = rec
 
@@ -1165,20 +1465,62 @@ class Database(object):
                     typ=data_type,
                     did=data_id)
 
-                export_full_fn = os.path.join(base_dir, dm_name, export_fname)
-                gr.ensure_dir(export_full_fn)
+                if archive is not None:
+                    if arc is None:
+                        arc, add_member = self._open_export_archive(archive)
+                        # the manifest is kept on disk until the end of the export
+                        manifest = tempfile.TemporaryFile()
+                        manifest.write(b'[\n')
+                    member_name = dm_name + '/' + export_fname
+                    add_member(member_name, io.BytesIO(content), len(content))
+                    if nb_exported > 0:
+                        manifest.write(b',\n')
+                    entry = {'data_id': data_id, 'type': data_type, 'dm_name': dm_name,
+                             'sent_date': None if sent_date is None else sent_date.isoformat(' '),
+                             'size': len(content), 'path': member_name}
+                    manifest.write(json.dumps(entry).encode())
+                    export_full_fn = '{:s}:{:s}'.format(archive, member_name)
 
-                with open(export_full_fn, 'wb') as fd:
-                    fd.write(content)
+                else:
+                    export_full_fn = os.path.join(base_dir, dm_name, export_fname)
+                    if dm_name not in created_dirs:
+                        gr.ensure_dir(export_full_fn)
+                        created_dirs.add(dm_name)
 
+                    if writers is None:
+                        self._write_exported_file(export_full_fn, content)
+                    else:
+                        # bound the number of data kept in memory for the writers
+                        if len(pending_writes) >= 2 * nb_writers:
+                            pending_writes.popleft().result()
+                        pending_writes.append(
+                            writers.submit(self._write_exported_file, export_full_fn, content))
+
+                nb_exported += 1
                 print(colorize("Data ID #{:d} --> {:s}".format(data_id, export_full_fn),
                                rgb=Color.FMKINFO))
 
-                data_id += 1
-
-        else:
+            if arc is not None:
+                manifest.write(b'\n]\n')
+                manifest_size = manifest.tell()
+                manifest.seek(0)
+                add_member(self.EXPORT_MANIFEST_NAME, manifest, manifest_size)
+
+        finally:
+            if writers is not None:
+                for w in pending_writes:
+                    w.result()
+                writers.shutdown()
+            if manifest is not None:
+                manifest.close()
+            if arc is not None:
+                arc.close()
+
+        if nb_exported == 0:
             print(colorize("*** ERROR: The provided DATA IDs do not exist ***", rgb=Color.ERROR))
 
+        return nb_exported
+
     def remove_data(self, data_id, colorized=True):
         colorize = self._get_color_function(colorized)
 
@@ -1235,6 +1577,24 @@ class Database(object):
 
         return prj_records
 
+    def _get_data_id_format_string(self, prj_name=None):
+        """
+        Returns:
+            tuple: the number of data of the project (or of all the projects) and the format
+            string for displaying the data IDs
+        """
+        if prj_name:
+            nb_data = self.execute_sql_statement(
+                "SELECT COUNT(*) FROM DATA WHERE PRJ_NAME == ?;",
+                params=(prj_name,)
+            )
+        else:
+            nb_data = self.execute_sql_statement("SELECT COUNT(*) FROM DATA;")
+        nb_data = nb_data[0][0] if nb_data else 0
+
+        data_id_pattern = "{:>" + str(int(math.log10(max(1, nb_data))) + 2) + "s}"
+        return nb_data, "     [DataID " + data_id_pattern + "] --> {:s}"
+
     def get_data_with_impact(self, prj_name=None, fbk_src=None, fbk_status_formula='? < 0',
                              display=True, verbose=False,
                              raw_analysis=False,
@@ -1243,90 +1603,86 @@ class Database(object):
         fbk_status_formula =  fbk_status_formula.replace('?', 'STATUS')
         colorize = self._get_color_function(colorized)
 
+        fbk_filter = fbk_status_formula
+        fbk_params = []
         if fbk_src:
-            fbk_records = self.execute_sql_statement(
-                f"SELECT DATA_ID, STATUS, SOURCE FROM FEEDBACK "
-                f"WHERE {fbk_status_formula} and SOURCE REGEXP ?;",
-                params=(fbk_src,)
-            )
-        else:
-            fbk_records = self.execute_sql_statement(
-                f"SELECT DATA_ID, STATUS, SOURCE FROM FEEDBACK "
-                f"WHERE {fbk_status_formula};"
-            )
+            fbk_filter += " AND SOURCE REGEXP ?"
+            fbk_params.append(fbk_src)
 
-
-        analysis_records = self.execute_sql_statement(
-            "SELECT DATA_ID, CONTENT, DATE, IMPACT FROM ANALYSIS "
-            "ORDER BY DATE DESC;"
+        fbk_records = self.execute_sql_statement(
+            f"SELECT 1 FROM FEEDBACK WHERE {fbk_filter} LIMIT 1;",
+            params=fbk_params
         )
-        if analysis_records:
-            data_analyzed = set([x[0] for x in analysis_records])
-        else:
-            data_analyzed = set()
-
-        prj_records = self.get_project_record(prj_name)
+        nb_data, format_string = self._get_data_id_format_string(prj_name)
         data_list = []
 
-        if fbk_records and prj_records:
-            id2fbk = {}
-            for rec in fbk_records:
-                data_id, status, src = rec
-                if data_id not in id2fbk:
-                    id2fbk[data_id] = {}
-                if src not in id2fbk[data_id]:
-                    id2fbk[data_id][src] = []
-                id2fbk[data_id][src].append(status)
+        if fbk_records and nb_data:
+            # Data with impact are the ones with matching feedback or analyzed by the user,
+            # except the ones whose last analysis disproves the impact
+            data_filter = ''
+            data_params = []
+            if prj_name:
+                data_filter += "AND DATA.PRJ_NAME == ? "
+                data_params.append(prj_name)
+            if not raw_analysis:
+                data_filter += "AND IFNULL((SELECT IMPACT FROM ANALYSIS " \
+                               "WHERE ANALYSIS.DATA_ID == DATA.ID " \
+                               "ORDER BY DATE DESC LIMIT 1), 1) != 0 "
 
-            user_src = 'User Analysis'
-            for rec in analysis_records:
-                data_id, content, tstamp, impact = rec
-                if data_id not in id2fbk:
-                    id2fbk[data_id] = {}
-                if user_src not in id2fbk[data_id]:
-                    id2fbk[data_id][user_src] = []
-                id2fbk[data_id][user_src].append(impact)
+            prj_records = self.execute_sql_statement(
+                f"WITH CANDIDATES(ID) AS ("
+                f"SELECT DATA_ID FROM FEEDBACK WHERE {fbk_filter} "
+                f"UNION SELECT DATA_ID FROM ANALYSIS) "
+                f"SELECT DATA.ID, DATA.TARGET, DATA.PRJ_NAME "
+                f"FROM CANDIDATES CROSS JOIN DATA ON DATA.ID == CANDIDATES.ID "
+                f"WHERE 1 {data_filter}"
+                f"ORDER BY DATA.PRJ_NAME ASC, DATA.TARGET ASC, DATA.ID ASC;",
+                params=fbk_params + data_params
+            )
 
-            data_id_pattern = "{:>" + str(int(math.log10(len(prj_records))) + 2) + "s}"
-            format_string = "     [DataID " + data_id_pattern + "] --> {:s}"
+            id2fbk = {}
+            user_src = 'User Analysis'
+            if display and verbose:
+                fbk_details = self.execute_sql_statement(
+                    f"SELECT DATA_ID, STATUS, SOURCE FROM FEEDBACK "
+                    f"WHERE {fbk_filter} ORDER BY ID ASC;",
+                    params=fbk_params
+                )
+                for data_id, status, src in fbk_details:
+                    id2fbk.setdefault(data_id, {}).setdefault(src, []).append(status)
+                analysis_records = self.execute_sql_statement(
+                    "SELECT DATA_ID, IMPACT FROM ANALYSIS "
+                    "ORDER BY DATE DESC;"
+                )
+                for data_id, impact in analysis_records:
+                    id2fbk.setdefault(data_id, {}).setdefault(user_src, []).append(impact)
 
             current_prj = None
             for rec in prj_records:
                 data_id, target, prj = rec
-                if data_id in id2fbk:
-
-                    if not raw_analysis and data_id in data_analyzed:
-                        records = self.execute_sql_statement(
-                            "SELECT IMPACT FROM ANALYSIS "
-                            "WHERE DATA_ID == {data_id:d} "
-                            "ORDER BY DATE DESC;".format(data_id=data_id)
-                        )
-                        if records[0][0] == False:
-                            continue
-
-                    data_list.append(data_id)
-                    if display:
-                        if prj != current_prj:
-                            current_prj = prj
-                            print(
-                                colorize("*** Project '{:s}' ***".format(prj), rgb=Color.FMKINFOGROUP))
-                        print(colorize(format_string.format('#' + str(data_id), target),
-                                       rgb=Color.DATAINFO))
-                        if verbose:
-                            for src, status in id2fbk[data_id].items():
-                                if src == user_src:
-                                    if status[0] == 0:
-                                        status_str = 'User analysis carried out: False Positive'
-                                    else:
-                                        status_str = 'User analysis carried out: Impact Confirmed'
-                                    color = Color.ANALYSIS_FALSEPOSITIVE if status[0] == 0 else Color.ANALYSIS_CONFIRM
-                                    print(colorize("       |_ {:s}".format(status_str),
-                                                   rgb=color))
+                data_list.append(data_id)
+                if display:
+                    if prj != current_prj:
+                        current_prj = prj
+                        print(
+                            colorize("*** Project '{:s}' ***".format(prj), rgb=Color.FMKINFOGROUP))
+                    print(colorize(format_string.format('#' + str(data_id), target),
+                                   rgb=Color.DATAINFO))
+                    if verbose:
+                        for src, status in id2fbk[data_id].items():
+                            if src == user_src:
+                                if status[0] == 0:
+                                    status_str = 'User analysis carried out: False Positive'
                                 else:
-                                    status_str = ''.join([str(s) + ',' for s in status])[:-1]
-                                    print(colorize("       |_ status={:s} from {:s}"
-                                                   .format(status_str, src),
-                                                   rgb=Color.FMKSUBINFO))
+                                    status_str = 'User analysis carried out: Impact Confirmed'
+                                color = Color.ANALYSIS_FALSEPOSITIVE if status[0] == 0 else Color.ANALYSIS_CONFIRM
+                                print(colorize("       |_ {:s}".format(status_str),
+                                               rgb=color))
+                            else:
+                                status_str = ''.join([str(s) + ',' for s in status])[:-1]
+                                print(colorize("       |_ status={:s} from {:s}"
+                                               .format(status_str, src),
+                                               rgb=Color.FMKSUBINFO))
 
         else:
             print(colorize("*** No data has negatively impacted a target ***", rgb=Color.FMKINFO))
@@ -1336,59 +1692,50 @@ class Database(object):
     def get_data_without_fbk(self, prj_name=None, fbk_src=None, display=True, colorized=True):
         colorize = self._get_color_function(colorized)
 
+        fbk_filter = ''
+        fbk_params = []
         if fbk_src:
-            fbk_records = self.execute_sql_statement(
-                "SELECT DATA_ID, STATUS, SOURCE, CONTENT FROM FEEDBACK "
-                "WHERE SOURCE REGEXP ?;",
-                params=(fbk_src,)
-            )
-        else:
-            fbk_records = self.execute_sql_statement(
-                "SELECT DATA_ID, STATUS, SOURCE, CONTENT FROM FEEDBACK;"
-            )
+            fbk_filter = "AND SOURCE REGEXP ? "
+            fbk_params.append(fbk_src)
 
-        prj_records = self.get_project_record(prj_name)
+        fbk_records = self.execute_sql_statement(
+            f"SELECT 1 FROM FEEDBACK WHERE 1 {fbk_filter}LIMIT 1;",
+            params=fbk_params
+        )
+        nb_data, format_string = self._get_data_id_format_string(prj_name)
         data_list = []
 
-        if fbk_records and prj_records:
-            id2fbk = {}
-            for rec in fbk_records:
-                data_id, status, src, content = rec
-                if data_id not in id2fbk:
-                    id2fbk[data_id] = {}
-                if src not in id2fbk[data_id]:
-                    id2fbk[data_id][src] = []
-                id2fbk[data_id][src].append((status, content))
+        if fbk_records and nb_data:
+            # feedback with no content, or whose binary content is only made of whitespaces,
+            # does not count
+            data_filter = ''
+            data_params = []
+            if prj_name:
+                data_filter = "AND DATA.PRJ_NAME == ? "
+                data_params.append(prj_name)
 
-            data_id_pattern = "{:>" + str(int(math.log10(len(prj_records))) + 2) + "s}"
-            format_string = "     [DataID " + data_id_pattern + "] --> {:s}"
+            prj_records = self.execute_sql_statement(
+                f"SELECT ID, TARGET, PRJ_NAME FROM DATA "
+                f"WHERE NOT EXISTS (SELECT 1 FROM FEEDBACK WHERE FEEDBACK.DATA_ID == DATA.ID "
+                f"{fbk_filter}"
+                f"AND CONTENT IS NOT NULL "
+                f"AND NOT (typeof(CONTENT) == 'blob' AND trim(CONTENT, X'200D0A090B0C') == '')) "
+                f"{data_filter}"
+                f"ORDER BY PRJ_NAME ASC, TARGET ASC, ID ASC;",
+                params=fbk_params + data_params
+            )
 
             current_prj = None
             for rec in prj_records:
                 data_id, target, prj = rec
-                to_gather = True
-                if data_id in id2fbk:
-                    current_fbk = id2fbk[data_id]  # the dictionnay is never empty
-                    for src, fbk_list in current_fbk.items():
-                        for fbk in fbk_list:
-                            if fbk[1] is None or \
-                                    (isinstance(fbk[1], bytes) and fbk[1].strip() == b''):
-                                continue
-                            else:
-                                to_gather = False
-                                break
-                        if not to_gather:
-                            break
-
-                if to_gather:
-                    data_list.append(data_id)
-                    if display:
-                        if prj != current_prj:
-                            current_prj = prj
-                            print(
-                                colorize("*** Project '{:s}' ***".format(prj), rgb=Color.FMKINFOGROUP))
-                        print(colorize(format_string.format('#' + str(data_id), target),
-                                       rgb=Color.DATAINFO))
+                data_list.append(data_id)
+                if display:
+                    if prj != current_prj:
+                        current_prj = prj
+                        print(
+                            colorize("*** Project '{:s}' ***".format(prj), rgb=Color.FMKINFOGROUP))
+                    print(colorize(format_string.format('#' + str(data_id), target),
+                                   rgb=Color.DATAINFO))
 
         else:
             print(colorize("*** No data has been found for analysis ***", rgb=Color.FMKINFO))
@@ -1402,56 +1749,59 @@ class Database(object):
 
         fbk = gr.convert_to_internal_repr(fbk)
 
+        sql_filter = ''
+        params = []
+        if prj_name:
+            sql_filter += "AND DATA.PRJ_NAME == ? "
+            params.append(prj_name)
         if fbk_src:
-            fbk_records = self.execute_sql_statement(
-                "SELECT DATA_ID, CONTENT, SOURCE FROM FEEDBACK "
-                "WHERE SOURCE REGEXP ? AND BINREGEXP(?,CONTENT);",
-                params=(fbk_src, fbk)
-            )
+            sql_filter += "AND FEEDBACK.SOURCE REGEXP ? "
+            params.append(fbk_src)
+        if fbk and not set(fbk).intersection(b'.^$*+?{}[]\\|()'):
+            # plain string, no need to call the (slower) user-defined function
+            sql_filter += "AND instr(FEEDBACK.CONTENT, ?) > 0 "
         else:
-            fbk_records = self.execute_sql_statement(
-                "SELECT DATA_ID, CONTENT, SOURCE FROM FEEDBACK "
-                "WHERE BINREGEXP(?,CONTENT);",
-                params=(fbk,)
-            )
+            sql_filter += "AND BINREGEXP(?,FEEDBACK.CONTENT) "
+        params.append(fbk)
+
+        fbk_records = self.execute_sql_statement(
+            f"SELECT FEEDBACK.DATA_ID, FEEDBACK.CONTENT, FEEDBACK.SOURCE, "
+            f"DATA.TARGET, DATA.PRJ_NAME "
+            f"FROM FEEDBACK INNER JOIN DATA ON DATA.ID == FEEDBACK.DATA_ID "
+            f"WHERE FEEDBACK.CONTENT IS NOT NULL {sql_filter}"
+            f"ORDER BY DATA.PRJ_NAME ASC, DATA.TARGET ASC, DATA.ID ASC, FEEDBACK.ID ASC;",
+            params=params
+        )
 
-        prj_records = self.get_project_record(prj_name)
         data_list = []
 
-        data_id_pattern = "{:>" + str(int(math.log10(len(prj_records))) + 2) + "s}"
-        format_string = "     [DataID " + data_id_pattern + "] --> {:s}"
-
-        if fbk_records and prj_records:
+        if fbk_records:
+            _, format_string = self._get_data_id_format_string(prj_name)
 
             ids_to_display = {}
             for rec in fbk_records:
-                data_id, content, src = rec
+                data_id, content, src, target, prj = rec
                 if data_id not in ids_to_display:
-                    ids_to_display[data_id] = {}
-                if src not in ids_to_display[data_id]:
-                    ids_to_display[data_id][src] = []
-                ids_to_display[data_id][src].append(content)
+                    ids_to_display[data_id] = (target, prj, {})
+                ids_to_display[data_id][2].setdefault(src, []).append(content)
 
             current_prj = None
-            for rec in prj_records:
-                data_id, target, prj = rec
-                if data_id in ids_to_display:
-                    data_list.append(data_id)
-                    if display:
-                        fbk = ids_to_display[data_id]
-                        if prj != current_prj:
-                            current_prj = prj
+            for data_id, (target, prj, fbk) in ids_to_display.items():
+                data_list.append(data_id)
+                if display:
+                    if prj != current_prj:
+                        current_prj = prj
+                        print(
+                            colorize("*** Project '{:s}' ***".format(prj), rgb=Color.FMKINFOGROUP))
+                    print(colorize(format_string.format('#' + str(data_id), target),
+                                   rgb=Color.DATAINFO))
+                    for src, contents in fbk.items():
+                        print(colorize("       |_ From [{:s}]:".format(src), rgb=Color.FMKSUBINFO))
+                        for ct in contents:
                             print(
-                                colorize("*** Project '{:s}' ***".format(prj), rgb=Color.FMKINFOGROUP))
-                        print(colorize(format_string.format('#' + str(data_id), target),
-                                       rgb=Color.DATAINFO))
-                        for src, contents in fbk.items():
-                            print(colorize("       |_ From [{:s}]:".format(src), rgb=Color.FMKSUBINFO))
-                            for ct in contents:
-                                print(
-                                    colorize("          {:s}".format(str(ct)), rgb=Color.DATAINFO_ALT))
+                                colorize("          {:s}".format(str(ct)), rgb=Color.DATAINFO_ALT))
 
         else:
             print(colorize("*** No data has been found for analysis ***", rgb=Color.FMKINFO))
 
-        return data_list
\ No newline at end of file
+        return data_list
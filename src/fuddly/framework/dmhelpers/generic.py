@@ -24,6 +24,7 @@
 from fuddly.framework.node import *
 
 import datetime
+import functools
 
 #####################
 # Data Model Helper #
@@ -252,6 +253,11 @@ def TIMESTAMP(time_format="%H%M%S", utc=False,
     return functools.partial(timestamp, time_format, utc, set_attrs, clear_attrs)
 
 
+@functools.lru_cache(maxsize=32)
+def _get_crc_function(poly, init_crc, xor_out, rev):
+    # building the CRC table is far more expensive than computing a CRC
+    return crcmod.mkCrcFun(poly, initCrc=init_crc, xorOut=xor_out, rev=rev)
+
 def CRC(vt=fvt.INT_str, poly=0x104c11db7, init_crc=0, xor_out=0xFFFFFFFF, rev=True,
         set_attrs=None, clear_attrs=None, after_encoding=True, freezable=False,
         base=16, letter_case='upper', min_sz=4, reverse_str=False):
@@ -295,8 +301,7 @@ def CRC(vt=fvt.INT_str, poly=0x104c11db7, init_crc=0, xor_out=0xFFFFFFFF, rev=Tr
             self.reverse_str = reverse_str
 
         def __call__(self, nodes):
-            crc_func = crcmod.mkCrcFun(self.poly, initCrc=self.init_crc,
-                                       xorOut=self.xor_out, rev=self.rev)
+            crc_func = _get_crc_function(self.poly, self.init_crc, self.xor_out, self.rev)
             if isinstance(nodes, Node):
                 s = nodes.to_bytes() if after_encoding else nodes.get_raw_value()
             else:
@@ -119,6 +119,20 @@ CREATE TABLE ASYNC_DATA (
     PRJ_NAME TEXT REFERENCES PROJECT (NAME)
 );
 
+CREATE TABLE PERF (
+    ID        INTEGER  PRIMARY KEY ASC AUTOINCREMENT,
+    DATE      TIMESTAMP,
+    PRJ_NAME  TEXT REFERENCES PROJECT (NAME),
+    STAGE     TEXT,
+    REF       TEXT,
+    COUNT     INTEGER,
+    TOTAL     REAL,
+    MIN       REAL,
+    MAX       REAL,
+    P50       REAL,
+    P99       REAL
+);
+
 CREATE VIEW STATS AS
     SELECT TYPE, sum(CPT) as TOTAL
     FROM (
@@ -238,7 +238,7 @@ class sd_walk_data_model(StatefulDisruptor):
         data.add_info('current node:     {!s}'.format(self.modelwalker.consumed_node_path))
 
         if self.clone_node:
-            exported_node = Node(rnode.name, base_node=rnode, new_env=True)
+            exported_node = Node(rnode.name, base_node=rnode, new_env=True, cow=True)
         else:
             exported_node = rnode
 
@@ -407,7 +407,7 @@ class sd_fuzz_typed_nodes(StatefulDisruptor):
         data.add_info('                      (ascii): {!s}'.format(truncate_info(corrupt_node_bytes)))
 
         if self.clone_node:
-            exported_node = Node(rnode.name, base_node=rnode, new_env=True)
+            exported_node = Node(rnode.name, base_node=rnode, new_env=True, cow=True)
         else:
             exported_node = rnode
 
@@ -508,7 +508,7 @@ class sd_switch_to_alternate_conf(StatefulDisruptor):
         data.add_info(' |_ original node value: {!s}'.format(truncate_info(orig_node_val)))
 
         if self.clone_node:
-            exported_node = Node(rnode.name, base_node=rnode, new_env=True)
+            exported_node = Node(rnode.name, base_node=rnode, new_env=True, cow=True)
             data.update_from(exported_node)
         else:
             data.update_from(rnode)
@@ -593,7 +593,7 @@ class sd_fuzz_separator_nodes(StatefulDisruptor):
         data.add_info('                     (ascii): {!s}'.format(truncate_info(corrupt_node_bytes)))
 
         if self.clone_node:
-            exported_node = Node(rnode.name, base_node=rnode, new_env=True)
+            exported_node = Node(rnode.name, base_node=rnode, new_env=True, cow=True)
             data.update_from(exported_node)
         else:
             data.update_from(rnode)
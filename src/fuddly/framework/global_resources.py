@@ -84,6 +84,8 @@ external_libs_folder = fuddly_data_folder + 'external_libs' + os.sep
 ensure_dir(external_libs_folder)
 external_tools_folder = fuddly_data_folder + 'external_tools' + os.sep
 ensure_dir(external_tools_folder)
+cache_folder = fuddly_data_folder + 'cache' + os.sep
+ensure_dir(cache_folder)
 
 if not use_xdg:
     config_folder = os.path.join(fuddly_data_folder, 'config') + os.sep
@@ -218,6 +220,12 @@ class UI(object):
 
     __repr__ = __str__
 
+    def __getstate__(self):
+        return self._inputs
+
+    def __setstate__(self, state):
+        self._inputs = state
+
     def __copy__(self):
         new_ui = type(self)()
         new_ui.__dict__.update(self.__dict__)
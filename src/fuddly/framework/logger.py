@@ -41,6 +41,25 @@ from fuddly.libs.utils import ExternalDisplay, Accumulator
 from fuddly.framework import global_resources as gr
 
 
+class HeadlessCase(object):
+    """
+    Outcomes of a test case handled in headless mode. They are kept by the Logger
+    until the end of the test case, so that its details are only logged if the case
+    turns out to be anomalous.
+    """
+
+    def __init__(self, index, sent_date):
+        self.index = index
+        self.sent_date = sent_date
+        self.records = []  # list of (Data, list of the related data IDs in fmkDB)
+        self.feedback = []  # list of (source, content, status_code, timestamp, record)
+
+    def is_anomalous(self):
+        return any(
+            status is not None and status < 0 for _, _, status, _, _ in self.feedback
+        )
+
+
 class Logger(object):
     """
     The Logger is used for keeping the history of the communication
@@ -54,6 +73,7 @@ class Logger(object):
     WRITE_API = 2
     PRETTY_PRINT_API = 3
     PRINT_CONSOLE_API = 4
+    FILE_WRITE_API = 5
 
     def __init__(
         self,
@@ -66,6 +86,8 @@ class Logger(object):
         enable_term_display=True,
         enable_file_logging=False,
         highlight_marked_nodes=False,
+        term_rate_limit=None,
+        max_pending_entries=10000,
     ):
         """
         Args:
@@ -88,6 +110,12 @@ class Logger(object):
           highlight_marked_nodes (bool): If True, alteration performed by compatible disruptors
             will be highlighted. Only possible if `export_raw_data` is False, as this option forces
             data interpretation.
+          term_rate_limit (int): maximum number of messages to display on the terminal per second.
+            Beyond that, the messages are skipped and only their number is displayed at the end
+            of each second. (The file logging is not affected.) If None, there is no limit.
+          max_pending_entries (int): maximum number of log entries waiting to be displayed or
+            written. Once this threshold is reached, the callers wait for the log handler to
+            catch up.
         """
 
         self.name = name
@@ -114,6 +142,11 @@ class Logger(object):
         self._tg_fbk_lck = threading.Lock()
 
         self.display_on_term = enable_term_display
+        self.term_rate_limit = term_rate_limit
+        self.max_pending_entries = max_pending_entries
+
+        self.headless = False
+        self._headless_case = None
 
         self._log_handler_thread = None
         self._log_handler_stop_event = threading.Event()
@@ -121,6 +154,11 @@ class Logger(object):
         self._thread_initialized = threading.Event()
         self._log_entry_submitted_cond = threading.Condition()
         self._log_entry_list = []
+        self._submitted_entries_cpt = 0
+        self._processed_entries_cpt = 0
+        self._term_window_start = None
+        self._term_window_cpt = 0
+        self._term_skipped_cpt = 0
         # self._log_displayed = threading.Event()
         self._sync_lock = threading.Lock()
 
@@ -168,25 +206,56 @@ class Logger(object):
 
         self.log_fn = init_logfn
 
-    def flush(self):
-        with self._sync_lock:
+    def _is_log_handler_running(self):
+        return (
+            self._log_handler_thread is not None
+            and self._log_handler_thread.is_alive()
+        )
+
+    def _submit_log_entry(self, api, params):
+        if threading.current_thread() is self._log_handler_thread:
+            # Entries submitted while processing other ones (e.g., by a callback that logs)
+            # bypass the bound, as only the log handler can make room for them. They do not
+            # wait for the submitters that hold self._sync_lock, which wait for the handler.
             with self._log_entry_submitted_cond:
-                self._log_entry_list.append((Logger.FLUSH_API, None))
-                self._log_entry_submitted_cond.notify()
+                self._append_log_entry(api, params)
+            return
 
-    def write(self, data: str):
         with self._sync_lock:
             with self._log_entry_submitted_cond:
-                self._log_entry_list.append((Logger.WRITE_API, data))
-                self._log_entry_submitted_cond.notify()
+                while (
+                    len(self._log_entry_list) >= self.max_pending_entries
+                    and self._is_log_handler_running()
+                ):
+                    self._log_entry_submitted_cond.wait(0.1)
+                self._append_log_entry(api, params)
+
+    def _append_log_entry(self, api, params):
+        # Should be called with the lock of self._log_entry_submitted_cond
+        self._log_entry_list.append((api, params))
+        self._submitted_entries_cpt += 1
+        self._log_entry_submitted_cond.notify_all()
+
+    def flush(self):
+        self._submit_log_entry(Logger.FLUSH_API, None)
+
+    def write(self, data: str):
+        self._submit_log_entry(Logger.WRITE_API, data)
 
     def pretty_print_data(self, data: Data, fd=None, raw_limit: int = None):
-        with self._sync_lock:
-            with self._log_entry_submitted_cond:
-                self._log_entry_list.append(
-                    (Logger.PRETTY_PRINT_API, (data, fd, raw_limit))
-                )
-                self._log_entry_submitted_cond.notify()
+        self._submit_log_entry(Logger.PRETTY_PRINT_API, (data, fd, raw_limit))
+
+    def _write_file(self, fd, content: str):
+        # the writes are performed by the log handler, so that they keep their order with
+        # the data pretty printed in the same file
+        if fd.closed:
+            self.print_console(
+                "\n*** ERROR: The log file has been closed."
+                " (Maybe because the Logger has been stopped and has not been restarted yet.)",
+                rgb=Color.ERROR,
+            )
+        else:
+            self._submit_log_entry(Logger.FILE_WRITE_API, (fd, content))
 
     def set_external_display(self, disp):
         self._ext_disp = disp
@@ -260,17 +329,9 @@ class Logger(object):
                 )
                 if not do_record:
                     return data
-                try:
-                    self._fd.write(data + "\n")
-                    if verbose and issubclass(x.__class__, Data):
-                        self.pretty_print_data(x, fd=self._fd)
-                    self._fd.flush()
-                except ValueError:
-                    self.print_console(
-                        "\n*** ERROR: The log file has been closed."
-                        " (Maybe because the Logger has been stopped and has not been restarted yet.)",
-                        rgb=Color.ERROR,
-                    )
+                self._write_file(self._fd, data + "\n")
+                if verbose and issubclass(x.__class__, Data) and not self._fd.closed:
+                    self.pretty_print_data(x, fd=self._fd)
 
                 return data
 
@@ -296,7 +357,9 @@ class Logger(object):
 
     def _stop_log_handler(self):
         with self._sync_lock:
-            self._log_handler_stop_event.set()
+            with self._log_entry_submitted_cond:
+                self._log_handler_stop_event.set()
+                self._log_entry_submitted_cond.notify_all()
             self._log_handler_thread.join()
 
     def _log_handler(self):
@@ -306,58 +369,146 @@ class Logger(object):
         while True:
             # self._log_displayed.clear()
             with self._log_entry_submitted_cond:
-                if self._log_handler_stop_event.is_set() and not self._log_entry_list:
-                    break
-                self._log_entry_submitted_cond.wait(0.001)
+                while not self._log_entry_list:
+                    if self._log_handler_stop_event.is_set():
+                        break
+                    # when messages have been skipped, their number is displayed once the
+                    # current period is over
+                    self._log_entry_submitted_cond.wait(
+                        1 if self._term_skipped_cpt else None
+                    )
+                    if self._term_skipped_cpt:
+                        break
 
-                if self._log_entry_list:
-                    log_entries = self._log_entry_list
-                    self._log_entry_list = []
-                else:
-                    continue
+                log_entries = self._log_entry_list
+                self._log_entry_list = []
+                # there is room for the callers waiting to submit new entries
+                self._log_entry_submitted_cond.notify_all()
 
-            for log_e in log_entries:
-                api, params = log_e
+            if not log_entries and self._log_handler_stop_event.is_set():
+                if self._term_skipped_cpt:
+                    # the number of skipped messages is displayed before leaving
+                    self._term_window_start = None
+                    self._process_log_entries([], accu)
+                break
 
-                if api == Logger.FLUSH_API:
-                    if not self._ext_disp.is_enabled:
-                        sys.stdout.flush()
-                elif api == Logger.WRITE_API:
-                    if self._ext_disp.is_enabled:
-                        self._ext_disp.disp.print(params)
-                    else:
-                        sys.stdout.write(params)
-                elif api == Logger.PRETTY_PRINT_API:
-                    data, fd, raw_limit = params
-                    if fd is None:
+            self._process_log_entries(log_entries, accu)
+
+            with self._log_entry_submitted_cond:
+                self._processed_entries_cpt += len(log_entries)
+                self._log_entry_submitted_cond.notify_all()
+
+            # self._log_displayed.set()
+
+    def _is_term_display_allowed(self):
+        if self.term_rate_limit is None:
+            return True
+
+        now = time.monotonic()
+        if self._term_window_start is None or now - self._term_window_start >= 1:
+            self._term_window_start = now
+            self._term_window_cpt = 0
+        self._term_window_cpt += 1
+        if self._term_window_cpt <= self.term_rate_limit:
+            return True
+        else:
+            self._term_skipped_cpt += 1
+            return False
+
+    def _process_log_entries(self, log_entries, accu):
+        # The outputs are gathered and written at once for each batch of entries.
+        term_output = []
+        fd_to_flush = []
+
+        def flush_term_output():
+            if term_output:
+                if self._ext_disp.is_enabled:
+                    self._ext_disp.disp.print("".join(term_output))
+                else:
+                    sys.stdout.write("".join(term_output))
+                    sys.stdout.flush()
+                term_output.clear()
+
+        if self._term_skipped_cpt and (
+            self._term_window_start is None
+            or time.monotonic() - self._term_window_start >= 1
+        ):
+            term_output.append(
+                self._format_console_msg(
+                    f"*** {self._term_skipped_cpt} message(s) not displayed "
+                    f"(more than {self.term_rate_limit} messages per second) ***",
+                    nl_after=True,
+                    rgb=Color.WARNING,
+                )
+            )
+            self._term_skipped_cpt = 0
+
+        for log_e in log_entries:
+            api, params = log_e
+
+            if api == Logger.FLUSH_API:
+                flush_term_output()
+            elif api == Logger.WRITE_API:
+                term_output.append(params)
+            elif api == Logger.PRETTY_PRINT_API:
+                data, fd, raw_limit = params
+                if fd is None:
+                    if self._is_term_display_allowed():
                         data.show(log_func=accu.accumulate, raw_limit=raw_limit)
-                        if self._ext_disp.is_enabled:
-                            self._ext_disp.disp.print(accu.content)
-                        else:
-                            sys.stdout.write(accu.content)
+                        term_output.append(accu.content)
                         accu.clear()
-                    else:
-                        data.show(log_func=fd.write, raw_limit=raw_limit)
-                        fd.flush()
-                elif api == Logger.PRINT_CONSOLE_API:
-                    self._print_console(*params)
+                elif not fd.closed:
+                    data.show(log_func=fd.write, raw_limit=raw_limit)
+                    if fd not in fd_to_flush:
+                        fd_to_flush.append(fd)
+            elif api == Logger.FILE_WRITE_API:
+                fd, content = params
+                try:
+                    fd.write(content)
+                except ValueError:
+                    term_output.append(
+                        self._format_console_msg(
+                            "\n*** ERROR: The log file has been closed."
+                            " (Maybe because the Logger has been stopped and has not been restarted yet.)",
+                            rgb=Color.ERROR,
+                        )
+                    )
                 else:
-                    self._print_console(
+                    if fd not in fd_to_flush:
+                        fd_to_flush.append(fd)
+            elif api == Logger.PRINT_CONSOLE_API:
+                if self.display_on_term and self._is_term_display_allowed():
+                    term_output.append(self._format_console_msg(*params))
+            else:
+                term_output.append(
+                    self._format_console_msg(
                         "*** ERROR[Logger]: Unknown API ***", rgb=Color.ERROR
                     )
+                )
 
-            # self._log_displayed.set()
-
-            self._log_handler_stop_event.wait(0.001)
+        flush_term_output()
+        for fd in fd_to_flush:
+            try:
+                fd.flush()
+            except ValueError:
+                pass
 
     def wait_for_sync(self):
-        # while not self._log_displayed.is_set():
-        #     self._log_displayed.wait(0.01)
-        # self._log_displayed.clear()
-        time.sleep(0.1)
+        """
+        Wait until the log entries submitted so far are displayed or written.
+        """
+        with self._log_entry_submitted_cond:
+            target_cpt = self._submitted_entries_cpt
+            while (
+                self._processed_entries_cpt < target_cpt
+                and self._is_log_handler_running()
+            ):
+                self._log_entry_submitted_cond.wait(0.1)
 
     def stop(self):
         if self._fd:
+            # the pending writes to the log file are performed first
+            self.wait_for_sync()
             self._fd.close()
 
         self.reset_current_state()
@@ -380,8 +531,66 @@ class Logger(object):
         self._current_dmaker_info = {}
         self._current_src_data_id = None
         self._current_fmk_info = []
+        self._current_data_ids = []
+
+    def set_headless_mode(self, enabled):
+        """
+        In headless mode, the test cases are not displayed anymore. Only the feedback with
+        a negative status code is displayed, unless it is retrieved while a test case is
+        open (refer to :meth:`Logger.open_headless_case`).
+        The feedback is still recorded in fmkDB.
+        """
+        self.headless = enabled
+        self._headless_case = None
 
-    def commit_data_table_entry(self, group_id, prj_name):
+    def open_headless_case(self):
+        """
+        Start keeping the outcomes of the current test case in a :class:`HeadlessCase`
+        (only relevant in headless mode).
+        """
+        self._headless_case = HeadlessCase(self.__idx, self._current_sent_date)
+
+    def defer_data_details(self):
+        """
+        Keep the current data and its fmkDB records in the open headless case,
+        so that its details can be logged afterwards if needed.
+        """
+        if self._headless_case is not None and self._current_data is not None:
+            self._headless_case.records.append(
+                (self._current_data, list(self._current_data_ids))
+            )
+
+    def close_headless_case(self):
+        """
+        Returns:
+          HeadlessCase: the outcomes of the test case opened by :meth:`Logger.open_headless_case`,
+          or None if no test case is open.
+        """
+        case = self._headless_case
+        self._headless_case = None
+        return case
+
+    def log_headless_case_header(self, case):
+        self._log_entry_header(case.index, case.sent_date, suffix="==[ ANOMALY ]")
+
+    def log_headless_case_feedback(self, case):
+        for source, content, status_code, timestamp, record in case.feedback:
+            self._show_feedback(source, content, status_code, timestamp, record=record)
+
+    def commit_data_table_entry(self, group_id, prj_name, with_steps=True):
+        """
+        Record the current data in fmkDB.
+
+        Args:
+          group_id (int): ID of the group of data sent at once the current data belongs to.
+          prj_name (str): name of the current project.
+          with_steps (bool): If False, only the data records are inserted. The steps that
+            led to the data and the related framework information are left out (they can
+            be inserted afterwards through :meth:`Logger.commit_steps_entries`).
+
+        Returns:
+          int: ID of the last inserted data record, or None if nothing has been recorded.
+        """
         if self._current_data is not None:  # that means data will be recorded
             init_dmaker = self._current_data.get_initial_dmaker()
             init_dmaker = (
@@ -413,38 +622,46 @@ class Logger(object):
                     return last_data_id
 
                 self._current_data.set_data_id(last_data_id)
+                self._current_data_ids.append(last_data_id)
 
-                step_id_start = 1
-
-                for step_id, dmaker in enumerate(
-                    self._current_dmaker_list, start=step_id_start
-                ):
-                    dmaker_type, dmaker_name, user_input = dmaker
-                    info = self._current_dmaker_info.get(
-                        (dmaker_type, dmaker_name), None
-                    )
-                    if info is not None:
-                        info = "\n".join(info)
-                        info = convert_to_internal_repr(info)
-                    ui = str(user_input) if bool(user_input) else None
-                    self.fmkDB.insert_steps(
-                        last_data_id,
-                        step_id,
-                        dmaker_type,
-                        dmaker_name,
-                        self._current_src_data_id,
-                        ui,
-                        info,
-                    )
-
-                for msg, now in self._current_fmk_info:
-                    self.fmkDB.insert_fmk_info(last_data_id, msg, now)
+                if with_steps:
+                    self.commit_steps_entries([last_data_id])
 
             return last_data_id
 
         else:
             return None
 
+    def commit_steps_entries(self, data_ids):
+        """
+        Record in fmkDB the steps that led to the current data, as well as the related
+        framework information, for each of the provided data IDs.
+        """
+        for data_id in data_ids:
+            step_id_start = 1
+
+            for step_id, dmaker in enumerate(
+                self._current_dmaker_list, start=step_id_start
+            ):
+                dmaker_type, dmaker_name, user_input = dmaker
+                info = self._current_dmaker_info.get((dmaker_type, dmaker_name), None)
+                if info is not None:
+                    info = "\n".join(info)
+                    info = convert_to_internal_repr(info)
+                ui = str(user_input) if bool(user_input) else None
+                self.fmkDB.insert_steps(
+                    data_id,
+                    step_id,
+                    dmaker_type,
+                    dmaker_name,
+                    self._current_src_data_id,
+                    ui,
+                    info,
+                )
+
+            for msg, now in self._current_fmk_info:
+                self.fmkDB.insert_fmk_info(data_id, msg, now)
+
     def log_async_data(
         self,
         data_list: Data | List[Data] | Tuple[Data],
@@ -541,6 +758,20 @@ class Logger(object):
             return False
 
     def _log_feedback(self, source, content, status_code, timestamp, record=True):
+        if not self.headless:
+            self._show_feedback(source, content, status_code, timestamp, record=record)
+        elif self._headless_case is not None:
+            # the feedback will only be displayed if the test case is anomalous
+            self._headless_case.feedback.append(
+                (source, content, status_code, timestamp, record)
+            )
+        elif status_code is not None and status_code < 0:
+            self._show_feedback(source, content, status_code, timestamp, record=record)
+
+        if record:
+            self._record_feedback(source, content, status_code, timestamp)
+
+    def _show_feedback(self, source, content, status_code, timestamp, record=True):
         processed_feedback = self._process_target_feedback(content)
         fbk_cond = status_code is not None and status_code < 0
         hdr_color = Color.FEEDBACK_ERR if fbk_cond else Color.FEEDBACK
@@ -577,40 +808,40 @@ class Logger(object):
                     "Feedback not displayed", rgb=Color.WARNING, do_record=record
                 )
 
-        if record:
-            assert isinstance(source, FeedbackSource)
-            if source.related_tg is not None:
-                try:
-                    data_id = self._last_data_IDs[source.related_tg]
-                except KeyError:
-                    self.print_console(
-                        "*** Warning: The feedback source is related to a target to which nothing has been sent."
-                        " Retrieved feedback will not be attached to any data ID.",
-                        nl_before=True,
-                        rgb=Color.WARNING,
-                    )
-                    data_id = None
-            else:
-                ids = self._last_data_IDs.values()
-                data_id = max(ids) if ids else None
-
-            if isinstance(content, list):
-                for fbk, ts in zip(content, timestamp):
-                    self.fmkDB.insert_feedback(
-                        data_id,
-                        source,
-                        ts,
-                        self._encode_target_feedback(fbk),
-                        status_code=status_code,
-                    )
-            else:
+    def _record_feedback(self, source, content, status_code, timestamp):
+        assert isinstance(source, FeedbackSource)
+        if source.related_tg is not None:
+            try:
+                data_id = self._last_data_IDs[source.related_tg]
+            except KeyError:
+                self.print_console(
+                    "*** Warning: The feedback source is related to a target to which nothing has been sent."
+                    " Retrieved feedback will not be attached to any data ID.",
+                    nl_before=True,
+                    rgb=Color.WARNING,
+                )
+                data_id = None
+        else:
+            ids = self._last_data_IDs.values()
+            data_id = max(ids) if ids else None
+
+        if isinstance(content, list):
+            for fbk, ts in zip(content, timestamp):
                 self.fmkDB.insert_feedback(
                     data_id,
                     source,
-                    timestamp,
-                    self._encode_target_feedback(content),
+                    ts,
+                    self._encode_target_feedback(fbk),
                     status_code=status_code,
                 )
+        else:
+            self.fmkDB.insert_feedback(
+                data_id,
+                source,
+                timestamp,
+                self._encode_target_feedback(content),
+                status_code=status_code,
+            )
 
     def log_collected_feedback(self, preamble=None, epilogue=None):
         """
@@ -641,7 +872,7 @@ class Logger(object):
 
         record = self.shall_record()
 
-        if preamble is not None:
+        if preamble is not None and not self.headless:
             self.log_fn(preamble, do_record=record, rgb=Color.FMKINFO)
 
         for idx, fbk_record in enumerate(fbk_list):
@@ -649,7 +880,7 @@ class Logger(object):
             self._log_feedback(fbk_src, fbk, status, timestamp, record=record)
             collected_status[fbk_src.obj] = status
 
-        if epilogue is not None:
+        if epilogue is not None and not self.headless:
             self.log_fn(epilogue, do_record=record, rgb=Color.FMKINFO)
 
         return collected_status
@@ -659,12 +890,12 @@ class Logger(object):
     ):
         record = self.shall_record()
 
-        if preamble is not None:
+        if preamble is not None and not self.headless:
             self.log_fn(preamble, do_record=record, rgb=Color.FMKINFO)
 
         self._log_feedback(source, content, status_code, timestamp, record=record)
 
-        if epilogue is not None:
+        if epilogue is not None and not self.headless:
             self.log_fn(epilogue, do_record=record, rgb=Color.FMKINFO)
 
     def log_operator_feedback(self, operator, content, status_code, timestamp):
@@ -720,13 +951,17 @@ class Logger(object):
     def start_new_log_entry(self, preamble=""):
         self.__idx += 1
         self._current_sent_date = datetime.datetime.now()
-        now = self._current_sent_date.strftime("%d/%m/%Y - %H:%M:%S.%f")
-        msg = "====[ {:d} ]==[ {:s} ]====".format(self.__idx, now)
-        msg += "=" * (max(80 - len(msg), 0))
-        self.log_fn(msg, rgb=Color.NEWLOGENTRY, style=FontStyle.BOLD)
+        if not self.headless:
+            self._log_entry_header(self.__idx, self._current_sent_date)
 
         return self._current_sent_date
 
+    def _log_entry_header(self, idx, sent_date, suffix=""):
+        now = sent_date.strftime("%d/%m/%Y - %H:%M:%S.%f")
+        msg = "====[ {:d} ]==[ {:s} ]====".format(idx, now) + suffix
+        msg += "=" * (max(80 - len(msg), 0))
+        self.log_fn(msg, rgb=Color.NEWLOGENTRY, style=FontStyle.BOLD)
+
     def log_dmaker_step(self, num):
         msg = "### Step %d:" % num
         self.log_fn(msg, rgb=Color.DMAKERSTEP)
@@ -802,20 +1037,24 @@ class Logger(object):
         else:
             self._current_ack_dates[tg_ref] = date
 
-    def log_data(self, data, verbose=False):
-        self.log_fn("### Data size: ", rgb=Color.LOGSECTION, nl_after=False)
+    def log_data(self, data, verbose=False, do_show=True):
         self._current_size = data.get_length()
-        self.log_fn("%d bytes" % self._current_size, nl_before=False)
+        if do_show:
+            self.log_fn("### Data size: ", rgb=Color.LOGSECTION, nl_after=False)
+            self.log_fn("%d bytes" % self._current_size, nl_before=False)
 
         if self.__explicit_data_recording and not data.is_recordable():
             self.last_data_recordable = False
-            self.log_fn("### Data emitted but not recorded", rgb=Color.LOGSECTION)
+            if do_show:
+                self.log_fn("### Data emitted but not recorded", rgb=Color.LOGSECTION)
             return False
 
         self._current_data = data
         self.last_data_recordable = self._current_data.is_recordable()
 
-        if not self.__record_data:
+        if not do_show:
+            return True
+        elif not self.__record_data:
             self.log_fn("### Data emitted:", rgb=Color.LOGSECTION)
             self.log_fn(data, nl_after=True, verbose=verbose)
         else:
@@ -903,22 +1142,19 @@ class Logger(object):
         limit_output=True,
         no_format_mode=False,
     ):
-        with self._sync_lock:
-            with self._log_entry_submitted_cond:
-                params = (
-                    msg,
-                    nl_before,
-                    nl_after,
-                    rgb,
-                    style,
-                    raw_limit,
-                    limit_output,
-                    no_format_mode,
-                )
-                self._log_entry_list.append((Logger.PRINT_CONSOLE_API, params))
-                self._log_entry_submitted_cond.notify()
+        params = (
+            msg,
+            nl_before,
+            nl_after,
+            rgb,
+            style,
+            raw_limit,
+            limit_output,
+            no_format_mode,
+        )
+        self._submit_log_entry(Logger.PRINT_CONSOLE_API, params)
 
-    def _print_console(
+    def _format_console_msg(
         self,
         msg,
         nl_before=True,
@@ -929,9 +1165,6 @@ class Logger(object):
         limit_output=True,
         no_format_mode=False,
     ):
-        if not self.display_on_term:
-            return
-
         if raw_limit is None:
             raw_limit = self._term_display_limit
 
@@ -941,13 +1174,7 @@ class Logger(object):
         prefix = p + self.p
 
         if no_format_mode:
-            if self._ext_disp.is_enabled:
-                self._ext_disp.disp.print(prefix + msg)
-            else:
-                sys.stdout.write(prefix + msg)
-                sys.stdout.flush()
-
-            # print(f'{msg}')
+            return prefix + msg
 
         else:
             if isinstance(msg, Data):
@@ -966,8 +1193,4 @@ class Logger(object):
             if style is None:
                 style = ""
 
-            if self._ext_disp.is_enabled:
-                self._ext_disp.disp.print(style + prefix + msg + suffix + FontStyle.END)
-            else:
-                sys.stdout.write(style + prefix + msg + suffix + FontStyle.END)
-                sys.stdout.flush()
+            return style + prefix + msg + suffix + FontStyle.END
@@ -35,6 +35,7 @@ import uuid
 import struct
 import math
 import time
+import weakref
 
 from pprint import pprint as pp
 
@@ -110,6 +111,10 @@ def flatten(nested):
             yield x
 
 
+def _to_tuple(crit):
+    return None if crit is None else tuple(crit)
+
+
 nodes_weight_re = re.compile(r'(.*?)\((.*)\)')
 
 ### Debug Means ###
@@ -498,11 +503,18 @@ class NodeCustomization(object):
     Base class for node cutomization
     """
 
+    __slots__ = ("_transform_func", "_custo_flags")
+
+    # Default values of the customization items. The values of an instance are packed
+    # within an integer where each item is a bit index.
     _custo_items = {}
 
     def __init__(self, items_to_set=None, items_to_clear=None, transform_func=None):
         self._transform_func = transform_func
-        self._custo_items = copy.copy(self._custo_items)
+        self._custo_flags = 0
+        for item, val in self._custo_items.items():
+            if val:
+                self._custo_flags |= 1 << item
         if items_to_set is not None:
             self.set_items(items_to_set)
         if items_to_clear is not None:
@@ -510,34 +522,34 @@ class NodeCustomization(object):
 
     def __getitem__(self, key):
         if key in self._custo_items:
-            return self._custo_items[key]
+            return bool(self._custo_flags & (1 << key))
         else:
             return None
 
     def set_items(self, items_to_set):
         if isinstance(items_to_set, int):
             assert items_to_set in self._custo_items
-            self._custo_items[items_to_set] = True
+            self._custo_flags |= 1 << items_to_set
         elif isinstance(items_to_set, list):
             for item in items_to_set:
                 assert item in self._custo_items
-                self._custo_items[item] = True
+                self._custo_flags |= 1 << item
         else:
             raise ValueError
 
     def clear_items(self, items_to_clear):
         if isinstance(items_to_clear, int):
             assert items_to_clear in self._custo_items
-            self._custo_items[items_to_clear] = False
+            self._custo_flags &= ~(1 << items_to_clear)
         elif isinstance(items_to_clear, list):
             for item in items_to_clear:
                 assert item in self._custo_items
-                self._custo_items[item] = False
+                self._custo_flags &= ~(1 << item)
         else:
             raise ValueError
 
     def copy_from(self, node_custo):
-        self._custo_items = copy.copy(node_custo._custo_items)
+        self._custo_flags = node_custo._custo_flags
 
     @property
     def transform_func(self):
@@ -548,9 +560,8 @@ class NodeCustomization(object):
         self._transform_func = func
 
     def __copy__(self):
-        new_custo = type(self)()
-        new_custo.__dict__.update(self.__dict__)
-        new_custo._custo_items = copy.copy(self._custo_items)
+        new_custo = type(self)(transform_func=self._transform_func)
+        new_custo._custo_flags = self._custo_flags
         return new_custo
 
 
@@ -560,6 +571,8 @@ class NonTermCusto(NodeCustomization):
     To be provided to :meth:`NodeInternals.customize`
     """
 
+    __slots__ = ()
+
     MutableClone = 1
     CycleClone = 2
     FrozenCopy = 3
@@ -581,35 +594,38 @@ class NonTermCusto(NodeCustomization):
 
     @property
     def mutable_clone_mode(self):
-        return self._custo_items[self.MutableClone]
+        return self[self.MutableClone]
 
     @property
     def cycle_clone_mode(self):
-        return self._custo_items[self.CycleClone]
+        return self[self.CycleClone]
 
     @property
     def frozen_copy_mode(self):
-        return self._custo_items[self.FrozenCopy]
+        return self[self.FrozenCopy]
 
     @property
     def collapse_padding_mode(self):
-        return self._custo_items[self.CollapsePadding]
+        return self[self.CollapsePadding]
 
     @property
     def delay_collapsing(self):
-        return self._custo_items[self.DelayCollapsing]
+        return self[self.DelayCollapsing]
 
     @property
     def full_combinatory_mode(self):
-        return self._custo_items[self.FullCombinatory]
+        return self[self.FullCombinatory]
 
     @full_combinatory_mode.setter
     def full_combinatory_mode(self, val: bool):
-        self._custo_items[self.FullCombinatory] = val
+        if val:
+            self.set_items(self.FullCombinatory)
+        else:
+            self.clear_items(self.FullCombinatory)
 
     @property
     def stick_to_default_mode(self):
-        return self._custo_items[self.StickToDefault]
+        return self[self.StickToDefault]
 
 
 class GenFuncCusto(NodeCustomization):
@@ -618,6 +634,8 @@ class GenFuncCusto(NodeCustomization):
     To be provided to :meth:`NodeInternals.customize`
     """
 
+    __slots__ = ()
+
     ForwardConfChange = 1
     CloneExtNodeArgs = 2
     ResetOnUnfreeze = 3
@@ -632,19 +650,19 @@ class GenFuncCusto(NodeCustomization):
 
     @property
     def forward_conf_change_mode(self):
-        return self._custo_items[self.ForwardConfChange]
+        return self[self.ForwardConfChange]
 
     @property
     def clone_ext_node_args_mode(self):
-        return self._custo_items[self.CloneExtNodeArgs]
+        return self[self.CloneExtNodeArgs]
 
     @property
     def reset_on_unfreeze_mode(self):
-        return self._custo_items[self.ResetOnUnfreeze]
+        return self[self.ResetOnUnfreeze]
 
     @property
     def trigger_last_mode(self):
-        return self._custo_items[self.TriggerLast]
+        return self[self.TriggerLast]
 
 
 class FuncCusto(NodeCustomization):
@@ -653,6 +671,8 @@ class FuncCusto(NodeCustomization):
     To be provided to :meth:`NodeInternals.customize`
     """
 
+    __slots__ = ()
+
     FrozenArgs = 1
     CloneExtNodeArgs = 2
 
@@ -663,14 +683,59 @@ class FuncCusto(NodeCustomization):
 
     @property
     def frozen_args_mode(self):
-        return self._custo_items[self.FrozenArgs]
+        return self[self.FrozenArgs]
 
     @property
     def clone_ext_node_args_mode(self):
-        return self._custo_items[self.CloneExtNodeArgs]
+        return self[self.CloneExtNodeArgs]
 
 
-class NodeInternals(object):
+class _GraphVersion(object):
+    """
+    Versions of a node graph, as seen from the node that caches information about it (refer to
+    Node.get_all_paths() and Node.get_reachable_nodes()). They are only incremented when
+    an element of this graph is changed.
+    """
+
+    __slots__ = ("structure", "attrs")
+
+    def __init__(self):
+        self.structure = 0
+        self.attrs = 0
+
+
+class _GraphTracked(object):
+    """
+    Element of a node graph (i.e., Node, NodeInternals or NodeSemantics) that records the
+    versions of the graphs it has been visited from, in order to only increment them when
+    it is changed.
+    """
+
+    __slots__ = ("_graph_versions",)
+
+    def _track_graph(self, version):
+        versions = self._graph_versions
+        if versions is None:
+            self._graph_versions = {version}
+        else:
+            versions.add(version)
+
+    def _structure_changed(self):
+        versions = self._graph_versions
+        if versions:
+            # the graphs will record themselves again when their caches are recomputed
+            self._graph_versions = None
+            for v in versions:
+                v.structure += 1
+
+    def _attrs_changed(self):
+        versions = self._graph_versions
+        if versions:
+            for v in versions:
+                v.attrs += 1
+
+
+class NodeInternals(_GraphTracked):
     """
     Base class for implementing the contents of a node.
     """
@@ -690,41 +755,104 @@ class NodeInternals(object):
 
     DISABLED = 100
 
+    # Bit of each attribute within the integer that packs their values
+    _attr_bits = {
+        ### GENERIC ###
+        Freezable: 1 << 0,
+        Mutable: 1 << 1,
+        Determinist: 1 << 2,
+        Finite: 1 << 3,
+        # Used for absorption
+        Abs_Postpone: 1 << 4,
+        # Used to distinguish separator
+        Separator: 1 << 5,
+        AutoSeparator: 1 << 6,
+        # Used to display visual effect when the node is printed on the console
+        Highlight: 1 << 7,
+        # Used for debugging purpose
+        DEBUG: 1 << 8,
+        # Used to express that someone (a disruptor for instance) is
+        # currently doing something with the node and doesn't want
+        # that someone else modify it.
+        LOCKED: 1 << 9,
+        ### INTERNAL USAGE ###
+        DISABLED: 1 << 10,
+    }
+
     default_custo = None
 
+    __slots__ = (
+        "private",
+        "absorb_helper",
+        "absorb_constraints",
+        "custo",
+        "_env",
+        "__attrs",
+        "_sync_with",
+        # NodeInternals_NonTerm objects that cache a serialized value depending on this one
+        # (refer to NodeInternals._get_cached_bytes())
+        "_bytes_cache_parents",
+    )
+
+    # Serialized value of the frozen node, only cached by NodeInternals_NonTerm
+    _bytes_cache = None
+
     def __hash__(self):
         return id(self)
 
+    # Slot descriptors of each NodeInternals subclass (refer to NodeInternals.__copy__())
+    _slot_descriptors = {}
+
+    @classmethod
+    def _get_slot_descriptors(cls):
+        try:
+            return NodeInternals._slot_descriptors[cls]
+        except KeyError:
+            descriptors = []
+            for klass in cls.__mro__:
+                slots = klass.__dict__.get("__slots__", ())
+                for name in (slots,) if isinstance(slots, str) else slots:
+                    if name in ("__dict__", "__weakref__"):
+                        continue
+                    if name.startswith("__") and not name.endswith("__"):
+                        name = "_" + klass.__name__.lstrip("_") + name
+                    descriptors.append(klass.__dict__[name])
+            descriptors = tuple(descriptors)
+            NodeInternals._slot_descriptors[cls] = descriptors
+            return descriptors
+
+    def __copy__(self):
+        # Same outcome as the generic copy.copy(), without going through the pickle protocol
+        # (this method is heavily used when nodes are cloned, e.g., during absorption)
+        cls = type(self)
+        new_obj = cls.__new__(cls)
+        for desc in cls._get_slot_descriptors():
+            try:
+                desc.__set__(new_obj, desc.__get__(self))
+            except AttributeError:  # unset slot
+                pass
+        obj_dict = getattr(self, "__dict__", None)
+        if obj_dict:
+            new_obj.__dict__.update(obj_dict)
+        # the copy does not belong to the graphs of the original
+        new_obj._graph_versions = None
+        return new_obj
+
     def __init__(self, arg=None):
         # if new attributes are added, set_contents_from() have to be updated
+        self._bytes_cache_parents = None
+        self._graph_versions = None
         self.private = None
         self.absorb_helper = None
         self.absorb_constraints = None
         self.custo = None
         self._env = None
 
-        self.__attrs = {
-            ### GENERIC ###
-            NodeInternals.Freezable: True,
-            NodeInternals.Mutable: True,
-            NodeInternals.Determinist: True,
-            NodeInternals.Finite: False,
-            # Used for absorption
-            NodeInternals.Abs_Postpone: False,
-            # Used to distinguish separator
-            NodeInternals.Separator: False,
-            NodeInternals.AutoSeparator: False,
-            # Used to display visual effect when the node is printed on the console
-            NodeInternals.Highlight: False,
-            # Used for debugging purpose
-            NodeInternals.DEBUG: False,
-            # Used to express that someone (a disruptor for instance) is
-            # currently doing something with the node and doesn't want
-            # that someone else modify it.
-            NodeInternals.LOCKED: False,
-            ### INTERNAL USAGE ###
-            NodeInternals.DISABLED: False,
-        }
+        self.__attrs = (
+            NodeInternals._attr_bits[NodeInternals.Freezable]
+            | NodeInternals._attr_bits[NodeInternals.Mutable]
+            | NodeInternals._attr_bits[NodeInternals.Determinist]
+        )
 
         self._sync_with = None
         self.customize(self.default_custo)
@@ -750,11 +878,12 @@ class NodeInternals(object):
                 del self._sync_with[SyncScope.Size]
 
     def get_attrs_copy(self):
-        return (copy.copy(self.__attrs), copy.copy(self.custo))
+        return (self.__attrs, copy.copy(self.custo))
 
     def set_attrs_from(self, all_attrs):
         self.__attrs = all_attrs[0]
         self.custo = all_attrs[1]
+        self._attrs_changed()
 
     def _init_specific(self, arg):
         pass
@@ -769,6 +898,7 @@ class NodeInternals(object):
 
     def customize(self, custo):
         self.custo = copy.copy(custo)
+        self._invalidate_bytes_cache()
 
     @property
     def env(self):
@@ -788,6 +918,7 @@ class NodeInternals(object):
         raise NotImplementedError
 
     def set_node_sync(self, scope, node=None, param=None, sync_obj=None):
+        self._attrs_changed()
         if self._sync_with is None:
             self._sync_with = {}
         if sync_obj is not None:
@@ -817,11 +948,13 @@ class NodeInternals(object):
         accept_external_entanglement,
         delayed_node_internals,
         forget_original_sync_objs=False,
+        cow=False,
     ):
+        self._bytes_cache_parents = None
+        self._graph_versions = None
         if self.private is not None:
             self.private = copy.copy(self.private)
         self.absorb_constraints = copy.copy(self.absorb_constraints)
-        self.__attrs = copy.copy(self.__attrs)
 
         if forget_original_sync_objs:
             self._sync_with = None
@@ -830,7 +963,9 @@ class NodeInternals(object):
                 delayed_node_internals.add(self)
             self._sync_with = copy.copy(self._sync_with)
 
-        self._make_private_specific(ignore_frozen_state, accept_external_entanglement)
+        self._make_private_specific(
+            ignore_frozen_state, accept_external_entanglement, cow=cow
+        )
         self.custo = copy.copy(self.custo)
 
     # Called near the end of Node copy (Node.set_contents) to update
@@ -864,9 +999,42 @@ class NodeInternals(object):
                     #       " \_ name: '%s' \n" \
                     #       " \_ updated_node: '%s', scope: '%r'\n" % (node, node.name, debug, scope))
 
-    def _make_private_specific(self, ignore_frozen_state, accept_external_entanglement):
+    def _make_private_specific(
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
+    ):
         pass
 
+    def _get_cached_bytes(self, parent=None):
+        """
+        Serialize the frozen value of the node by relying on the bytes cached by
+        the non-terminal nodes. Only usable when the node is fully frozen.
+
+        Args:
+          parent (NodeInternals_NonTerm): non-terminal node internals that will cache
+            a value depending on this one, and thus has to be invalidated when it changes.
+
+        Returns:
+          bytes: the serialized value, or None if the cache cannot be used
+            (in which case the regular serialization has to be performed)
+        """
+        return None
+
+    def _register_bytes_cache_parent(self, parent):
+        if self._bytes_cache_parents is None:
+            self._bytes_cache_parents = {parent}
+        else:
+            self._bytes_cache_parents.add(parent)
+
+    def _invalidate_bytes_cache(self):
+        """
+        Invalidate the cached bytes along the path from this node up to the roots.
+        """
+        parents = self._bytes_cache_parents
+        if parents:
+            self._bytes_cache_parents = None
+            for p in parents:
+                p._invalidate_bytes_cache()
+
     def absorb(self, blob, constraints, conf, pending_postpone_desc=None):
         raise NotImplementedError
 
@@ -881,33 +1049,50 @@ class NodeInternals(object):
         raise NotImplementedError
 
     def set_attr(self, name):
-        if name not in self.__attrs:
+        bit = self._attr_bits.get(name)
+        if bit is None:
             raise ValueError
         if self._make_specific(name):
-            self.__attrs[name] = True
+            if not self.__attrs & bit:
+                self._invalidate_bytes_cache()
+                self._attrs_changed()
+                self.__attrs |= bit
 
     def clear_attr(self, name):
-        if name not in self.__attrs:
+        bit = self._attr_bits.get(name)
+        if bit is None:
             raise ValueError
         if self._unmake_specific(name):
-            self.__attrs[name] = False
+            if self.__attrs & bit:
+                self._invalidate_bytes_cache()
+                self._attrs_changed()
+                self.__attrs &= ~bit
 
     # To be used on very specific case only
     def _set_attr_direct(self, name):
-        if name not in self.__attrs:
+        bit = self._attr_bits.get(name)
+        if bit is None:
             raise ValueError
-        self.__attrs[name] = True
+        if not self.__attrs & bit:
+            self._invalidate_bytes_cache()
+            self._attrs_changed()
+            self.__attrs |= bit
 
     # To be used on very specific case only
     def _clear_attr_direct(self, name):
-        if name not in self.__attrs:
+        bit = self._attr_bits.get(name)
+        if bit is None:
             raise ValueError
-        self.__attrs[name] = False
+        if self.__attrs & bit:
+            self._invalidate_bytes_cache()
+            self._attrs_changed()
+            self.__attrs &= ~bit
 
     def is_attr_set(self, name):
-        if name not in self.__attrs:
+        bit = self._attr_bits.get(name)
+        if bit is None:
             raise ValueError
-        return self.__attrs[name]
+        return bool(self.__attrs & bit)
 
     def set_child_attr(self, name, conf=None, all_conf=False, recursive=False):
         pass
@@ -941,7 +1126,7 @@ class NodeInternals(object):
             return True
 
         for c in criteria:
-            if not self.__attrs[c]:
+            if not self.__attrs & self._attr_bits[c]:
                 return False
         return True
 
@@ -978,7 +1163,7 @@ class NodeInternals(object):
             return True
 
         for c in criteria:
-            if self.__attrs[c]:
+            if self.__attrs & self._attr_bits[c]:
                 return False
         return True
 
@@ -1238,6 +1423,29 @@ class NodeInternalsCriteria(object):
 
         return False
 
+    def get_fingerprint(self):
+        """
+        Return a hashable summary of the criteria, or None if matching them depends on
+        something that is not tracked by the cache of :meth:`Node.get_reachable_nodes`
+        (node subkinds depend on the node values and customizations could be changed in place).
+        """
+        if (
+            self.node_subkinds is not None
+            or self.negative_node_subkinds is not None
+            or self.mandatory_custo is not None
+            or self.negative_custo is not None
+        ):
+            return None
+
+        csts = self._node_constraints
+        return (
+            _to_tuple(self.mandatory_attrs),
+            _to_tuple(self.negative_attrs),
+            _to_tuple(self.node_kinds),
+            _to_tuple(self.negative_node_kinds),
+            None if csts is None else frozenset(csts.items()),
+        )
+
 
 class DynNode_Helpers(object):
     determinist = True
@@ -1341,6 +1549,8 @@ class DynNode_Helpers(object):
 
 
 class NodeInternals_Empty(NodeInternals):
+    __slots__ = ()
+
     def _get_value(
         self, conf=None, recursive=True, return_node_internals=False, restrict_csp=False
     ):
@@ -1377,6 +1587,17 @@ class NodeInternals_Empty(NodeInternals):
 class NodeInternals_GenFunc(NodeInternals):
     default_custo = GenFuncCusto()
 
+    __slots__ = (
+        "_generated_node",
+        "generator_func",
+        "generator_arg",
+        "node_arg",
+        "pdepth",
+        "_node_helpers",
+        "provide_helpers",
+        "_trigger_registered",
+    )
+
     def _init_specific(self, arg):
         self._generated_node = None
         self.generator_func = None
@@ -1432,7 +1653,9 @@ class NodeInternals_GenFunc(NodeInternals):
                 self.generated_node.clear_attr(name, recursive=True)
         return True
 
-    def _make_private_specific(self, ignore_frozen_state, accept_external_entanglement):
+    def _make_private_specific(
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
+    ):
         # Note that the 'node_arg' attribute is directly dealt with in
         # Node.__init__() during copy (which calls self.make_args_private()),
         # because the new Node to point to is unknown at this local
@@ -1446,6 +1669,7 @@ class NodeInternals_GenFunc(NodeInternals):
                 base_node=self._generated_node,
                 ignore_frozen_state=ignore_frozen_state,
                 accept_external_entanglement=accept_external_entanglement,
+                cow=cow,
             )
             self._generated_node._reset_depth(parent_depth=self.pdepth)
             self._generated_node.set_env(self.env)
@@ -1562,6 +1786,8 @@ class NodeInternals_GenFunc(NodeInternals):
 
     def reset_generator(self):
         self._generated_node = None
+        self._structure_changed()
+        self._invalidate_bytes_cache()
 
     @property
     def generated_node(self):
@@ -1600,6 +1826,8 @@ class NodeInternals_GenFunc(NodeInternals):
                 self.set_private(private_val)
 
             self._generated_node = ret
+            self._structure_changed()
+            self._invalidate_bytes_cache()
             self._generated_node._reset_depth(parent_depth=self.pdepth)
             self._generated_node.set_env(self.env)
 
@@ -1667,6 +1895,18 @@ class NodeInternals_GenFunc(NodeInternals):
 
         return (ret, False)
 
+    def _get_cached_bytes(self, parent=None):
+        if (
+            self._generated_node is None
+            or not self.is_attr_set(NodeInternals.Freezable)
+            or (self.custo.trigger_last_mode and not self._trigger_registered)
+        ):
+            return None
+        val = self._generated_node._get_cached_bytes(parent=self)
+        if val is not None and parent is not None:
+            self._register_bytes_cache_parent(parent)
+        return val
+
     def _get_delayed_value(self, conf=None, recursive=True, restrict_csp=False):
         self.reset_generator()
         ret = self.generated_node._get_value(conf=conf, recursive=recursive,
@@ -1913,25 +2153,45 @@ class NodeInternals_GenFunc(NodeInternals):
 
 
 class NodeInternals_Term(NodeInternals):
+    __slots__ = ("_frozen_node",)
+
     def _init_specific(self, arg):
         self.frozen_node = None
 
+    @property
+    def frozen_node(self):
+        return self._frozen_node
+
+    @frozen_node.setter
+    def frozen_node(self, val):
+        self._frozen_node = val
+        if self._bytes_cache_parents:
+            self._invalidate_bytes_cache()
+
+    def _get_cached_bytes(self, parent=None):
+        val = self._frozen_node
+        if val is not None and parent is not None:
+            self._register_bytes_cache_parent(parent)
+        return val
+
     @staticmethod
     def _convert_to_internal_repr(val):
         return convert_to_internal_repr(val)
 
-    def _make_private_specific(self, ignore_frozen_state, accept_external_entanglement):
+    def _make_private_specific(
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
+    ):
         if ignore_frozen_state:
             self.frozen_node = None
         else:
             self.frozen_node = self.frozen_node
 
         self._make_private_term_specific(
-            ignore_frozen_state, accept_external_entanglement
+            ignore_frozen_state, accept_external_entanglement, cow=cow
         )
 
     def _make_private_term_specific(
-        self, ignore_frozen_state, accept_external_entanglement
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
     ):
         pass
 
@@ -1987,6 +2247,11 @@ class NodeInternals_Term(NodeInternals):
         if self.absorb_constraints is not None:
             constraints = self.absorb_constraints
 
+        if isinstance(blob, memoryview):
+            blob = self._get_blob_for_absorption(
+                blob, constraints, pending_postpone_desc
+            )
+
         if self.absorb_helper is not None:
             try:
                 status, off, size = self.absorb_helper(blob, constraints, self)
@@ -2018,6 +2283,17 @@ class NodeInternals_Term(NodeInternals):
 
         return st, off, size, None
 
+    def _get_blob_for_absorption(self, blob, constraints, pending_postpone_desc):
+        """
+        Provide the bytes to absorb from the view on the remaining data handed over
+        by a non-terminal node. When the absorption has to start at the beginning of the blob
+        (no pending postponed node), only the part the node can consume is copied.
+        """
+        span = None
+        if self.absorb_helper is None and pending_postpone_desc is None:
+            span = self.absorb_span(constraints)
+        return blob.tobytes() if span is None else blob[:span].tobytes()
+
     def cancel_absorb(self):
         self.do_revert_absorb()
         self.do_cleanup_absorb()
@@ -2025,6 +2301,9 @@ class NodeInternals_Term(NodeInternals):
     def confirm_absorb(self):
         self.do_cleanup_absorb()
 
+    def absorb_span(self, constraints):
+        return None
+
     def absorb_auto_helper(self, blob, constraints):
         raise NotImplementedError
 
@@ -2119,12 +2398,118 @@ class NodeInternals_Term(NodeInternals):
         pass
 
 
+class _SharedValueType(object):
+    """
+    Holder of a value type shared between the :class:`NodeInternals_TypedValue` object
+    that owns it and the ones created through a copy-on-write clone
+    (refer to :meth:`Node.get_clone`). The latter are the *dependents* of the holder and
+    have to make the value type private before any access to it.
+    """
+
+    __slots__ = ("vt", "dependents")
+
+    def __init__(self, vt):
+        self.vt = vt
+        self.dependents = None  # created on the first copy-on-write clone
+
+    def add_dependent(self, node_internals):
+        if self.dependents is None:
+            self.dependents = weakref.WeakSet()
+        self.dependents.add(node_internals)
+
+    def remove_dependent(self, node_internals):
+        if self.dependents is not None:
+            self.dependents.discard(node_internals)
+
+    def has_dependents(self):
+        return bool(self.dependents)
+
+    def __getstate__(self):
+        return self.vt, None if self.dependents is None else list(self.dependents)
+
+    def __setstate__(self, state):
+        self.vt = state[0]
+        self.dependents = None if state[1] is None else weakref.WeakSet(state[1])
+
+
 class NodeInternals_TypedValue(NodeInternals_Term):
+    # __weakref__ is needed by _SharedValueType
+    __slots__ = ("_vt_holder", "_vt_cow_pending", "__fuzzy_values", "__weakref__")
+
     def _init_specific(self, arg):
         NodeInternals_Term._init_specific(self, arg)
         self.value_type = None
         self.__fuzzy_values = None
 
+    @property
+    def value_type(self):
+        # A default value is provided, because this property is also reached
+        # through __getattr__() while the object is not fully initialized (e.g., during copy)
+        holder = getattr(self, "_vt_holder", None)
+        if holder is None:
+            return None
+        if self._vt_cow_pending or holder.dependents:
+            self._materialize_value_type()
+        return self._vt_holder.vt
+
+    @value_type.setter
+    def value_type(self, vt):
+        holder = getattr(self, "_vt_holder", None)
+        if holder is not None and self._vt_cow_pending:
+            holder.remove_dependent(self)
+        self._vt_holder = None if vt is None else _SharedValueType(vt)
+        self._vt_cow_pending = None
+
+    def _materialize_value_type(self):
+        """
+        Stop sharing the value type with other nodes (copy-on-write).
+        If this object owns the value type, its dependents make their private copies.
+        Otherwise, the value type is copied, and the changes postponed during the
+        clone are applied.
+        """
+        holder = self._vt_holder
+        pending = self._vt_cow_pending
+
+        if not pending:
+            for dep in list(holder.dependents):
+                dep._materialize_value_type()
+            return
+
+        self._vt_cow_pending = None
+        holder.remove_dependent(self)
+        vt = copy.copy(holder.vt)
+        for forget_current_state, determinist in pending:
+            vt.make_private(forget_current_state=forget_current_state)
+            if determinist:
+                vt.make_determinist()
+            else:
+                vt.make_random()
+        self._vt_holder = _SharedValueType(vt)
+
+    def _get_value_type_for_reading(self):
+        """
+        Return the value type for a read-only access to its current value. If the value type
+        is still shared and already holds a drawn value, no private copy is made.
+        """
+        holder = self._vt_holder
+        pending = self._vt_cow_pending
+        if pending and any(forget for forget, _ in pending):
+            return self.value_type
+        vt = holder.vt
+        if getattr(vt, "drawn_val", None) is None:
+            return self.value_type
+        return vt
+
+    def is_value_type_shared(self):
+        """
+        Returns:
+          bool: True if the value type is still shared because of a copy-on-write clone
+        """
+        holder = getattr(self, "_vt_holder", None)
+        return holder is not None and (
+            bool(self._vt_cow_pending) or holder.has_dependents()
+        )
+
     def _make_specific(self, name):
         if name == NodeInternals.Determinist:
             self.value_type.make_determinist()
@@ -2167,14 +2552,18 @@ class NodeInternals_TypedValue(NodeInternals_Term):
         return self.__fuzzy_values
 
     def _make_private_term_specific(
-        self, ignore_frozen_state, accept_external_entanglement
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
     ):
-        self.value_type = copy.copy(self.value_type)
-        self.value_type.make_private(forget_current_state=ignore_frozen_state)
-        if self.is_attr_set(NodeInternals.Determinist):
-            self.value_type.make_determinist()
-        else:
-            self.value_type.make_random()
+        if self._vt_holder is not None:
+            pending = [] if self._vt_cow_pending is None else self._vt_cow_pending
+            self._vt_cow_pending = pending + [
+                (ignore_frozen_state, self.is_attr_set(NodeInternals.Determinist))
+            ]
+            if cow:
+                # the copy of the value type is postponed until someone accesses it
+                self._vt_holder.add_dependent(self)
+            else:
+                self._materialize_value_type()
         self.__fuzzy_values = copy.copy(self.__fuzzy_values)
 
     def _get_value_specific(self, conf=None, recursive=True):
@@ -2184,7 +2573,10 @@ class NodeInternals_TypedValue(NodeInternals_Term):
     def get_raw_value(self, **kwargs):
         if not self.is_frozen():
             self._get_value()
-        return self.value_type.get_current_raw_val(**kwargs)
+        return self._get_value_type_for_reading().get_current_raw_val(**kwargs)
+
+    def absorb_span(self, constraints):
+        return self.value_type.absorb_span(constraints)
 
     def absorb_auto_helper(self, blob, constraints):
         return self.value_type.absorb_auto_helper(blob, constraints)
@@ -2227,11 +2619,16 @@ class NodeInternals_TypedValue(NodeInternals_Term):
             return False
 
     def pretty_print(self, max_size=None):
-        return self.value_type.pretty_print(max_size=max_size)
+        return self._get_value_type_for_reading().pretty_print(max_size=max_size)
 
     def __getattr__(self, name):
-        vt = self.__getattribute__("value_type")
-        if hasattr(vt, name):
+        try:
+            holder = object.__getattribute__(self, "_vt_holder")
+        except AttributeError:
+            holder = None
+        if holder is not None and hasattr(holder.vt, name):
+            # the value type is only made private if the attribute exists
+            vt = self.__getattribute__("value_type")
             # to avoid looping in __getattr__
             return vt.__getattribute__(name)
         else:
@@ -2241,6 +2638,8 @@ class NodeInternals_TypedValue(NodeInternals_Term):
 class NodeInternals_Func(NodeInternals_Term):
     default_custo = FuncCusto()
 
+    __slots__ = ("fct", "node_arg", "fct_arg", "_node_helpers", "provide_helpers")
+
     def _init_specific(self, arg):
         NodeInternals_Term._init_specific(self, arg)
         self.fct = None
@@ -2290,11 +2689,6 @@ class NodeInternals_Func(NodeInternals_Term):
         else:
             self.custo = copy.copy(custo)
 
-        if self.custo.frozen_args_mode:
-            self._get_value_specific = self.__get_value_specific_mode1
-        else:
-            self._get_value_specific = self.__get_value_specific_mode2
-
     def set_clone_info(self, info, node):
         self._node_helpers.set_graph_info(node, info)
 
@@ -2407,18 +2801,13 @@ class NodeInternals_Func(NodeInternals_Term):
                 self.node_arg = l
 
     def _make_private_term_specific(
-        self, ignore_frozen_state, accept_external_entanglement
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
     ):
         # Note that the 'node_arg' attribute is directly dealt with in
         # Node.__init__() during copy (which calls
         # self.make_args_private()), because the new Node to point to
         # is unknown at this local stage.
         self.fct_arg = copy.copy(self.fct_arg)
-
-        # This is MANDATORY, because when this object is copied, the
-        # new _get_value_specific() still points to the bounded method
-        # of the copied object, and thus the bounded 'node_arg'
-        # attribute used by this function is not what we want for the new object
         self.customize(self.custo)
 
         self._node_helpers = copy.copy(self._node_helpers)
@@ -2432,7 +2821,7 @@ class NodeInternals_Func(NodeInternals_Term):
 
         sz = len(convert_to_internal_repr(self._get_value()))
 
-        self._set_frozen_value(blob[:sz])
+        self._set_frozen_value(bytes(blob[:sz]))
 
         return AbsorbStatus.Absorbed, 0, sz, None
 
@@ -2443,7 +2832,10 @@ class NodeInternals_Func(NodeInternals_Term):
         pass
 
     def _get_value_specific(self, conf, recursive):
-        raise NotImplementedError
+        if self.custo.frozen_args_mode:
+            return self.__get_value_specific_mode1(conf, recursive)
+        else:
+            return self.__get_value_specific_mode2(conf, recursive)
 
     def _unfreeze_without_state_change(self, current_val):
         # 'dont_change_state' is not supported in this case. But
@@ -2587,6 +2979,31 @@ class NodeInternals_NonTerm(NodeInternals):
     through a specific grammar...
     """
 
+    __slots__ = (
+        "_bytes_cache",
+        "_frozen_node_list",
+        "_nodes_drawn_qty",
+        "_reevaluation_pending",
+        "combinatory_complete",
+        "component_seed",
+        "current_flattened_nodelist",
+        "current_pick_section",
+        "current_picked_node_idx",
+        "cursor_maj",
+        "cursor_min",
+        "encoder",
+        "excluded_components",
+        "exhausted_pick_cases",
+        "exhausted_shapes",
+        "previous_cursor_maj",
+        "previous_cursor_min",
+        "separator",
+        "subnodes_attrs",
+        "subnodes_order",
+        "subnodes_order_total_weight",
+        "subnodes_set",
+    )
+
     class NodeAttrs(object):
         _default_qty = None
         _min = None
@@ -2721,9 +3138,90 @@ class NodeInternals_NonTerm(NodeInternals):
 
         self.reset()
 
+    @property
+    def frozen_node_list(self):
+        return self._frozen_node_list
+
+    @frozen_node_list.setter
+    def frozen_node_list(self, node_list):
+        self._frozen_node_list = node_list
+        self._frozen_node_list_changed()
+
+    def _frozen_node_list_changed(self):
+        self._structure_changed()
+        self._invalidate_bytes_cache()
+
+    def _invalidate_bytes_cache(self):
+        self._bytes_cache = None
+        NodeInternals._invalidate_bytes_cache(self)
+
+    def _get_cached_bytes(self, parent=None):
+        val = self._bytes_cache
+        if val is None:
+            val = self._compute_bytes_cache()
+            if val is None:
+                return None
+            self._bytes_cache = val
+        if parent is not None:
+            self._register_bytes_cache_parent(parent)
+        return val
+
+    def _compute_bytes_cache(self):
+        """
+        Serialize the frozen node from the values of its subnodes (using their own caches
+        for the non-terminal ones). Any situation where self._get_value() would change the
+        frozen node (disabled nodes, pending existence conditions, separators to remove,
+        collapse padding) is not handled and makes the method return None.
+        """
+        node_list = self._frozen_node_list
+        if node_list is None or self.custo.collapse_padding_mode:
+            return None
+
+        if node_list:
+            node_env = node_list[0].env
+            if (
+                node_env
+                and node_env.delayed_jobs_enabled
+                and node_env.djobs_exists(Node.DJOBS_PRIO_nterm_existence)
+            ):
+                return None
+
+        sep = self.separator
+        check_no_children = sep is not None and not sep.always
+
+        l = []
+        for n in node_list:
+            if n.is_attr_set(NodeInternals.DISABLED):
+                return None
+            val = n._get_cached_bytes(parent=self)
+            if val is None:
+                return None
+            if (
+                check_no_children
+                and not n.is_attr_set(NodeInternals.AutoSeparator)
+                and n.is_nonterm()
+                and n.has_no_children()
+            ):
+                return None
+            l.append(val)
+
+        if (
+            check_no_children
+            and not sep.suffix
+            and node_list
+            and node_list[-1].is_attr_set(NodeInternals.AutoSeparator)
+        ):
+            return None
+
+        blob = b"".join(l)
+        if self.encoder:
+            blob = self.encoder.encode(blob)
+        return blob
+
     def reset(
         self, nodes_drawn_qty=None, custo=None, exhaust_info=None, preserve_node=False
     ):
+        self._structure_changed()
         self.subnodes_set = set()
         self.subnodes_order = []
         self.subnodes_order_total_weight = 0
@@ -2748,6 +3246,7 @@ class NodeInternals_NonTerm(NodeInternals):
     def set_encoder(self, encoder):
         self.encoder = encoder
         encoder.reset()
+        self._invalidate_bytes_cache()
 
     def __iter_csts(self, node_list):
         for delim, sublist in node_list:
@@ -2987,7 +3486,10 @@ class NodeInternals_NonTerm(NodeInternals):
 
                             modified_csts[id(node_list)].append(idx)
 
-    def _make_private_specific(self, ignore_frozen_state, accept_external_entanglement):
+    def _make_private_specific(
+        self, ignore_frozen_state, accept_external_entanglement, cow=False
+    ):
+        self._bytes_cache = None
         if self.encoder:
             self.encoder = copy.copy(self.encoder)
             if ignore_frozen_state:
@@ -3002,6 +3504,7 @@ class NodeInternals_NonTerm(NodeInternals):
         accept_external_entanglement,
         entangled_set,
         delayed_node_internals,
+        cow=False,
     ):
         subnodes_order, subnodes_attrs = self.get_subnodes_csts_copy(node_dico)
 
@@ -3090,11 +3593,13 @@ class NodeInternals_NonTerm(NodeInternals):
                         accept_external_entanglement=accept_external_entanglement,
                         entangled_set=entangled_set,
                         delayed_node_internals=delayed_node_internals,
+                        cow=cow,
                     )
                     e.internals[c].make_private(
                         ignore_frozen_state=ignore_frozen_state,
                         accept_external_entanglement=accept_external_entanglement,
                         delayed_node_internals=delayed_node_internals,
+                        cow=cow,
                     )
 
                 elif e.is_func(c) or e.is_genfunc(c):
@@ -3104,6 +3609,7 @@ class NodeInternals_NonTerm(NodeInternals):
                         ignore_frozen_state=ignore_frozen_state,
                         accept_external_entanglement=accept_external_entanglement,
                         delayed_node_internals=delayed_node_internals,
+                        cow=cow,
                     )
 
                 else:
@@ -3111,6 +3617,7 @@ class NodeInternals_NonTerm(NodeInternals):
                         ignore_frozen_state=ignore_frozen_state,
                         accept_external_entanglement=accept_external_entanglement,
                         delayed_node_internals=delayed_node_internals,
+                        cow=cow,
                     )
 
     def get_subnodes_csts_copy(self, node_dico=None):
@@ -4045,8 +4552,8 @@ class NodeInternals_NonTerm(NodeInternals):
                     list_to_enc = list(flatten(list_to_enc))
 
                 if list_to_enc:
-                    if issubclass(list_to_enc[0].__class__, NodeInternals):
-                        list_to_enc = list(map(tobytes_helper, list_to_enc))
+                    # the list may mix NodeInternals and bytes (from encoded or cached subnodes)
+                    list_to_enc = list(map(tobytes_helper, list_to_enc))
                     blob = b"".join(list_to_enc)
                 else:
                     blob = b""
@@ -4059,6 +4566,15 @@ class NodeInternals_NonTerm(NodeInternals):
         l = []
         node_list, was_not_frozen = self.get_subnodes_with_csts()
 
+        # the bytes cached by frozen non-terminal subnodes are used instead of walking them
+        # again, except when the subnodes have to be visited (CSP, collapse padding, color)
+        use_bytes_cache = (
+            conf is None
+            and not restrict_csp
+            and not self.custo.collapse_padding_mode
+            and not (self.env is not None and self.env.color_enabled)
+        )
+
         djob_group_created = False
         disabled_node = False
         node_with_no_children = False
@@ -4083,14 +4599,19 @@ class NodeInternals_NonTerm(NodeInternals):
                     )
                     disabled_node = True
             else:
-                val = n._get_value(conf=conf, recursive=recursive,
-                                   return_node_internals=True, restrict_csp=restrict_csp)
+                val = None
+                if use_bytes_cache and n.cc is not None:
+                    val = n.cc._bytes_cache
+                if val is None:
+                    val = n._get_value(conf=conf, recursive=recursive,
+                                       return_node_internals=True, restrict_csp=restrict_csp)
 
                 if node_with_no_children and n.is_attr_set(NodeInternals.AutoSeparator):
                     # print(f'\nNode with no children - step 2 / {idx} {n.name}')
                     # print_node_list(self.frozen_node_list)
                     node_with_no_children = False
                     self.frozen_node_list.pop(idx)
+                    self._frozen_node_list_changed()
                     continue
                 elif (self.separator is not None and not self.separator.always
                         and not n.is_attr_set(NodeInternals.AutoSeparator)
@@ -4110,6 +4631,7 @@ class NodeInternals_NonTerm(NodeInternals):
                 #  --> TBC
                 disabled_node = False
                 self.frozen_node_list.pop(idx - removed_cpt)
+                self._frozen_node_list_changed()
                 removed_cpt += 1
                 continue
 
@@ -4126,6 +4648,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     and isinstance(l[-1], NodeInternals) and l[-1].is_attr_set(NodeInternals.AutoSeparator)):
                 l.pop(-1)
                 self.frozen_node_list.pop(-1)
+                self._frozen_node_list_changed()
 
         if node_list:
             node_env = node_list[0].env
@@ -4178,11 +4701,12 @@ class NodeInternals_NonTerm(NodeInternals):
         raw_list = list(flatten(raw_list))
 
         def tobytes_helper(node_internals):
+            if isinstance(node_internals, bytes):
+                return node_internals
             return node_internals._get_value(return_node_internals=False)[0]
 
         if raw_list:
-            if issubclass(raw_list[0].__class__, NodeInternals):
-                raw_list = list(map(tobytes_helper, raw_list))
+            raw_list = list(map(tobytes_helper, raw_list))
             raw = b"".join(raw_list)
         else:
             raw = b""
@@ -4214,6 +4738,7 @@ class NodeInternals_NonTerm(NodeInternals):
             node_list.pop(idx)
             for i, n in enumerate(expand_list):
                 node_list.insert(idx + i, n)
+            node._invalidate_bytes_cache()
 
         return len(expand_list)
 
@@ -4223,6 +4748,7 @@ class NodeInternals_NonTerm(NodeInternals):
         node.clear_attr(NodeInternals.DISABLED)
         if idx < len(node_list):
             node_list.pop(idx)
+            node._invalidate_bytes_cache()
 
     def set_separator_node(
         self, sep_node, prefix=True, suffix=True, unique=False, always=False
@@ -4239,6 +4765,7 @@ class NodeInternals_NonTerm(NodeInternals):
         self.separator = NodeSeparator(
             sep_node, prefix=prefix, suffix=suffix, unique=unique, always=always
         )
+        self._frozen_node_list_changed()
 
     def get_separator_node(self):
         if self.separator is not None:
@@ -4273,6 +4800,7 @@ class NodeInternals_NonTerm(NodeInternals):
         return len(self.frozen_node_list)
 
     def replace_subnode(self, old, new):
+        self._structure_changed()
         self.subnodes_set.remove(old)
         self.subnodes_set.add(new)
 
@@ -4321,6 +4849,7 @@ class NodeInternals_NonTerm(NodeInternals):
             or (after is None and before is None and idx is None)
         )
 
+        self._structure_changed()
         self.subnodes_set.add(node)
         self.subnodes_attrs[node] = NodeInternals_NonTerm.NodeAttrs()
         self.subnodes_attrs[node].default_qty = default_qty
@@ -4394,6 +4923,7 @@ class NodeInternals_NonTerm(NodeInternals):
 
             for _ in range(default_qty if default_qty is not None else min):
                 self.frozen_node_list.insert(f_idx, node)
+            self._frozen_node_list_changed()
 
     def _parse_node_desc(self, node_desc):
         mini, maxi = self.subnodes_attrs[node_desc].qty
@@ -4613,6 +5143,8 @@ class NodeInternals_NonTerm(NodeInternals):
         """
 
         if self.encoder:
+            if isinstance(blob, memoryview):
+                blob = blob.tobytes()
             original_blob_size = len(blob)
             if isinstance(self.encoder, enc.EncoderAbsorptionHelper):
                 try:
@@ -4664,6 +5196,11 @@ class NodeInternals_NonTerm(NodeInternals):
 
             original_decoded_blob = blob
 
+        # The subnodes are absorbed through a view on the blob, so that walking
+        # through it does not copy the remaining data at each step.
+        if not isinstance(blob, memoryview):
+            blob = memoryview(blob)
+
         abs_excluded_components = []
         abs_exhausted = False
         status = AbsorbStatus.Reject
@@ -4687,7 +5224,7 @@ class NodeInternals_NonTerm(NodeInternals):
 
             if st == AbsorbStatus.Reject:
                 if DEBUG:
-                    print("REJECTED: SEPARATOR, blob: %r ..." % blob[:4])
+                    print("REJECTED: SEPARATOR, blob: %r ..." % bytes(blob[:4]))
                 abort = True
             elif st == AbsorbStatus.Absorbed or st == AbsorbStatus.FullyAbsorbed:
                 if off != 0:
@@ -4697,7 +5234,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     if DEBUG:
                         print(
                             "ABSORBED: SEPARATOR, blob: %r ..., consumed: %d"
-                            % (blob[:4], sz)
+                            % (bytes(blob[:4]), sz)
                         )
                     blob = blob[sz:]
                     consumed_size += sz
@@ -4786,7 +5323,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     if DEBUG:
                         print(
                             "\nREJECT: %s, size: %d, blob: %r ..."
-                            % (node.name, len(blob), blob[:4])
+                            % (node.name, len(blob), bytes(blob[:4]))
                         )
                     if min_node == 0:
                         # if DEBUG:
@@ -4803,7 +5340,13 @@ class NodeInternals_NonTerm(NodeInternals):
                     if DEBUG:
                         print(
                             "\nABSORBED: %s, abort: %r, off: %d, consumed_sz: %d, blob: %r..."
-                            % (node.name, abort, off, sz, blob[off : off + sz][:100])
+                            % (
+                                node.name,
+                                abort,
+                                off,
+                                sz,
+                                bytes(blob[off : off + sz][:100]),
+                            )
                         )
                         print(
                             f'\nPostpone Node: {postponed.name if postponed else "N/A"} ({postponed!r})'
@@ -4833,7 +5376,7 @@ class NodeInternals_NonTerm(NodeInternals):
 
                         # we only support one postponed node between two nodes
                         st2, off2, sz2, name2 = postponed.absorb(
-                            blob[:off],
+                            blob[:off].tobytes(),
                             constraints,
                             conf=conf,
                             pending_postpone_desc=None,
@@ -4849,7 +5392,7 @@ class NodeInternals_NonTerm(NodeInternals):
                         ):
                             if DEBUG:
                                 print('\nABSORBED (of postponed): %s, off: %d, consumed_sz: %d, blob: %r ...' \
-                                    % (postponed.name, off2, sz2, blob[off2:sz2][:150]))
+                                    % (postponed.name, off2, sz2, bytes(blob[off2:sz2][:150])))
 
                             if (
                                 pending_upper_postpone is not None
@@ -4920,11 +5463,11 @@ class NodeInternals_NonTerm(NodeInternals):
 
             if reject_with_min_null and self.separator is not None and self.separator.always:
                 if DEBUG:
-                    print(f'\n Try absorb separator\n  - {blob}\n  - {consumed_size}')
+                    print(f'\n Try absorb separator\n  - {bytes(blob)}\n  - {consumed_size}')
 
                 abort, blob, consumed_size, new_sep = _try_separator_absorption_with(blob, consumed_size)
                 if DEBUG:
-                    print(f'\n Try absorb separator, success={not abort}, cons_sz={consumed_size}, blob={blob}')
+                    print(f'\n Try absorb separator, success={not abort}, cons_sz={consumed_size}, blob={bytes(blob)}')
                 if not abort:
                     tmp_list.append(new_sep)
                 abort = False
@@ -4956,6 +5499,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     idx += 1
                 if prepend_postponed is not None:
                     self.frozen_node_list.append(prepend_postponed)
+                    self._frozen_node_list_changed()
                     pending_postponed_to_send_back = None
                 self.frozen_node_list += tmp_list
 
@@ -4996,6 +5540,7 @@ class NodeInternals_NonTerm(NodeInternals):
                     break
                 else:
                     self.frozen_node_list.append(new_sep)
+                    self._frozen_node_list_changed()
 
             postponed_node_desc = None
             first_pass = True
@@ -5118,7 +5663,9 @@ class NodeInternals_NonTerm(NodeInternals):
                                             val |= fvt.BitField.padding_one[
                                                 vt.padding_size
                                             ]
-                                        partial_blob += struct.pack("B", val)
+                                        partial_blob = partial_blob.tobytes() + struct.pack(
+                                            "B", val
+                                        )
                                         byte_aligned = False
                                     else:
                                         byte_aligned = True
@@ -5472,9 +6019,10 @@ class NodeInternals_NonTerm(NodeInternals):
                 if not self.separator.suffix and not self.separator.always:
                     # TODO: check self.separator.always is maybe not always enough
                     sep = self.frozen_node_list.pop(-1)
+                    self._frozen_node_list_changed()
                     data = sep._tobytes()
                     consumed_size = consumed_size - len(data)
-                    blob = blob + data
+                    blob = memoryview(blob.tobytes() + data)
 
             if not abort:
                 status = AbsorbStatus.Absorbed
@@ -5960,20 +6508,24 @@ class NodeAbstraction(object):
         pass
 
 
-class NodeSemantics(object):
+class NodeSemantics(_GraphTracked):
     """
     To be used while defining a data model as a means to associate
     semantics to an Node.
     """
 
+    __slots__ = ("__attrs",)
+
     def __init__(self, attrs=None):
         self.__attrs = attrs if isinstance(attrs, (list, tuple)) else [attrs]
+        self._graph_versions = None
 
     def __str__(self):
         return " ".join(self.__attrs)
 
     def add_attributes(self, attrs):
         self.__attrs += attrs
+        self._attrs_changed()
 
     def _match_optionalbut1_criteria(self, criteria):
         if criteria is None:
@@ -6059,6 +6611,7 @@ class NodeSemantics(object):
         all your metadata private (if needed).
         """
         self.__attrs = copy.copy(self.__attrs)
+        self._graph_versions = None
 
 
 class NodeSemanticsCriteria(object):
@@ -6125,6 +6678,17 @@ class NodeSemanticsCriteria(object):
     def get_mandatory_criteria(self):
         return self.__mandatory
 
+    def get_fingerprint(self):
+        """
+        Return a hashable summary of the criteria (refer to :meth:`Node.get_reachable_nodes`)
+        """
+        return (
+            _to_tuple(self.__optionalbut1),
+            _to_tuple(self.__mandatory),
+            _to_tuple(self.__exclusive),
+            _to_tuple(self.__negative),
+        )
+
     def get_optionalbut1_criteria(self):
         return self.__optionalbut1
 
@@ -6132,6 +6696,218 @@ class NodeSemanticsCriteria(object):
         return self.__negative
 
 
+class _PathsHTable(collections.OrderedDict):
+    """
+    Paths of a node graph as computed by Node.get_all_paths(), along with what is needed to
+    know if they are still up to date and the index built on top of them.
+    """
+
+    def __init__(self, params=None, graph_version=None):
+        collections.OrderedDict.__init__(self)
+        self.params = params
+        self.graph_version = graph_version
+        self.structure_version = None
+        # True if the paths depend on something else than the graph structure
+        # (e.g., the freeze state of a non-mutable generator node)
+        self.volatile = False
+        self._index = None
+
+    def is_up_to_date(self, params):
+        return (
+            not self.volatile
+            and self.params == params
+            and self.structure_version == self.graph_version.structure
+        )
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = _PathIndex(self)
+        return self._index
+
+
+class _ReachableNodesCache(dict):
+    """
+    Outcomes of Node.get_reachable_nodes() on a node graph, keyed by the search parameters.
+    An entry is only valid as long as neither the graph structure nor the node attributes
+    have changed since it was recorded. The cache is neither pickled nor copied.
+    """
+
+    max_entries = 32
+    # number of visits of nodes that make a search outcome impossible to cache
+    volatile_visits = 0
+
+    def __init__(self, graph_version):
+        dict.__init__(self)
+        self.graph_version = graph_version
+
+    def __reduce__(self):
+        return (self.__class__, (_GraphVersion(),))
+
+    def get_nodes(self, key):
+        entry = self.get(key)
+        if entry is None or entry[0] != (
+            self.graph_version.structure,
+            self.graph_version.attrs,
+        ):
+            return None
+        return entry[1]
+
+    def set_nodes(self, key, nodes):
+        if len(self) >= self.max_entries and key not in self:
+            self.clear()
+        self[key] = (
+            (self.graph_version.structure, self.graph_version.attrs),
+            nodes,
+        )
+
+
+class _PathIndex(object):
+    """
+    Trie of the paths of a node graph keyed by the node names. It is used to only look for
+    the paths that match a regexp within the subtrees that are compatible with the literal
+    prefix of this regexp, and to retrieve the paths leading to a specific node.
+    """
+
+    class TrieNode(object):
+        __slots__ = ("name", "parent", "children", "items")
+
+        def __init__(self, name, parent):
+            self.name = name
+            self.parent = parent
+            self.children = {}
+            self.items = []
+
+        def iter_subtree_items(self):
+            stack = [self]
+            while stack:
+                tnode = stack.pop()
+                yield from tnode.items
+                stack.extend(tnode.children.values())
+
+    _regexp_special_chars = frozenset(".^$*+?{}[]\\|()")
+
+    def __init__(self, htable):
+        self.items = []
+        self.root = _PathIndex.TrieNode(None, None)
+        self._tnodes_by_name = {}
+        self._paths_by_node = None
+
+        tnodes = {}
+        for path, node in htable.items():
+            if isinstance(path, tuple):
+                path = path[0]
+            tnode = tnodes.get(path)
+            if tnode is None:
+                parent_path, _, name = path.rpartition("/")
+                parent = tnodes[parent_path] if parent_path else self.root
+                tnode = _PathIndex.TrieNode(name, parent)
+                parent.children[name] = tnode
+                tnodes[path] = tnode
+                self._tnodes_by_name.setdefault(name, []).append(tnode)
+            tnode.items.append(len(self.items))
+            self.items.append((path, node))
+
+    def _get_literal_prefix(self, path_regexp):
+        """
+        Returns:
+            tuple: (anchored, literal prefix, True if the prefix ends the regexp) or None if
+              the regexp has no usable literal prefix
+        """
+        if not isinstance(path_regexp, str) or "|" in path_regexp:
+            return None
+
+        anchored = path_regexp.startswith("^")
+        start = idx = 1 if anchored else 0
+        while idx < len(path_regexp) and path_regexp[idx] not in self._regexp_special_chars:
+            idx += 1
+        literal = path_regexp[start:idx]
+        next_char = path_regexp[idx : idx + 1]
+        if next_char in ("*", "?", "{"):
+            # the last character is optional
+            literal = literal[:-1]
+        if not literal:
+            return None
+
+        return anchored, literal, path_regexp[idx:] == "$"
+
+    def _get_candidates(self, path_regexp):
+        """
+        Returns:
+            list: indexes of the items that may match `path_regexp` (in index order), or None
+              if every item has to be considered
+        """
+        prefix = self._get_literal_prefix(path_regexp)
+        if prefix is None:
+            return None
+        anchored, literal, terminal = prefix
+
+        names = literal.split("/")
+        if anchored:
+            tnodes = [self.root]
+        elif len(names) > 2:
+            # as regexps are not anchored, the first name could be the end of a node name
+            first = names.pop(0)
+            second = names.pop(0)
+            tnodes = [
+                tn
+                for tn in self._tnodes_by_name.get(second, [])
+                if tn.parent.name is not None and tn.parent.name.endswith(first)
+            ]
+        elif len(names) == 2:
+            first = names.pop(0)
+            tnodes = [
+                tn
+                for name, tn_list in self._tnodes_by_name.items()
+                if name.endswith(first)
+                for tn in tn_list
+            ]
+        else:
+            return None
+
+        for name in names[:-1]:
+            tnodes = [tn.children[name] for tn in tnodes if name in tn.children]
+
+        last = names[-1]
+        if terminal:
+            tnodes = [tn.children[last] for tn in tnodes if last in tn.children]
+            candidates = {i for tn in tnodes for i in tn.items}
+        else:
+            # subtrees may be nested if the regexp is not anchored
+            candidates = {
+                i
+                for tn in tnodes
+                for name, child in tn.children.items()
+                if name.startswith(last)
+                for i in child.iter_subtree_items()
+            }
+
+        return sorted(candidates)
+
+    def iter_items(self, path_regexp):
+        """
+        Iterate over the (path, node) items whose path matches `path_regexp` (as with
+        `re.search()`), in the order of Node.get_all_paths().
+        """
+        candidates = self._get_candidates(path_regexp)
+        if candidates is None:
+            items = self.items
+        else:
+            items = [self.items[i] for i in candidates]
+
+        regexp = re.compile(path_regexp)
+        for path, node in items:
+            if regexp.search(path):
+                yield path, node
+
+    def get_paths_of(self, node):
+        if self._paths_by_node is None:
+            self._paths_by_node = {}
+            for path, nd in self.items:
+                self._paths_by_node.setdefault(nd, []).append(path)
+        return self._paths_by_node.get(node, [])
+
+
 ##########################
 # Node func/class helpers #
 ##########################
@@ -6182,7 +6958,7 @@ def make_entangled_nodes(node_list):
 ########### Node Class ##############
 
 
-class Node(object):
+class Node(_GraphTracked):
     """A Node is the basic building-block used within a graph-based data model.
 
     Attributes:
@@ -6239,6 +7015,29 @@ class Node(object):
     CORRUPT_NODE_QTY = 7
     CORRUPT_SIZE_SYNC = 8
 
+    __slots__ = (
+        "internals",
+        "current_conf",
+        "name",
+        "description",
+        "env",
+        "_paths_htable",
+        "_reachable_nodes_cache",
+        # versions of the graph this node is the root of (refer to _GraphVersion)
+        "_graph_version",
+        "entangled_nodes",
+        "semantics",
+        "fuzz_weight",
+        "_post_freeze_handler",
+        "depth",
+        "tmp_ref_count",
+        "abs_postpone_sent_back",
+        "_delayed_jobs_called",
+        # user code (data models, disruptors, ...) may still tag nodes with their own
+        # attributes, the dict is only allocated for the nodes that are tagged
+        "__dict__",
+    )
+
     def __init__(
         self,
         name,
@@ -6253,6 +7052,7 @@ class Node(object):
         vt=None,
         new_env=False,
         description=None,
+        cow=False,
     ):
         """
         Args:
@@ -6281,16 +7081,23 @@ class Node(object):
            will be copied. Otherwise, the same will be used. If `ignore_frozen_state` is True, a
            new :class:`Env()` will be used.
           description (str): textual description of the node
+          cow (bool): [If `base_node` provided] If True, the value types of the typed nodes
+            are shared with `base_node` and only copied when one of the nodes accesses them
+            (copy-on-write). Refer to :meth:`Node.get_clone`.
         """
 
         assert "/" not in name  # '/' is a reserved character
 
         self.internals = {}
+        self.current_conf = None
         self.name = name
         self.description = description
         self.env = None
 
         self._paths_htable = None
+        self._reachable_nodes_cache = None
+        self._graph_version = None
+        self._graph_versions = None
 
         self.entangled_nodes = None
 
@@ -6334,6 +7141,7 @@ class Node(object):
                 accept_external_entanglement=accept_external_entanglement,
                 acceptance_set=acceptance_set,
                 preserve_node=False,
+                cow=cow,
             )
 
             if new_env and self.env is not None:
@@ -6380,6 +7188,7 @@ class Node(object):
         accept_external_entanglement=False,
         acceptance_set=None,
         new_env=True,
+        cow=False,
     ):
         """Create a new node. To be used within a graph-based data model.
 
@@ -6391,6 +7200,12 @@ class Node(object):
           acceptance_set (set): refer to the corresponding Node parameter
           new_env (bool): If True, the current :class:`Env()` will be copied.
             Otherwise, the same will be used.
+          cow (bool): If True, the clone is performed in copy-on-write mode. The value types
+            of the typed nodes (which account for most of the copy work) are shared between
+            the clone and the original graph, and a private copy of one of them is only made
+            when a node accesses it (to change its value, unfreeze it, fuzz it, etc.).
+            Reading the frozen value of an unmodified node does not trigger any copy.
+            The behavior of the clone is otherwise identical to a regular one.
 
         Returns:
           Node: duplicated Node object
@@ -6406,6 +7221,7 @@ class Node(object):
             accept_external_entanglement=accept_external_entanglement,
             acceptance_set=acceptance_set,
             new_env=new_env,
+            cow=cow,
         )
 
     def __copy__(self):
@@ -6413,8 +7229,20 @@ class Node(object):
         # It does not handle self.internals nor self.entangled_nodes which are copied
         # in a different way.
 
-        new_node = type(self)(self.name)
-        new_node.__dict__.update(self.__dict__)
+        if type(self) is Node:
+            # every attribute set by __init__() is overwritten right after
+            new_node = Node.__new__(Node)
+        else:
+            new_node = type(self)(self.name)
+        user_attrs, attrs = self.__getstate__()
+        for attr, val in attrs.items():
+            setattr(new_node, attr, val)
+        if user_attrs:
+            new_node.__dict__.update(user_attrs)
+        new_node._paths_htable = None
+        new_node._reachable_nodes_cache = None
+        new_node._graph_version = None
+        new_node._graph_versions = None
         if self.semantics is not None:
             new_node.semantics = copy.copy(self.semantics)
             new_node.semantics.make_private()
@@ -6429,6 +7257,7 @@ class Node(object):
         accept_external_entanglement=False,
         acceptance_set=None,
         preserve_node=True,
+        cow=False,
     ):
         """
         Set the contents of the node based on the one provided within
@@ -6451,6 +7280,7 @@ class Node(object):
             entangled nodes that could be referenced within the new node during the cloning process.
           copy_dico (dict): It is used internally during the cloning process,
             and should not be used for any functional purpose.
+          cow (bool): If True, perform a copy-on-write copy (refer to :meth:`Node.get_clone`).
 
         Returns:
           dict: For each subnodes of `base_node` (keys), reference the corresponding subnodes within the new node.
@@ -6460,6 +7290,7 @@ class Node(object):
         self._post_freeze_handler = base_node._post_freeze_handler
 
         if self.internals:
+            self._invalidate_bytes_cache()
             self.internals = {}
         if self.entangled_nodes:
             self.entangled_nodes = None
@@ -6489,6 +7320,7 @@ class Node(object):
                     accept_external_entanglement=accept_external_entanglement,
                     delayed_node_internals=delayed_node_internals,
                     forget_original_sync_objs=True,
+                    cow=cow,
                 )
                 new_internals.set_contents_from(self.internals[conf])
             else:
@@ -6497,6 +7329,7 @@ class Node(object):
                     accept_external_entanglement=accept_external_entanglement,
                     delayed_node_internals=delayed_node_internals,
                     forget_original_sync_objs=False,
+                    cow=cow,
                 )
 
             self.internals[conf] = new_internals
@@ -6514,11 +7347,13 @@ class Node(object):
                     accept_external_entanglement=accept_external_entanglement,
                     entangled_set=entangled_set,
                     delayed_node_internals=delayed_node_internals,
+                    cow=cow,
                 )
                 self.internals[conf].make_private(
                     ignore_frozen_state=ignore_frozen_state,
                     accept_external_entanglement=accept_external_entanglement,
                     delayed_node_internals=delayed_node_internals,
+                    cow=cow,
                 )
                 self._finalize_nonterm_node(conf)
 
@@ -6634,6 +7469,7 @@ class Node(object):
           None
         """
         self.fuzz_weight = int(w)
+        self._attrs_changed()
 
     def get_fuzz_weight(self):
         """Return the fuzzing weight of the node.
@@ -6654,6 +7490,7 @@ class Node(object):
           None
         """
         self.fuzz_weight = 1
+        self._attrs_changed()
         if recursive:
             for conf in self.internals:
                 self.internals[conf].reset_fuzz_weight(recursive=recursive)
@@ -6662,6 +7499,7 @@ class Node(object):
         # @conf could not be None or the empty string
         if conf and conf not in self.internals:
             self.internals[conf] = None
+            self._structure_changed()
             return True
         else:
             return False
@@ -6683,6 +7521,8 @@ class Node(object):
         self, node, conf, reverse, ignore_entanglement=False
     ):
         conf2 = conf if node.is_conf_existing(conf) else node.current_conf
+        if node.current_conf is not None and conf2 != node.current_conf:
+            node._invalidate_bytes_cache(conf=node.current_conf)
 
         if not reverse:
             node.current_conf = conf2
@@ -6723,6 +7563,7 @@ class Node(object):
                 )
             else:
                 if e.is_conf_existing(conf):
+                    e._invalidate_bytes_cache(conf=e.current_conf)
                     e.current_conf = conf
 
         if not ignore_entanglement and self.entangled_nodes is not None:
@@ -6771,6 +7612,7 @@ class Node(object):
         return self.internals[self.current_conf]
 
     def __set_current_internals(self, internal):
+        self._invalidate_bytes_cache(conf=self.current_conf)
         self.internals[self.current_conf] = internal
 
     def __get_internals(self):
@@ -6802,6 +7644,7 @@ class Node(object):
         self.fuzz_weight = backup.fuzz_weight
         self.depth = backup.depth
         self.tmp_ref_count = backup.tmp_ref_count
+        self._invalidate_bytes_cache()
         self.internals = backup.internals
         self.current_conf = backup.current_conf
         self.entangled_nodes = backup.entangled_nodes
@@ -6922,6 +7765,7 @@ class Node(object):
         new_internals = NodeInternals_NonTerm()
         if preserve_node:
             new_internals.set_contents_from(self.internals[conf])
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = new_internals
         self.internals[conf].import_subnodes_basic(
             node_list, separator=separator, preserve_node=preserve_node
@@ -6950,6 +7794,7 @@ class Node(object):
         new_internals = NodeInternals_NonTerm()
         if preserve_node:
             new_internals.set_contents_from(self.internals[conf])
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = new_internals
         self.internals[conf].import_subnodes_with_csts(
             wlnode_list, separator=separator, preserve_node=preserve_node
@@ -6978,6 +7823,7 @@ class Node(object):
         new_internals = NodeInternals_NonTerm()
         if preserve_node:
             new_internals.set_contents_from(self.internals[conf])
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = new_internals
         self.internals[conf].import_subnodes_full_format(
             subnodes_order=subnodes_order,
@@ -6999,6 +7845,7 @@ class Node(object):
         new_internals = NodeInternals_TypedValue()
         if preserve_node:
             new_internals.set_contents_from(self.internals[conf])
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = new_internals
 
         if values is not None:
@@ -7037,6 +7884,7 @@ class Node(object):
         new_internals = NodeInternals_Func()
         if preserve_node:
             new_internals.set_contents_from(self.internals[conf])
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = new_internals
         self.internals[conf].import_func(
             func,
@@ -7070,6 +7918,7 @@ class Node(object):
         new_internals = NodeInternals_GenFunc()
         if preserve_node:
             new_internals.set_contents_from(self.internals[conf])
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = new_internals
         self.internals[conf].import_generator_func(
             gen_func,
@@ -7090,6 +7939,7 @@ class Node(object):
 
     def make_empty(self, conf=None):
         conf = self._check_conf(conf)
+        self._invalidate_bytes_cache(conf=conf)
         self.internals[conf] = NodeInternals_Empty()
 
     def is_empty(self, conf=None):
@@ -7102,7 +7952,9 @@ class Node(object):
 
     def absorb(self, blob, constraints=AbsCsts(), conf=None, pending_postpone_desc=None):
         conf, next_conf = self._compute_confs(conf=conf, recursive=True)
-        blob = convert_to_internal_repr(blob)
+        if not isinstance(blob, memoryview):
+            # a memoryview is only provided by a non-terminal parent node
+            blob = convert_to_internal_repr(blob)
         status, off, sz, postpone_sent_back = self.internals[conf].absorb(
             blob,
             constraints=constraints,
@@ -7241,6 +8093,7 @@ class Node(object):
         else:
             assert isinstance(sem, (list, str))
             self.semantics = NodeSemantics(sem)
+        self._attrs_changed()
 
     def get_semantics(self):
         return self.semantics
@@ -7329,9 +8182,19 @@ class Node(object):
                 config = node.current_conf
 
             internal = node.internals[config]
-            side_effect_risk = (
-                isinstance(internal, NodeInternals_GenFunc) and not internal.is_frozen()
-            )
+            node._track_graph(graph_version)
+            internal._track_graph(graph_version)
+            if node.semantics is not None:
+                node.semantics._track_graph(graph_version)
+            if isinstance(internal, NodeInternals_GenFunc):
+                side_effect_risk = not internal.is_frozen()
+                if not resolve_generator and not internal.is_attr_set(
+                    NodeInternals.Mutable
+                ):
+                    # the freeze state of the generated node is not tracked
+                    _ReachableNodesCache.volatile_visits += 1
+            else:
+                side_effect_risk = False
 
             if (owned_conf == None) or node.is_conf_existing(owned_conf):
                 if __compliant(
@@ -7363,19 +8226,47 @@ class Node(object):
 
             return s
 
+        # The outcome of a search from the top node is cached, except for the criteria that
+        # rely on information which is not versioned (node subkinds and customizations).
+        cache_key = None
+        if top_node is None:
+            ic_fingerprint = (
+                internals_criteria.get_fingerprint() if internals_criteria else ()
+            )
+            if ic_fingerprint is not None:
+                cache_key = (
+                    ic_fingerprint,
+                    semantics_criteria.get_fingerprint() if semantics_criteria else (),
+                    owned_conf,
+                    conf,
+                    path_regexp,
+                    exclude_self,
+                    respect_order,
+                    ignore_fstate,
+                    resolve_generator,
+                    relative_depth,
+                )
+                if self._reachable_nodes_cache is not None:
+                    cached_nodes = self._reachable_nodes_cache.get_nodes(cache_key)
+                    if cached_nodes is not None:
+                        return list(cached_nodes)
+
         top_node = self if top_node is None else top_node
-        if relative_depth == -1:
+        graph_version = top_node._get_graph_version()
+        if (
+            relative_depth == -1
+            and top_node._paths_htable is not None
+            and not top_node._paths_htable.is_up_to_date((None, True, resolve_generator))
+        ):
             top_node._paths_htable = None
 
+        volatile_visits = _ReachableNodesCache.volatile_visits
         nodes = get_reachable_nodes_rec(
             node=self, config=conf, rdepth=relative_depth, top_node=top_node
         )
 
-        if relative_depth == -1:
-            top_node._paths_htable = None
-
         if respect_order:
-            return nodes
+            ret = nodes
         else:
             l1 = []
             l2 = []
@@ -7386,7 +8277,19 @@ class Node(object):
                     l2.append(e)
             l1 = sorted(l1, key=lambda x: -x.get_fuzz_weight())
 
-            return l1 + sorted(l2, key=lambda x: x.name)
+            ret = l1 + sorted(l2, key=lambda x: x.name)
+
+        if (
+            cache_key is not None
+            and volatile_visits == _ReachableNodesCache.volatile_visits
+        ):
+            if self._reachable_nodes_cache is None:
+                self._reachable_nodes_cache = _ReachableNodesCache(graph_version)
+            self._reachable_nodes_cache.set_nodes(cache_key, ret)
+            # the callers are free to modify the returned list
+            ret = list(ret)
+
+        return ret
 
     @staticmethod
     def filter_out_entangled_nodes(node_list):
@@ -7425,11 +8328,11 @@ class Node(object):
             generator of the nodes that match the path regexp
 
         """
-        for p, node in self.iter_paths(
+        htable = self.get_all_paths(
             conf=conf, flush_cache=flush_cache, resolve_generator=resolve_generator
-        ):
-            if re.search(path_regexp, p):
-                yield node
+        )
+        for _, node in htable.index.iter_items(path_regexp):
+            yield node
 
     def get_first_node_by_path(
         self, path_regexp, conf=None, flush_cache=True, resolve_generator=False
@@ -7500,9 +8403,18 @@ class Node(object):
         else:
             htable[name] = self
 
-        side_effect_risk = (
-            isinstance(internal, NodeInternals_GenFunc) and not internal.is_frozen()
-        )
+        self._track_graph(htable.graph_version)
+        internal._track_graph(htable.graph_version)
+
+        is_genfunc = isinstance(internal, NodeInternals_GenFunc)
+        side_effect_risk = is_genfunc and not internal.is_frozen()
+        if (
+            is_genfunc
+            and not resolve_generator
+            and not internal.is_attr_set(NodeInternals.Mutable)
+        ):
+            # the freeze state of such generator depends on its generated node
+            htable.volatile = True
         if resolve_generator or not side_effect_risk:
             internal.get_child_all_path(
                 name,
@@ -7512,6 +8424,15 @@ class Node(object):
                 resolve_generator=resolve_generator,
             )
 
+    def _get_graph_version(self):
+        """
+        Versions of the graph this node is the root of, which the caches related to this
+        graph rely on.
+        """
+        if self._graph_version is None:
+            self._graph_version = _GraphVersion()
+        return self._graph_version
+
     def get_all_paths(
         self,
         conf=None,
@@ -7531,13 +8452,20 @@ class Node(object):
               could result from the call of this method. And thus for this latter case,
               the method works as if `resolve_generator` is set to `True`.
 
+            flush_cache: if `False`, and the paths have already been computed, they are returned
+              as is. Otherwise, they are only computed again if the graph structure has changed
+              since then.
+
         Returns:
             dict: the keys are either a 'path' or a tuple ('path', int) when the path already
               exists (case of the same node used more than once within the same non-terminal)
         """
 
-        if flush_cache or self._paths_htable is None:
-            self._paths_htable = collections.OrderedDict()
+        params = (conf, recursive, resolve_generator)
+        if self._paths_htable is None or (
+            flush_cache and not self._paths_htable.is_up_to_date(params)
+        ):
+            self._paths_htable = _PathsHTable(params, self._get_graph_version())
             self._get_all_paths_rec(
                 "",
                 self._paths_htable,
@@ -7545,11 +8473,12 @@ class Node(object):
                 recursive=recursive,
                 resolve_generator=resolve_generator,
             )
+            self._paths_htable.structure_version = self._graph_version.structure
 
         if depth_min is not None or depth_max is not None:
             depth_min = int(depth_min) if depth_min is not None else 0
             depth_max = int(depth_max) if depth_max is not None else -1
-            paths = copy.copy(self._paths_htable)
+            paths = collections.OrderedDict(self._paths_htable)
             for k in self._paths_htable.keys():
                 depth = len(k.split("/"))
                 if depth < depth_min:
@@ -7586,24 +8515,18 @@ class Node(object):
                 yield path if only_paths else (path, node)
 
     def get_path_from(self, node, conf=None, flush_cache=True, resolve_generator=False):
-        for path, nd in node.iter_paths(
-            conf=conf, flush_cache=flush_cache, resolve_generator=resolve_generator
-        ):
-            if nd == self:
-                return path
-        else:
-            return None
+        paths = self.get_all_paths_from(
+            node, conf=conf, flush_cache=flush_cache, resolve_generator=resolve_generator
+        )
+        return paths[0] if paths else None
 
     def get_all_paths_from(
         self, node, conf=None, flush_cache=True, resolve_generator=False
     ):
-        l = []
-        for path, nd in node.iter_paths(
+        htable = node.get_all_paths(
             conf=conf, flush_cache=flush_cache, resolve_generator=resolve_generator
-        ):
-            if nd == self:
-                l.append(path)
-        return l
+        )
+        return list(htable.index.get_paths_of(self))
 
     def is_path_valid(self, path, resolve_generator=False):
         htable = self.get_all_paths(
@@ -7616,6 +8539,10 @@ class Node(object):
             return False
 
     def set_env(self, env):
+        if (self.env is None) != (env is None):
+            # the paths of the generator nodes depend on the availability of an environment
+            # (refer to NodeInternals_GenFunc.get_child_all_path())
+            self._structure_changed()
         self.env = env
         for c in self.internals:
             self.internals[c].set_child_env(env)
@@ -7854,6 +8781,46 @@ class Node(object):
                     ignore_entanglement=True,
                 )
 
+    def _get_cached_bytes(self, parent=None):
+        internal = self.internals[self.current_conf]
+        return None if internal is None else internal._get_cached_bytes(parent=parent)
+
+    def _get_bytes_from_cache(self, conf, recursive, check_djobs):
+        """
+        Try to serialize the node from the bytes cached by the non-terminal nodes.
+        Each frozen non-terminal node keeps its serialized value until one of the nodes
+        it depends on is changed, which invalidates the cached bytes along the path up to
+        the root. Thus, after a change of a single terminal node, only the non-terminal
+        nodes on its path are serialized again.
+
+        Returns:
+          bytes: the serialized node, or None if the regular serialization is required
+        """
+        if conf is not None or not recursive or self.env is None:
+            return None
+        if self.env.color_enabled:
+            return None
+        if check_djobs and self.env.delayed_jobs_enabled and (
+            not self._delayed_jobs_called or self.env.delayed_jobs_pending
+        ):
+            return None
+        return self._get_cached_bytes()
+
+    def _invalidate_bytes_cache(self, conf=None):
+        """
+        Invalidate the bytes cached by the non-terminal nodes that contain this node
+        (in any configuration if `conf` is None). As it is called each time the node
+        contents are changed, the graph structure is also considered as changed.
+        """
+        self._structure_changed()
+        if conf is None:
+            internals_list = self.internals.values()
+        else:
+            internals_list = [self.internals.get(conf)]
+        for internals in internals_list:
+            if internals is not None:
+                internals._invalidate_bytes_cache()
+
     def to_bytes(self, conf=None, recursive=True):
         def tobytes_helper(node_internals):
             if isinstance(node_internals, bytes):
@@ -7863,6 +8830,10 @@ class Node(object):
                     conf=conf, recursive=recursive, return_node_internals=False
                 )[0]
 
+        val = self._get_bytes_from_cache(conf, recursive, check_djobs=True)
+        if val is not None:
+            return val
+
         node_internals_list = self.freeze(conf=conf, recursive=recursive)
         if isinstance(node_internals_list, list):
             node_internals_list = list(flatten(node_internals_list))
@@ -7905,6 +8876,10 @@ class Node(object):
                     conf=conf, recursive=recursive, return_node_internals=False
                 )[0]
 
+        val = self._get_bytes_from_cache(conf, recursive, check_djobs=False)
+        if val is not None:
+            return val
+
         node_internals_list = self._get_value(conf=conf, recursive=recursive)
         if isinstance(node_internals_list, list):
             node_internals_list = list(flatten(node_internals_list))
@@ -8172,13 +9147,14 @@ class Node(object):
             smaller_depth = []
             prev_depth = l[i][0].count("/")
 
+            seen = set()
             for j in range(i, nodes_nb):
                 current = l[j][1]
                 sep_nb = l[j][0].count("/")
                 if current.depth != sep_nb:
                     # case when the same node is used at different depth
-                    if "_seen" not in current.__dict__:
-                        current._seen = True
+                    if current not in seen:
+                        seen.add(current)
                         current.depth = sep_nb
 
                 if current.depth != prev_depth:
@@ -8186,11 +9162,6 @@ class Node(object):
 
                 prev_depth = current.depth
 
-            for j in range(i, nodes_nb):
-                current = l[j][1]
-                if "_seen" in current.__dict__:
-                    del current._seen
-
             for j in range(i + 1, nodes_nb):
                 delta = depth - l[j][1].depth
                 if delta > 0:
@@ -8662,7 +9633,8 @@ class Env(object):
         return self._color_enabled
 
     def __getattr__(self, name):
-        if hasattr(self.env4NT, name):
+        # 'env4NT' is not set yet while an Env is unpickled
+        if name != 'env4NT' and hasattr(self.env4NT, name):
             return self.env4NT.__getattribute__(name)
         else:
             raise AttributeError
@@ -8890,6 +9862,8 @@ class Env(object):
 
 
 class DJobGroup(object):
+    __slots__ = ("node_list",)
+
     def __init__(self, node_list):
         self.node_list = node_list
 
@@ -37,16 +37,19 @@ import atexit
 import datetime
 import time
 import signal
+import json
 
 from functools import wraps, partial
 from typing import Sequence
 
 from fuddly.framework.data import Data, DataProcess
+from fuddly.framework.data_producer import DataProducer
 from fuddly.framework.database import FeedbackGate
 from fuddly.framework.knowledge.feedback_collector import FeedbackSource
 from fuddly.framework.error_handling import *
 from fuddly.framework.evolutionary_helpers import EvolutionaryScenariosFactory
 from fuddly.framework.logger import *
+from fuddly.framework.profiler import ExecutionProfiler
 from fuddly.framework.monitor import *
 from fuddly.framework.operator_helpers import *
 from fuddly.framework.project import *
@@ -63,6 +66,7 @@ from fuddly.framework.global_resources import *
 from fuddly.libs.utils import *
 
 import importlib
+import importlib.util
 from importlib.metadata import entry_points
 
 import io
@@ -73,10 +77,109 @@ sys.path.insert(0, external_libs_folder)
 sig_int_handler = signal.getsignal(signal.SIGINT)
 
 r_pyfile = re.compile(r'.*\.py$')
+
+# stages of the test case pipeline measured by the execution profiler
+perf_stages = collections.OrderedDict([
+    ('generator', 'data generation (per generator type)'),
+    ('disruptor', 'data disruption (per disruptor type)'),
+    ('before_sending', 'data callbacks and hooks before sending'),
+    ('target_sending', 'Target.send_data() (per target)'),
+    ('target_readiness', 'wait for the target readiness'),
+    ('feedback_retrieval', 'feedback retrieval and logging'),
+    ('probes', 'probes status retrieval and logging'),
+    ('logging', 'data logging'),
+    ('fmkdb', 'data recording in the fmkDB (part of logging)'),
+    ('fmkdb_batch', 'execution of the fmkDB statements (SQL handler thread)'),
+])
+
 def is_python_file(fname):
     return r_pyfile.match(fname)
 
 
+class ModuleIndex(object):
+    """
+    Persistent index of the names of the data models and projects found in
+    the modules discovered during a previous start, which enables to list them
+    without importing their modules. An entry is only used as long as the
+    files of the related module are not modified.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._changed = False
+        try:
+            with open(path, 'rb') as f:
+                self._entries = pickle.load(f)
+        except Exception:
+            self._entries = {}
+
+    @staticmethod
+    def get_stamp(module_name):
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, ValueError):
+            return None
+        if spec is None or spec.origin is None:
+            return None
+
+        if spec.submodule_search_locations:
+            files = []
+            for location in spec.submodule_search_locations:
+                for dirpath, _, filenames in os.walk(location):
+                    files += [os.path.join(dirpath, f) for f in filenames if is_python_file(f)]
+        else:
+            files = [spec.origin]
+
+        stamp = []
+        for f in sorted(files):
+            st = os.stat(f)
+            stamp.append((f, st.st_mtime_ns, st.st_size))
+        return tuple(stamp)
+
+    def lookup(self, key, stamp):
+        entry = self._entries.get(key)
+        if stamp is None or entry is None or entry[0] != stamp:
+            return None
+        return entry[1]
+
+    def record(self, key, stamp, name):
+        if stamp is not None and self._entries.get(key) != (stamp, name):
+            self._entries[key] = (stamp, name)
+            self._changed = True
+
+    def save(self):
+        if not self._changed:
+            return
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self._entries, f)
+        os.replace(tmp_path, self._path)
+        self._changed = False
+
+
+class LazyRegistry(dict):
+    """
+    Dictionary of the data models (or projects) by name, where the ones which
+    have only been discovered are imported on first access.
+    """
+
+    def __init__(self, importer):
+        dict.__init__(self)
+        self._importer = importer
+
+    def __missing__(self, name):
+        obj = self._importer(name)
+        if obj is None:
+            raise KeyError(name)
+        return obj
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
 class Printer(io.StringIO):
     def __init__(self, fmk):
         io.StringIO.__init__(self)
@@ -168,6 +271,51 @@ class FmkFeedback(object):
         return self.__data_list
 
 
+class HeadlessStats(object):
+    """
+    Aggregate statistics of the test cases handled in headless mode.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.cases = 0
+        self.anomalies = 0
+        self.start_time = self._period_start_time = time.monotonic()
+        self._period_cases = 0
+        self._period_rate = None
+
+    def add_case(self, anomalous=False):
+        """
+        Returns:
+          bool: True if the statistics period is over (the statistics for the new period
+          are then reset).
+        """
+        self.cases += 1
+        self._period_cases += 1
+        if anomalous:
+            self.anomalies += 1
+
+        now = time.monotonic()
+        elapsed = now - self._period_start_time
+        if elapsed >= self.period:
+            self._period_rate = self._period_cases / elapsed
+            self._period_start_time = now
+            self._period_cases = 0
+            return True
+        else:
+            return False
+
+    def get_summary(self, final=False):
+        if final or self._period_rate is None:
+            elapsed = time.monotonic() - self.start_time
+            rate = self.cases / elapsed if elapsed > 0 else 0.0
+        else:
+            rate = self._period_rate
+        return "Headless mode: {:d} test cases sent ({:.1f}/s{:s}), {:d} anomalous".format(
+            self.cases, rate, "" if final else " over the last {:g}s".format(self.period),
+            self.anomalies)
+
+
 class EnforceOrder(object):
     current_state = None
 
@@ -257,11 +405,17 @@ class FmkPlumbing(object):
     """
 
     def __init__(self, exit_on_error=False, debug_mode=False, quiet=False,
-                 external_term=False, fmkdb_path=None):
+                 external_term=False, fmkdb_path=None, lazy_import=False):
+        """
+        Args:
+            lazy_import (bool): if True, the data models and projects already indexed
+              by a previous start are only imported once selected (refer to :class:`ModuleIndex`).
+        """
         self._debug_mode = debug_mode
         self._exit_on_error = exit_on_error
         self._quiet = quiet
         self._fmkdb_path = fmkdb_path
+        self._lazy_import = lazy_import
         self.external_display = ExternalDisplay()
         if external_term:
             self.external_display.start_term(title="Fuddly log", keepterm=True)
@@ -293,8 +447,13 @@ class FmkPlumbing(object):
         self.__first_loading = True
 
         self._exportable_fmk_ops = ExportableFMKOps(self)
-        self._name2dm = {}
-        self._name2prj = {}
+        self._name2dm = LazyRegistry(self._import_pending_data_model)
+        self._name2prj = LazyRegistry(self._import_pending_project)
+
+        # data models and projects discovered in lazy mode but not imported yet
+        self._module_index = None
+        self._pending_dms = collections.OrderedDict()
+        self._pending_prjs = collections.OrderedDict()
 
         self._prj_dict = {}
         self.__st_dict = {}
@@ -355,6 +514,9 @@ class FmkPlumbing(object):
         if not ok:
             raise InvalidFmkDB("The database {:s} is invalid!".format(self.fmkDB.fmk_db_path))
 
+        self.perf = ExecutionProfiler()
+        self.fmkDB.perf = self.perf
+
         self.last_data_id = None
         self.next_data_id = None
 
@@ -370,6 +532,9 @@ class FmkPlumbing(object):
         self.group_id = 0
         self._recovered_tgs = None  # used by self._recover_target()
 
+        self._headless = False
+        self._headless_stats = None
+
         self.import_successfull = True
         self.get_data_models()
         if self._exit_on_error and not self.import_successfull:
@@ -749,9 +914,15 @@ class FmkPlumbing(object):
 
     @EnforceOrder(initial_func=True, final_state="get_projs")
     def get_data_models(self, fmkDB_update=True):
+        if self._lazy_import and self._module_index is None:
+            self._module_index = ModuleIndex(os.path.join(gr.cache_folder, 'module_index'))
+
         self._get_data_models_from_fs(fmkDB_update)
         self._get_data_models_from_modules(fmkDB_update)
 
+        if self._module_index is not None:
+            self._module_index.save()
+
         if fmkDB_update:
             self.fmkDB.insert_data_model(Database.DEFAULT_DM_NAME)
             self.fmkDB.insert_dmaker(Database.DEFAULT_DM_NAME, Database.DEFAULT_GTYPE_NAME,
@@ -800,17 +971,8 @@ class FmkPlumbing(object):
                                     rgb=Color.FMKINFOSUBGROUP))
             prefix = dname.replace(os.sep, ".") + "."
             for name in names:
-                dm_params = self._import_dm(prefix, name)
-                if dm_params is None:
+                if not self._discover_data_model(prefix, name, prefix + name, fmkDB_update):
                     self.import_successfull = False
-                    continue
-
-                self._add_data_model(dm_params["dm"], dm_params["tactics"], dm_params["dm_rld_args"],
-                                     reload_dm=False)
-                self.__dyngenerators_created[dm_params["dm"]] = False
-                if fmkDB_update:
-                    # populate FMK DB
-                    self._fmkDB_insert_dm_and_dmakers(dm_params["dm"].name, dm_params["tactics"])
 
     def _get_data_models_from_modules(self, fmkDB_update=True):
         if not self._quiet:
@@ -820,24 +982,67 @@ class FmkPlumbing(object):
         dms = entry_points(group=group_name)
         for module in dms:
             try:
-                dm_params = self._import_dm(module, module.name)
+                ok = self._discover_data_model(module, module.name, module.module, fmkDB_update)
             except DataModelDuplicateError as e:
                 if not self._quiet:
                     self.print(colorize(f"*** The data model '{e.name}' was already defined, "
                                         f"ignoring... [{module.module}] ***", rgb=Color.WARNING))
                 continue
 
-            if dm_params is None:
+            if not ok:
                 self.import_successfull = False
-                continue 
 
-            self._add_data_model(dm_params["dm"], dm_params["tactics"], dm_params["dm_rld_args"],
-                                 reload_dm=False)
-            name = dm_params["dm"].name
-            self.__dyngenerators_created[dm_params["dm"]] = False
-            if fmkDB_update:
-                # populate FMK DB
-                self._fmkDB_insert_dm_and_dmakers(dm_params["dm"].name, dm_params["tactics"])
+    def _discover_data_model(self, prefix, name, module_name, fmkDB_update=True):
+        if self._module_index is not None:
+            key = 'data_models:' + module_name
+            stamp = ModuleIndex.get_stamp(module_name)
+            dm_name = self._module_index.lookup(key, stamp)
+            if dm_name is not None:
+                if type(prefix) is importlib.metadata.EntryPoint and \
+                        (dm_name in self._name2dm or dm_name in self._pending_dms):
+                    raise DataModelDuplicateError(dm_name)
+                self._pending_dms[dm_name] = (prefix, name, fmkDB_update)
+                if not self._quiet:
+                    self.print(colorize(f"*** Found Data Model: '{dm_name}' ***", rgb=Color.FMKSUBINFO))
+                return True
+
+        dm_params = self._import_dm(prefix, name)
+        if dm_params is None:
+            return False
+
+        self._register_data_model(dm_params, fmkDB_update)
+        if self._module_index is not None:
+            self._module_index.record(key, stamp, dm_params["dm"].name)
+
+        return True
+
+    def _register_data_model(self, dm_params, fmkDB_update=True):
+        self._add_data_model(dm_params["dm"], dm_params["tactics"], dm_params["dm_rld_args"],
+                             reload_dm=False)
+        self.__dyngenerators_created[dm_params["dm"]] = False
+        if fmkDB_update:
+            # populate FMK DB
+            self._fmkDB_insert_dm_and_dmakers(dm_params["dm"].name, dm_params["tactics"])
+
+    def _import_pending_data_model(self, name):
+        if name not in self._pending_dms:
+            return None
+
+        prefix, module_name, fmkDB_update = self._pending_dms.pop(name)
+        try:
+            dm_params = self._import_dm(prefix, module_name)
+        except DataModelDuplicateError:
+            dm_params = None
+        if dm_params is None:
+            self.import_successfull = False
+            return None
+
+        self._register_data_model(dm_params, fmkDB_update)
+        return dm_params["dm"]
+
+    def _import_pending_data_models(self):
+        for name in list(self._pending_dms):
+            self._import_pending_data_model(name)
 
     def _import_dm(self, prefix, name, reload_dm=False):
         load_from_module=False
@@ -933,6 +1138,9 @@ class FmkPlumbing(object):
         self._get_projects_fs(fmkDB_update)
         self._get_projects_module(fmkDB_update)
 
+        if self._module_index is not None:
+            self._module_index.save()
+
     def _get_projects_fs(self, fmkDB_update=True):
         if not self._quiet:
             self.print(colorize(FontStyle.BOLD + "=" * 66 + "[ Projects (filesystem) ]==", rgb=Color.FMKINFOGROUP))
@@ -982,18 +1190,7 @@ class FmkPlumbing(object):
                 if res is None:
                     continue
                 name = res.group(1)
-                prj_params = self._import_project(prefix, name)
-                if prj_params is not None:
-                    self._add_project(
-                        prj_params["project"],
-                        prj_params["target"],
-                        prj_params["logger"],
-                        prj_params["prj_rld_args"],
-                        reload_prj=False,
-                    )
-                    if fmkDB_update:
-                        self.fmkDB.insert_project(prj_params["project"].name)
-                else:
+                if not self._discover_project(prefix, name, prefix + name, fmkDB_update):
                     self.import_successfull = False
 
     def _get_projects_module(self, fmkDB_update=True):
@@ -1005,22 +1202,67 @@ class FmkPlumbing(object):
 
         for module in projects:
             try:
-                prj_params = self._import_project(module, module.name)
+                ok = self._discover_project(module, module.name, module.module, fmkDB_update)
             except ProjectDuplicateError as e:
                 if not self._quiet:
                     self.print(colorize(f"*** The project '{e.name}' was already defined, "
                                         f"ignoring... [{module.module}] ***", rgb=Color.WARNING))
                 continue
 
-            if prj_params is not None:
-                self._add_project(prj_params["project"], prj_params["target"],
-                                  prj_params["logger"], prj_params["prj_rld_args"],
-                                  reload_prj=False)
-                if fmkDB_update:
-                    self.fmkDB.insert_project(prj_params["project"].name)
-            else:
+            if not ok:
                 self.import_successfull = False
 
+    def _discover_project(self, prefix, name, module_name, fmkDB_update=True):
+        if self._module_index is not None:
+            key = 'projects:' + module_name
+            stamp = ModuleIndex.get_stamp(module_name)
+            prj_name = self._module_index.lookup(key, stamp)
+            if prj_name is not None:
+                if type(prefix) is importlib.metadata.EntryPoint and \
+                        (prj_name in self._name2prj or prj_name in self._pending_prjs):
+                    raise ProjectDuplicateError(prj_name)
+                self._pending_prjs[prj_name] = (prefix, name, fmkDB_update)
+                if not self._quiet:
+                    self.print(colorize(f"*** Found Project: '{prj_name}' ***", rgb=Color.FMKSUBINFO))
+                return True
+
+        prj_params = self._import_project(prefix, name)
+        if prj_params is None:
+            return False
+
+        self._register_project(prj_params, fmkDB_update)
+        if self._module_index is not None:
+            self._module_index.record(key, stamp, prj_params["project"].name)
+
+        return True
+
+    def _register_project(self, prj_params, fmkDB_update=True):
+        self._add_project(prj_params["project"], prj_params["target"],
+                          prj_params["logger"], prj_params["prj_rld_args"],
+                          reload_prj=False)
+        if fmkDB_update:
+            self.fmkDB.insert_project(prj_params["project"].name)
+
+    def _import_pending_project(self, name):
+        if name not in self._pending_prjs:
+            return None
+
+        prefix, module_name, fmkDB_update = self._pending_prjs.pop(name)
+        try:
+            prj_params = self._import_project(prefix, module_name)
+        except ProjectDuplicateError:
+            prj_params = None
+        if prj_params is None:
+            self.import_successfull = False
+            return None
+
+        self._register_project(prj_params, fmkDB_update)
+        return prj_params["project"]
+
+    def _import_pending_projects(self):
+        for name in list(self._pending_prjs):
+            self._import_pending_project(name)
+
     def _import_project(self, prefix, name, reload_prj=False):
         load_from_module=False
         try: 
@@ -1421,6 +1663,7 @@ class FmkPlumbing(object):
         self.print(colorize("              Workspace enabled: ", rgb=Color.SUBINFO) + repr(self.prj.wkspace_enabled))
         self.print(colorize("                  Sending delay: ", rgb=Color.SUBINFO) + delay_str)
         self.print(colorize("   Number of data sent in burst: ", rgb=Color.SUBINFO) + str(self._burst))
+        self.print(colorize("                  Headless mode: ", rgb=Color.SUBINFO) + repr(self._headless))
         self.print(colorize(" Target(s) health-check timeout: ", rgb=Color.SUBINFO) + str(self._hc_timeout_max))
 
         for tg_id, tg in self.targets.items():
@@ -1456,6 +1699,7 @@ class FmkPlumbing(object):
 
     @EnforceOrder(accepted_states=["20_load_prj", "25_load_dm", "S1", "S2"])
     def projects(self):
+        self._import_pending_projects()
         for prj in self.prj_list:
             yield prj
 
@@ -1467,12 +1711,13 @@ class FmkPlumbing(object):
     def show_projects(self):
         self.print(colorize(FontStyle.BOLD + "\n-=[ Projects ]=-\n", rgb=Color.INFO))
         idx = 0
-        for prj in self._projects():
-            self.print(colorize("[%d] " % idx + prj.name, rgb=Color.SUBINFO))
+        for prj_name in [prj.name for prj in self._projects()] + list(self._pending_prjs):
+            self.print(colorize("[%d] " % idx + prj_name, rgb=Color.SUBINFO))
             idx += 1
 
     @EnforceOrder(accepted_states=["20_load_prj", "25_load_dm", "S1", "S2"])
     def iter_data_models(self):
+        self._import_pending_data_models()
         for dm in self.dm_list:
             yield dm
 
@@ -1490,12 +1735,16 @@ class FmkPlumbing(object):
             else:
                 self.print(colorize("[{:d}] {!s}".format(idx, dm.name), rgb=Color.SUBINFO))
             idx += 1
+        for dm_name in self._pending_dms:
+            self.print(colorize("[{:d}] {!s}".format(idx, dm_name), rgb=Color.SUBINFO))
+            idx += 1
 
     def _init_fmk_internals_step1(self, prj, dm):
         self.prj = prj
         self.dm = dm
         # self.dm.knowledge_source = prj.knowledge_source
         self.lg = self.__logger_dict[prj]
+        self.lg.set_headless_mode(self._headless)
 
         self.targets = {}
         try:
@@ -1550,7 +1799,7 @@ class FmkPlumbing(object):
                 ret = model
                 break
         else:
-            ret = None
+            ret = self._import_pending_data_model(name)
         return ret
 
     @EnforceOrder(accepted_states=["25_load_dm", "S1", "S2"], transition=["25_load_dm", "S1"])
@@ -1675,7 +1924,7 @@ class FmkPlumbing(object):
                 ret = prj
                 break
         else:
-            ret = None
+            ret = self._import_pending_project(name)
         return ret
 
     @EnforceOrder(accepted_states=["20_load_prj", "25_load_dm", "S1", "S2"], final_state="S2" )
@@ -1800,6 +2049,178 @@ class FmkPlumbing(object):
             self.lg.log_fmk_info("Wrong burst value!", do_record=False)
             return False
 
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def enable_headless_mode(self, stats_period=10, do_record=False):
+        """
+        Enable the headless mode, meant for unattended campaigns. In this mode, only a compact
+        record of each test case is kept (i.e., the data records in fmkDB, as well as the
+        feedback records). The test cases are not displayed anymore, except the anomalous ones
+        (i.e., the ones that trigger feedback with a negative status code), whose details are
+        logged and recorded as in the regular mode. Aggregate statistics are displayed instead.
+
+        Args:
+            stats_period (float): period (in seconds) of the statistics display.
+        """
+        if stats_period > 0:
+            self._headless = True
+            self._headless_stats = HeadlessStats(stats_period)
+            self.lg.set_headless_mode(True)
+            self.lg.log_fmk_info("Headless mode enabled (statistics period = {:g}s)".format(stats_period),
+                                 do_record=do_record)
+            return True
+        else:
+            self.lg.log_fmk_info("Wrong statistics period value!", do_record=False)
+            return False
+
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def disable_headless_mode(self, do_record=False):
+        if self._headless:
+            self.lg.log_fmk_info(self._headless_stats.get_summary(final=True), do_record=do_record)
+        self._headless = False
+        self._headless_stats = None
+        self.lg.set_headless_mode(False)
+        self.lg.log_fmk_info("Headless mode disabled", do_record=do_record)
+        return True
+
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def enable_perf_monitoring(self, profiled_stage=None, profiling_mode='cprofile',
+                               sampling_interval=0.001):
+        """
+        Enable the measurement of the time spent within each stage of the test case pipeline
+        (refer to :meth:`show_perf`). Optionally, one stage can be profiled in order to find out
+        which functions take the most time within it.
+
+        Args:
+            profiled_stage (str): name of the stage to profile (refer to ``perf_stages``).
+            profiling_mode (str): either ``'cprofile'`` (deterministic profiling) or
+              ``'sampling'`` (periodic sampling of the call stack, with a lower overhead).
+            sampling_interval (float): sampling period in seconds (only relevant to the
+              ``'sampling'`` mode).
+        """
+        if profiled_stage is not None and profiled_stage not in perf_stages:
+            self.set_error("Unknown stage '{!s}'! [possible values: {:s}]"
+                           .format(profiled_stage, ", ".join(perf_stages)),
+                           code=Error.CommandError)
+            return False
+        if profiling_mode not in ExecutionProfiler.PROFILING_MODES:
+            self.set_error("Unknown profiling mode '{!s}'! [possible values: {:s}]"
+                           .format(profiling_mode, ", ".join(ExecutionProfiler.PROFILING_MODES)),
+                           code=Error.CommandError)
+            return False
+
+        self.perf.enable(profiled_stage=profiled_stage, profiling_mode=profiling_mode,
+                         sampling_interval=sampling_interval)
+        msg = "Performance monitoring enabled"
+        if profiled_stage is not None:
+            msg += " (stage '{:s}' profiled in {:s} mode)".format(profiled_stage, profiling_mode)
+        self.lg.log_fmk_info(msg, do_record=False)
+        return True
+
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def disable_perf_monitoring(self):
+        self.perf.disable()
+        self.lg.log_fmk_info("Performance monitoring disabled", do_record=False)
+        return True
+
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def reset_perf_stats(self):
+        self.perf.reset()
+        self.lg.log_fmk_info("Performance statistics reset", do_record=False)
+        return True
+
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def show_perf(self, limit=20):
+        """
+        Show the time spent within each stage of the test case pipeline since the monitoring
+        has been enabled (or reset). The share of a stage is computed against the monitoring
+        time, thus the shares of nested stages (e.g., 'fmkdb' within 'logging') overlap.
+
+        Args:
+            limit (int): maximum number of functions to show for the profiled stage.
+        """
+        elapsed = self.perf.elapsed
+        self.print(colorize(FontStyle.BOLD + "\n-=[ Performance Statistics ]=-\n", rgb=Color.INFO))
+        self.print(colorize("     Monitoring: ", rgb=Color.SUBINFO)
+                   + ("enabled" if self.perf.enabled else "disabled"))
+        self.print(colorize("   Elapsed time: ", rgb=Color.SUBINFO) + "{:.3f}s".format(elapsed))
+
+        stage_order = list(perf_stages)
+        stats = sorted(self.perf.iter_stats(),
+                       key=lambda s: stage_order.index(s[0]) if s[0] in stage_order else len(stage_order))
+        if not stats:
+            self.print(colorize("\n  No measurement", rgb=Color.SUBINFO))
+        else:
+            line_fmt = "  {:<34.34s} {:>8s} {:>10s} {:>7s} {:>10s} {:>10s} {:>10s} {:>10s}"
+            ms = lambda d: "{:.3f}".format(d * 1000)
+            self.print(colorize("\n" + line_fmt.format("stage / reference", "count", "total(s)", "share",
+                                                        "mean(ms)", "p50(ms)", "p99(ms)", "max(ms)"),
+                                rgb=Color.INFO))
+            for stage, key, st in stats:
+                if key is None:
+                    name, color = stage, Color.SUBINFO
+                else:
+                    name, color = "  |_ " + str(key), Color.DATE
+                share = "{:.1f}%".format(100 * st.total / elapsed) if elapsed > 0 else "-"
+                self.print(colorize(line_fmt.format(name, str(st.count), "{:.3f}".format(st.total), share,
+                                                    ms(st.mean), ms(st.percentile(50)),
+                                                    ms(st.percentile(99)), ms(st.max)),
+                                    rgb=color))
+
+        if self.perf.profiled_stage is not None:
+            self.print(colorize("\n  [ Profiling of stage '{:s}' ({:s} mode) ]"
+                                .format(self.perf.profiled_stage, self.perf.profiling_mode),
+                                rgb=Color.INFO))
+            functions = self.perf.get_profiling_stats(limit=limit)
+            if not functions:
+                self.print(colorize("  No profiling data", rgb=Color.SUBINFO))
+            elif self.perf.profiling_mode == 'cprofile':
+                self.print(colorize("  {:>10s} {:>10s} {:>10s}  function"
+                                    .format("cumtime(s)", "tottime(s)", "ncalls"), rgb=Color.INFO))
+                for f in functions:
+                    self.print(colorize("  {:>10.3f} {:>10.3f} {:>10d}  "
+                                        .format(f['cumtime'], f['tottime'], f['ncalls']),
+                                        rgb=Color.SUBINFO) + f['function'])
+            else:
+                self.print(colorize("  {:>10s} {:>10s}  function"
+                                    .format("cumulative", "self"), rgb=Color.INFO))
+                for f in functions:
+                    self.print(colorize("  {:>10d} {:>10d}  "
+                                        .format(f['cumulative_samples'], f['self_samples']),
+                                        rgb=Color.SUBINFO) + f['function'])
+        self.print("")
+
+    @EnforceOrder(accepted_states=["S1", "S2"])
+    def export_perf_stats(self, json_path=None, limit=20):
+        """
+        Export the performance statistics either to a JSON file or to the fmkDB (table PERF).
+
+        Args:
+            json_path (str): path of the JSON file. If None, the statistics are recorded
+              in the fmkDB.
+            limit (int): maximum number of functions to export for the profiled stage
+              (only relevant to the JSON export).
+        """
+        if json_path is not None:
+            try:
+                with open(json_path, 'w') as f:
+                    json.dump(self.perf.to_dict(limit=limit), f, indent=2)
+            except OSError as e:
+                self.set_error("Cannot export the performance statistics to '{:s}': {!s}"
+                               .format(json_path, e), code=Error.CommandError)
+                return False
+            self.lg.log_fmk_info("Performance statistics exported to '{:s}'".format(json_path),
+                                 do_record=False)
+        else:
+            if not self.fmkDB.enabled:
+                self.set_error("The fmkDB is disabled!", code=Error.CommandError)
+                return False
+            now = datetime.datetime.now()
+            for stage, key, st in self.perf.iter_stats():
+                self.fmkDB.insert_perf_stats(now, self.prj.name, stage,
+                                             None if key is None else str(key), st.to_dict())
+            self.lg.log_fmk_info("Performance statistics recorded in the fmkDB", do_record=False)
+        return True
+
     @EnforceOrder(accepted_states=["S1", "S2"])
     def set_health_check_timeout(
         self, timeout, target=None, do_record=True, do_show=True
@@ -2366,7 +2787,8 @@ class FmkPlumbing(object):
     def process_data_and_send( self, data_desc=None, id_from_fmkdb=None, id_from_db=None,
                               max_loop=1, tg_ids=None,
                               verbose=False, console_display=True,
-                              save_generator_seed=False):
+                              save_generator_seed=False, workers=0, lookahead=4,
+                              workers_seed=None):
         """
         Send data to the selected targets. These data can follow a specific processing before
         being emitted. The latter depends on what is provided in `data_desc`.
@@ -2388,6 +2810,15 @@ class FmkPlumbing(object):
             save_generator_seed: If random Generators are used, the generated data will be internally saved
               and will be reused next time this generator will be called, until
               FmkPlumbing.cleanup_dmaker(... reset_existing_seed=True) is called on this Generator.
+            workers: If strictly positive and `data_desc` only contains DataProcess, the data will be
+              pre-generated by this number of worker processes (refer to
+              :class:`framework.data_producer.DataProducer`) while the previous ones are sent.
+              Only one worker is used if some data makers of the chains are stateful.
+              The data are then sent as raw data, and the framework data makers are not affected.
+              Data makers that rely on the feedback of the targets shall not be used this way.
+            lookahead: Maximum number of data pre-generated by each worker.
+            workers_seed: Base seed used by the workers to make each generated data reproducible.
+              Randomly chosen if `None`.
 
         Returns:
             The list of data that have been sent. `None` if nothing was sent due to some error.
@@ -2416,29 +2847,46 @@ class FmkPlumbing(object):
                 data_desc.seed = data
 
             data_desc = data_desc if isinstance(data_desc, list) else [data_desc]
+            producer = None
+            if workers > 0 and max_loop != 1:
+                producer = self._get_data_producer(data_desc, workers, lookahead, workers_seed,
+                                                   save_generator_seed)
             cpt = 0
             sent_data = []
-            while cpt < max_loop or max_loop == -1:
-                cpt += 1
-                data_list = []
-                for d_desc in data_desc:
-                    data = self.handle_data_desc(d_desc, resolve_dataprocess=True,
-                                                 save_generator_seed=save_generator_seed)
-                    if data is None:
-                        data = Data()
-                        data.make_unusable()
+            try:
+                while cpt < max_loop or max_loop == -1:
+                    cpt += 1
+                    if producer is None:
+                        data_list = []
+                        for d_desc in data_desc:
+                            data = self.handle_data_desc(d_desc, resolve_dataprocess=True,
+                                                         save_generator_seed=save_generator_seed)
+                            if data is None:
+                                data = Data()
+                                data.make_unusable()
+                            data_list.append(data)
+                    else:
+                        data_list, errors = producer.get_next()
+                        for e in errors:
+                            self.set_error(e.msg, context=e.context, code=e.code)
+                        if data_list is None:
+                            break
+
                     if tg_ids:
-                        data.tg_ids = tg_ids
-                    data_list.append(data)
+                        for data in data_list:
+                            data.tg_ids = tg_ids
 
-                go_on, sdata = self.send_data_and_log(data_list, verbose=verbose,
-                                                      console_display=console_display)
-                if sdata:
-                    for d in sdata:
-                        sent_data.append(d)
+                    go_on, sdata = self.send_data_and_log(data_list, verbose=verbose,
+                                                          console_display=console_display)
+                    if sdata:
+                        for d in sdata:
+                            sent_data.append(d)
 
-                if not go_on:
-                    break
+                    if not go_on:
+                        break
+            finally:
+                if producer is not None:
+                    producer.stop()
 
         else:
             cpt = 0
@@ -2457,6 +2905,70 @@ class FmkPlumbing(object):
 
         return sent_data
 
+    def _get_data_producer(self, data_desc_list, workers, lookahead, seed, save_generator_seed):
+        if not DataProducer.is_supported():
+            self.set_error("Data cannot be pre-generated by worker processes on this platform",
+                           code=Error.FmkWarning)
+            return None
+
+        if save_generator_seed:
+            # the generator seeds have to be saved in the framework process
+            return None
+
+        stateless = True
+        for d_desc in data_desc_list:
+            if not isinstance(d_desc, DataProcess) or d_desc.process is None:
+                return None
+            if d_desc.process_qty > 1 or d_desc.auto_regen:
+                stateless = False
+            for dmaker_obj in self._get_dmaker_candidates(d_desc):
+                if isinstance(dmaker_obj, DynGeneratorFromScenario):
+                    # scenarios rely on the feedback and on data callbacks
+                    return None
+                if not isinstance(dmaker_obj, (DynGenerator, Disruptor)):
+                    stateless = False
+
+        producer = DataProducer(self, data_desc_list, nb_workers=workers if stateless else 1,
+                                lookahead=lookahead, seed=seed)
+        self.lg.log_fmk_info("Data pre-generated by {:d} worker process(es) (seed: {:d})"
+                             .format(producer.nb_workers, producer.seed))
+        producer.start()
+        return producer
+
+    def _get_dmaker_candidates(self, data_process):
+        """
+        Return all the data makers that the process of the data process may use
+        (several ones if a data maker name is not provided).
+        """
+        candidates = []
+        first = data_process.seed is None
+        for full_action in data_process.process:
+            action = full_action[0] if isinstance(full_action, (tuple, list)) else full_action
+            if first and action == "NOGEN":
+                first = False
+                continue
+
+            if isinstance(action, (tuple, list)):
+                dmaker_type, dmaker_name = action
+            else:
+                dmaker_type, dmaker_name = action, None
+
+            parsed = self.check_clone_re.match(dmaker_type)
+            if parsed is not None:
+                dmaker_type = parsed.group(1)
+
+            for tactics in (self._tactics, self._generic_tactics):
+                dmakers = tactics.get_generators_list(dmaker_type) if first \
+                    else tactics.get_disruptors_list(dmaker_type)
+                if not dmakers:
+                    continue
+                for name, info in dmakers.items():
+                    if dmaker_name is None or name == dmaker_name:
+                        candidates.append(info['obj'])
+            first = False
+
+        return candidates
+
     @EnforceOrder(accepted_states=["S2"])
     def send_data_and_log(self, data_list, verbose=False, console_display=True):
         if not console_display:
@@ -2541,30 +3053,42 @@ class FmkPlumbing(object):
 
         # When checking target readiness, feedback timeout is taken into account indirectly
         # through the call to Target.is_feedback_received()
-        cont0 = self.wait_for_target_readiness() >= 0
+        with self.perf.measure('target_readiness'):
+            cont0 = self.wait_for_target_readiness() >= 0
 
-        if multiple_data:
-            self._log_data(data_list, verbose=verbose)
-        else:
-            self._log_data(data_list[0], verbose=verbose)
+        if self._headless:
+            self.lg.open_headless_case()
+
+        with self.perf.measure('logging'):
+            if multiple_data:
+                self._log_data(data_list, verbose=verbose)
+            else:
+                self._log_data(data_list[0], verbose=verbose)
 
         cont1 = True
         cont2 = True
         # That means this is the end of a burst
         if self._burst_countdown == self._burst:
-            cont1 = self.retrieve_and_log_target_feedback()
+            with self.perf.measure('feedback_retrieval'):
+                cont1 = self.retrieve_and_log_target_feedback()
+
+        with self.perf.measure('probes'):
+            self.mon.notify_target_feedback_retrieval()
+            self.mon.wait_for_probe_status_retrieval()
 
-        self.mon.notify_target_feedback_retrieval()
-        self.mon.wait_for_probe_status_retrieval()
+            if self._burst_countdown == self._burst:
+                # We handle probe feedback if any
+                cont2 = self.monitor_probes(force_record=True)
 
         if self._burst_countdown == self._burst:
-            # We handle probe feedback if any
-            cont2 = self.monitor_probes(force_record=True)
             for tg in self._currently_used_targets:
                 tg.cleanup()
 
         self._do_after_feedback_retrieval(data_list)
 
+        if self._headless:
+            self._close_headless_case(verbose=verbose)
+
         if not console_display:
             self.lg.display_on_term = lg_display_on_term_save
 
@@ -2583,7 +3107,8 @@ class FmkPlumbing(object):
                 self.mon.notify_error()
                 return None
 
-            data_list = self._do_before_sending_data(data_list)
+            with self.perf.measure('before_sending'):
+                data_list = self._do_before_sending_data(data_list)
 
             if not data_list:
                 self.set_error("_send_data(): No more data to send",
@@ -2640,7 +3165,8 @@ class FmkPlumbing(object):
 
             for tg in self._currently_used_targets:
                 try:
-                    tg.send_pending_data(from_fmk=True)
+                    with self.perf.measure('target_sending', key=self.available_targets_desc[tg]):
+                        tg.send_pending_data(from_fmk=True)
                 except TargetStuck as e:
                     self.lg.log_target_feedback_from(
                         source=FeedbackSource(self),
@@ -2672,7 +3198,6 @@ class FmkPlumbing(object):
 
             self.group_id += 1
             self._recovered_tgs = None
-            gen = self.__current_gen
 
             if isinstance(data_list, Data):
                 data_list = [data_list]
@@ -2682,79 +3207,18 @@ class FmkPlumbing(object):
             else:
                 raise ValueError
 
-            if multiple_data:
+            if multiple_data and not self._headless:
                 self.lg.log_fmk_info("MULTIPLE DATA EMISSION", nl_after=True, delay_recording=True)
 
             for idx, dt in enumerate(data_list):
-                dt_mk_h = dt.get_history()
-                if multiple_data:
-                    self.lg.log_fmk_info("Data #%d" % (idx + 1), nl_before=True, delay_recording=True)
-                    self.lg.log_fn("--------------------------", rgb=Color.SUBINFO)
-
-                gen_info = dt.get_initial_dmaker()
-                gen_type_initial, gen_name, gen_ui = gen_info if gen_info is not None else (None, None, None)
-
-                data_id = dt.get_data_id()
-                # if data_id is not None, the data has been created from fmkDB
-                # because new data have not a data_id yet at this point in the code.
-                # if data_id is not None:
-                if dt.from_fmkdb:
-                    num = 1
-                    self.lg.log_dmaker_step(num)
-                    self.lg.log_generator_info(gen_type_initial, gen_name, None, data_id=data_id)
-                    self.lg.log_data_info(("Data fetched from FMKDB",), gen_type_initial, gen_name)
-                else:
-                    num = 0
-
-                if dt_mk_h is not None:
-                    for dmaker_type, data_maker_name, user_input in dt_mk_h:
-                        num += 1
-
-                        if num == 1 and data_id is None:
-                            # if data_id is not None then no need to log an initial generator
-                            # because data comes from FMKDB and it has been dealt previously
-                            if dmaker_type != gen_type_initial:
-                                self.lg.log_generator_info(gen_type_initial, gen_name, gen_ui, disabled=True)
-
-                        self.lg.log_dmaker_step(num)
-
-                        if dmaker_type in gen:
-                            dmaker_obj = self._generic_tactics.get_generator_obj(dmaker_type, data_maker_name)
-                            if dmaker_obj is None:
-                                dmaker_obj = self._tactics.get_generator_obj(dmaker_type, data_maker_name)
-                            if dmaker_obj in self.__initialized_dmakers and self.__initialized_dmakers[dmaker_obj][0]:
-                                ui = self.__initialized_dmakers[dmaker_obj][1]
-                            else:
-                                ui = user_input
-
-                            self.lg.log_generator_info(dmaker_type, data_maker_name, ui)
-
-                        else:
-                            dmaker_obj = self._generic_tactics.get_disruptor_obj(dmaker_type, data_maker_name)
-                            if dmaker_obj is None:
-                                dmaker_obj = self._tactics.get_disruptor_obj(dmaker_type, data_maker_name)
-                            if dmaker_obj in self.__initialized_dmakers and self.__initialized_dmakers[dmaker_obj][0]:
-                                ui = self.__initialized_dmakers[dmaker_obj][1]
-                            else:
-                                ui = user_input
-
-                            self.lg.log_disruptor_info(dmaker_type, data_maker_name, ui)
-
-                        for info in dt.read_info(dmaker_type, data_maker_name):
-                            self.lg.log_data_info(info, dmaker_type, data_maker_name)
+                if not self._headless:
+                    if multiple_data:
+                        self.lg.log_fmk_info("Data #%d" % (idx + 1), nl_before=True, delay_recording=True)
+                        self.lg.log_fn("--------------------------", rgb=Color.SUBINFO)
 
-                else:
-                    if gen_type_initial is None:
-                        self.lg.log_dmaker_step(1)
-                        self.lg.log_generator_info(Database.DEFAULT_GTYPE_NAME,
-                                                   Database.DEFAULT_GEN_NAME,
-                                                   None)
-                        self.lg.log_data_info(("RAW DATA (data makers not provided)",),
-                                              Database.DEFAULT_GTYPE_NAME, Database.DEFAULT_GEN_NAME)
-                    # else:
-                    #     self.lg.log_initial_generator(gen_type_initial, gen_name, gen_ui)
+                    self._log_data_steps(dt)
 
-                self.lg.log_data(dt, verbose=verbose)
+                self.lg.log_data(dt, verbose=verbose, do_show=not self._headless)
 
                 tg_ids = self._vtg_to_tg(dt)
                 for tg_id in tg_ids:
@@ -2762,8 +3226,20 @@ class FmkPlumbing(object):
                     ack_date = tg.get_last_target_ack_date()
                     self.lg.set_target_ack_date(FeedbackSource(tg), date=ack_date)
 
+                if self._headless:
+                    # Only the data records are inserted in fmkDB. The steps are left
+                    # out unless the test case turns out to be anomalous.
+                    if self.fmkDB.enabled:
+                        with self.perf.measure('fmkdb'):
+                            self.last_data_id = self.lg.commit_data_table_entry(self.group_id, self.prj.name,
+                                                                                with_steps=False)
+                    self.lg.defer_data_details()
+                    self.lg.reset_current_state()
+                    continue
+
                 if self.fmkDB.enabled:
-                    self.last_data_id = self.lg.commit_data_table_entry(self.group_id, self.prj.name)
+                    with self.perf.measure('fmkdb'):
+                        self.last_data_id = self.lg.commit_data_table_entry(self.group_id, self.prj.name)
                     if self.last_data_id is None:
                         self.lg.print_console("### Data not recorded in FmkDB",
                                               rgb=Color.DATAINFO, nl_after=True)
@@ -2778,6 +3254,93 @@ class FmkPlumbing(object):
 
                 self.lg.reset_current_state()
 
+    def _log_data_steps(self, dt):
+        gen = self.__current_gen
+        dt_mk_h = dt.get_history()
+
+        gen_info = dt.get_initial_dmaker()
+        gen_type_initial, gen_name, gen_ui = gen_info if gen_info is not None else (None, None, None)
+
+        data_id = dt.get_data_id()
+        # if data_id is not None, the data has been created from fmkDB
+        # because new data have not a data_id yet at this point in the code.
+        # if data_id is not None:
+        if dt.from_fmkdb:
+            num = 1
+            self.lg.log_dmaker_step(num)
+            self.lg.log_generator_info(gen_type_initial, gen_name, None, data_id=data_id)
+            self.lg.log_data_info(("Data fetched from FMKDB",), gen_type_initial, gen_name)
+        else:
+            num = 0
+
+        if dt_mk_h is not None:
+            for dmaker_type, data_maker_name, user_input in dt_mk_h:
+                num += 1
+
+                if num == 1 and data_id is None:
+                    # if data_id is not None then no need to log an initial generator
+                    # because data comes from FMKDB and it has been dealt previously
+                    if dmaker_type != gen_type_initial:
+                        self.lg.log_generator_info(gen_type_initial, gen_name, gen_ui, disabled=True)
+
+                self.lg.log_dmaker_step(num)
+
+                if dmaker_type in gen:
+                    dmaker_obj = self._generic_tactics.get_generator_obj(dmaker_type, data_maker_name)
+                    if dmaker_obj is None:
+                        dmaker_obj = self._tactics.get_generator_obj(dmaker_type, data_maker_name)
+                    if dmaker_obj in self.__initialized_dmakers and self.__initialized_dmakers[dmaker_obj][0]:
+                        ui = self.__initialized_dmakers[dmaker_obj][1]
+                    else:
+                        ui = user_input
+
+                    self.lg.log_generator_info(dmaker_type, data_maker_name, ui)
+
+                else:
+                    dmaker_obj = self._generic_tactics.get_disruptor_obj(dmaker_type, data_maker_name)
+                    if dmaker_obj is None:
+                        dmaker_obj = self._tactics.get_disruptor_obj(dmaker_type, data_maker_name)
+                    if dmaker_obj in self.__initialized_dmakers and self.__initialized_dmakers[dmaker_obj][0]:
+                        ui = self.__initialized_dmakers[dmaker_obj][1]
+                    else:
+                        ui = user_input
+
+                    self.lg.log_disruptor_info(dmaker_type, data_maker_name, ui)
+
+                for info in dt.read_info(dmaker_type, data_maker_name):
+                    self.lg.log_data_info(info, dmaker_type, data_maker_name)
+
+        else:
+            if gen_type_initial is None:
+                self.lg.log_dmaker_step(1)
+                self.lg.log_generator_info(Database.DEFAULT_GTYPE_NAME,
+                                           Database.DEFAULT_GEN_NAME,
+                                           None)
+                self.lg.log_data_info(("RAW DATA (data makers not provided)",),
+                                      Database.DEFAULT_GTYPE_NAME, Database.DEFAULT_GEN_NAME)
+            # else:
+            #     self.lg.log_initial_generator(gen_type_initial, gen_name, gen_ui)
+
+    def _close_headless_case(self, verbose=False):
+        case = self.lg.close_headless_case()
+        if case is None:
+            return
+
+        anomalous = case.is_anomalous()
+        if anomalous:
+            # the details of the test case are logged as in the regular mode
+            self.lg.log_headless_case_header(case)
+            for dt, data_ids in case.records:
+                self._log_data_steps(dt)
+                self.lg.log_data(dt, verbose=verbose)
+                if self.fmkDB.enabled:
+                    self.lg.commit_steps_entries(data_ids)
+                self.lg.reset_current_state()
+            self.lg.log_headless_case_feedback(case)
+
+        if self._headless_stats.add_case(anomalous):
+            self.lg.log_fmk_info(self._headless_stats.get_summary(), do_record=False)
+
     @EnforceOrder(accepted_states=["S2"])
     def _setup_new_sending(self):
         if self._burst > 1 and self._burst_countdown == self._burst:
@@ -3013,7 +3576,7 @@ class FmkPlumbing(object):
     @EnforceOrder(accepted_states=["S2"])
     def fmkdb_fetch_data(self, start_id=1, end_id=-1):
         data_list = []
-        for record in self.fmkDB.fetch_data(start_id=start_id, end_id=end_id):
+        for record in self.fmkDB.iter_data(start_id=start_id, end_id=end_id):
             data_id, content, dtype, dmk_name, dm_name = record
             data = Data(content)
             data.set_data_id(data_id)
@@ -3330,12 +3893,17 @@ class FmkPlumbing(object):
                         dt.make_recordable()
                         self.register_in_data_bank(dt)
 
-                if multiple_data:
-                    self._log_data(data_list, verbose=verbose)
-                else:
-                    self._log_data(data_list[0], verbose=verbose)
+                if self._headless:
+                    self.lg.open_headless_case()
 
-                ret = self.wait_for_target_readiness()
+                with self.perf.measure('logging'):
+                    if multiple_data:
+                        self._log_data(data_list, verbose=verbose)
+                    else:
+                        self._log_data(data_list[0], verbose=verbose)
+
+                with self.perf.measure('target_readiness'):
+                    ret = self.wait_for_target_readiness()
                 # Note: the condition (ret = -1) is supposed to be managed by the operator
                 if ret < -1:
                     exit_operator = True
@@ -3346,13 +3914,17 @@ class FmkPlumbing(object):
 
                 # Target fbk is logged only at the end of a burst
                 if self._burst_countdown == self._burst:
-                    cont1 = self.retrieve_and_log_target_feedback()
+                    with self.perf.measure('feedback_retrieval'):
+                        cont1 = self.retrieve_and_log_target_feedback()
+
+                with self.perf.measure('probes'):
+                    self.mon.notify_target_feedback_retrieval()
+                    self.mon.wait_for_probe_status_retrieval()
 
-                self.mon.notify_target_feedback_retrieval()
-                self.mon.wait_for_probe_status_retrieval()
+                    if self._burst_countdown == self._burst:
+                        cont2 = self.monitor_probes(force_record=True)
 
                 if self._burst_countdown == self._burst:
-                    cont2 = self.monitor_probes(force_record=True)
                     if not cont1 or not cont2:
                         exit_operator = True
                         self.lg.log_fmk_info("Operator will shutdown because something is going wrong with "
@@ -3371,6 +3943,9 @@ class FmkPlumbing(object):
                 if comments:
                     self.lg.log_comment(comments)
 
+                if self._headless:
+                    self._close_headless_case(verbose=verbose)
+
                 if op_status is not None and op_status < 0:
                     exit_operator = True
                     self.lg.log_fmk_info("Operator will shutdown because it returns a negative status")
@@ -3633,38 +4208,40 @@ class FmkPlumbing(object):
             if not setup_crashed and not setup_err:
                 try:
                     invalid_data = False
-                    if isinstance(dmaker_obj, Generator):
-                        if dmaker_obj.produced_seed is not None:
-                            data = Data(dmaker_obj.produced_seed.get_content(do_copy=True))
-                        else:
-                            data = dmaker_obj.generate_data(self.dm, self.mon, self.targets)
-                            if data.scenario_dependence:
-                                init_dmaker = data.get_initial_dmaker()
-                                if init_dmaker[0] != Database.DEFAULT_GTYPE_NAME:
-                                    initial_generator_info = data.get_initial_dmaker()
-                            if save_gen_seed and dmaker_obj.produced_seed is None:
-                                # Usefull to replay from the beginning a modelwalking sequence
-                                dmaker_obj.produced_seed = Data(data.get_content(do_copy=True))
-                        invalid_data = not self._is_data_valid(data)
-                    elif isinstance(dmaker_obj, Disruptor):
-                        if not self._is_data_valid(data):
-                            invalid_data = True
-                        else:
-                            data = dmaker_obj.disrupt_data(self.dm, self.targets, data)
-                    elif isinstance(dmaker_obj, StatefulDisruptor):
-                        # we only check validity in the case the stateful disruptor
-                        # has not been seeded
-                        if dmaker_obj.is_attr_set(DataMakerAttr.NeedSeed) and not self._is_data_valid(data):
-                            invalid_data = True
-                        else:
-                            ret = dmaker_obj._set_seed(data)
-                            if isinstance(ret, Data):
-                                data = ret
-                                dmaker_obj.set_attr(DataMakerAttr.NeedSeed)
+                    perf_stage = 'generator' if isinstance(dmaker_obj, Generator) else 'disruptor'
+                    with self.perf.measure(perf_stage, key=dmaker_type):
+                        if isinstance(dmaker_obj, Generator):
+                            if dmaker_obj.produced_seed is not None:
+                                data = Data(dmaker_obj.produced_seed.get_content(do_copy=True))
+                            else:
+                                data = dmaker_obj.generate_data(self.dm, self.mon, self.targets)
+                                if data.scenario_dependence:
+                                    init_dmaker = data.get_initial_dmaker()
+                                    if init_dmaker[0] != Database.DEFAULT_GTYPE_NAME:
+                                        initial_generator_info = data.get_initial_dmaker()
+                                if save_gen_seed and dmaker_obj.produced_seed is None:
+                                    # Usefull to replay from the beginning a modelwalking sequence
+                                    dmaker_obj.produced_seed = Data(data.get_content(do_copy=True))
+                            invalid_data = not self._is_data_valid(data)
+                        elif isinstance(dmaker_obj, Disruptor):
+                            if not self._is_data_valid(data):
+                                invalid_data = True
                             else:
                                 data = dmaker_obj.disrupt_data(self.dm, self.targets, data)
-                    else:
-                        raise ValueError
+                        elif isinstance(dmaker_obj, StatefulDisruptor):
+                            # we only check validity in the case the stateful disruptor
+                            # has not been seeded
+                            if dmaker_obj.is_attr_set(DataMakerAttr.NeedSeed) and not self._is_data_valid(data):
+                                invalid_data = True
+                            else:
+                                ret = dmaker_obj._set_seed(data)
+                                if isinstance(ret, Data):
+                                    data = ret
+                                    dmaker_obj.set_attr(DataMakerAttr.NeedSeed)
+                                else:
+                                    data = dmaker_obj.disrupt_data(self.dm, self.targets, data)
+                        else:
+                            raise ValueError
 
                     self._do_after_dmaker_data_retrieval(data)
 
@@ -4469,15 +5046,11 @@ class FmkShell(cmd.Cmd):
 
         arg = line.strip()
 
-        ok = False
-        for dm in self.fz.iter_data_models():
-            if dm.name == arg:
-                ok = True
-                break
+        dm = self.fz.get_data_model_by_name(arg)
 
         self.__error_msg = "Data Model '%s' is not available" % arg
 
-        if not ok:
+        if dm is None:
             return False
 
         if not self.fz.load_data_model(dm=dm):
@@ -4496,9 +5069,8 @@ class FmkShell(cmd.Cmd):
         args = line.split()
 
         ok = True
-        dm_name_list = [x.name for x in self.fz.dm_list]
         for dm_name in args:
-            if dm_name not in dm_name_list:
+            if self.fz.get_data_model_by_name(dm_name) is None:
                 ok = False
                 break
 
@@ -4519,15 +5091,11 @@ class FmkShell(cmd.Cmd):
 
         arg = line.strip()
 
-        ok = False
-        for prj in self.fz.projects():
-            if prj.name == arg:
-                ok = True
-                break
+        prj = self.fz.get_project_by_name(arg)
 
         self.__error_msg = "Project '%s' is not available" % arg
 
-        if not ok:
+        if prj is None:
             return False
 
         if not self.fz.load_project(prj=prj):
@@ -4572,14 +5140,10 @@ class FmkShell(cmd.Cmd):
         else:
             tg_ids = None
 
-        ok = False
-        for prj in self.fz.projects():
-            if prj.name == prj_name:
-                ok = True
-                break
+        prj = self.fz.get_project_by_name(prj_name)
 
         self.__error_msg = "Project '%s' is not available" % prj_name
-        if not ok:
+        if prj is None:
             return False
 
         self.__error_msg = "Unable to launch the project '%s'" % prj_name
@@ -5088,6 +5652,14 @@ class FmkShell(cmd.Cmd):
         ret = self.do_send(line, verbose=True)
         return ret
 
+    def _get_producer_settings(self):
+        try:
+            return int(self.config.send_loop.producer.workers), \
+                   int(self.config.send_loop.producer.lookahead)
+        except (AttributeError, TypeError, ValueError):
+            # configuration file created by a previous fuddly version
+            return 0, 4
+
     def do_send_loop(self, line, use_existing_seed=False, verbose=False):
         """
         Execute the 'send' command in a loop
@@ -5127,10 +5699,12 @@ class FmkShell(cmd.Cmd):
             "prompt_height": conf.prompt_height,
         }
 
+        workers, lookahead = self._get_producer_settings()
         with aligned_stdout(**kwargs):
             self.__error = self.fz.process_data_and_send(DataProcess(actions, tg_ids=tg_ids),
                                                          max_loop=max_loop, verbose=verbose,
-                                                         save_generator_seed=use_existing_seed) is None
+                                                         save_generator_seed=use_existing_seed,
+                                                         workers=workers, lookahead=lookahead) is None
 
         return False
 
@@ -5206,9 +5780,11 @@ class FmkShell(cmd.Cmd):
             "prompt_height": conf.prompt_height,
         }
 
+        workers, lookahead = self._get_producer_settings()
         with aligned_stdout(**kwargs):
             self.__error = self.fz.process_data_and_send(DataProcess(actions, tg_ids=tg_ids),
-                                                         max_loop=nb) is None
+                                                         max_loop=nb, workers=workers,
+                                                         lookahead=lookahead) is None
 
         return False
 
@@ -5256,7 +5832,9 @@ class FmkShell(cmd.Cmd):
 
             dp_list.append(DataProcess(actions, tg_ids=tg_ids))
 
-        self.__error = self.fz.process_data_and_send(dp_list, max_loop=loop_count) is None
+        workers, lookahead = self._get_producer_settings()
+        self.__error = self.fz.process_data_and_send(dp_list, max_loop=loop_count,
+                                                     workers=workers, lookahead=lookahead) is None
         return False
 
         # prev_data_list = None
@@ -5416,6 +5994,105 @@ class FmkShell(cmd.Cmd):
         self.__error = False
         return False
 
+    def do_enable_headless_mode(self, line):
+        """
+        Enable the headless mode, meant for unattended campaigns: only a compact record
+        of each test case is kept, the anomalous test cases are fully logged and aggregate
+        statistics are displayed periodically.
+        |  syntax: enable_headless_mode [stats_period]
+        |  |_ stats_period: period of the statistics display in seconds (Default = 10)
+        """
+        self.__error = True
+
+        args = line.split()
+        args_len = len(args)
+
+        if args_len > 1:
+            return False
+        try:
+            if args_len == 1:
+                ok = self.fz.enable_headless_mode(stats_period=float(args[0]))
+            else:
+                ok = self.fz.enable_headless_mode()
+        except:
+            return False
+
+        if not ok:
+            return False
+
+        self.__error = False
+        return False
+
+    def do_disable_headless_mode(self, line):
+        """Disable the headless mode"""
+        self.fz.disable_headless_mode()
+        return False
+
+    def do_enable_perf(self, line):
+        """
+        Enable the measurement of the time spent within each stage of the test case
+        pipeline, and optionally the profiling of one stage.
+        |  syntax: enable_perf [stage [mode]]
+        |  |_ stage: the stage to profile, among: generator, disruptor, before_sending,
+        |     target_sending, target_readiness, feedback_retrieval, probes, logging,
+        |     fmkdb, fmkdb_batch
+        |  |_ mode: 'cprofile' (Default) or 'sampling'
+        """
+        self.__error = True
+
+        args = line.split()
+        args_len = len(args)
+
+        if args_len > 2:
+            return False
+        try:
+            ok = self.fz.enable_perf_monitoring(*args)
+        except:
+            return False
+
+        if not ok:
+            return False
+
+        self.__error = False
+        return False
+
+    def do_disable_perf(self, line):
+        """Disable the performance monitoring (the statistics are kept)"""
+        self.fz.disable_perf_monitoring()
+        return False
+
+    def do_reset_perf(self, line):
+        """Reset the performance statistics"""
+        self.fz.reset_perf_stats()
+        return False
+
+    def do_show_perf(self, line):
+        """
+        Show the time spent within each stage of the test case pipeline (count, total,
+        share of the monitoring time, mean, p50, p99 and max durations), per data maker
+        and per target, as well as the most time-consuming functions of the profiled stage.
+        """
+        self.fz.show_perf()
+        return False
+
+    def do_export_perf(self, line):
+        """
+        Export the performance statistics to a JSON file or to the fmkDB
+        |  syntax: export_perf [json_path]
+        |  |_ json_path: path of the JSON file. If not provided, the statistics
+        |     are recorded in the fmkDB (table PERF)
+        """
+        self.__error = True
+
+        args = line.split()
+        if len(args) > 1:
+            return False
+        if not self.fz.export_perf_stats(json_path=args[0] if args else None):
+            return False
+
+        self.__error = False
+        return False
+
     def do_set_burst(self, line):
         """
         Set the burst value. Used by the FMK to decide when delay
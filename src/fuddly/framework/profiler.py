@@ -0,0 +1,335 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import collections
+import contextlib
+import cProfile
+import math
+import pstats
+import sys
+import threading
+import time
+
+
+class StageStats(object):
+    """
+    Timing statistics of a stage of the test case pipeline. The percentiles are computed
+    from the last `max_samples` durations.
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', '_samples')
+
+    def __init__(self, max_samples=10000):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._samples = collections.deque(maxlen=max_samples)
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+        self._samples.append(duration)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        """
+        Args:
+            p (float): percentile to compute (between 0 and 100), using the nearest-rank method.
+        """
+        if not self._samples:
+            return None
+        samples = sorted(self._samples)
+        rank = max(1, int(math.ceil(p / 100.0 * len(samples))))
+        return samples[rank - 1]
+
+    def to_dict(self):
+        return {'count': self.count, 'total': self.total, 'mean': self.mean,
+                'min': self.min, 'max': self.max,
+                'p50': self.percentile(50), 'p99': self.percentile(99)}
+
+
+class StackSampler(object):
+    """
+    Sample the call stack of the thread which is currently within the profiled stage,
+    from a background thread.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self._sampled_thread_id = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.clear()
+
+    def clear(self):
+        self.nb_samples = 0
+        self.self_samples = collections.Counter()  # innermost function
+        self.cumulative_samples = collections.Counter()  # functions within the stack
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(None, self._sample, 'perf_sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def begin_stage(self):
+        self._sampled_thread_id = threading.get_ident()
+
+    def end_stage(self):
+        self._sampled_thread_id = None
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval):
+            thread_id = self._sampled_thread_id
+            if thread_id is None:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+
+            self.nb_samples += 1
+            func = self._get_func(frame)
+            self.self_samples[func] += 1
+            stack_funcs = set()
+            while frame is not None:
+                stack_funcs.add(self._get_func(frame))
+                frame = frame.f_back
+            self.cumulative_samples.update(stack_funcs)
+
+    @staticmethod
+    def _get_func(frame):
+        code = frame.f_code
+        return code.co_filename, code.co_firstlineno, code.co_name
+
+    def get_stats(self, limit=20):
+        return [{'function': '{:s}:{:d}({:s})'.format(*func),
+                 'self_samples': self.self_samples[func],
+                 'cumulative_samples': nb}
+                for func, nb in self.cumulative_samples.most_common(limit)]
+
+
+class _Measure(object):
+
+    __slots__ = ('profiler', 'stage', 'key', 'start')
+
+    def __init__(self, profiler, stage, key):
+        self.profiler = profiler
+        self.stage = stage
+        self.key = key
+
+    def __enter__(self):
+        if self.stage == self.profiler.profiled_stage:
+            self.profiler._begin_profiling()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        if self.stage == self.profiler.profiled_stage:
+            self.profiler._end_profiling()
+        self.profiler.add_duration(self.stage, duration, key=self.key)
+        return False
+
+
+class ExecutionProfiler(object):
+    """
+    Measure the time spent within each stage of the test case pipeline.
+    The durations are aggregated per stage and per key (e.g., per data maker or per target).
+    Besides, one stage can be profiled either by cProfile or by sampling the call stack.
+    """
+
+    PROFILING_MODES = ('cprofile', 'sampling')
+
+    def __init__(self, max_samples=10000):
+        self.enabled = False
+        self.max_samples = max_samples
+        self.profiled_stage = None
+        self.profiling_mode = None
+        self._stats = collections.OrderedDict()  # stage -> {key: StageStats}
+        self._lock = threading.Lock()
+        self._profile = None
+        self._sampler = None
+        self._profiled_depth = {}  # thread ID -> nesting depth of the profiled stage
+        self._elapsed = 0.0
+        self._enabled_since = None
+
+    def enable(self, profiled_stage=None, profiling_mode='cprofile', sampling_interval=0.001):
+        """
+        Args:
+            profiled_stage (str): name of the stage to profile. If None, only the durations
+              are measured.
+            profiling_mode (str): either 'cprofile' or 'sampling'.
+            sampling_interval (float): sampling period in seconds (only relevant to the
+              'sampling' mode).
+        """
+        if profiling_mode not in self.PROFILING_MODES:
+            raise ValueError('Unknown profiling mode: {!r}'.format(profiling_mode))
+
+        self.disable()
+        self.profiled_stage = profiled_stage
+        self.profiling_mode = profiling_mode if profiled_stage is not None else None
+        self._profile = None
+        self._sampler = None
+        if self.profiling_mode == 'cprofile':
+            self._profile = cProfile.Profile()
+        elif self.profiling_mode == 'sampling':
+            self._sampler = StackSampler(interval=sampling_interval)
+            self._sampler.start()
+        self._enabled_since = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        if self.enabled:
+            self._elapsed += time.perf_counter() - self._enabled_since
+        self.enabled = False
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    @property
+    def elapsed(self):
+        """
+        Time (in seconds) during which the measurement has been enabled since the last reset.
+        """
+        if self.enabled:
+            return self._elapsed + time.perf_counter() - self._enabled_since
+        else:
+            return self._elapsed
+
+    def reset(self):
+        with self._lock:
+            self._stats = collections.OrderedDict()
+        self._elapsed = 0.0
+        self._enabled_since = time.perf_counter()
+        if self._profile is not None:
+            self._profile = cProfile.Profile()
+        if self._sampler is not None:
+            self._sampler.clear()
+
+    def measure(self, stage, key=None):
+        """
+        Return a context manager measuring the time spent within the stage `stage`.
+        If `key` is provided, the duration is also aggregated for this key.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _Measure(self, stage, key)
+
+    def add_duration(self, stage, duration, key=None):
+        with self._lock:
+            stage_stats = self._stats.get(stage)
+            if stage_stats is None:
+                stage_stats = self._stats[stage] = collections.OrderedDict()
+            keys = (None,) if key is None else (None, key)
+            for k in keys:
+                stats = stage_stats.get(k)
+                if stats is None:
+                    stats = stage_stats[k] = StageStats(self.max_samples)
+                stats.add(duration)
+
+    def _begin_profiling(self):
+        thread_id = threading.get_ident()
+        depth = self._profiled_depth.get(thread_id, 0)
+        self._profiled_depth[thread_id] = depth + 1
+        if depth > 0:
+            return
+        if self._profile is not None:
+            try:
+                self._profile.enable()
+            except ValueError:
+                # another profiler is already active
+                pass
+        elif self._sampler is not None:
+            self._sampler.begin_stage()
+
+    def _end_profiling(self):
+        thread_id = threading.get_ident()
+        depth = self._profiled_depth.get(thread_id, 1) - 1
+        self._profiled_depth[thread_id] = depth
+        if depth > 0:
+            return
+        if self._profile is not None:
+            self._profile.disable()
+        elif self._sampler is not None:
+            self._sampler.end_stage()
+
+    def iter_stats(self):
+        """
+        Iterate over the statistics as (stage, key, :class:`StageStats`) tuples. The key is None
+        for the statistics of the whole stage.
+        """
+        with self._lock:
+            stats = [(stage, key, st) for stage, stage_stats in self._stats.items()
+                     for key, st in stage_stats.items()]
+        for s in stats:
+            yield s
+
+    def get_profiling_stats(self, limit=20):
+        """
+        Returns:
+            list: the functions that took the most time within the profiled stage.
+        """
+        if self._profile is not None:
+            try:
+                stats = pstats.Stats(self._profile)
+            except TypeError:
+                # nothing has been profiled yet
+                return []
+            stats.sort_stats('cumulative')
+            functions = []
+            for func in stats.fcn_list[:limit]:
+                cc, nc, tt, ct, _ = stats.stats[func]
+                functions.append({'function': '{:s}:{:d}({:s})'.format(*func),
+                                  'ncalls': nc, 'tottime': tt, 'cumtime': ct})
+            return functions
+        elif self._sampler is not None:
+            return self._sampler.get_stats(limit=limit)
+        else:
+            return []
+
+    def to_dict(self, limit=20):
+        stages = collections.OrderedDict()
+        for stage, key, stats in self.iter_stats():
+            stage_desc = stages.setdefault(stage, {'stats': None, 'keys': collections.OrderedDict()})
+            if key is None:
+                stage_desc['stats'] = stats.to_dict()
+            else:
+                stage_desc['keys'][str(key)] = stats.to_dict()
+
+        return {'elapsed': self.elapsed,
+                'stages': stages,
+                'profiled_stage': self.profiled_stage,
+                'profiling_mode': self.profiling_mode,
+                'profiling_stats': self.get_profiling_stats(limit=limit)}
@@ -39,6 +39,132 @@ from fuddly.libs.external_modules import Color
 class IncorrectTargetError(Exception): pass
 class ShmemMappingError(Exception): pass
 
+
+class ShmemRingBuffer(object):
+    """
+    Ring buffer of variable-length records within a shared memory block, written by one
+    producer and read by up to `max_consumer` consumers, each one with its own read cursor.
+
+    The block starts with the capacity of the ring, the write cursor and the read cursors,
+    followed by the records. A record is made of its length followed by its content, and it
+    never wraps around the end of the ring (a padding marker is written instead, if there is
+    enough room for it). The cursors are monotonic byte counters, each one only written by
+    its owner, thus no lock is needed.
+    """
+
+    cursor_format = '<Q'
+    cursor_size = 8
+    len_format = '<L'
+    len_size = 4
+    padding_marker = 0xFFFFFFFF
+
+    def __init__(self, name, size=None, max_consumer=10, create=False):
+        """
+        Args:
+            name (str): name of the shared memory block
+            size (int): size of the shared memory block (only used if `create` is True)
+            max_consumer (int): maximum number of consumers
+            create (bool): if True, the shared memory block is created, otherwise an existing
+              one is mapped. In the latter case, :class:`ShmemMappingError` is raised if it has not
+              been initialized yet by its creator.
+        """
+        self.max_consumer = max_consumer
+        self.data_start = self.cursor_size * (2 + max_consumer)
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.capacity = size - self.data_start
+            self.shm.buf[:self.data_start] = bytes(self.data_start)
+            # the capacity is written last, as it signals that the ring is initialized
+            struct.pack_into(self.cursor_format, self.shm.buf, 0, self.capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name, create=False)
+            self.capacity = struct.unpack_from(self.cursor_format, self.shm.buf, 0)[0]
+            if self.capacity == 0:
+                self.shm.close()
+                raise ShmemMappingError('the shared memory {!s} is not initialized'.format(name))
+
+    def _get_cursor(self, idx):
+        return struct.unpack_from(self.cursor_format, self.shm.buf, self.cursor_size * (1 + idx))[0]
+
+    def _set_cursor(self, idx, value):
+        struct.pack_into(self.cursor_format, self.shm.buf, self.cursor_size * (1 + idx), value)
+
+    def _get_write_cursor(self):
+        return self._get_cursor(0)
+
+    def _get_read_cursor(self, consumer_idx):
+        return self._get_cursor(1 + consumer_idx)
+
+    def fits(self, data):
+        return self.len_size + len(data) <= self.capacity
+
+    def write(self, data, nb_consumers):
+        """
+        Write a record if there is enough room for it, that is, if the `nb_consumers` first
+        consumers have read enough of the previous records.
+
+        Returns:
+            bool: True if the record has been written
+        """
+        if not self.fits(data):
+            raise ValueError('data too long, exceeds shared memory size')
+
+        wpos = self._get_write_cursor()
+        min_rpos = min((self._get_read_cursor(i) for i in range(nb_consumers)), default=wpos)
+        offset = wpos % self.capacity
+        needed = self.len_size + len(data)
+        padding = self.capacity - offset if offset + needed > self.capacity else 0
+        if self.capacity - (wpos - min_rpos) < padding + needed:
+            return False
+
+        buf = self.shm.buf
+        if padding:
+            if padding >= self.len_size:
+                struct.pack_into(self.len_format, buf, self.data_start + offset, self.padding_marker)
+            offset = 0
+        start = self.data_start + offset
+        struct.pack_into(self.len_format, buf, start, len(data))
+        buf[start + self.len_size:start + needed] = data
+        # the record is published once its content is written
+        self._set_cursor(0, wpos + padding + needed)
+        return True
+
+    def has_data(self, consumer_idx):
+        return self._get_read_cursor(consumer_idx) < self._get_write_cursor()
+
+    def read(self, consumer_idx):
+        """
+        Returns:
+            list: all the records that have not been read yet by the consumer
+        """
+        rpos = self._get_read_cursor(consumer_idx)
+        wpos = self._get_write_cursor()
+        records = []
+        buf = self.shm.buf
+        while rpos < wpos:
+            offset = rpos % self.capacity
+            if self.capacity - offset < self.len_size:
+                rpos += self.capacity - offset
+                continue
+            dlen = struct.unpack_from(self.len_format, buf, self.data_start + offset)[0]
+            if dlen == self.padding_marker:
+                rpos += self.capacity - offset
+                continue
+            start = self.data_start + offset + self.len_size
+            records.append(bytes(buf[start:start + dlen]))
+            rpos += self.len_size + dlen
+
+        if records or rpos != self._get_read_cursor(consumer_idx):
+            self._set_cursor(1 + consumer_idx, rpos)
+        return records
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
 class TestTarget(Target):
 
     _feedback_mode = Target.FBK_WAIT_FULL_TIME
@@ -46,15 +172,11 @@ class TestTarget(Target):
     _last_ack_date = None
 
     # shared memory constants
-    dlen_start = 0
-    dlen_stop = 4
-    dlen_format = '>L'
-    producer_status_idx = 5
-    consumer_start = 6
-    consumer_stop = 15
-    max_consumer = consumer_stop - consumer_start + 1
-    data_start = meta_data_size = 16
-    shmem_size = 4096
+    max_consumer = 10
+    shmem_size = 1 << 20
+    # bounds of the delay between two polls of the shared memory when nothing happens
+    min_poll_delay = 0.0005
+    max_poll_delay = 0.01
 
 
     def __init__(self, name=None, recover_ratio=100, fbk_samples=None, repeat_input=False,
@@ -94,15 +216,8 @@ class TestTarget(Target):
             self._target_ready = False
             if self.fbk_sources is not None:
                 self.input_shmem_list = []
-            self.output_shmem = shared_memory.SharedMemory(name=self.name,
-                                                           create=True,
-                                                           size=self.shmem_size)
-            buf = self.output_shmem.buf
-            for i in range(self._current_consumer_idx+1):
-                # every consumers are ready at start
-                buf[self.consumer_start+i] = 1
-            # nothing has been produced
-            buf[self.producer_status_idx] = 0
+            self.output_shmem = ShmemRingBuffer(self.name, size=self.shmem_size,
+                                                max_consumer=self.max_consumer, create=True)
 
             self._stop_event = threading.Event()
             self._stop_event.clear()
@@ -136,22 +251,25 @@ class TestTarget(Target):
                 except FileNotFoundError:
                     pass
             if self.input_shmem_list:
-                for shm, _ in self.input_shmem_list:
-                    shm.close()
+                for ring, _ in self.input_shmem_list:
+                    ring.close()
 
     def _map_input_shmem(self):
         if self.fbk_sources is None:
             return False
 
         else:
+            for ring, _ in self.input_shmem_list:
+                ring.close()
+            self.input_shmem_list = []
             for tg, c_idx in self.fbk_sources:
                 if tg._shmem_mode:
                     try:
-                        shm = shared_memory.SharedMemory(name=tg.name, create=False)
-                    except FileNotFoundError:
+                        ring = ShmemRingBuffer(tg.name, max_consumer=tg.max_consumer)
+                    except (FileNotFoundError, ShmemMappingError):
                         return False
                     else:
-                        self.input_shmem_list.append((shm, c_idx))
+                        self.input_shmem_list.append((ring, c_idx))
                 else:
                     raise IncorrectTargetError()
 
@@ -165,9 +283,9 @@ class TestTarget(Target):
             if self._map_input_shmem():
                 shmem_ok = True
                 break
-            else:
+            elif self._stop_event.wait(0.2):
                 # print('\n*** DBG wait for fbk sources')
-                time.sleep(0.2)
+                break
 
         if shmem_ok:
             self._target_ready = True
@@ -181,56 +299,47 @@ class TestTarget(Target):
             self._fbk_collector_exit_event.set()
             return
 
+        poll_delay = self.min_poll_delay
         while not self._stop_event.is_set():
             feedback_items = []
-            for shm, _ in self.input_shmem_list:
-                if shm.buf[self.producer_status_idx] == 1:
-                    break
-            else:
-                time.sleep(0.01)
-                continue
-
             for tg_idx, obj in enumerate(self.input_shmem_list):
-                shm, c_idx = obj
-                if shm.buf[self.producer_status_idx] == 0 \
-                        or shm.buf[self.consumer_start+c_idx] == 1:
-                    continue
-
-                dlen = struct.unpack(self.dlen_format,
-                                     bytes(shm.buf[self.dlen_start:self.dlen_stop]))[0]
-                fbk_item = bytes(shm.buf[self.data_start:self.data_start+dlen])
-                self._logger.collect_feedback(fbk_item, status_code=0,
-                                              fbk_src=self.fbk_sources[tg_idx][0])
-                shm.buf[self.consumer_start+c_idx] = 1
-                feedback_items.append(fbk_item)
-
-            if self.controled_targets:
-                for fi in feedback_items:
-                    # print(f'\n***DBG put {fi}')
-                    self.forward_queue.put(fi)
-
-            time.sleep(0.01)
+                ring, c_idx = obj
+                for fbk_item in ring.read(c_idx):
+                    self._logger.collect_feedback(fbk_item, status_code=0,
+                                                  fbk_src=self.fbk_sources[tg_idx][0])
+                    feedback_items.append(fbk_item)
+
+            if feedback_items:
+                if self.controled_targets:
+                    for fi in feedback_items:
+                        # print(f'\n***DBG put {fi}')
+                        self.forward_queue.put(fi)
+                poll_delay = self.min_poll_delay
+            else:
+                # the shared memory is polled less often while the sources are idle
+                self._stop_event.wait(poll_delay)
+                poll_delay = min(poll_delay * 2, self.max_poll_delay)
 
         # print('\n*** DBG fbk collector exits')
         self._fbk_collector_exit_event.set()
 
     def _forward_data(self):
         while not self._stop_event.is_set():
-            data_to_send = []
+            try:
+                data_to_send = [self.forward_queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
             while not self.forward_queue.empty():
                 data_to_send.append(self.forward_queue.get_nowait())
 
             # print(f'\n***DBG get {data_to_send}')
 
-            if data_to_send:
-                time.sleep(self.control_delay)
-                for tg, fbk_filter in self.controled_targets:
-                    for data in data_to_send:
-                        d = fbk_filter(data, self.current_dm)
-                        if d is not None:
-                            tg.send_data_sync(Data(d))
-            else:
-                time.sleep(0.1)
+            time.sleep(self.control_delay)
+            for tg, fbk_filter in self.controled_targets:
+                for data in data_to_send:
+                    d = fbk_filter(data, self.current_dm)
+                    if d is not None:
+                        tg.send_data_sync(Data(d))
 
         # print('\n***DBG leave forward')
 
@@ -245,7 +354,7 @@ class TestTarget(Target):
 
     def get_consumer_idx(self):
         # This function is OK even when linked TestTargets are run in different fuddly instance
-        if self._current_consumer_idx + 1 > self.max_consumer:
+        if self._current_consumer_idx + 1 >= self.max_consumer:
             raise IndexError
         self._current_consumer_idx += 1
         return self._current_consumer_idx
@@ -280,39 +389,26 @@ class TestTarget(Target):
                 return
 
             d = data.to_bytes()
-            dlen = len(d)
-            if dlen > self.shmem_size - self.meta_data_size:
+            if not self.output_shmem.fits(d):
+                self._send_data_finished_event.set()
                 raise ValueError('data too long, exceeds shared memory size')
 
-            data_consumed = False
-            buf = self.output_shmem.buf
+            data_written = False
             t0 = datetime.datetime.now()
             self._last_ack_date = None
-            while (datetime.datetime.now() - t0).total_seconds() < 2:
-                time.sleep(0.001)
-                for i in range(self._current_consumer_idx+1):
-                    if buf[self.consumer_start+i] == 0:
-                        # one consumer is not ready thus we busy wait
-                        break
-                else:
-                    # All the consumers are ready (0 everywhere)
-                    # print('\n*** consumer are ready')
+            poll_delay = self.min_poll_delay
+            while True:
+                if self.output_shmem.write(d, nb_consumers=self._current_consumer_idx+1):
                     self._last_ack_date = datetime.datetime.now()
-                    data_consumed = True
-                    # print('\n*** DBG: data consumed on time!')
+                    data_written = True
                     break
-                # print('\n*** DBG: data not consumed yet')
-
-
-            if data_consumed:
-                buf[self.producer_status_idx] = 0
+                elif (datetime.datetime.now() - t0).total_seconds() >= 2:
+                    break
+                # the ring is full, thus we wait for the slowest consumer
+                time.sleep(poll_delay)
+                poll_delay = min(poll_delay * 2, self.max_poll_delay)
 
-                for i in range(self._current_consumer_idx+1):
-                    buf[self.consumer_start+i] = 0
-                buf[self.dlen_start:self.dlen_stop] = struct.pack(self.dlen_format, dlen)
-                buf[self.data_start:self.data_start+dlen] = d
-                buf[self.producer_status_idx] = 1
-            else:
+            if not data_written:
                 print(f'\n*** Warning: previous data not consumed on time, thus ignore new sending of "{d[:10]}..." ***')
 
             self._send_data_finished_event.set()
@@ -340,9 +436,8 @@ class TestTarget(Target):
 
     def is_feedback_received(self):
         if self._shmem_mode:
-            for shm, c_idx in self.input_shmem_list:
-                if shm.buf[self.producer_status_idx] == 1 and \
-                        shm.buf[self.consumer_start+c_idx] == 0:
+            for ring, c_idx in self.input_shmem_list:
+                if ring.has_data(c_idx):
                     return True
             else:
                 return False
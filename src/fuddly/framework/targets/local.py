@@ -26,6 +26,7 @@ import os
 import random
 import select
 import signal
+import struct
 import subprocess
 
 from fuddly.framework.global_resources import workspace_folder
@@ -34,13 +35,65 @@ from fuddly.framework.knowledge.feedback_collector import FeedbackCollector
 
 
 class LocalTarget(Target):
+    """
+    Target for interacting with a program running on the same platform as fuddly.
+
+    By default the program is executed for each test case. If ``fork_server`` is set to
+    ``True``, the program is only started once and it is asked to fork a new child for each
+    test case through the AFL fork server protocol (file descriptors 198 and 199), which
+    is implemented by the programs compiled with AFL/AFL++ instrumentation. The test case is
+    then provided through the same file (or through the same stdin) for every child, and the
+    exit status of each child is retrieved through the fork server.
+
+    When the test cases are provided through a file, ``tmpfile_backend`` selects where this
+    file is written:
+
+    - ``'disk'``: a file within the fuddly workspace folder (default);
+    - ``'memfd'``: an anonymous in-memory file (Linux only) that the program opens through
+      the path ``/proc/self/fd/<fd>``. Note that this path does not end with ``tmpfile_ext``;
+    - ``'tmpfs'``: a ring of ``tmpfs_ring_size`` files within :attr:`TMPFS_FOLDER`, so that
+      the file of a test case is not rewritten while a previous program may still read it.
+
+    Args:
+        target_path (str): path of the program
+        pre_args (str): arguments put before the test case file name
+        post_args (str): arguments put after the test case file name
+        tmpfile_ext (str): extension of the test case file
+        send_via_stdin (bool): provide the test cases through stdin
+        send_via_cmdline (bool): provide the test cases as an argument of the program
+          (not compatible with ``fork_server``)
+        error_samples (list): byte strings that trigger an error feedback if they are
+          found on stdout
+        error_parsing_func: function that parses stdout and returns a tuple
+          (error detected, message)
+        fork_server (bool): use the fork server mode
+        fork_server_timeout (float): maximum time to wait for the fork server to be ready
+        tmpfile_backend (str): storage of the test case file (``'disk'``, ``'memfd'``
+          or ``'tmpfs'``)
+        tmpfs_ring_size (int): number of files used by the ``'tmpfs'`` backend
+    """
 
     _feedback_mode = Target.FBK_WAIT_UNTIL_RECV
     supported_feedback_mode = [Target.FBK_WAIT_UNTIL_RECV]
 
+    FORKSRV_FD = 198
+
+    # AFL++ fork server options (refer to AFL++ include/types.h)
+    FS_OPT_ENABLED = 0x80000001
+    FS_OPT_AUTODICT = 0x10000000
+    FS_NEW_VERSION_MIN = 0x41464c01
+    FS_NEW_VERSION_MAX = 0x41464c01
+    FS_NEW_OPT_MAPSIZE = 0x00000001
+    FS_NEW_OPT_AUTODICT = 0x00000800
+
+    TMPFILE_BACKENDS = ('disk', 'memfd', 'tmpfs')
+    TMPFS_FOLDER = '/dev/shm'
+
     def __init__(self, target_path=None, pre_args=None, post_args=None,
                  tmpfile_ext='.bin', send_via_stdin=False, send_via_cmdline=False,
-                 error_samples=None, error_parsing_func=lambda x: (False, '')):
+                 error_samples=None, error_parsing_func=lambda x: (False, ''),
+                 fork_server=False, fork_server_timeout=10,
+                 tmpfile_backend='disk', tmpfs_ring_size=8):
         Target.__init__(self)
         self._suffix = '{:0>12d}'.format(random.randint(2 ** 16, 2 ** 32))
         self._app = None
@@ -53,6 +106,18 @@ class LocalTarget(Target):
         self._data_sent = None
         self._feedback_computed = None
         self._feedback = FeedbackCollector()
+        self._fork_server = fork_server
+        self._fork_server_timeout = fork_server_timeout
+        self._fs_ctl_fd = None
+        self._fs_st_fd = None
+        self._fs_input = None
+        self._fs_child_pid = None
+        self._fs_child_status = None
+        assert tmpfile_backend in self.TMPFILE_BACKENDS
+        self._tmpfile_backend = tmpfile_backend
+        self._tmpfs_ring_size = max(1, tmpfs_ring_size)
+        self._tmpfs_ring_idx = 0
+        self._memfd = None
         self.set_target_path(target_path)
         self.set_tmp_file_extension(tmpfile_ext)
 
@@ -63,7 +128,8 @@ class LocalTarget(Target):
             args = ', Args: ' + ('' if pre_args is None else pre_args) + ('' if post_args is None else post_args)
         else:
             args = ''
-        return 'Program: ' + self._target_path + args
+        fs = ', Fork Server' if self._fork_server else ''
+        return 'Program: ' + self._target_path + args + fs
 
     def set_tmp_file_extension(self, tmpfile_ext):
         self._tmpfile_ext = tmpfile_ext
@@ -103,29 +169,99 @@ class LocalTarget(Target):
             print('/!\\ ERROR /!\\: the LocalTarget path has not been set')
             return False
 
+        if self._fork_server and self._send_via_cmdline:
+            print('/!\\ ERROR /!\\: the fork server mode cannot be used when data are sent '
+                  'through the command line')
+            return False
+
         self._data_sent = False
 
-        return self.initialize()
+        if not self._setup_tmpfile_backend():
+            return False
+
+        if not self.initialize():
+            return False
+
+        if self._fork_server:
+            return self._start_fork_server()
+
+        return True
 
     def stop(self):
-        return self.terminate()
+        if self._fork_server:
+            self._stop_fork_server()
+        ret = self.terminate()
+        self._release_tmpfile_backend()
+        return ret
 
     def _before_sending_data(self):
         self._feedback_computed = False
 
-    def send_data(self, data, from_fmk=False):
-        self._before_sending_data()
-        data = data.to_bytes()
+    def _setup_tmpfile_backend(self):
+        if (self._send_via_stdin and not self._fork_server) or self._send_via_cmdline:
+            # no test case file is involved
+            return True
+
+        if self._tmpfile_backend == 'memfd':
+            if not hasattr(os, 'memfd_create'):
+                print('/!\\ ERROR /!\\: the memfd backend is not supported by this platform')
+                return False
+            if self._memfd is None:
+                self._memfd = os.memfd_create('fuzz_test_' + self._suffix)
+        elif self._tmpfile_backend == 'tmpfs':
+            if not os.path.isdir(self.TMPFS_FOLDER):
+                print('/!\\ ERROR /!\\: the tmpfs folder {:s} does not exist'
+                      .format(self.TMPFS_FOLDER))
+                return False
+            self._tmpfs_ring_idx = 0
 
-        if self._send_via_stdin:
-            name = ''
-        elif self._send_via_cmdline:
-            name = data
+        return True
+
+    def _release_tmpfile_backend(self):
+        if self._memfd is not None:
+            os.close(self._memfd)
+            self._memfd = None
+        elif self._tmpfile_backend == 'tmpfs':
+            for idx in range(self._tmpfs_ring_size):
+                try:
+                    os.remove(self._get_tmpfs_file_name(idx))
+                except OSError:
+                    pass
+
+    def _get_tmpfs_file_name(self, idx):
+        return os.path.join(self.TMPFS_FOLDER, 'fuzz_test_{:s}_{:d}{:s}'
+                            .format(self._suffix, idx, self._tmpfile_ext))
+
+    def _get_tmp_file_name(self):
+        """
+        Returns:
+            str: path of the file where the next test case is written (with the 'tmpfs'
+            backend, each call moves forward in the ring of files)
+        """
+        if self._tmpfile_backend == 'memfd':
+            return '/proc/self/fd/{:d}'.format(self._memfd)
+        elif self._tmpfile_backend == 'tmpfs':
+            name = self._get_tmpfs_file_name(self._tmpfs_ring_idx)
+            self._tmpfs_ring_idx = (self._tmpfs_ring_idx + 1) % self._tmpfs_ring_size
+            return name
+        else:
+            return os.path.join(workspace_folder, 'fuzz_test_' + self._suffix + self._tmpfile_ext)
+
+    def _write_tmp_file(self, data):
+        """
+        Returns:
+            str: path of the file containing `data`, to be provided to the program
+        """
+        name = self._get_tmp_file_name()
+        if self._memfd is not None:
+            os.ftruncate(self._memfd, 0)
+            os.pwrite(self._memfd, data, 0)
         else:
-            name = os.path.join(workspace_folder, 'fuzz_test_' + self._suffix + self._tmpfile_ext)
             with open(name, 'wb') as f:
-                 f.write(data)
+                f.write(data)
+        return name
 
+    def _build_cmd(self, name):
         if self._pre_args is not None and self._post_args is not None:
             if self._send_via_stdin:
                 cmd = [self._target_path] + self._pre_args.split() + self._post_args.split()
@@ -141,9 +277,29 @@ class LocalTarget(Target):
         else:
             cmd = [self._target_path] if self._send_via_stdin else [self._target_path, name]
 
+        return cmd
+
+    def send_data(self, data, from_fmk=False):
+        self._before_sending_data()
+        data = data.to_bytes()
+
+        if self._fork_server:
+            self._send_data_to_fork_server(data)
+            return
+
+        if self._send_via_stdin:
+            name = ''
+        elif self._send_via_cmdline:
+            name = data
+        else:
+            name = self._write_tmp_file(data)
+
+        cmd = self._build_cmd(name)
+
         stdin_arg = subprocess.PIPE if self._send_via_stdin else None
+        # the memfd is inherited by the program under the same number
         self._app = subprocess.Popen(args=cmd, stdin=stdin_arg, stdout=subprocess.PIPE,
-                                     stderr=subprocess.PIPE)
+                                     stderr=subprocess.PIPE, pass_fds=self._get_memfd_to_pass())
 
         if self._send_via_stdin:
             with self._app.stdin as f:
@@ -158,10 +314,189 @@ class LocalTarget(Target):
 
         self._data_sent = True
 
+    def _start_fork_server(self):
+        name = self._get_tmp_file_name()
+        if self._memfd is not None:
+            self._fs_input = os.fdopen(os.dup(self._memfd), 'w+b')
+        else:
+            self._fs_input = open(name, 'w+b')
+        if self._send_via_stdin:
+            name = ''
+
+        ctl_r, ctl_w = os.pipe()
+        st_r, st_w = os.pipe()
+        fs_fds = (self.FORKSRV_FD, self.FORKSRV_FD + 1)
+        for fd in fs_fds:
+            try:
+                os.fstat(fd)
+            except OSError:
+                pass
+            else:
+                print('/!\\ ERROR /!\\: the file descriptor {:d} is already used by fuddly, '
+                      'the fork server cannot be started'.format(fd))
+                for fd in (ctl_r, ctl_w, st_r, st_w):
+                    os.close(fd)
+                self._fs_input.close()
+                self._fs_input = None
+                return False
+
+        # the fork server expects its control pipe on fd 198 and its status pipe on fd 199
+        os.dup2(ctl_r, fs_fds[0])
+        os.dup2(st_w, fs_fds[1])
+        try:
+            self._app = subprocess.Popen(args=self._build_cmd(name),
+                                         stdin=self._fs_input if self._send_via_stdin else None,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                         pass_fds=fs_fds + self._get_memfd_to_pass())
+        except OSError as e:
+            print('/!\\ ERROR /!\\: cannot start the fork server ({!s})'.format(e))
+            self._app = None
+        finally:
+            for fd in fs_fds + (ctl_r, st_w):
+                os.close(fd)
+
+        self._fs_ctl_fd = ctl_w
+        self._fs_st_fd = st_r
+        if self._app is None:
+            self._stop_fork_server()
+            return False
+
+        for f in (self._app.stdout, self._app.stderr):
+            fl = fcntl.fcntl(f, fcntl.F_GETFL)
+            fcntl.fcntl(f, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+
+        if not self._fork_server_handshake():
+            print('/!\\ ERROR /!\\: the fork server has not answered (is the program '
+                  'instrumented for AFL?)')
+            self._stop_fork_server()
+            return False
+
+        return True
+
+    def _get_memfd_to_pass(self):
+        if self._memfd is not None and not self._send_via_stdin:
+            return (self._memfd,)
+        return ()
+
+    def _fork_server_handshake(self):
+        hello = self._read_fork_server(self._fork_server_timeout)
+        if hello is None:
+            return False
+
+        if self.FS_NEW_VERSION_MIN <= hello <= self.FS_NEW_VERSION_MAX:
+            # AFL++ >= 4.21 protocol
+            os.write(self._fs_ctl_fd, struct.pack('=I', hello ^ 0xffffffff))
+            options = self._read_fork_server(self._fork_server_timeout)
+            if options is None:
+                return False
+            if options & self.FS_NEW_OPT_MAPSIZE:
+                self._read_fork_server(self._fork_server_timeout)
+            if options & self.FS_NEW_OPT_AUTODICT:
+                dict_len = self._read_fork_server(self._fork_server_timeout)
+                if dict_len is None or self._read_fork_server_bytes(dict_len) is None:
+                    return False
+            return self._read_fork_server(self._fork_server_timeout) == hello
+
+        elif (hello & self.FS_OPT_ENABLED) == self.FS_OPT_ENABLED \
+                and hello & self.FS_OPT_AUTODICT:
+            # former AFL++ protocol, the fork server waits for the dictionary to be requested
+            os.write(self._fs_ctl_fd, struct.pack('=I', self.FS_OPT_ENABLED | self.FS_OPT_AUTODICT))
+            dict_len = self._read_fork_server(self._fork_server_timeout)
+            return dict_len is not None and self._read_fork_server_bytes(dict_len) is not None
+
+        return True
+
+    def _read_fork_server_bytes(self, size, timeout=None):
+        data = b''
+        while len(data) < size:
+            ret = select.select([self._fs_st_fd], [], [], timeout)
+            if not ret[0]:
+                return None
+            chunk = os.read(self._fs_st_fd, size - len(data))
+            if not chunk:
+                # the fork server has terminated
+                return None
+            data += chunk
+        return data
+
+    def _read_fork_server(self, timeout=None):
+        data = self._read_fork_server_bytes(4, timeout=timeout)
+        return None if data is None else struct.unpack('=I', data)[0]
+
+    def _stop_fork_server(self):
+        if self._app is not None:
+            if self._app.poll() is None:
+                self._app.kill()
+            self._app.wait()
+            self._app.stdout.close()
+            self._app.stderr.close()
+            self._app = None
+        for fd in (self._fs_ctl_fd, self._fs_st_fd):
+            if fd is not None:
+                os.close(fd)
+        self._fs_ctl_fd = None
+        self._fs_st_fd = None
+        if self._fs_input is not None:
+            self._fs_input.close()
+            self._fs_input = None
+        self._fs_child_pid = None
+        self._fs_child_status = None
+
+    def _send_data_to_fork_server(self, data):
+        if self._app is None or self._app.poll() is not None:
+            # the fork server has terminated, so we restart it
+            self._stop_fork_server()
+            if not self._start_fork_server():
+                self._data_sent = False
+                return
+
+        self._fs_input.seek(0)
+        self._fs_input.truncate()
+        self._fs_input.write(data)
+        self._fs_input.flush()
+        self._fs_input.seek(0)
+
+        self._fs_child_status = None
+        try:
+            os.write(self._fs_ctl_fd, struct.pack('=I', 0))
+        except OSError:
+            self._fs_child_pid = None
+        else:
+            self._fs_child_pid = self._read_fork_server(self._fork_server_timeout)
+
+        self._data_sent = True
+
+    def _wait_for_fork_server_child(self, timeout):
+        """
+        Returns:
+            bool: True if the child has terminated by itself before `timeout`
+        """
+        if self._fs_child_pid is None or self._fs_child_status is not None:
+            return True
+
+        status = self._read_fork_server(timeout)
+        if status is None and self._app.poll() is None:
+            try:
+                os.kill(self._fs_child_pid, signal.SIGKILL)
+            except OSError:
+                pass
+            status = self._read_fork_server(self._fork_server_timeout)
+            self._fs_child_status = status
+            return False
+
+        self._fs_child_status = status
+        return True
+
     def cleanup(self):
         if self._app is None:
             return
 
+        if self._fork_server:
+            # only the child related to the last data is concerned
+            self._wait_for_fork_server_child(timeout=0)
+            self._data_sent = False
+            return
+
         try:
             os.kill(self._app.pid, signal.SIGTERM)
         except:
@@ -169,6 +504,33 @@ class LocalTarget(Target):
         finally:
             self._data_sent = False
 
+    def _get_return_code(self, timeout):
+        """
+        Returns:
+            tuple: PID of the process that handled the data and its return code
+            (negative if it has been terminated by a signal, None if it has not terminated)
+        """
+        if not self._fork_server:
+            return self._app.pid, self._app.poll()
+
+        if not self._wait_for_fork_server_child(timeout):
+            self._feedback.add_fbk_from(f"Application[{self._fs_child_pid}]",
+                                        f"Application has not terminated within {timeout}s "
+                                        f"(killed by fuddly)",
+                                        status=-3)
+
+        status = self._fs_child_status
+        if status is None:
+            self._feedback.add_fbk_from("Application[fork server]",
+                                        "Fork server has terminated unexpectedly "
+                                        "(will be restarted)",
+                                        status=-3)
+            return self._app.pid, self._app.poll()
+        elif os.WIFSIGNALED(status):
+            return self._fs_child_pid, -os.WTERMSIG(status)
+        else:
+            return self._fs_child_pid, os.WEXITSTATUS(status)
+
     def get_feedback(self, timeout=0.2):
         timeout = self.feedback_timeout if timeout is None else timeout
         if self._feedback_computed:
@@ -182,12 +544,12 @@ class LocalTarget(Target):
 
         exit_error = False
         proc_killed = False
-        return_code = self._app.poll()
+        pid, return_code = self._get_return_code(timeout)
         if return_code is not None: # process has terminate
             if return_code < 0:
                 # process terminated by a signal (python behavior for POSIX system)
                 proc_killed = True
-                self._feedback.add_fbk_from(f"Application[{self._app.pid}]",
+                self._feedback.add_fbk_from(f"Application[{pid}]",
                                             f"Application terminated by a signal (ID: {-return_code})",
                                             status=-3)
 
@@ -201,14 +563,16 @@ class LocalTarget(Target):
                 else:
                     msg = f'Expected exit status ({return_code})'
 
-                self._feedback.add_fbk_from(f"Application[{self._app.pid}]", msg, status=-1 if exit_error else 0)
+                self._feedback.add_fbk_from(f"Application[{pid}]", msg, status=-1 if exit_error else 0)
 
         console_error = False
-        ret = select.select([self._app.stdout, self._app.stderr], [], [], timeout)
+        # in fork server mode, the child has already terminated
+        ret = select.select([self._app.stdout, self._app.stderr], [], [],
+                            0 if self._fork_server else timeout)
         if ret[0]:
             byte_string = b''
-            for fd in ret[0][:-1]:
-                byte_string += fd.read() + b'\n\n'
+            if self._app.stdout in ret[0]:
+                byte_string += (self._app.stdout.read() or b'') + b'\n\n'
 
             console_error, msg = self._error_parsing_func(byte_string)
             if console_error:
@@ -223,7 +587,7 @@ class LocalTarget(Target):
                                                 f"Error detected on stdout (from provided samples): '{err_msg.decode()}'",
                                                 status=-1)
 
-            stderr_msg = ret[0][-1].read()
+            stderr_msg = self._app.stderr.read() if self._app.stderr in ret[0] else None
             if stderr_msg:
                 console_error = True
                 self._feedback.add_fbk_from("LocalTarget[stderr]",
@@ -21,10 +21,14 @@
 #
 ################################################################################
 
+import asyncio
 import collections
+import concurrent.futures
 import copy
 import datetime
+import errno
 import fcntl
+import functools
 import select
 import socket
 import struct
@@ -71,6 +75,14 @@ class NetworkTarget(Target):
     CHUNK_SZ = 2048
     _INTERNALS_ID = 'NetworkTarget()'
 
+    ENGINES = ('thread', 'asyncio')
+
+    # maximum number of idle connections kept by each connection pool
+    CONNECTION_POOL_SIZE = 4
+    # maximum number of data emissions between two reports of the connection pool statistics
+    CONNECTION_POOL_STATS_INTERVAL = 50
+    _CONNECTION_RESET_ERRNOS = (errno.ECONNRESET, errno.EPIPE, errno.ENOTCONN, errno.ECONNABORTED)
+
     _feedback_mode = Target.FBK_WAIT_FULL_TIME
     supported_feedback_mode = [Target.FBK_WAIT_FULL_TIME, Target.FBK_WAIT_UNTIL_RECV]
 
@@ -79,7 +91,8 @@ class NetworkTarget(Target):
                  server_mode=False, listen_on_start=True, target_address=None, wait_for_client=True,
                  hold_connection=False, keep_first_client=True,
                  mac_src=None, mac_dst=None, add_eth_header=False,
-                 fbk_timeout=2, fbk_mode=Target.FBK_WAIT_FULL_TIME, sending_delay=1, recover_timeout=0.5):
+                 fbk_timeout=2, fbk_mode=Target.FBK_WAIT_FULL_TIME, sending_delay=1, recover_timeout=0.5,
+                 engine='thread', connection_pool=False):
         """
         Args:
           host (str): IP address of the target to connect to, or
@@ -136,6 +149,19 @@ class NetworkTarget(Target):
           recover_timeout (int): Allowed delay for recovering the target. (the recovering can be triggered
             by the framework if the feedback threads did not terminate before the target health check)
             Impact the behavior of self.recover_target().
+          engine (str): If ``'thread'``, a thread is started for each server interface and for
+            each feedback collection. If ``'asyncio'``, all the sockets are multiplexed within a
+            single event loop (running in its own thread for the lifetime of the target), thus
+            no thread is spawned while data are sent and feedback is collected.
+          connection_pool (bool): Only for client mode interfaces with `SOCK_STREAM` socket type.
+            If `True`, the connections are not closed after feedback collection but kept alive
+            (with TCP keep-alive) within a pool of at most ``CONNECTION_POOL_SIZE`` idle
+            connections, in order to be reused by the next data emissions. Before being reused,
+            the connections closed by the target are discarded, and if a connection is reset while
+            sending data, a new one is opened for sending them again. Statistics on the pool are
+            provided as feedback (which is thus recorded in the fmkDB) each time connections are
+            opened, reopened or discarded, and at least every ``CONNECTION_POOL_STATS_INTERVAL``
+            data emissions.
         """
 
         Target.__init__(self)
@@ -143,6 +169,13 @@ class NetworkTarget(Target):
         if not self._is_valid_socket_type(socket_type):
             raise ValueError("Unrecognized socket type")
 
+        if engine not in self.ENGINES:
+            raise ValueError("Unrecognized engine")
+        self._engine = engine
+        self._loop = None
+        self._loop_thread = None
+        self._srv_executor = None
+
         if sys.platform in ['linux']:
             def get_mac_addr(ifname):
                 ifname = bytes(ifname, 'latin_1')
@@ -185,12 +218,14 @@ class NetworkTarget(Target):
         self._default_fbk_id = {}
 
         self.hold_connection = {}
+        self._connection_pool = {}
 
         self.register_new_interface(host=host, port=port, socket_type=socket_type, data_semantics=data_semantics,
                                     server_mode=server_mode, target_address=target_address,
                                     wait_for_client=wait_for_client, hold_connection=hold_connection,
                                     keep_first_client=keep_first_client, mac_src=mac_src,
-                                    mac_dst=mac_dst, add_eth_header=add_eth_header)
+                                    mac_dst=mac_dst, add_eth_header=add_eth_header,
+                                    connection_pool=connection_pool)
         self.multiple_destination = False
 
         self._additional_fbk_desc = {}
@@ -227,10 +262,13 @@ class NetworkTarget(Target):
     def register_new_interface(self, host, port, socket_type, data_semantics, server_mode=False,
                                target_address = None, wait_for_client=True,
                                hold_connection=False, keep_first_client=True,
-                               mac_src=None, mac_dst=None, add_eth_header=False):
+                               mac_src=None, mac_dst=None, add_eth_header=False,
+                               connection_pool=False):
 
         if not self._is_valid_socket_type(socket_type):
             raise ValueError("Unrecognized socket type")
+        if connection_pool and (server_mode or socket_type[1] != socket.SOCK_STREAM):
+            raise ValueError("Connection pool is only supported by client mode SOCK_STREAM interfaces")
 
         self.multiple_destination = True
         self._host[data_semantics] = host
@@ -243,6 +281,7 @@ class NetworkTarget(Target):
         self._server_mode_additional_info[(host, port)] = (target_address, wait_for_client, keep_first_client)
         self._default_fbk_id[(host, port)] = self._default_fbk_socket_id + ' - {:s}:{:d}'.format(host, port)
         self.hold_connection[(host, port)] = hold_connection
+        self._connection_pool[(host, port)] = connection_pool
         if socket_type[1] == socket.SOCK_RAW:
             self._mac_src[(host, port)] = self.get_mac_addr(host) if mac_src is None else mac_src
             self._mac_dst[(host, port)] = b'\xff\xff\xff\xff\xff\xff' if mac_dst is None else mac_dst
@@ -472,6 +511,12 @@ class NetworkTarget(Target):
         self._hclient_sock2hp = {}  # only for hold_connection
         self._hclient_hp2sock = {}  # only for hold_connection
 
+        # Used by _connect_to_target() for connection pools
+        self._pool_idle = {hp: [] for hp, pool in self._connection_pool.items() if pool}
+        self._pool_busy = {}
+        self._pool_stats = {hp: collections.Counter() for hp in self._pool_idle}
+        self._pool_last_report = {hp: None for hp in self._pool_idle}
+
         self._additional_fbk_sockets = []
         self._additional_fbk_ids = {}
         self._additional_fbk_lengths = {}
@@ -486,6 +531,11 @@ class NetworkTarget(Target):
                                     # used.
         self._flush_feedback_delay = None
 
+        # Used by the asyncio engine (first client of each server interface)
+        self._srv_first_client = {}
+        if self._engine == 'asyncio':
+            self._start_event_loop()
+
         self._connect_to_additional_feedback_sockets()
 
         if self._listen_on_start:
@@ -509,6 +559,8 @@ class NetworkTarget(Target):
 
     def stop(self):
         self.stop_event.set()
+        if self._loop is not None:
+            self._stop_event_loop()
         for ev, _ in self._raw_server_private.values():
             ev.set()
         for s in self._server_sock2hp.keys():
@@ -519,6 +571,11 @@ class NetworkTarget(Target):
             s.close()
         for s in self._additional_fbk_sockets:
             s.close()
+        for s in self._pool_busy.keys():
+            s.close()
+        for idle in self._pool_idle.values():
+            for s in idle:
+                s.close()
 
         self._server_sock2hp = None
         self._server_thread_share = None
@@ -530,9 +587,55 @@ class NetworkTarget(Target):
         self._additional_fbk_ids = None
         self._additional_fbk_lengths = None
         self._dynamic_interfaces = None
+        self._pool_idle = None
+        self._pool_busy = None
 
         return self.terminate()
 
+    def _start_event_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(None, self._loop.run_forever, name='NET-LOOP',
+                                             daemon=True)
+        self._loop_thread.start()
+        # server handlers send through blocking sockets, they must not stall the event loop
+        self._srv_executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='NET-SRV')
+
+    def _stop_event_loop(self):
+        async def cancel_pending_tasks():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(cancel_pending_tasks(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        # the readers still registered (server sockets) are dropped with the selector
+        self._loop.close()
+        self._loop = None
+        self._loop_thread = None
+        self._srv_executor.shutdown(wait=True, cancel_futures=True)
+        self._srv_executor = None
+
+    def _call_in_loop(self, func, *args):
+        self._loop.call_soon_threadsafe(func, *args)
+
+    def _serve_in_executor(self, func, *args, **kwargs):
+        def check_result(future):
+            if not future.cancelled() and future.exception() is not None:
+                print('\n*** ERROR(while serving a client): ' + str(future.exception()))
+
+        future = self._loop.run_in_executor(self._srv_executor,
+                                            functools.partial(func, *args, **kwargs))
+        future.add_done_callback(check_result)
+
+    def _remove_reader(self, fileobj):
+        try:
+            self._loop.remove_reader(fileobj)
+        except (ValueError, OSError):
+            # the socket has already been closed
+            pass
+
     def recover_target(self):
         t0 = datetime.datetime.now()
         while not self.is_feedback_received():
@@ -587,6 +690,15 @@ class NetworkTarget(Target):
                         sockets.append(s)
                         data_refs[s] = (data, host, port, None)
 
+        if data_list is not None:
+            for data, host, port, socket_type, server_mode in sending_list:
+                if (host, port) not in self._pool_stats:
+                    continue
+                stats_msg = self._get_pool_stats_report(host, port)
+                if stats_msg is not None:
+                    self._feedback.add_fbk_from(self._get_pool_fbk_id(host, port), stats_msg,
+                                                status=0)
+
         if data_refs:
             if from_fmk:
                 self._fbk_collector_to_launch_cpt += 1
@@ -607,7 +719,7 @@ class NetworkTarget(Target):
             duration = 0
             client_event = connected_client_event
             client_event_copy = copy.copy(connected_client_event)
-            while duration < self.sending_delay:
+            while client_event_copy and duration < self.sending_delay:
                 if len(client_event) != len(client_event_copy):
                     client_event = copy.copy(client_event_copy)
                 for ref, event in client_event.items():
@@ -669,6 +781,12 @@ class NetworkTarget(Target):
             else:
                 return self._hclient_hp2sock[(host, port)]
 
+        pooled = (host, port) in self._pool_idle
+        if pooled:
+            s = self._get_pooled_connection(host, port)
+            if s is not None:
+                return s
+
         skt_sz = len(socket_type)
         if skt_sz == 2:
             family, sock_type = socket_type
@@ -697,12 +815,80 @@ class NetworkTarget(Target):
 
             s.setblocking(0)
 
-        if self.hold_connection[(host, port)]:
+        if pooled:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            with self.socket_desc_lock:
+                self._pool_busy[s] = (host, port)
+                self._pool_stats[(host, port)]['new'] += 1
+        elif self.hold_connection[(host, port)]:
             self._hclient_sock2hp[s] = (host, port)
             self._hclient_hp2sock[(host, port)] = s
 
         return s
 
+    def _get_pooled_connection(self, host, port):
+        stats = self._pool_stats[(host, port)]
+        with self.socket_desc_lock:
+            idle = self._pool_idle[(host, port)]
+            while idle:
+                s = idle.pop()
+                if self._is_connection_alive(s):
+                    self._pool_busy[s] = (host, port)
+                    stats['reused'] += 1
+                    return s
+                s.close()
+                stats['discarded'] += 1
+        return None
+
+    @staticmethod
+    def _is_connection_alive(s):
+        try:
+            # unsolicited data may be pending, they will be part of the feedback
+            return s.recv(1, socket.MSG_PEEK) != b''
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    def _is_pooled_connection(self, s):
+        with self.socket_desc_lock:
+            return self._pool_busy is not None and s in self._pool_busy
+
+    def _release_pooled_connection(self, s):
+        with self.socket_desc_lock:
+            hp = self._pool_busy.pop(s, None)
+            if hp is not None and s.fileno() != -1 \
+                    and len(self._pool_idle[hp]) < self.CONNECTION_POOL_SIZE:
+                self._pool_idle[hp].append(s)
+                return
+        s.close()
+
+    def _reconnect_pooled_connection(self, s, host, port, socket_type):
+        with self.socket_desc_lock:
+            del self._pool_busy[s]
+            self._pool_stats[(host, port)]['reconnected'] += 1
+        s.close()
+        return self._connect_to_target(host, port, socket_type)
+
+    def _get_pool_stats_report(self, host, port):
+        # the pool is snapshotted under the lock protecting its updates
+        with self.socket_desc_lock:
+            stats = self._pool_stats[(host, port)]
+            stats['emissions'] += 1
+            # reusing a connection is the steady state, only the pool changes are worth reporting
+            changes = (stats['new'], stats['reconnected'], stats['discarded'])
+            last_report = self._pool_last_report[(host, port)]
+            if last_report is not None and last_report[0] == changes \
+                    and stats['emissions'] - last_report[1] < self.CONNECTION_POOL_STATS_INTERVAL:
+                return None
+            self._pool_last_report[(host, port)] = (changes, stats['emissions'])
+            return 'new: {:d}, reused: {:d}, reconnected: {:d}, discarded: {:d}, idle: {:d}' \
+                .format(stats['new'], stats['reused'], stats['reconnected'], stats['discarded'],
+                        len(self._pool_idle[(host, port)]))
+
+    def _get_pool_fbk_id(self, host, port):
+        return 'Connection Pool - {:s}:{:d}'.format(host, port)
+
 
     def _listen_to_target(self, host, port, socket_type, func, args=None):
 
@@ -728,7 +914,12 @@ class NetworkTarget(Target):
             if sock_type == socket.SOCK_DGRAM or sock_type == socket.SOCK_RAW:
                 with self._server_thread_lock:
                     self._server_thread_share[(host, port)] = args
-                if self.hold_connection[(host, port)] and (host, port) in self._last_client_hp2sock:
+                if self.hold_connection[(host, port)] and (host, port) in self._last_client_hp2sock \
+                        and self._loop is not None:
+                    serversocket, _ = self._last_client_hp2sock[(host, port)]
+                    self._call_in_loop(self._handle_raw_server, serversocket, host, port,
+                                       sock_type, func, args)
+                elif self.hold_connection[(host, port)] and (host, port) in self._last_client_hp2sock:
                     sending_event, notif_host_event = self._raw_server_private[(host, port)]
                     sending_event.set()
                     # serversocket, _ = self._last_client_hp2sock[(host, port)]
@@ -764,12 +955,25 @@ class NetworkTarget(Target):
         with self._server_thread_lock:
             self._server_thread_share[(host, port)] = args
 
-        if sock_type == socket.SOCK_STREAM:
+        if sock_type == socket.SOCK_STREAM and self._loop is not None:
+            serversocket.listen(5)
+            serversocket.setblocking(False)
+            self._call_in_loop(self._loop.add_reader, serversocket,
+                               self._accept_client, serversocket, host, port, func)
+
+        elif sock_type == socket.SOCK_STREAM:
             serversocket.listen(5)
             server_thread = threading.Thread(None, self._server_main, name='SRV-' + '',
                                              args=(serversocket, host, port, func))
             server_thread.start()
 
+        elif (sock_type == socket.SOCK_DGRAM or sock_type == socket.SOCK_RAW) \
+                and self._loop is not None:
+            self._last_client_hp2sock[(host, port)] = (serversocket, None)
+            self._last_client_sock2hp[serversocket] = (host, port)
+            self._call_in_loop(self._handle_raw_server, serversocket, host, port, sock_type,
+                               func, args)
+
         elif sock_type == socket.SOCK_DGRAM or sock_type == socket.SOCK_RAW:
             sending_event = threading.Event()
             notif_host_event = threading.Event()
@@ -834,26 +1038,8 @@ class NetworkTarget(Target):
 
             notif_host_event.set()
 
-            target_address, wait_for_client, _ = self._server_mode_additional_info[(host, port)]
-            if func == self._handle_connection_to_fbk_server:
-                # args = fbk_id, fbk_length, connected_client_event
-                assert args[0] in self._additional_fbk_desc
-                wait_before_first_sending = False
-            elif func == self._handle_target_connection:
-                # args = data, host, port, connected_client_event, from_fmk
-                if args[0] is None:
-                    # In the case 'data' is None there is no data to send,
-                    # thus we are requested to only collect feedback
-                    wait_before_first_sending = False
-                elif target_address is not None:
-                    wait_before_first_sending = wait_for_client
-                elif sock_type == socket.SOCK_RAW:
-                    # in this case target_address is not provided, but it is OK if it is a SOCK_RAW
-                    wait_before_first_sending = wait_for_client
-                else:
-                    wait_before_first_sending = True
-            else:
-                raise ValueError
+            target_address, _, _ = self._server_mode_additional_info[(host, port)]
+            wait_before_first_sending = self._must_wait_for_client(host, port, sock_type, func, args)
 
             retry = 0
             while retry < 10:
@@ -886,6 +1072,99 @@ class NetworkTarget(Target):
                     func(serversocket, address, args, pre_fbk=data)
                     break
 
+    def _must_wait_for_client(self, host, port, sock_type, func, args):
+        # For SOCK_RAW and SOCK_DGRAM server interfaces, tell if data from a client
+        # has to be received before sending anything
+        target_address, wait_for_client, _ = self._server_mode_additional_info[(host, port)]
+        if func == self._handle_connection_to_fbk_server:
+            # args = fbk_id, fbk_length, connected_client_event
+            assert args[0] in self._additional_fbk_desc
+            return False
+        elif func == self._handle_target_connection:
+            # args = data, host, port, connected_client_event, from_fmk
+            if args[0] is None:
+                # In the case 'data' is None there is no data to send,
+                # thus we are requested to only collect feedback
+                return False
+            elif target_address is not None:
+                return wait_for_client
+            elif sock_type == socket.SOCK_RAW:
+                # in this case target_address is not provided, but it is OK if it is a SOCK_RAW
+                return wait_for_client
+            else:
+                return True
+        else:
+            raise ValueError
+
+    # For SOCK_STREAM (asyncio engine), called by the event loop when a client connects
+    def _accept_client(self, serversocket, host, port, func):
+        _, _, keep_first_client = self._server_mode_additional_info[(host, port)]
+        try:
+            clientsocket, address = serversocket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            if e.errno == 9: # [Errno 9] Bad file descriptor
+                return
+            raise
+
+        # same socket mode as the one provided by the thread engine
+        clientsocket.setblocking(True)
+        if keep_first_client and (host, port) in self._srv_first_client:
+            return
+        elif keep_first_client:
+            self._srv_first_client[(host, port)] = address
+
+        msg = "Connection from {!s}({!s}). Use this information to send data to " \
+              "the interface '{!s}:{:d}'.".format(address, clientsocket, host, port)
+        self._feedback_collect(msg, self.General_Info_ID, error=0)
+
+        with self._server_thread_lock:
+            args = self._server_thread_share[(host, port)]
+        self._serve_in_executor(func, clientsocket, address, args)
+
+    # For SOCK_RAW and SOCK_DGRAM (asyncio engine), called within the event loop
+    def _handle_raw_server(self, serversocket, host, port, sock_type, func, args):
+        target_address, _, _ = self._server_mode_additional_info[(host, port)]
+
+        def serve(address, pre_fbk=None):
+            address = address if target_address is None else target_address
+            serversocket.settimeout(self.feedback_timeout)
+            self._serve_in_executor(func, serversocket, address, args, pre_fbk=pre_fbk)
+
+        saved_addr = self._srv_first_client.get((host, port), None)
+        if saved_addr is not None:
+            serve(saved_addr)
+            return
+        elif not self._must_wait_for_client(host, port, sock_type, func, args):
+            serve(None)
+            return
+
+        def give_up():
+            self._remove_reader(serversocket)
+
+        def receive_from_client():
+            try:
+                data, address = serversocket.recvfrom(self.CHUNK_SZ)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                data, address = None, None
+
+            timer.cancel()
+            self._remove_reader(serversocket)
+            if address is None:
+                return
+
+            self._srv_first_client[(host, port)] = address
+            msg = "Received data from {!s}. Use this information to send data to " \
+                  "the interface '{!s}:{:d}'.".format(address, host, port)
+            self._feedback_collect(msg, self.General_Info_ID, error=0)
+            serve(address, pre_fbk=data)
+
+        timer = self._loop.call_later(self.sending_delay, give_up)
+        self._loop.add_reader(serversocket, receive_from_client)
+
     def _handle_connection_to_fbk_server(self, clientsocket, address, args, pre_fbk=None):
         fbk_id, fbk_length, connected_client_event = args
         connected_client_event.set()
@@ -925,29 +1204,7 @@ class NetworkTarget(Target):
                 # in python2, bad file descriptor (errno 9) witnessed
                 print('\n*** ERROR(check obsolete socket): ' + str(serr))
 
-            self._server_thread_lock.acquire()
-            if skt in self._last_client_sock2hp.keys():
-                if error is not None:
-                    error_list.append((fbk_ids[skt], error))
-                host, port = self._last_client_sock2hp[skt]
-                del self._last_client_sock2hp[skt]
-                del self._last_client_hp2sock[(host, port)]
-                self._server_thread_lock.release()
-            else:
-                self._server_thread_lock.release()
-                with self.socket_desc_lock:
-                    if skt in self._hclient_sock2hp.keys():
-                        if error is not None:
-                            error_list.append((fbk_ids[skt], error))
-                        host, port = self._hclient_sock2hp[skt]
-                        del self._hclient_sock2hp[skt]
-                        del self._hclient_hp2sock[(host, port)]
-                    if skt in self._additional_fbk_sockets:
-                        if error is not None:
-                            error_list.append((self._additional_fbk_ids[skt], error))
-                        self._additional_fbk_sockets.remove(skt)
-                        del self._additional_fbk_ids[skt]
-                        del self._additional_fbk_lengths[skt]
+            self._forget_obsolete_socket(skt, fbk_ids, error=error, error_list=error_list)
 
         # print('\n*** DBG: start - collect_thread {:d}'.format(thread_id))
 
@@ -1055,6 +1312,137 @@ class NetworkTarget(Target):
             else:
                 dont_stop = False
 
+        self._process_collected_feedback(chunks, fbk_ids, socket_errors)
+
+        # print('\n*** DBG: stop - collect_thread {:d}'.format(thread_id))
+
+        return
+
+    async def _collect_feedback_async(self, fbk_sockets, fbk_ids, fbk_lengths, fbk_timeout,
+                                      flush_received_fbk, pre_fbk):
+        # Counterpart of _collect_feedback_from() for the asyncio engine. The sockets are
+        # read by the event loop as soon as they are readable, and the collection ends when
+        # the future `done` is resolved (by the reading callback or a timer).
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        chunks = collections.OrderedDict()
+        bytes_recd = {}
+        fds = {}
+        socket_errors = []
+        t0 = datetime.datetime.now()
+        first_pass = True
+        has_read = False
+        idle_timer = None
+
+        def stop_collecting():
+            if not done.done():
+                done.set_result(None)
+
+        def is_complete(skt):
+            return fbk_lengths[skt] is not None and bytes_recd[skt] >= fbk_lengths[skt]
+
+        def check_completion():
+            if not fbk_sockets:
+                stop_collecting()
+            elif flush_received_fbk:
+                # only the feedback already available is collected
+                nonlocal idle_timer
+                if idle_timer is not None:
+                    idle_timer.cancel()
+                if (datetime.datetime.now() - t0).total_seconds() > fbk_timeout:
+                    stop_collecting()
+                else:
+                    idle_timer = loop.call_later(0.001, stop_collecting)
+            elif (has_read and not self.fbk_wait_full_time_slot_mode) or \
+                    all(is_complete(skt) for skt in fbk_sockets):
+                stop_collecting()
+
+        def read_socket(skt):
+            nonlocal first_pass, has_read
+            if fbk_lengths[skt] is None:
+                sz = NetworkTarget.CHUNK_SZ
+            else:
+                sz = min(fbk_lengths[skt] - bytes_recd[skt], NetworkTarget.CHUNK_SZ)
+
+            error = None
+            try:
+                chunk = skt.recv(sz)
+            except (BlockingIOError, InterruptedError, socket.timeout):
+                return
+            except socket.error as serr:
+                chunk = b''
+                error = serr.errno
+                print('\n*** ERROR[{!s}] (while receiving): {:s}'.format(serr.errno, str(serr)))
+
+            if first_pass:
+                first_pass = False
+                self._register_last_ack_date(datetime.datetime.now())
+            has_read = True
+
+            if chunk == b'':
+                print('\n*** NOTE: Nothing more to receive from: {!r}'.format(fbk_ids[skt]))
+                self._remove_reader(fds[skt])
+                fbk_sockets.remove(skt)
+                self._forget_obsolete_socket(skt, fbk_ids, error=error, error_list=socket_errors)
+                skt.close()
+            else:
+                bytes_recd[skt] += len(chunk)
+                chunks[skt].append(chunk)
+                if is_complete(skt):
+                    self._remove_reader(fds[skt])
+            check_completion()
+
+        for skt in fbk_sockets:
+            bytes_recd[skt] = 0
+            chunks[skt] = []
+            if pre_fbk is not None and skt in pre_fbk and pre_fbk[skt] is not None:
+                chunks[skt].append(pre_fbk[skt])
+            # file descriptors are registered rather than sockets, as the selector
+            # formats the representation of unknown objects
+            fds[skt] = skt.fileno()
+            loop.add_reader(fds[skt], read_socket, skt)
+
+        timer = None if flush_received_fbk else loop.call_later(max(fbk_timeout, 0), stop_collecting)
+        check_completion()
+        try:
+            await done
+        finally:
+            for t in (timer, idle_timer):
+                if t is not None:
+                    t.cancel()
+            for skt in fbk_sockets:
+                self._remove_reader(fds[skt])
+
+        self._process_collected_feedback(chunks, fbk_ids, socket_errors)
+
+    def _forget_obsolete_socket(self, skt, fbk_ids, error=None, error_list=None):
+        self._server_thread_lock.acquire()
+        if skt in self._last_client_sock2hp.keys():
+            if error is not None:
+                error_list.append((fbk_ids[skt], error))
+            host, port = self._last_client_sock2hp[skt]
+            del self._last_client_sock2hp[skt]
+            del self._last_client_hp2sock[(host, port)]
+            self._server_thread_lock.release()
+        else:
+            self._server_thread_lock.release()
+            with self.socket_desc_lock:
+                if skt in self._hclient_sock2hp.keys():
+                    if error is not None:
+                        error_list.append((fbk_ids[skt], error))
+                    host, port = self._hclient_sock2hp[skt]
+                    del self._hclient_sock2hp[skt]
+                    del self._hclient_hp2sock[(host, port)]
+                if skt in self._additional_fbk_sockets:
+                    if error is not None:
+                        error_list.append((self._additional_fbk_ids[skt], error))
+                    self._additional_fbk_sockets.remove(skt)
+                    del self._additional_fbk_ids[skt]
+                    del self._additional_fbk_lengths[skt]
+                if skt in self._pool_busy:
+                    del self._pool_busy[skt]
+
+    def _process_collected_feedback(self, chunks, fbk_ids, socket_errors):
         for s, chks in chunks.items():
             fbk = b'\n'.join(chks)
             with self._fbk_handling_lock:
@@ -1062,7 +1450,9 @@ class NetworkTarget(Target):
                     fbkid = fbk_ids[s]
                     fbk, err = self._feedback_handling(fbk, fbkid)
                     self._feedback_collect(fbk, fbkid, error=err)
-                if (self._additional_fbk_sockets is None or s not in self._additional_fbk_sockets) and \
+                if self._is_pooled_connection(s):
+                    self._release_pooled_connection(s)
+                elif (self._additional_fbk_sockets is None or s not in self._additional_fbk_sockets) and \
                         (self._hclient_sock2hp is None or s not in self._hclient_sock2hp.keys()) and \
                         (self._last_client_sock2hp is None or s not in self._last_client_sock2hp.keys()):
                     s.close()
@@ -1073,23 +1463,20 @@ class NetworkTarget(Target):
                                        "<<<".format(ev,fbkid), fbkid, error=-ev)
             self._feedback_complete()
 
-        # print('\n*** DBG: stop - collect_thread {:d}'.format(thread_id))
-
-        return
-
     def _send_data(self, sockets, data_refs, fbk_timeout, from_fmk, pre_fbk=None):
         # Should be called with the lock self_network_send_lock.
         # Especially needed in the context of self.send_multiple_data() as different threads can reach
         # this code simultaneously (_raw_server_main, _server_main and the main framework thread).
 
-        epobj = select.epoll()
+        # with the asyncio engine, the sockets are registered by the feedback collector
+        epobj = select.epoll() if self._loop is None else None
         fileno2fd = {}
 
         if self._first_send_data_call:
             self._first_send_data_call = False
 
             fbk_sockets, fbk_ids, fbk_lengths = self._get_additional_feedback_sockets()
-            if fbk_sockets:
+            if fbk_sockets and epobj is not None:
                 for fd in fbk_sockets:
                     epobj.register(fd, select.EPOLLIN)
                     fileno2fd[fd.fileno()] = fd
@@ -1108,8 +1495,9 @@ class NetworkTarget(Target):
 
             for s in sockets:
                 data, host, port, address = data_refs[s]
-                epobj.register(s, select.EPOLLIN)
-                fileno2fd[s.fileno()] = s
+                if epobj is not None:
+                    epobj.register(s, select.EPOLLIN)
+                    fileno2fd[s.fileno()] = s
                 fbk_sockets.append(s)
                 fbk_ids[s] = self._default_fbk_id[(host, port)]
                 fbk_lengths[s] = self.feedback_length
@@ -1125,8 +1513,6 @@ class NetworkTarget(Target):
 
             for s in ready_to_write:
                 data, host, port, address = data_refs[s]
-                epobj.register(s, select.EPOLLIN)
-                fileno2fd[s.fileno()] = s
 
                 raw_data = data.to_bytes() if isinstance(data, Data) else data
                 totalsent = 0
@@ -1141,6 +1527,16 @@ class NetworkTarget(Target):
                     except socket.error as serr:
                         send_retry += 1
                         print('\n*** ERROR(while sending): ' + str(serr))
+                        if serr.errno in self._CONNECTION_RESET_ERRNOS \
+                                and self._is_pooled_connection(s):
+                            # the pooled connection has been reset, the data are sent again
+                            # through a new one
+                            new_s = self._reconnect_pooled_connection(s, host, port,
+                                                                      self._socket_type_of(host, port))
+                            if new_s is not None:
+                                s = new_s
+                                totalsent = 0
+                                continue
                         if serr.errno == socket.errno.EWOULDBLOCK:
                             time.sleep(0.2)
                             continue
@@ -1161,6 +1557,15 @@ class NetworkTarget(Target):
                             raise TargetStuck("socket connection broken")
                         totalsent = totalsent + sent
 
+                if epobj is not None:
+                    epobj.register(s, select.EPOLLIN)
+                    fileno2fd[s.fileno()] = s
+
+                if not from_fmk and self._is_pooled_connection(s):
+                    # no feedback will be collected from this connection
+                    self._release_pooled_connection(s)
+                    continue
+
                 if fbk_sockets is None:
                     assert fbk_ids is None
                     assert fbk_lengths is None
@@ -1185,6 +1590,13 @@ class NetworkTarget(Target):
     def _start_fbk_collector(self, fbk_sockets, fbk_ids, fbk_lengths, epobj, fileno2fd,
                              pre_fbk=None, timeout=None, flush_received_fbk=False):
 
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(
+                self._collect_feedback_async(fbk_sockets, fbk_ids, fbk_lengths, timeout,
+                                             flush_received_fbk, pre_fbk),
+                self._loop)
+            return
+
         self._feedback_thread_qty += 1
         feedback_thread = threading.Thread(None, self._collect_feedback_from,
                                            name='FBK-#' + repr(self._feedback_thread_qty),
@@ -1282,21 +1694,26 @@ class NetworkTarget(Target):
     def get_last_target_ack_date(self):
         return self._last_ack_date
 
-    def _get_socket_type(self, host, port):
+    def _socket_type_of(self, host, port):
         for key, h in self._host.items():
             if h == host and self._port[key] == port:
-                st = self._socket_type[key]
-                if st[:2] == (socket.AF_INET, socket.SOCK_STREAM):
-                    return 'STREAM'
-                elif st[:2] == (socket.AF_INET, socket.SOCK_DGRAM):
-                    return 'DGRAM'
-                elif st[:2] == (socket.AF_PACKET, socket.SOCK_RAW):
-                    return 'RAW'
-                else:
-                    return repr(st)
+                return self._socket_type[key]
         else:
             return None
 
+    def _get_socket_type(self, host, port):
+        st = self._socket_type_of(host, port)
+        if st is None:
+            return None
+        elif st[:2] == (socket.AF_INET, socket.SOCK_STREAM):
+            return 'STREAM'
+        elif st[:2] == (socket.AF_INET, socket.SOCK_DGRAM):
+            return 'DGRAM'
+        elif st[:2] == (socket.AF_PACKET, socket.SOCK_RAW):
+            return 'RAW'
+        else:
+            return repr(st)
+
     def get_description(self):
         desc_added = []
         desc = ''
@@ -35,6 +35,7 @@ import string
 import re
 import zlib
 import codecs
+import threading
 
 import builtins
 
@@ -49,6 +50,85 @@ from fuddly.libs import debug_facility as dbg
 DEBUG = dbg.VT_DEBUG
 
 
+class FuzzCasesTable(object):
+    """
+    LRU table of the fuzz cases computed by the value types when their fuzz mode is enabled.
+
+    The (deterministic) fuzz cases of a value type only depend on the parameters that
+    define it, and the same definitions recur across the nodes of a data model and across
+    the atoms. Thus the value types share this table, and the fuzz cases are computed once
+    per definition while the table is not full.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._table = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute_func):
+        """
+        Args:
+            key: hashable description of the parameters the fuzz cases depend on
+            compute_func: function called without argument for computing the fuzz cases
+              if they are not in the table
+
+        Returns:
+            the fuzz cases (shared with the table, thus not to be modified)
+        """
+        try:
+            with self._lock:
+                cases = self._table[key]
+                self._table.move_to_end(key)
+                self.hits += 1
+            return cases
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable parameters
+            return compute_func()
+
+        cases = compute_func()
+        with self._lock:
+            self.misses += 1
+            self._table[key] = cases
+            if len(self._table) > self.maxsize:
+                self._table.popitem(last=False)
+        return cases
+
+    def clear(self):
+        with self._lock:
+            self._table.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._table)
+
+
+fuzz_cases_table = FuzzCasesTable()
+
+
+def _find_value_gaps(values):
+    """
+    Returns:
+        tuple: the smallest and the largest integers that are missing between the minimum and
+        the maximum of `values`, or None if there is no such integer
+    """
+    sorted_vals = sorted(set(values))
+    first = last = None
+    for a, b in zip(sorted_vals, sorted_vals[1:]):
+        if b - a > 1:
+            first = a + 1
+            break
+    for a, b in zip(reversed(sorted_vals[:-1]), reversed(sorted_vals[1:])):
+        if b - a > 1:
+            last = b - 1
+            break
+    return None if first is None else (first, last)
+
+
 class VT(object):
     """
     Base class to implement Types that are leveraged by typed nodes
@@ -112,6 +192,20 @@ class VT(object):
     def set_size_from_constraints(self, size=None, encoded_size=None):
         raise NotImplementedError
 
+    def absorb_span(self, constraints):
+        """
+        Provide the maximum number of bytes an absorption starting at the
+        beginning of the blob can read, in order to avoid handing the whole
+        remaining data over to the value type.
+
+        Args:
+            constraints (AbsCsts): constraints used for the absorption
+
+        Returns:
+            int: the number of bytes, or None if it cannot be bounded
+        """
+        return None
+
     def pretty_print(self, max_size=None):
         return None
 
@@ -506,6 +600,31 @@ class String(VT_Alt):
         else:
             return AbsorbStatus.Accept, off, size
 
+    def absorb_span(self, constraints):
+        # Without the size constraint the whole blob is read, and encoded strings
+        # need it to be decoded.
+        if self.encoded_string or not constraints[AbsCsts.Size]:
+            return None
+
+        if constraints[AbsCsts.Contents] and (
+            self.is_values_provided or self.alphabet is not None
+        ):
+            if self.alphabet is None:
+                return max([self.max_encoded_sz] + [len(v) for v in self.values])
+        elif constraints[AbsCsts.Regexp] and self.regexp is not None:
+            # Only the default regexps, which match a prefix of single-byte
+            # characters, give the same result on a part of the blob.
+            if not (
+                (self.regexp == ".*" and self.codec == self.LATIN_1)
+                or (
+                    self.regexp == "[\x00-\x7f]*"
+                    and self.codec in (self.ASCII, self.LATIN_1)
+                )
+            ):
+                return None
+
+        return self.max_encoded_sz
+
     def do_absorb(self, blob, constraints, off=0, size=None):
         """
         Core function for absorption.
@@ -1051,7 +1170,6 @@ class String(VT_Alt):
                     self.values_fuzzy.append(min_val)
 
         else:
-            ### Common Test Cases
             if self.drawn_val is not None:
                 orig_val = self.drawn_val
             else:
@@ -1061,79 +1179,31 @@ class String(VT_Alt):
                     orig_val = random.choice(self.values_copy)
 
             sz = len(orig_val)
-            sz_delta_with_max = self.max_encoded_sz - sz
-
             if sz > 0:
                 val = bp.corrupt_bits(orig_val, n=1)
                 self.values_fuzzy.append(val)
 
-            val = orig_val + b"A"*(sz_delta_with_max + 1)
-            self.values_fuzzy.append(val)
-
-            if len(self.encode(orig_val)) > 0:
-                self.values_fuzzy.append(b'')
-
-            if sz > 0:
-                sz_delta_with_min = sz - self.min_sz
-                val = orig_val[:-sz_delta_with_min-1]
-                if val != b'':
+            ### Common, Conditional and CODEC related Test Cases
+            knowledge = self.knowledge_source
+            encoded_val_not_empty = len(self.encode(orig_val)) > 0
+            key = (type(self), orig_val, self.min_sz, self.max_sz, self.max_encoded_sz, self.codec,
+                   self.alphabet, self.case_sensitive, fuzz_magnitude, encoded_val_not_empty,
+                   self._get_knowledge_signature(knowledge))
+            cases_before_sample, unsupported_chars, cases_after_sample = fuzz_cases_table.get(
+                key, lambda: self._compute_fuzz_cases(knowledge, orig_val, fuzz_magnitude,
+                                                      encoded_val_not_empty))
+
+            self.values_fuzzy += cases_before_sample
+            random_cases = self.values_fuzzy[:]
+            if unsupported_chars:
+                sample = random.choice(unsupported_chars)[0]
+                test_case = orig_val[:-1] + sample.encode(self.codec)
+                self.values_fuzzy.append(test_case)
+                random_cases.append(test_case)
+            for val, deduplicated in cases_after_sample:
+                if not deduplicated or val not in random_cases:
                     self.values_fuzzy.append(val)
 
-            if self.max_sz > 0:
-                val = orig_val + b"X"*(self.max_sz*int(100*fuzz_magnitude))
-                self.values_fuzzy.append(val)
-
-            self.values_fuzzy.append(b'\x00' * sz if sz > 0 else b'\x00')
-
-            if self.alphabet is not None and sz > 0:
-                if self.codec == self.ASCII:
-                    base_char_set = set(self.printable_char_set)
-                else:
-                    base_char_set = set(self.non_ctrl_char)
-
-                unsupported_chars = base_char_set - set(self._bytes2str(self.alphabet))
-                if unsupported_chars:
-                    sample = random.choice(tuple(unsupported_chars))[0]
-                    test_case = orig_val[:-1] + sample.encode(self.codec)
-                    self.values_fuzzy.append(test_case)
-
-            self.values_fuzzy.append(orig_val + b'\r\n' * int(100*fuzz_magnitude))
-
-            ### Conditional Test Cases
-            ctrl_chars_tc = String.fuzz_cases_ctrl_chars(self.knowledge_source, orig_val, sz,
-                                                         self.max_sz, self.codec)
-            if ctrl_chars_tc:
-                add_to_fuzz_list(ctrl_chars_tc)
-
-            c_strings_tc = String.fuzz_cases_c_strings(self.knowledge_source, orig_val, sz,
-                                                       fuzz_magnitude)
-            if c_strings_tc:
-                add_to_fuzz_list(c_strings_tc)
-
-            if self.case_sensitive:
-                fc_letter_cases = String.fuzz_cases_letter_case(self.knowledge_source, orig_val)
-                if fc_letter_cases:
-                    add_to_fuzz_list(fc_letter_cases)
-
-            ### CODEC related test cases
-            if self.codec == self.ASCII:
-                val = bytearray(orig_val)
-                if len(val) > 0:
-                    val[0] |= 0x80
-                    val = bytes(val)
-                else:
-                    val = b'\xe9'
-                if val not in self.values_fuzzy:
-                    self.values_fuzzy.append(val)
-            elif self.codec == self.UTF16BE or self.codec == self.UTF16LE:
-                if self.max_sz > 0:
-                    if self.max_encoded_sz % 2 == 1:
-                        nb = self.max_sz // 2
-                        # euro character at the end that 'fully' use the 2 bytes of utf-16
-                        val = ('A' * nb).encode(self.codec) + b'\xac\x20'
-                        if val not in self.values_fuzzy:
-                            self.values_fuzzy.append(val)
-
             ### Specific test cases added by optional string encoders
             enc_cases = self.encoding_test_cases(orig_val, self.max_sz, self.min_sz,
                                                  self.min_encoded_sz, self.max_encoded_sz)
@@ -1166,6 +1236,103 @@ class String(VT_Alt):
             return False
 
 
+    @staticmethod
+    def _get_knowledge_signature(knowledge):
+        # the knowledge the test cases of String.fuzz_cases_*() depend on
+        if knowledge is None:
+            return None
+        return (knowledge.is_info_class_represented(Language),
+                knowledge.is_assumption_valid(Language.C),
+                knowledge.is_info_class_represented(Test),
+                knowledge.is_assumption_valid(Test.Cursory),
+                knowledge.is_info_class_represented(InputHandling),
+                knowledge.is_assumption_valid(InputHandling.Ctrl_Char_Set))
+
+    def _compute_fuzz_cases(self, knowledge, orig_val, fuzz_magnitude, encoded_val_not_empty):
+        """
+        Compute the fuzz cases of _enable_fuzz_mode() that only depend on the parameters of
+        the String and on `orig_val`.
+
+        Returns:
+            tuple: the test cases to put before the test case built from an unsupported
+            character, the unsupported characters (to pick one randomly), and the test cases to
+            put after it, as tuples (test case, should be dropped if already in the list)
+        """
+        cases_before_sample = []
+
+        sz = len(orig_val)
+        sz_delta_with_max = self.max_encoded_sz - sz
+
+        val = orig_val + b"A"*(sz_delta_with_max + 1)
+        cases_before_sample.append(val)
+
+        if encoded_val_not_empty:
+            cases_before_sample.append(b'')
+
+        if sz > 0:
+            sz_delta_with_min = sz - self.min_sz
+            val = orig_val[:-sz_delta_with_min-1]
+            if val != b'':
+                cases_before_sample.append(val)
+
+        if self.max_sz > 0:
+            val = orig_val + b"X"*(self.max_sz*int(100*fuzz_magnitude))
+            cases_before_sample.append(val)
+
+        cases_before_sample.append(b'\x00' * sz if sz > 0 else b'\x00')
+
+        unsupported_chars = None
+        if self.alphabet is not None and sz > 0:
+            if self.codec == self.ASCII:
+                base_char_set = set(self.printable_char_set)
+            else:
+                base_char_set = set(self.non_ctrl_char)
+            unsupported_chars = tuple(sorted(base_char_set - set(self._bytes2str(self.alphabet))))
+
+        cases_after_sample = [(orig_val + b'\r\n' * int(100*fuzz_magnitude), False)]
+        known_cases = set(cases_before_sample)
+        known_cases.add(cases_after_sample[0][0])
+
+        def add_to_fuzz_list(flist):
+            for v in flist:
+                if v not in known_cases:
+                    known_cases.add(v)
+                    cases_after_sample.append((v, True))
+
+        ### Conditional Test Cases
+        ctrl_chars_tc = String.fuzz_cases_ctrl_chars(knowledge, orig_val, sz,
+                                                     self.max_sz, self.codec)
+        if ctrl_chars_tc:
+            add_to_fuzz_list(ctrl_chars_tc)
+
+        c_strings_tc = String.fuzz_cases_c_strings(knowledge, orig_val, sz, fuzz_magnitude)
+        if c_strings_tc:
+            add_to_fuzz_list(c_strings_tc)
+
+        if self.case_sensitive:
+            fc_letter_cases = String.fuzz_cases_letter_case(knowledge, orig_val)
+            if fc_letter_cases:
+                add_to_fuzz_list(fc_letter_cases)
+
+        ### CODEC related test cases
+        if self.codec == self.ASCII:
+            val = bytearray(orig_val)
+            if len(val) > 0:
+                val[0] |= 0x80
+                val = bytes(val)
+            else:
+                val = b'\xe9'
+            add_to_fuzz_list([val])
+        elif self.codec == self.UTF16BE or self.codec == self.UTF16LE:
+            if self.max_sz > 0:
+                if self.max_encoded_sz % 2 == 1:
+                    nb = self.max_sz // 2
+                    # euro character at the end that 'fully' use the 2 bytes of utf-16
+                    val = ('A' * nb).encode(self.codec) + b'\xac\x20'
+                    add_to_fuzz_list([val])
+
+        return tuple(cases_before_sample), unsupported_chars, tuple(cases_after_sample)
+
     def is_valid(self, val):
         sz = len(val)
         if self.max_sz < sz or self.min_sz > sz:
@@ -1606,53 +1773,14 @@ class INT(VT):
 
         else:
             specific_fuzzy_values = self.get_specific_fuzzy_vals()
-            supp_list = specific_fuzzy_values if specific_fuzzy_values is not None else []
-
             val = self.get_current_raw_val()
-            if val is not None:
-                # don't use a set to preserve the order if needed
-                if val+1 not in supp_list:
-                    supp_list.append(val+1)
-                if val-1 not in supp_list:
-                    supp_list.append(val-1)
-
-                if self.values is not None:
-                    orig_set = set(self.values)
-                    max_oset = max(orig_set)
-                    min_oset = min(orig_set)
-                    if min_oset != max_oset:
-                        diff_sorted = sorted(set(range(min_oset, max_oset+1)) - orig_set)
-                        if diff_sorted:
-                            item1 = diff_sorted[0]
-                            item2 = diff_sorted[-1]
-                            if item1 not in supp_list:
-                                supp_list.append(item1)
-                            if item2 not in supp_list:
-                                supp_list.append(item2)
-                        if max_oset+1 not in supp_list:
-                            supp_list.append(max_oset+1)
-                        if min_oset-1 not in supp_list:
-                            supp_list.append(min_oset-1)
-
-                if self.mini is not None:
-                    cond1 = False
-                    if self.value_space_size != -1:  # meaning not an INT_str
-                        cond1 = (self.mini != 0 or self.maxi != ((1 << self.size) - 1)) and \
-                           (self.mini != -(1 << (self.size-1)) or self.maxi != ((1 << (self.size-1)) - 1))
-                    else:
-                        cond1 = True
-
-                    if cond1:
-                        # we avoid using vt.mini or vt.maxi has they could be undefined (e.g., INT_str)
-                        if self.mini_gen-1 not in supp_list:
-                            supp_list.append(self.mini_gen-1)
-                        if self.maxi_gen+1 not in supp_list:
-                            supp_list.append(self.maxi_gen+1)
-
-            if self.fuzzy_values:
-                for v in self.fuzzy_values:
-                    if v not in supp_list:
-                        supp_list.append(v)
+            key = (type(self), val, None if self.values is None else tuple(self.values),
+                   self.mini, self.maxi, self.mini_gen, self.maxi_gen, self.size,
+                   self.value_space_size,
+                   None if self.fuzzy_values is None else tuple(self.fuzzy_values),
+                   None if specific_fuzzy_values is None else tuple(specific_fuzzy_values))
+            supp_list = list(fuzz_cases_table.get(
+                key, lambda: self._compute_fuzz_cases(val, specific_fuzzy_values)))
 
         if supp_list:
             supp_list = list(filter(self.is_size_compatible, supp_list))
@@ -1665,6 +1793,59 @@ class INT(VT):
         else:
             return None
 
+    def _compute_fuzz_cases(self, val, specific_fuzzy_values):
+        """
+        Compute the fuzz cases of get_fuzzed_vt_list() that only depend on the parameters of
+        the INT and on its current value.
+        """
+        supp_list = list(specific_fuzzy_values) if specific_fuzzy_values is not None else []
+
+        if val is not None:
+            # don't use a set to preserve the order if needed
+            if val+1 not in supp_list:
+                supp_list.append(val+1)
+            if val-1 not in supp_list:
+                supp_list.append(val-1)
+
+            if self.values is not None:
+                orig_set = set(self.values)
+                max_oset = max(orig_set)
+                min_oset = min(orig_set)
+                if min_oset != max_oset:
+                    gaps = _find_value_gaps(orig_set)
+                    if gaps:
+                        item1, item2 = gaps
+                        if item1 not in supp_list:
+                            supp_list.append(item1)
+                        if item2 not in supp_list:
+                            supp_list.append(item2)
+                    if max_oset+1 not in supp_list:
+                        supp_list.append(max_oset+1)
+                    if min_oset-1 not in supp_list:
+                        supp_list.append(min_oset-1)
+
+            if self.mini is not None:
+                cond1 = False
+                if self.value_space_size != -1:  # meaning not an INT_str
+                    cond1 = (self.mini != 0 or self.maxi != ((1 << self.size) - 1)) and \
+                       (self.mini != -(1 << (self.size-1)) or self.maxi != ((1 << (self.size-1)) - 1))
+                else:
+                    cond1 = True
+
+                if cond1:
+                    # we avoid using vt.mini or vt.maxi has they could be undefined (e.g., INT_str)
+                    if self.mini_gen-1 not in supp_list:
+                        supp_list.append(self.mini_gen-1)
+                    if self.maxi_gen+1 not in supp_list:
+                        supp_list.append(self.maxi_gen+1)
+
+        if self.fuzzy_values:
+            for v in self.fuzzy_values:
+                if v not in supp_list:
+                    supp_list.append(v)
+
+        return tuple(supp_list)
+
     def _instanciate_obj(self, values, fuzz_mode=False):
         return self.__class__(values=values, fuzz_mode=fuzz_mode)
 
@@ -1697,6 +1878,9 @@ class INT(VT):
         else:
             return AbsorbStatus.Accept, off, None
 
+    def absorb_span(self, constraints):
+        return struct.calcsize(self.cformat)
+
     def do_absorb(self, blob, constraints, off=0, size=None):
         self.orig_values = copy.copy(self.values)
         self.orig_values_copy = copy.copy(self.values_copy)
@@ -2432,6 +2616,10 @@ class INT_str(INT):
 
         return str(self.drawn_val)
 
+    def absorb_span(self, constraints):
+        # the size of the integer string is only known once matched
+        return None
+
     def _read_value_from(self, blob, size):
         g = re.match(self._regex, blob)
         if g is None:
@@ -3043,56 +3231,11 @@ class BitField(VT_Alt):
                 mini, maxi = self.subfield_extrems[idx]
                 current = mini + curr_idx
 
-            # append first a normal value, as it will be used as a
-            # reference when the other fields are fuzzed.
-            # self._reset_idx() will init self.idx accordingly to avoid nominal value in fuzz mode
-            l.append(current)
-
-            if self.subfield_extrems[idx] is not None:
-                mini, maxi = self.subfield_extrems[idx]
-                MM = maxi + 1
-                mm = mini - 1
-                if MM not in l and self.is_compatible(MM, sz):
-                    l.append(MM)
-                if mm not in l and self.is_compatible(mm, sz):
-                    l.append(mm)
-
-            M = (1 << sz) - 1
-            m = 0
-            a = l[0] + 1
-            b = l[0] - 1
-            if M not in l and self.is_compatible(M, sz):
-                l.append(M)
-            if m not in l and self.is_compatible(m, sz):
-                l.append(m)
-            if a not in l and self.is_compatible(a, sz):
-                l.append(a)
-            if b not in l and self.is_compatible(b, sz):
-                l.append(b)
-
-            if curr_values is not None:
-                orig_set = set(curr_values)
-                max_oset = builtins.max(orig_set)
-                min_oset = builtins.min(orig_set)
-                if min_oset != max_oset:
-                    diff_sorted = sorted(set(range(min_oset, max_oset + 1)) - orig_set)
-                    if diff_sorted:
-                        item1 = diff_sorted[0]
-                        item2 = diff_sorted[-1]
-                        if item1 not in l and self.is_compatible(item1, sz):
-                            l.append(item1)
-                        if item2 not in l and self.is_compatible(item2, sz):
-                            l.append(item2)
-                    beyond_max_oset = max_oset + 1
-                    if beyond_max_oset not in l and self.is_compatible(
-                        beyond_max_oset, sz
-                    ):
-                        l.append(beyond_max_oset)
-                    below_min_oset = min_oset - 1
-                    if below_min_oset not in l and self.is_compatible(
-                        below_min_oset, sz
-                    ):
-                        l.append(below_min_oset)
+            extrems = self.subfield_extrems[idx]
+            key = (type(self), sz, current, None if extrems is None else tuple(extrems),
+                   None if curr_values is None else tuple(curr_values))
+            l += fuzz_cases_table.get(
+                key, lambda: self._compute_subfield_fuzz_cases(sz, current, extrems, curr_values))
 
         self.determinist_save = self.determinist
         self.determinist = True
@@ -3103,6 +3246,64 @@ class BitField(VT_Alt):
         self.subfield_extrems = [None for i in range(len(self.subfield_fuzzy_vals))]
         self.exhausted = False
 
+    def _compute_subfield_fuzz_cases(self, sz, current, extrems, curr_values):
+        """
+        Compute the fuzz cases of a subfield, given its size, its current value, and its
+        extrems or its values.
+        """
+        l = []
+        # append first a normal value, as it will be used as a
+        # reference when the other fields are fuzzed.
+        # self._reset_idx() will init self.idx accordingly to avoid nominal value in fuzz mode
+        l.append(current)
+
+        if extrems is not None:
+            mini, maxi = extrems
+            MM = maxi + 1
+            mm = mini - 1
+            if MM not in l and self.is_compatible(MM, sz):
+                l.append(MM)
+            if mm not in l and self.is_compatible(mm, sz):
+                l.append(mm)
+
+        M = (1 << sz) - 1
+        m = 0
+        a = l[0] + 1
+        b = l[0] - 1
+        if M not in l and self.is_compatible(M, sz):
+            l.append(M)
+        if m not in l and self.is_compatible(m, sz):
+            l.append(m)
+        if a not in l and self.is_compatible(a, sz):
+            l.append(a)
+        if b not in l and self.is_compatible(b, sz):
+            l.append(b)
+
+        if curr_values is not None:
+            orig_set = set(curr_values)
+            max_oset = builtins.max(orig_set)
+            min_oset = builtins.min(orig_set)
+            if min_oset != max_oset:
+                gaps = _find_value_gaps(orig_set)
+                if gaps:
+                    item1, item2 = gaps
+                    if item1 not in l and self.is_compatible(item1, sz):
+                        l.append(item1)
+                    if item2 not in l and self.is_compatible(item2, sz):
+                        l.append(item2)
+                beyond_max_oset = max_oset + 1
+                if beyond_max_oset not in l and self.is_compatible(
+                    beyond_max_oset, sz
+                ):
+                    l.append(beyond_max_oset)
+                below_min_oset = min_oset - 1
+                if below_min_oset not in l and self.is_compatible(
+                    below_min_oset, sz
+                ):
+                    l.append(below_min_oset)
+
+        return tuple(l)
+
     def make_determinist(self):
         self.determinist = True
 
@@ -3248,6 +3449,9 @@ class BitField(VT_Alt):
         else:
             return AbsorbStatus.Accept, 0, None
 
+    def absorb_span(self, constraints):
+        return self.nb_bytes
+
     def do_absorb(self, blob, constraints, off=0, size=None):
         self.orig_idx = copy.deepcopy(self.idx)
         self.orig_subfield_vals = copy.deepcopy(self.subfield_vals)
@@ -49,14 +49,22 @@ def main():
         action="store_true",
         help="Limit the information displayed at startup.",
     )
+    group.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Only import the data models and projects once selected "
+             "(if they have been indexed by a previous start).",
+    )
 
     args = parser.parse_args()
 
     fmkdb = args.fmkdb
     external_display = args.external_display
     quiet = args.quiet
+    lazy = args.lazy
 
-    fmk = FmkPlumbing(external_term=external_display, fmkdb_path=fmkdb, quiet=quiet)
+    fmk = FmkPlumbing(external_term=external_display, fmkdb_path=fmkdb, quiet=quiet,
+                      lazy_import=lazy)
     fmk.start()
 
     shell = FmkShell("Fuddly Shell", fmk)
@@ -22,6 +22,7 @@
 ################################################################################
 
 import sys
+import importlib.util
 
 try:
     import xtermcolor
@@ -96,9 +97,32 @@ class FontStyle:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
+def _lazy_import(name):
+    """
+    Return the module `name` without executing it. The module is actually
+    imported the first time one of its attributes is accessed, which avoids
+    paying the import cost of heavy optional modules when fuddly starts.
+
+    Raise ImportError if the module is not installed.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError("No module named '{:s}'".format(name), name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    return module
+
 graphviz_module = True
 try:
-    import graphviz
+    graphviz = _lazy_import('graphviz')
 except ImportError:
     graphviz_module = False
     graphviz = None
@@ -131,7 +155,7 @@ except ImportError:
 
 ssh_module = True
 try:
-    import paramiko as ssh
+    ssh = _lazy_import('paramiko')
 except ImportError:
     ssh_module = False
     ssh = None
@@ -158,9 +182,27 @@ except ImportError:
 
 z3_module = True
 try:
-    import z3
+    z3 = _lazy_import('z3')
 except ImportError:
     z3_module = False
     z3 = None
     print('WARNING [FMK]: python-z3 or z3-solver module is not installed! '
           'Should be installed to support constraint-based nodes.')
+
+numpy_module = True
+try:
+    numpy = _lazy_import('numpy')
+except ImportError:
+    numpy_module = False
+    numpy = None
+    print('WARNING [FMK]: python(3)-numpy module is not installed! '
+          'Should be installed for faster bulk data corruption.')
+
+cloudpickle_module = True
+try:
+    cloudpickle = _lazy_import('cloudpickle')
+except ImportError:
+    cloudpickle_module = False
+    cloudpickle = None
+    print('WARNING [FMK]: python(3)-cloudpickle module is not installed! '
+          'Should be installed for caching the data models once built.')
@@ -27,6 +27,8 @@ from __future__ import print_function
 import time
 
 import sys
+import gc
+import tracemalloc
 import unittest
 import ddt
 
@@ -2872,6 +2874,194 @@ class TestNodeFeatures(unittest.TestCase):
         self.assertEqual(l0, l1)
         self.assertEqual(l1, l2)
 
+    def test_cow_clone(self):
+
+        ex_node = fmk.dm.get_atom('ex')
+        ex_node.freeze()
+        orig_val = ex_node.to_bytes()
+        typed_crit = NodeInternalsCriteria(node_kinds=[NodeInternals_TypedValue])
+
+        clone = ex_node.get_clone(cow=True)
+        for n in clone.get_reachable_nodes(internals_criteria=typed_crit):
+            self.assertTrue(n.cc.is_value_type_shared())
+        self.assertEqual(clone.to_bytes(), orig_val)
+
+        # modifying the clone shall not impact the original node
+        for n in clone.get_reachable_nodes(internals_criteria=typed_crit):
+            n.unfreeze()
+            n.freeze()
+            self.assertFalse(n.cc.is_value_type_shared())
+        clone.unfreeze(recursive=True)
+        clone.freeze()
+        self.assertEqual(ex_node.to_bytes(), orig_val)
+
+        # modifying the original node shall not impact the clone
+        clone = ex_node.get_clone(cow=True)
+        regular_clone = ex_node.get_clone()
+        for n in ex_node.get_reachable_nodes(internals_criteria=typed_crit):
+            n.unfreeze()
+            n.freeze()
+            self.assertFalse(n.cc.is_value_type_shared())
+        self.assertEqual(clone.to_bytes(), orig_val)
+
+        # the clone and a regular clone shall walk the same values
+        for _ in range(5):
+            clone.unfreeze(recursive=True)
+            regular_clone.unfreeze(recursive=True)
+            self.assertEqual(clone.to_bytes(), regular_clone.to_bytes())
+
+        clone = ex_node.get_clone(ignore_frozen_state=True, cow=True)
+        regular_clone = ex_node.get_clone(ignore_frozen_state=True)
+        for _ in range(5):
+            self.assertEqual(clone.to_bytes(), regular_clone.to_bytes())
+            clone.unfreeze(recursive=True)
+            regular_clone.unfreeze(recursive=True)
+
+    def test_bytes_cache(self):
+
+        def build(name, depth):
+            if depth == 0:
+                return Node(name, vt=String(values=['AB', 'CD']))
+            return Node(name, subnodes=[build(name + str(i), depth - 1) for i in range(3)])
+
+        root = build('r', 3)
+        root.set_env(Env())
+        orig_val = root.to_bytes()
+        self.assertEqual(orig_val, b'AB' * 27)
+        self.assertEqual(root.to_bytes(), orig_val)
+        self.assertEqual(root.cc._bytes_cache, orig_val)
+
+        leaf = root['r/r1/r12/r120$'][0]
+        sibling = root['r/r0$'][0]
+        parent = root['r/r1/r12$'][0]
+        self.assertIsNotNone(sibling.cc._bytes_cache)
+
+        # only the cached bytes on the path from the leaf up to the root are invalidated
+        leaf.set_frozen_value(b'XYZ')
+        self.assertIsNone(root.cc._bytes_cache)
+        self.assertIsNone(parent.cc._bytes_cache)
+        self.assertIsNotNone(sibling.cc._bytes_cache)
+        expected = b'AB' * 15 + b'XYZ' + b'AB' * 11
+        self.assertEqual(root.to_bytes(), expected)
+        self.assertEqual(root.cc._bytes_cache, expected)
+
+        leaf.unfreeze()
+        self.assertIsNone(root.cc._bytes_cache)
+        self.assertEqual(root.to_bytes(), b'AB' * 15 + b'CD' + b'AB' * 11)
+        self.assertEqual(root.to_bytes(), b'AB' * 15 + b'CD' + b'AB' * 11)
+
+        parent.set_attr(NodeInternals.DISABLED)
+        self.assertIsNone(root.cc._bytes_cache)
+        parent.clear_attr(NodeInternals.DISABLED)
+
+        parent.cc.set_encoder(GZIP_Enc(6))
+        self.assertIsNone(root.cc._bytes_cache)
+        self.assertEqual(root.to_bytes(), root.to_bytes())
+        self.assertEqual(root.get_clone().to_bytes(), root.to_bytes())
+
+        root.unfreeze(recursive=True)
+        self.assertIsNone(root.cc._bytes_cache)
+        self.assertEqual(root.to_bytes(), root.to_bytes())
+
+    def test_compact_representation(self):
+        node = Node('TEST', subnodes=[Node('str', values=['A', 'B']),
+                                      Node('int', vt=UINT8(values=[1, 2]))])
+        node.set_env(Env())
+        node.freeze()
+
+        for n in [node.cc, node['TEST/int$'][0].cc, node.cc.custo]:
+            self.assertEqual(type(n).__dictoffset__, 0)
+        # nodes only carry the attributes set by user code
+        for n in [node, node['TEST/str$'][0]]:
+            self.assertIsNone(n.__getstate__()[0])
+
+        internals = node['TEST/str$'][0].cc
+        self.assertTrue(internals.is_attr_set(NodeInternals.Mutable))
+        self.assertFalse(internals.is_attr_set(NodeInternals.Highlight))
+        internals.set_attr(NodeInternals.Highlight)
+        internals.clear_attr(NodeInternals.Mutable)
+        self.assertTrue(internals.is_attr_set(NodeInternals.Highlight))
+        self.assertFalse(internals.is_attr_set(NodeInternals.Mutable))
+        self.assertRaises(ValueError, internals.is_attr_set, 12345)
+
+        clone = node.get_clone()
+        clone_internals = clone['TEST/str$'][0].cc
+        self.assertTrue(clone_internals.is_attr_set(NodeInternals.Highlight))
+        clone_internals.clear_attr(NodeInternals.Highlight)
+        self.assertTrue(internals.is_attr_set(NodeInternals.Highlight))
+
+        custo = NonTermCusto(items_to_set=NonTermCusto.CycleClone,
+                             items_to_clear=NonTermCusto.MutableClone)
+        custo_copy = copy.copy(custo)
+        self.assertTrue(custo_copy.cycle_clone_mode)
+        self.assertFalse(custo_copy.mutable_clone_mode)
+        self.assertTrue(custo_copy.frozen_copy_mode)
+        custo_copy.full_combinatory_mode = True
+        self.assertTrue(custo_copy.full_combinatory_mode)
+        self.assertFalse(custo.full_combinatory_mode)
+        self.assertIsNone(custo[GenFuncCusto.TriggerLast + 100])
+
+    def test_path_index(self):
+
+        def build(name, depth):
+            if depth == 0:
+                return Node(name, vt=String(values=['AB']))
+            return Node(name, subnodes=[build(name + str(i), depth - 1) for i in range(3)])
+
+        root = build('r', 3)
+        root.set_env(Env())
+        root.freeze()
+
+        def search(regexp):
+            return [(p, n) for p, n in root.iter_paths() if re.search(regexp, p)]
+
+        regexps = ['r/r1/r12/r120$', '^r/r1', 'r1/r12', '1/r12', '2$', '^r/r2/r2.?',
+                   '.*r21', 'r0[0-9]/r0', r'r2/r2\d', '^r/r1/r12/r12']
+        for regexp in regexps:
+            expected = [n for _, n in search(regexp)]
+            self.assertEqual(list(root.iter_nodes_by_path(regexp)), expected)
+            self.assertIs(root.get_first_node_by_path(regexp), expected[0])
+
+        # paths are only computed again when the graph structure changes
+        htable = root.get_all_paths()
+        self.assertIs(root.get_all_paths(), htable)
+        root['r/r1/r12/r120$'][0].set_frozen_value(b'XYZ')
+        self.assertIs(root.get_all_paths(), htable)
+
+        node = root['r/r1/r12$'][0]
+        self.assertEqual(node.get_all_paths_from(root), ['r/r1/r12'])
+        new_node = Node('new', vt=String(values=['NEW']))
+        node.add(new_node)
+        self.assertIsNot(root.get_all_paths(), htable)
+        self.assertEqual(root.get_first_node_by_path('r1/r12/new$'), new_node)
+        self.assertEqual(new_node.get_path_from(root), 'r/r1/r12/new')
+
+        # the changes within other graphs, including the copies of this one, are ignored
+        htable = root.get_all_paths()
+        clone = root.get_clone()
+        clone['r/r1/r12$'][0].add(Node('other', vt=String(values=['OTHER'])))
+        other_root = build('o', 2)
+        other_root.set_env(Env())
+        other_root.freeze()
+        self.assertIs(root.get_all_paths(), htable)
+        self.assertIsNone(root.get_first_node_by_path('r1/r12/other$'))
+
+        # unless the changed node is shared with this graph
+        shared = root['r/r0$'][0]
+        other_root['o/o1$'][0].add(shared)
+        other_htable = other_root.get_all_paths()
+        shared.add(Node('shared_new', vt=String(values=['NEW'])))
+        self.assertIsNot(root.get_all_paths(), htable)
+        self.assertIsNot(other_root.get_all_paths(), other_htable)
+        self.assertIsNotNone(root.get_first_node_by_path('^r/r0/shared_new$'))
+        self.assertIsNotNone(other_root.get_first_node_by_path('^o/o1/r0/shared_new$'))
+
+        htable = root.get_all_paths()
+        root.unfreeze(recursive=True)
+        self.assertIsNot(root.get_all_paths(), htable)
+        self.assertEqual(root.get_first_node_by_path('r12/new'), new_node)
+
+
 @ddt.ddt
 class TestNode_NonTerm(unittest.TestCase):
     @classmethod
@@ -3884,6 +4074,39 @@ class TestDataModel(unittest.TestCase):
                 # data.show(raw_limit=200)
                 print('Success!')
 
+    @unittest.skipIf(not run_long_tests, "Long test case")
+    def test_node_memory_footprint(self):
+
+        for dm in fmk.dm_list:
+            try:
+                dm.load_data_model(fmk._name2dm)
+            except:
+                print("\n*** WARNING: Data Model '{:s}' not tested because" \
+                      " the loading process has failed ***\n".format(dm.name))
+                continue
+
+            gc.collect()
+            tracemalloc.start()
+            atoms = []
+            for data_id in dm.atom_identifiers():
+                try:
+                    atom = dm.get_atom(data_id)
+                    atom.freeze()
+                except:
+                    print("\n*** WARNING: Atom '{:s}' not tested ***\n".format(data_id))
+                    continue
+                atoms.append(atom)
+            gc.collect()
+            mem_size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            nodes = set()
+            for atom in atoms:
+                nodes.update(atom.get_reachable_nodes(resolve_generator=True))
+            if nodes:
+                print("\n*** '{:s}' Data Model: {:d} nodes, {:d} bytes per node"
+                      .format(dm.name, len(nodes), mem_size // len(nodes)))
+
     @unittest.skipIf(not run_long_tests, "Long test case")
     def test_data_model_specifics(self):
 
@@ -4367,6 +4590,39 @@ class TestFMK(unittest.TestCase):
 
         self.assertEqual(idx, expected_idx)
 
+    def test_data_producer(self):
+
+        def send_loop(dp, max_loop, **kwargs):
+            fmk.cleanup_all_dmakers(reset_existing_seed=True)
+            sent_data = fmk.process_data_and_send(dp, max_loop=max_loop, **kwargs)
+            return [d.to_bytes() for d in sent_data]
+
+        # stateless chain: each data only depends on its seed
+        dp = DataProcess(['TESTNODE'])
+        outcomes_1 = send_loop(dp, 12, workers=3, workers_seed=42)
+        outcomes_2 = send_loop(dp, 12, workers=2, workers_seed=42)
+        self.assertEqual(len(outcomes_1), 12)
+        self.assertEqual(outcomes_1, outcomes_2)
+
+        # stateful chain: the data makers are walked by only one worker, exactly like the
+        # sequential loop would do if each test case was seeded the same way
+        act = ['OFF_GEN', ('tTYPE', UI(min_node_tc=1, max_node_tc=4))]
+        fmk.cleanup_all_dmakers(reset_existing_seed=True)
+        dp = DataProcess(act)
+        expected_outcomes = []
+        for case_idx in range(20):
+            random.seed(7 + case_idx)
+            sent_data = fmk.process_data_and_send(dp, max_loop=1)
+            if not sent_data:
+                # the chain is exhausted
+                break
+            expected_outcomes += [d.to_bytes() for d in sent_data]
+        outcomes_1 = send_loop(DataProcess(act), 20, workers=1, workers_seed=7)
+        outcomes_2 = send_loop(DataProcess(act), 20, workers=3, workers_seed=7)
+        self.assertTrue(expected_outcomes)
+        self.assertEqual(outcomes_1, expected_outcomes)
+        self.assertEqual(outcomes_1, outcomes_2)
+
     def test_operator_1(self):
 
         fmk.reload_all(tg_ids=[7,8])
@@ -0,0 +1,87 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import unittest
+import random
+import ddt
+from fuddly.test import mock
+
+from fuddly.framework import basic_primitives as bp
+
+
+def nb_flipped_bits(orig, variant):
+    return sum(bin(a ^ b).count('1') for a, b in zip(orig, variant))
+
+def nb_corrupted_bytes(orig, variant):
+    return sum(a != b for a, b in zip(orig, variant))
+
+
+@ddt.ddt
+class TestBulkCorruption(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.buffer = bytes(range(256)) * 4
+
+    @ddt.data(True, False)
+    def test_corrupt_bits_bulk(self, vectorized):
+        with mock.patch.object(bp, 'numpy_module', vectorized and bp.numpy_module):
+            for n in (1, 8, 100, 6000):
+                variants = bp.corrupt_bits_bulk(self.buffer, 10, n=n)
+                self.assertEqual(len(variants), 10)
+                for v in variants:
+                    self.assertEqual(len(v), len(self.buffer))
+                    self.assertEqual(nb_flipped_bits(self.buffer, v), n)
+
+            for v in bp.corrupt_bits_bulk(self.buffer, 10, n=100, ascii=True):
+                self.assertTrue(all(b < 0x80 for a, b in zip(self.buffer, v) if a != b))
+
+    @ddt.data(True, False)
+    def test_corrupt_bytes_bulk(self, vectorized):
+        with mock.patch.object(bp, 'numpy_module', vectorized and bp.numpy_module):
+            for v in bp.corrupt_bytes_bulk(self.buffer, 10, p=0.1):
+                self.assertEqual(nb_corrupted_bytes(self.buffer, v), 102)
+
+            ctrl_chars = set(range(32)) | {0x7f}
+            for v in bp.corrupt_bytes_bulk(self.buffer, 10, n=200, ctrl_char=True):
+                self.assertTrue(all(b in ctrl_chars for a, b in zip(self.buffer, v) if a != b))
+
+    def test_reproducibility(self):
+        random.seed(42)
+        variants = bp.corrupt_bits_bulk(self.buffer, 20, n=3)
+        single = bp.corrupt_bits(self.buffer, n=200)
+        random.seed(42)
+        self.assertEqual(bp.corrupt_bits_bulk(self.buffer, 20, n=3), variants)
+        self.assertEqual(bp.corrupt_bits(self.buffer, n=200), single)
+        self.assertEqual(len(set(variants)), 20)
+
+    def test_streaming(self):
+        with mock.patch.object(bp, 'CORRUPTION_BATCH_VARIANTS', 4):
+            gen = bp.iter_corrupted_bytes(b'abcdefgh', n=1)
+            variants = [next(gen) for _ in range(10)]
+        for v in variants:
+            self.assertEqual(nb_corrupted_bytes(b'abcdefgh', v), 1)
+
+    def test_too_many_positions(self):
+        self.assertRaises(ValueError, bp.iter_corrupted_bits, b'ab', n=17)
+        self.assertRaises(ValueError, bp.iter_corrupted_bytes, b'ab', n=3)
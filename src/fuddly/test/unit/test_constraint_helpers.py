@@ -0,0 +1,102 @@
+################################################################################
+#
+#  Copyright 2022 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import itertools
+import unittest
+
+from fuddly.framework.constraint_helpers import CSP, Constraint, Z3Constraint, ConstraintError
+from fuddly.libs.external_modules import csp_module, z3_module
+
+
+def iter_solutions(csp):
+    while True:
+        yield dict(csp.get_solution())
+        csp.next_solution()
+        if csp.exhausted_solutions:
+            break
+
+
+@unittest.skipIf(not z3_module, 'z3 is not installed')
+class TestZ3CSP(unittest.TestCase):
+
+    def _make_csp(self, default=None):
+        csp = CSP([Z3Constraint('x == 3*y + z', vars=('x', 'y', 'z')),
+                   Z3Constraint('Or([x >= 50, x <= 20])', vars=('x',))])
+        csp.set_var_domain('x', None, min=0, max=100, default=default)
+        csp.set_var_domain('y', None, min=0, max=40)
+        csp.set_var_domain('z', [1, 2, 3])
+        csp.freeze()
+        return csp
+
+    @staticmethod
+    def _expected_solutions():
+        return {(3*y + z, y, z) for y, z in itertools.product(range(41), [1, 2, 3])
+                if 3*y + z <= 100 and (3*y + z >= 50 or 3*y + z <= 20)}
+
+    def test_solution_enumeration(self):
+        csp = self._make_csp()
+        # the variable domains are split in many regions
+        csp.z3_solutions_per_region = 4
+        solutions = [(s['x'], s['y'], s['z']) for s in iter_solutions(csp)]
+        self.assertEqual(len(solutions), len(set(solutions)))
+        self.assertEqual(set(solutions), self._expected_solutions())
+
+    def test_default_values(self):
+        csp = self._make_csp(default=13)
+        solutions = list(iter_solutions(csp))
+        self.assertEqual(solutions[0]['x'], 13)
+        self.assertEqual({(s['x'], s['y'], s['z']) for s in solutions},
+                         self._expected_solutions())
+
+        csp = self._make_csp(default=30)
+        self.assertRaises(ConstraintError, csp.get_solution)
+
+    def test_incremental_reset(self):
+        csp = self._make_csp()
+        csp.get_solution()
+        solver = csp._solver
+
+        csp.set_var_domain('z', [2])
+        csp.reset()
+        self.assertEqual({s['z'] for s in iter_solutions(csp)}, {2})
+        self.assertIs(csp._solver, solver)
+
+        csp.restore_var_domains()
+        csp.negate_constraint(1)
+        solutions = list(iter_solutions(csp))
+        self.assertIsNot(csp._solver, solver)
+        self.assertTrue(all(20 < s['x'] < 50 for s in solutions))
+
+
+@unittest.skipIf(not csp_module, 'python-constraint is not installed')
+class TestPythonConstraintCSP(unittest.TestCase):
+
+    def test_solution_enumeration(self):
+        csp = CSP([Constraint(lambda x, y: x == 2*y, vars=('x', 'y'))])
+        csp.set_var_domain('x', None, min=0, max=20, default=4)
+        csp.set_var_domain('y', [1, 2, 3, 4, 5])
+        csp.freeze()
+        solutions = list(iter_solutions(csp))
+        self.assertEqual(solutions[0], {'x': 4, 'y': 2})
+        self.assertEqual(sorted((s['x'], s['y']) for s in solutions),
+                         [(2, 1), (4, 2), (6, 3), (8, 4), (10, 5)])
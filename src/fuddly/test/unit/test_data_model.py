@@ -0,0 +1,260 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+from contextlib import redirect_stdout
+
+from fuddly.test import mock
+
+import fuddly.framework.global_resources as gr
+from fuddly.framework import data_model
+from fuddly.framework.data_model import DataModel, SampleImporter
+from fuddly.framework.dmhelpers.generic import CRC, MH
+from fuddly.framework.node import Node, AbsNoCsts, AbsorbStatus
+from fuddly.framework.node_builder import NodeBuilder
+from fuddly.framework.value_types import String, UINT16_be, UINT32_be
+from fuddly.libs.external_modules import cloudpickle_module
+
+
+class ChunkDataModel(DataModel):
+
+    file_extension = 'chk'
+    name = 'chunk_test'
+
+    def build_data_model(self):
+        desc = \
+        {'name': 'chunk_file',
+         'contents': [
+             {'name': 'magic',
+              'contents': String(values=['CHK'], size=3)},
+             {'name': 'chunks',
+              'qty': (1, 20),
+              'contents': [
+                  {'name': 'len',
+                   'contents': UINT16_be()},
+                  {'name': 'data_gen',
+                   'contents': lambda x: Node('data', value_type=String(size=x.get_raw_value())),
+                   'node_args': 'len'},
+                  {'name': 'crc32_gen',
+                   'contents': CRC(vt=UINT32_be, clear_attrs=[MH.Attr.Mutable]),
+                   'node_args': ['data_gen']}
+              ]}
+         ]}
+
+        atom = NodeBuilder().create_graph_from_desc(desc)
+        self.register(atom)
+        self.register_atom_for_decoding(atom, absorb_constraints=AbsNoCsts(size=True))
+
+
+def make_chunk_file(payloads):
+    content = b'CHK'
+    for p in payloads:
+        content += struct.pack('>H', len(p)) + p + struct.pack('>I', zlib.crc32(p))
+    return content
+
+
+class TestSampleImport(unittest.TestCase):
+
+    def setUp(self):
+        self.dm = ChunkDataModel()
+        self.dm.build_data_model()
+        self.samples_folder = tempfile.mkdtemp()
+        self.cache_folder = tempfile.mkdtemp()
+        for i in range(4):
+            self._write_sample('sample{:d}.chk'.format(i),
+                               make_chunk_file([b'A' * (i + 1), b'payload', b'B' * 10 * i]))
+        self._write_sample('invalid.chk', b'NOT A CHUNK FILE')
+        self._write_sample('ignored.bin', make_chunk_file([b'ignored']))
+
+    def tearDown(self):
+        shutil.rmtree(self.samples_folder)
+        shutil.rmtree(self.cache_folder)
+
+    def _write_sample(self, name, content):
+        with open(os.path.join(self.samples_folder, name), 'wb') as f:
+            f.write(content)
+
+    def _import(self, **kwargs):
+        with mock.patch.object(gr, 'cache_folder', self.cache_folder), \
+                redirect_stdout(io.StringIO()):
+            atoms = self.dm.import_file_contents(path=self.samples_folder, **kwargs)
+        return {name: atom.to_bytes() for name, atom in atoms.items()}
+
+    def test_sequential_import(self):
+        atoms = self._import(nb_workers=1, use_cache=False)
+        self.assertEqual(sorted(atoms.keys()), ['sample{:d}.chk'.format(i) for i in range(4)])
+        for name, content in atoms.items():
+            with open(os.path.join(self.samples_folder, name), 'rb') as f:
+                self.assertEqual(content, f.read())
+        self.assertFalse(os.listdir(self.cache_folder))
+
+    @unittest.skipIf(not SampleImporter.is_parallel_import_supported(),
+                     'worker processes cannot be forked')
+    def test_parallel_import(self):
+        atoms = self._import(nb_workers=2, use_cache=False)
+        self.assertEqual(atoms, self._import(nb_workers=1, use_cache=False))
+
+    def test_import_cache(self):
+        atoms = self._import(nb_workers=1, use_cache=True)
+        cache_entries = os.listdir(os.path.join(self.cache_folder, 'imported_data', self.dm.name))
+        # invalid samples are also cached
+        self.assertEqual(len(cache_entries), 5)
+
+        with mock.patch.object(SampleImporter, 'absorb') as absorb:
+            self.assertEqual(self._import(nb_workers=1, use_cache=True), atoms)
+            absorb.assert_not_called()
+
+        self._write_sample('sample2.chk', make_chunk_file([b'modified']))
+        absorbed = []
+        orig_absorb = SampleImporter.absorb
+        def absorb(importer, idx, name, echo=False):
+            absorbed.append(name)
+            return orig_absorb(importer, idx, name, echo=echo)
+
+        with mock.patch.object(SampleImporter, 'absorb', absorb):
+            new_atoms = self._import(nb_workers=1, use_cache=True)
+        self.assertEqual(absorbed, ['sample2.chk'])
+        self.assertEqual(new_atoms['sample2.chk'], make_chunk_file([b'modified']))
+
+    def test_import_is_sequential_by_default(self):
+        with mock.patch('multiprocessing.context.ForkContext.Pool') as pool:
+            atoms = self._import(use_cache=False)
+            pool.assert_not_called()
+        self.assertEqual(len(atoms), 4)
+
+    def test_import_cache_eviction(self):
+        self._import(nb_workers=1, use_cache=True)
+        cache_folder = os.path.join(self.cache_folder, 'imported_data', self.dm.name)
+        cache_size = 0
+        for name in os.listdir(cache_folder):
+            cache_size += os.path.getsize(os.path.join(cache_folder, name))
+            os.utime(os.path.join(cache_folder, name), (0, 0))
+
+        max_size = cache_size - 1
+        with mock.patch.object(SampleImporter, 'CACHE_MAX_SIZE', max_size):
+            self._write_sample('sample2.chk', make_chunk_file([b'modified']))
+            self._import(nb_workers=1, use_cache=True)
+        remaining = [os.path.join(cache_folder, name) for name in os.listdir(cache_folder)]
+        self.assertLessEqual(sum(os.path.getsize(path) for path in remaining), max_size)
+        # only the entry of the former sample2 has not been used and is evicted
+        self.assertEqual(len(remaining), 5)
+        self.assertFalse([path for path in remaining if os.path.getmtime(path) == 0])
+
+    def test_imported_atoms_registration(self):
+        atoms = self._import(nb_workers=1, use_cache=True)
+
+        # retrieved from the cache
+        with mock.patch.object(gr, 'cache_folder', self.cache_folder), \
+                redirect_stdout(io.StringIO()):
+            imported = self.dm.import_file_contents(path=self.samples_folder, nb_workers=1)
+        self.dm.register(*imported.values())
+        atom = imported['sample1.chk']
+        self.assertIs(atom.env.get_data_model(), self.dm)
+
+        atom = self.dm.get_atom(atom.name)
+        self.assertEqual(atom.to_bytes(), atoms['sample1.chk'])
+        atom.unfreeze()
+        self.assertIsInstance(atom.to_bytes(), bytes)
+
+
+class DependentDataModel(DataModel):
+
+    name = 'dependent_test'
+
+    def build_data_model(self):
+        chunk_file = self.get_external_atom('chunk_test', 'chunk_file')
+        self.register(Node('wrapper', subnodes=[chunk_file]))
+
+
+@unittest.skipIf(not cloudpickle_module, 'cloudpickle is not installed')
+class TestBuildSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_folder = tempfile.mkdtemp()
+        self.imported_data_folder = tempfile.mkdtemp()
+        self.patches = [mock.patch.object(gr, 'cache_folder', self.cache_folder),
+                        mock.patch.object(gr, 'imported_data_folder', self.imported_data_folder),
+                        mock.patch.object(data_model, 'BUILD_SNAPSHOT_MIN_TIME', 0)]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.cache_folder)
+        shutil.rmtree(self.imported_data_folder)
+
+    @staticmethod
+    def _load(*dm_list):
+        dm_db = {dm.name: dm for dm in dm_list}
+        with redirect_stdout(io.StringIO()):
+            dm_list[-1].load_data_model(dm_db)
+        return dm_list[-1]
+
+    def test_snapshot_restoration(self):
+        self._load(ChunkDataModel())
+        self.assertTrue(os.path.exists(os.path.join(self.cache_folder, 'data_models', 'chunk_test')))
+
+        with mock.patch.object(ChunkDataModel, 'build_data_model') as build:
+            dm = self._load(ChunkDataModel())
+            build.assert_not_called()
+
+        self.assertEqual(list(dm.atom_identifiers()), ['chunk_file'])
+        self.assertIs(dm._dm_hashtable['chunk_file'].env.get_data_model(), dm)
+        # the generator functions and the CRC helper of the atom are restored
+        content = make_chunk_file([b'restored', b'snapshot'])
+        atom, (status, off, size, _) = dm.absorb(content)
+        self.assertEqual(status, AbsorbStatus.FullyAbsorbed)
+        self.assertEqual(atom.to_bytes(), content)
+
+    def test_snapshot_dependencies(self):
+        self._load(ChunkDataModel(), DependentDataModel())
+
+        with mock.patch.object(DependentDataModel, 'build_data_model') as build:
+            dm = self._load(ChunkDataModel(), DependentDataModel())
+            build.assert_not_called()
+        self.assertEqual(list(dm.atom_identifiers()), ['wrapper'])
+
+        # the samples of the data model it depends on are modified
+        sample_folder = os.path.join(self.imported_data_folder, 'chunk_test')
+        with open(os.path.join(sample_folder, 'new.chk'), 'wb') as f:
+            f.write(make_chunk_file([b'new sample']))
+
+        with mock.patch.object(DependentDataModel, 'build_data_model') as build:
+            self._load(ChunkDataModel(), DependentDataModel())
+            build.assert_called_once()
+
+    def test_snapshot_too_large(self):
+        with mock.patch.object(data_model, 'BUILD_SNAPSHOT_MAX_SIZE', 10):
+            self._load(ChunkDataModel())
+
+        with mock.patch.object(DataModel, '_save_build_snapshot') as save:
+            dm = self._load(ChunkDataModel())
+            save.assert_not_called()
+        self.assertEqual(list(dm.atom_identifiers()), ['chunk_file'])
@@ -0,0 +1,262 @@
+import datetime
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from fuddly.framework import global_resources as gr
+from fuddly.framework.database import Database
+from fuddly.framework.profiler import ExecutionProfiler
+from fuddly.test import mock
+
+
+class DatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = Database(fmkdb_path=os.path.join(self.tmp_dir, 'fmkdb.db'))
+        self.assertTrue(self.db.start())
+
+    def tearDown(self):
+        self.db.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_journal_mode(self):
+        ret = self.db.execute_sql_statement("PRAGMA journal_mode;")
+        self.assertEqual(ret[0][0].upper(), 'WAL')
+
+    def test_batched_inserts(self):
+        nb = 2000
+        for i in range(nb):
+            self.db.insert_project('prj_{:d}'.format(i))
+        ret = self.db.execute_sql_statement("SELECT COUNT(*) FROM PROJECT;")
+        self.assertEqual(ret[0][0], nb)
+
+    def test_rowid_outcomes(self):
+        stmt = "INSERT INTO DATAMODEL(NAME) VALUES(?)"
+        futures = [self.db.submit_sql_stmt_async(stmt, params=('dm_{:d}'.format(i),),
+                                                 outcome_type=Database.OUTCOME_ROWID)
+                   for i in range(10)]
+        rowids = [f.result() for f in futures]
+        self.assertEqual(rowids, list(range(rowids[0], rowids[0] + 10)))
+        self.assertIsNone(self.db.submit_sql_stmt_async(stmt, params=('dm_last',)))
+
+    def test_failing_statement_within_batch(self):
+        stmt = "INSERT INTO DATAMODEL(NAME) VALUES(?)"
+        self.db.submit_sql_stmt(stmt, params=('dm_ok_1',))
+        ret = self.db.submit_sql_stmt("INSERT INTO UNKNOWN_TABLE VALUES(1)",
+                                      outcome_type=Database.OUTCOME_ROWID)
+        self.assertIsNone(ret)
+        self.db.submit_sql_stmt(stmt, params=('dm_ok_2',))
+        self.db.shrink_db()
+        ret = self.db.execute_sql_statement("SELECT NAME FROM DATAMODEL ORDER BY NAME;")
+        self.assertEqual(ret, [('dm_ok_1',), ('dm_ok_2',)])
+
+    def test_concurrent_submissions(self):
+        def insert(prefix):
+            for i in range(200):
+                self.db.insert_project('{:s}_{:d}'.format(prefix, i))
+
+        threads = [threading.Thread(target=insert, args=('t{:d}'.format(i),)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.db.sync()
+        ret = self.db.execute_sql_statement("SELECT COUNT(*) FROM PROJECT;")
+        self.assertEqual(ret[0][0], 800)
+
+    def test_submission_after_stop(self):
+        self.db.stop()
+        future = self.db.submit_sql_stmt_async("SELECT 1;", outcome_type=Database.OUTCOME_DATA)
+        self.assertIsNone(future.result(timeout=1))
+        self.db.sync()
+
+    def _get_index_names(self):
+        ret = self.db.execute_sql_statement(
+            "SELECT name FROM sqlite_master WHERE type == 'index' AND name LIKE '%_IDX';")
+        return {r[0] for r in ret}
+
+    def test_schema_upgrade(self):
+        self.assertEqual(self.db.execute_sql_statement("PRAGMA user_version;")[0][0],
+                         Database.SCHEMA_VERSION)
+        self.assertIn('FEEDBACK_DATA_ID_IDX', self._get_index_names())
+
+        # fmkDB created by a previous fuddly version
+        self.db.execute_sql_statement("DROP INDEX FEEDBACK_DATA_ID_IDX;")
+        self.db.execute_sql_statement("DROP TABLE PERF;")
+        self.db.execute_sql_statement("PRAGMA user_version = 0;")
+        self.db.stop()
+        self.db = Database(fmkdb_path=self.db.fmk_db_path)
+        self.assertTrue(self.db.start())
+        self.assertEqual(self.db.execute_sql_statement("PRAGMA user_version;")[0][0],
+                         Database.SCHEMA_VERSION)
+        self.assertIn('FEEDBACK_DATA_ID_IDX', self._get_index_names())
+        self.assertEqual(self.db.execute_sql_statement("SELECT COUNT(*) FROM PERF;")[0][0], 0)
+
+    def _make_previous_version_db(self):
+        # fmkDB created by a previous fuddly version, without WAL
+        self.db.execute_sql_statement("DROP INDEX FEEDBACK_DATA_ID_IDX;")
+        self.db.execute_sql_statement("PRAGMA user_version = 0;")
+        self.db.execute_sql_statement("PRAGMA journal_mode = DELETE;")
+        self.db.stop()
+        with open(self.db.fmk_db_path, 'rb') as f:
+            return f.read()
+
+    def _check_untouched_db(self, content):
+        self.assertEqual(self.db.execute_sql_statement("PRAGMA user_version;")[0][0], 0)
+        self.assertEqual(self.db.execute_sql_statement("PRAGMA journal_mode;")[0][0].upper(),
+                         'DELETE')
+        self.assertNotIn('FEEDBACK_DATA_ID_IDX', self._get_index_names())
+        self.assertIsNone(self.db.execute_sql_statement("INSERT INTO PROJECT(NAME) VALUES('p');"))
+        self.db.stop()
+        with open(self.db.fmk_db_path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(self.tmp_dir), ['fmkdb.db'])
+
+    def test_read_only_mode(self):
+        content = self._make_previous_version_db()
+        self.db = Database(fmkdb_path=self.db.fmk_db_path, read_only=True)
+        self.assertTrue(self.db.start())
+        self._check_untouched_db(content)
+
+        db = Database(fmkdb_path=os.path.join(self.tmp_dir, 'missing.db'), read_only=True)
+        self.assertFalse(db.start())
+        db.stop()
+        self.assertEqual(os.listdir(self.tmp_dir), ['fmkdb.db'])
+
+    def test_not_writable_fmkdb(self):
+        content = self._make_previous_version_db()
+        self.db = Database(fmkdb_path=self.db.fmk_db_path)
+        with mock.patch('os.access', return_value=False):
+            self.assertTrue(self.db.start())
+        self._check_untouched_db(content)
+
+    def test_perf_stats(self):
+        self.db.perf = ExecutionProfiler()
+        self.db.perf.enable()
+        for i in range(10):
+            self.db.insert_project('prj_{:d}'.format(i))
+        self.db.sync()
+        self.db.perf.disable()
+
+        stats = dict(((stage, key), st) for stage, key, st in self.db.perf.iter_stats())
+        self.assertIn(('fmkdb_batch', None), stats)
+        now = datetime.datetime.now()
+        self.db.insert_perf_stats(now, 'prj_0', 'fmkdb_batch', None,
+                                  stats[('fmkdb_batch', None)].to_dict())
+        ret = self.db.execute_sql_statement("SELECT STAGE, REF, COUNT FROM PERF;")
+        self.assertEqual(ret, [('fmkdb_batch', None, stats[('fmkdb_batch', None)].count)])
+
+    def _insert_fbk_records(self):
+        now = datetime.datetime.now()
+        records = [
+            # data ID, project, feedback (source, status, content)
+            (1, 'prj_a', [('Target', 0, None), ('Probe', 0, b'')]),
+            (2, 'prj_a', [('Target', -1, b'crash'), ('Probe', 0, b' \n')]),
+            (3, 'prj_b', [('Probe', -2, b'error 42')]),
+            (4, 'prj_b', [('Target', 0, b'\x00')]),
+            (5, 'prj_b', [('Target', -1, 'error 4')]),
+        ]
+        for data_id, prj, fbk_list in records:
+            self.db.insert_project(prj)
+            self.db.execute_sql_statement(
+                "INSERT INTO DATA(ID, TYPE, TARGET, PRJ_NAME) VALUES(?, 'tTYPE', 'TG', ?);",
+                params=(data_id, prj))
+            for src, status, content in fbk_list:
+                self.db.execute_sql_statement(
+                    "INSERT INTO FEEDBACK(DATA_ID, SOURCE, DATE, CONTENT, STATUS) "
+                    "VALUES(?, ?, ?, ?, ?);", params=(data_id, src, now, content, status))
+        # the impact on data 5 has been disproved
+        self.db.execute_sql_statement(
+            "INSERT INTO ANALYSIS(DATA_ID, CONTENT, DATE, IMPACT) VALUES(5, 'analysis', ?, 0);",
+            params=(now,))
+
+    def test_data_with_impact(self):
+        self._insert_fbk_records()
+        self.assertEqual(self.db.get_data_with_impact(display=False), [2, 3])
+        self.assertEqual(self.db.get_data_with_impact(display=False, raw_analysis=True),
+                         [2, 3, 5])
+        self.assertEqual(self.db.get_data_with_impact(prj_name='prj_b', display=False), [3])
+        self.assertEqual(self.db.get_data_with_impact(fbk_src='^Target$', display=False), [2])
+        self.assertEqual(self.db.get_data_with_impact(fbk_status_formula='? == -2',
+                                                      display=False), [3])
+
+    def test_data_without_fbk(self):
+        self._insert_fbk_records()
+        self.assertEqual(self.db.get_data_without_fbk(display=False), [1])
+        self.assertEqual(self.db.get_data_without_fbk(fbk_src='Probe', display=False),
+                         [1, 2, 4, 5])
+        self.assertEqual(self.db.get_data_without_fbk(prj_name='prj_b', display=False), [])
+
+    def test_data_with_specific_fbk(self):
+        self._insert_fbk_records()
+        self.assertEqual(self.db.get_data_with_specific_fbk('error 4', display=False), [3, 5])
+        self.assertEqual(self.db.get_data_with_specific_fbk('error 4$', display=False), [5])
+        self.assertEqual(self.db.get_data_with_specific_fbk('^(crash|error)', prj_name='prj_a',
+                                                            display=False), [2])
+        self.assertEqual(self.db.get_data_with_specific_fbk('error', fbk_src='Target',
+                                                            display=False), [5])
+        self.assertEqual(self.db.get_data_with_specific_fbk('nothing', display=False), [])
+
+    def _insert_data_records(self, nb):
+        sent_date = datetime.datetime(2024, 1, 2, 3, 4, 5)
+        self.db.insert_data_model('dm')
+        for i in range(1, nb + 1):
+            self.db.execute_sql_statement(
+                "INSERT INTO DATA(ID, TYPE, DM_NAME, CONTENT, SENT_DATE) VALUES(?, ?, 'dm', ?, ?);",
+                params=(i, 'TYPE{:d}'.format(i % 2), 'content {:d}'.format(i).encode(), sent_date))
+
+    def test_iter_sql_statement(self):
+        self._insert_data_records(25)
+        records = self.db.iter_sql_statement("SELECT ID, CONTENT FROM DATA WHERE ID > ? ORDER BY ID;",
+                                             params=(5,), chunk_size=4)
+        self.assertEqual(list(records),
+                         [(i, 'content {:d}'.format(i).encode()) for i in range(6, 26)])
+        with self.assertRaises(ValueError):
+            next(self.db.iter_sql_statement("SELECT 1;", chunk_size=0))
+
+    def test_export_data_within_folder(self):
+        self._insert_data_records(30)
+        export_dir = os.path.join(self.tmp_dir, 'exported') + os.sep
+        for nb_writers in (1, 3):
+            with mock.patch.object(gr, 'exported_data_folder', export_dir):
+                self.assertEqual(self.db.export_data(5, 24, colorized=False,
+                                                     nb_writers=nb_writers, chunk_size=7), 20)
+            fnames = sorted(os.listdir(os.path.join(export_dir, 'dm')))
+            self.assertEqual(len(fnames), 20)
+            self.assertIn('TYPE1_ID5_2024-01-02-030405_00.dm', fnames)
+            self.assertIn('TYPE0_ID24_2024-01-02-030405_19.dm', fnames)
+            with open(os.path.join(export_dir, 'dm', 'TYPE0_ID10_2024-01-02-030405_05.dm'), 'rb') as f:
+                self.assertEqual(f.read(), b'content 10')
+            shutil.rmtree(export_dir)
+
+        self.assertEqual(self.db.export_data(100, colorized=False), 0)
+
+    def test_export_data_within_archive(self):
+        self._insert_data_records(10)
+
+        zip_path = os.path.join(self.tmp_dir, 'export.zip')
+        self.assertEqual(self.db.export_data(1, 10, colorized=False, archive=zip_path,
+                                             chunk_size=3), 10)
+        with zipfile.ZipFile(zip_path) as arc:
+            manifest = json.loads(arc.read(Database.EXPORT_MANIFEST_NAME))
+            self.assertEqual([e['data_id'] for e in manifest], list(range(1, 11)))
+            self.assertEqual(arc.read(manifest[2]['path']), b'content 3')
+            self.assertEqual(manifest[2]['size'], 9)
+            self.assertEqual(manifest[2]['sent_date'], '2024-01-02 03:04:05')
+
+        tar_path = os.path.join(self.tmp_dir, 'export.tar.gz')
+        self.assertEqual(self.db.export_data(4, colorized=False, archive=tar_path), 1)
+        with tarfile.open(tar_path) as arc:
+            self.assertEqual(arc.getnames(),
+                             ['dm/TYPE0_ID4_2024-01-02-030405_00.dm', Database.EXPORT_MANIFEST_NAME])
+            manifest = json.load(arc.extractfile(Database.EXPORT_MANIFEST_NAME))
+            self.assertEqual(manifest[0]['type'], 'TYPE0')
+
+        with self.assertRaises(ValueError):
+            self.db.export_data(1, 10, archive=os.path.join(self.tmp_dir, 'export.rar'))
@@ -0,0 +1,126 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import os
+import struct
+import time
+import unittest
+
+from fuddly.test import mock
+
+from fuddly.framework.data import Data
+from fuddly.framework.targets import debug
+from fuddly.framework.targets.debug import ShmemRingBuffer, ShmemMappingError
+
+
+def shmem_name(name):
+    return 'fuddly_test_{:s}_{:d}'.format(name, os.getpid())
+
+
+class TestShmemRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.producer = ShmemRingBuffer(shmem_name('ring'), size=256, max_consumer=2, create=True)
+        self.consumer = ShmemRingBuffer(shmem_name('ring'), max_consumer=2)
+
+    def tearDown(self):
+        self.consumer.close()
+        self.producer.close()
+        self.producer.unlink()
+
+    def test_records(self):
+        self.assertFalse(self.consumer.has_data(0))
+        records = [b'A' * 10, b'', b'B' * 50]
+        for r in records:
+            self.assertTrue(self.producer.write(r, nb_consumers=2))
+        self.assertTrue(self.consumer.has_data(0))
+        self.assertEqual(self.consumer.read(0), records)
+        self.assertFalse(self.consumer.has_data(0))
+        self.assertEqual(self.consumer.read(0), [])
+        # each consumer has its own cursor
+        self.assertEqual(self.consumer.read(1), records)
+
+    def test_wrap_around(self):
+        capacity = self.producer.capacity
+        for i in range(20):
+            record = bytes([i]) * (30 + i)
+            self.assertTrue(self.producer.write(record, nb_consumers=1))
+            self.assertEqual(self.consumer.read(0), [record])
+        self.assertGreater(self.producer._get_write_cursor(), 3 * capacity)
+
+    def test_full_ring(self):
+        record = b'X' * 60
+        nb_written = 0
+        while self.producer.write(record, nb_consumers=2):
+            nb_written += 1
+        self.assertEqual(nb_written, self.producer.capacity // 64)
+
+        # the slowest consumer holds the producer back
+        self.assertEqual(len(self.consumer.read(0)), nb_written)
+        self.assertFalse(self.producer.write(record, nb_consumers=2))
+        self.assertTrue(self.producer.write(record, nb_consumers=1))
+        self.assertEqual(len(self.consumer.read(1)), nb_written + 1)
+        self.assertTrue(self.producer.write(record, nb_consumers=2))
+        self.assertEqual(self.consumer.read(0), [record, record])
+
+    def test_too_large_record(self):
+        self.assertFalse(self.producer.fits(bytes(self.producer.capacity)))
+        self.assertRaises(ValueError, self.producer.write, bytes(self.producer.capacity), 1)
+
+    def test_uninitialized_shmem(self):
+        struct.pack_into(ShmemRingBuffer.cursor_format, self.producer.shm.buf, 0, 0)
+        self.assertRaises(ShmemMappingError, ShmemRingBuffer, shmem_name('ring'), max_consumer=2)
+        self.assertRaises(FileNotFoundError, ShmemRingBuffer, shmem_name('unknown'))
+
+
+class TestTestTargetShmem(unittest.TestCase):
+
+    def test_feedback_sources(self):
+        source = debug.TestTarget(name=shmem_name('source'), shmem_mode=True)
+        sink = debug.TestTarget(name=shmem_name('sink'), shmem_mode=True, shmem_timeout=2)
+        sink.add_feedback_sources(source)
+        source.set_logger(mock.Mock())
+        logger = mock.Mock()
+        sink.set_logger(logger)
+
+        source.start()
+        sink.start()
+        try:
+            t0 = time.time()
+            while not sink.is_target_ready_for_new_data() and time.time() - t0 < 2:
+                time.sleep(0.01)
+            self.assertTrue(sink.is_target_ready_for_new_data())
+
+            # records larger than 4096 bytes used to be rejected
+            items = [b'%04d' % i + b'.' * 5000 for i in range(200)]
+            for item in items:
+                source.send_data(Data(item))
+                self.assertIsNotNone(source.get_last_target_ack_date())
+
+            t0 = time.time()
+            while logger.collect_feedback.call_count < len(items) and time.time() - t0 < 5:
+                time.sleep(0.01)
+            self.assertEqual([c.args[0] for c in logger.collect_feedback.call_args_list], items)
+        finally:
+            sink.stop()
+            source.stop()
@@ -0,0 +1,198 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import ddt
+
+from fuddly.framework.data import Data
+from fuddly.framework.targets.local import LocalTarget
+
+# Minimal program implementing the AFL fork server protocol (as AFL instrumented
+# programs do). It runs normally if it has not been started by a fork server client.
+HARNESS = r'''
+import os, signal, struct, sys, time
+
+def run():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as f:
+            data = f.read()
+    else:
+        data = b''
+        while True:
+            chunk = os.read(0, 4096)
+            if not chunk:
+                break
+            data += chunk
+    if data == b'crash':
+        os.kill(os.getpid(), signal.SIGSEGV)
+    elif data == b'hang':
+        time.sleep(60)
+    sys.stdout.write('parsed {:d} bytes\n'.format(len(data)))
+    sys.stdout.flush()
+    return 0 if data.startswith(b'OK') else 1
+
+try:
+    os.write(199, struct.pack('=I', 0))
+except OSError:
+    sys.exit(run())
+
+while True:
+    if len(os.read(198, 4)) != 4:
+        sys.exit(0)
+    pid = os.fork()
+    if pid == 0:
+        os.close(198)
+        os.close(199)
+        os._exit(run())
+    os.write(199, struct.pack('=I', pid))
+    os.write(199, struct.pack('=I', os.waitpid(pid, 0)[1]))
+'''
+
+
+@ddt.ddt
+class LocalTargetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.harness = os.path.join(self.tmp_dir, 'harness.py')
+        with open(self.harness, 'w') as f:
+            f.write(HARNESS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _send(self, tg, content):
+        tg.send_data(Data(content))
+        fbk = tg.get_feedback(timeout=1)
+        entries = {ref.split('[')[0]: (data, status)
+                   for ref, data, status, _ in fbk.iter_and_cleanup_collector()}
+        bstring = fbk.get_bytes()
+        error_code = fbk.get_error_code()
+        fbk.cleanup()
+        tg.cleanup()
+        return entries, bstring, error_code
+
+    @ddt.data(False, True)
+    def test_fork_server_feedback(self, send_via_stdin):
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.harness,
+                         send_via_stdin=send_via_stdin, fork_server=True)
+        self.assertTrue(tg.start())
+        try:
+            entries, bstring, error_code = self._send(tg, b'OK data')
+            self.assertEqual(entries['Application'][1], 0)
+            self.assertEqual(bstring, b'parsed 7 bytes\n')
+            self.assertEqual(error_code, 0)
+
+            entries, bstring, error_code = self._send(tg, b'bad data')
+            self.assertEqual(entries['Application'][1], -1)
+            self.assertEqual(error_code, -1)
+
+            entries, _, error_code = self._send(tg, b'crash')
+            self.assertEqual(entries['Application'][1], -3)
+            self.assertIn('signal (ID: 11)', entries['Application'][0][-1])
+            self.assertEqual(error_code, -1)
+
+            entries, bstring, error_code = self._send(tg, b'OK again')
+            self.assertEqual(entries['Application'][1], 0)
+            self.assertEqual(bstring, b'parsed 8 bytes\n')
+        finally:
+            tg.stop()
+
+    def test_fork_server_hang_and_restart(self):
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.harness, fork_server=True)
+        self.assertTrue(tg.start())
+        try:
+            entries, _, error_code = self._send(tg, b'hang')
+            self.assertEqual(entries['Application'][1], -3)
+            self.assertIn('signal (ID: 9)', entries['Application'][0][-1])
+            self.assertEqual(error_code, -1)
+
+            # the fork server is restarted if it has terminated
+            tg._app.kill()
+            tg._app.wait()
+            entries, bstring, _ = self._send(tg, b'OK data')
+            self.assertEqual(entries['Application'][1], 0)
+            self.assertEqual(bstring, b'parsed 7 bytes\n')
+        finally:
+            tg.stop()
+
+    def test_fork_server_not_supported(self):
+        tg = LocalTarget(target_path='true', fork_server=True, fork_server_timeout=1)
+        self.assertFalse(tg.start())
+
+    def test_fork_server_fd_already_used(self):
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.harness, fork_server=True)
+        os.dup2(0, LocalTarget.FORKSRV_FD)
+        try:
+            nb_fds = len(os.listdir('/proc/self/fd'))
+            self.assertFalse(tg.start())
+            self.assertIsNone(tg._fs_input)
+            self.assertEqual(len(os.listdir('/proc/self/fd')), nb_fds)
+        finally:
+            os.close(LocalTarget.FORKSRV_FD)
+            tg.stop()
+
+    @ddt.data('disk', 'memfd', 'tmpfs')
+    def test_tmpfile_backends(self, backend):
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.harness,
+                         tmpfile_backend=backend, tmpfs_ring_size=2)
+        self.assertTrue(tg.start())
+        try:
+            for content in (b'OK data', b'bad data!', b'OK'):
+                _, bstring, _ = self._send(tg, content)
+                self.assertEqual(bstring, 'parsed {:d} bytes\n'.format(len(content)).encode())
+            ring = [tg._get_tmpfs_file_name(idx) for idx in range(2)]
+            if backend == 'tmpfs':
+                # the last test case overwrote the first file of the ring
+                with open(ring[0], 'rb') as f:
+                    self.assertEqual(f.read(), b'OK')
+                with open(ring[1], 'rb') as f:
+                    self.assertEqual(f.read(), b'bad data!')
+            else:
+                self.assertFalse(any(os.path.exists(n) for n in ring))
+        finally:
+            tg.stop()
+
+        self.assertFalse(any(os.path.exists(n) for n in ring))
+        self.assertIsNone(tg._memfd)
+
+    @ddt.data('memfd', 'tmpfs')
+    def test_fork_server_tmpfile_backends(self, backend):
+        tg = LocalTarget(target_path=sys.executable, pre_args=self.harness,
+                         fork_server=True, tmpfile_backend=backend)
+        self.assertTrue(tg.start())
+        try:
+            entries, bstring, _ = self._send(tg, b'OK data')
+            self.assertEqual(entries['Application'][1], 0)
+            self.assertEqual(bstring, b'parsed 7 bytes\n')
+
+            entries, bstring, _ = self._send(tg, b'bad')
+            self.assertEqual(entries['Application'][1], -1)
+            self.assertEqual(bstring, b'parsed 3 bytes\n')
+        finally:
+            tg.stop()
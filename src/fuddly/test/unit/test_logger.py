@@ -0,0 +1,184 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from fuddly.test import mock
+
+from fuddly.framework import logger as logger_module
+from fuddly.framework.data import Data
+from fuddly.framework.knowledge.feedback_collector import FeedbackSource
+from fuddly.framework.logger import Logger
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.stdout = io.StringIO()
+        self.stdout_patch = mock.patch('sys.stdout', self.stdout)
+        self.stdout_patch.start()
+
+    def tearDown(self):
+        self.stdout_patch.stop()
+
+    def _start(self, **kwargs):
+        lg = Logger('test', **kwargs)
+        lg.start()
+        self.addCleanup(self._stop, lg)
+        lg.wait_for_sync()
+        self.stdout.seek(0)
+        self.stdout.truncate()
+        return lg
+
+    @staticmethod
+    def _stop(lg):
+        if not lg._log_handler_stop_event.is_set():
+            lg.stop()
+
+    @staticmethod
+    def _console_msg(i):
+        return 'msg {:d}\n\033[0m'.format(i)
+
+    def test_batched_output(self):
+        lg = self._start()
+        with mock.patch.object(self.stdout, 'flush') as flush:
+            # the log handler does not process anything until the lock is released
+            with lg._log_entry_submitted_cond:
+                for i in range(100):
+                    lg.print_console('msg {:d}'.format(i), nl_before=False, nl_after=True)
+                lg.write('end\n')
+            lg.wait_for_sync()
+            flush.assert_called_once()
+        self.assertEqual(self.stdout.getvalue(),
+                         ''.join(self._console_msg(i) for i in range(100)) + 'end\n')
+
+    def test_term_rate_limit(self):
+        lg = self._start()
+        lg.term_rate_limit = 10
+        for i in range(100):
+            lg.print_console('msg {:d}'.format(i), nl_before=False, nl_after=True)
+        lg.write('end\n')
+        lg.wait_for_sync()
+        self.assertEqual(self.stdout.getvalue(),
+                         ''.join(self._console_msg(i) for i in range(10)) + 'end\n')
+
+        lg.stop()
+        self.assertIn('90 message(s) not displayed', self.stdout.getvalue())
+
+    def test_log_from_log_handler(self):
+        lg = self._start(max_pending_entries=1)
+        write = self.stdout.write
+
+        def write_and_log(output):
+            if output.startswith('msg'):
+                # more entries than the bound allows are submitted by the log handler
+                for i in range(3):
+                    lg.print_console('nested {:d}'.format(i), nl_before=False, nl_after=True)
+            return write(output)
+
+        with mock.patch.object(self.stdout, 'write', write_and_log):
+            lg.print_console('msg 0', nl_before=False, nl_after=True)
+            lg.wait_for_sync()
+            lg.wait_for_sync()
+        self.assertEqual(self.stdout.getvalue(),
+                         self._console_msg(0)
+                         + ''.join('nested {:d}\n\033[0m'.format(i) for i in range(3)))
+
+    def test_file_logging(self):
+        folder = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(logger_module, 'logs_folder', folder):
+                lg = self._start(enable_file_logging=True, enable_term_display=False)
+                for i in range(10):
+                    lg.log_fn('line {:d}'.format(i))
+                lg.log_fn(Data(b'data'), verbose=True)
+                lg.log_fn('last line')
+                lg.stop()
+
+            log_file, = os.listdir(folder)
+            with open(os.path.join(folder, log_file)) as f:
+                content = f.read()
+        finally:
+            shutil.rmtree(folder)
+
+        lines = content.splitlines()
+        self.assertEqual(lines[:11], ['line {:d}'.format(i) for i in range(10)] + ["'data'"])
+        # the data is pretty printed (without newline) before the next line is written
+        self.assertEqual(lines[11:], ['datalast line'])
+        self.assertFalse(self.stdout.getvalue())
+
+    def test_headless_mode(self):
+        fmkdb = mock.Mock()
+        fmkdb.insert_data.return_value = 1
+        with mock.patch.object(Logger, 'fmkDB', fmkdb):
+            lg = self._start()
+            lg.set_headless_mode(True)
+            target = object()
+            source = FeedbackSource(object())
+
+            def send_test_case(status_code):
+                lg.start_new_log_entry()
+                lg.open_headless_case()
+                data = Data(b'test case')
+                lg.log_data(data, do_show=False)
+                lg.set_target_ack_date(FeedbackSource(target), date=None)
+                lg.commit_data_table_entry(1, 'prj', with_steps=False)
+                lg.defer_data_details()
+                lg.reset_current_state()
+                lg.log_target_feedback_from(source, b'status %d' % status_code, status_code,
+                                            datetime.datetime.now())
+                return data, lg.close_headless_case()
+
+            data, case = send_test_case(0)
+            self.assertFalse(case.is_anomalous())
+            self.assertEqual(case.records, [(data, [1])])
+            lg.wait_for_sync()
+            self.assertFalse(self.stdout.getvalue())
+            fmkdb.insert_data.assert_called_once()
+            fmkdb.insert_steps.assert_not_called()
+            # the feedback is always recorded
+            fmkdb.insert_feedback.assert_called_once()
+
+            data, case = send_test_case(-1)
+            self.assertTrue(case.is_anomalous())
+            lg.wait_for_sync()
+            self.assertFalse(self.stdout.getvalue())
+            lg.log_headless_case_feedback(case)
+            lg.wait_for_sync()
+            self.assertIn('status -1', self.stdout.getvalue())
+            self.assertEqual(fmkdb.insert_feedback.call_count, 2)
+
+            # out of a test case, only the anomalous feedback is displayed
+            self.stdout.seek(0)
+            self.stdout.truncate()
+            lg.log_target_feedback_from(source, b'residual 0', 0, datetime.datetime.now())
+            lg.log_target_feedback_from(source, b'residual -2', -2, datetime.datetime.now())
+            lg.wait_for_sync()
+            self.assertNotIn('residual 0', self.stdout.getvalue())
+            self.assertIn('residual -2', self.stdout.getvalue())
+            self.assertEqual(fmkdb.insert_feedback.call_count, 4)
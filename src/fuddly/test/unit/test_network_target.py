@@ -0,0 +1,299 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import socket
+import threading
+import time
+import unittest
+
+import ddt
+
+from fuddly.framework.data import Data
+from fuddly.framework.target_helpers import Target
+from fuddly.framework.targets.network import NetworkTarget
+
+
+def _free_port(sock_type=socket.SOCK_STREAM):
+    s = socket.socket(socket.AF_INET, sock_type)
+    s.bind(('localhost', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class EchoServer(threading.Thread):
+    """
+    TCP server that answers 'ack:<data>' to each message received, and that closes
+    the connection after `close_after` messages (if not None)
+    """
+
+    def __init__(self, close_after=None):
+        threading.Thread.__init__(self, daemon=True)
+        self.close_after = close_after
+        self.connections = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('localhost', 0))
+        self.sock.listen(5)
+        self.port = self.sock.getsockname()[1]
+
+    def run(self):
+        while True:
+            try:
+                csock, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(csock,), daemon=True).start()
+
+    def _serve(self, csock):
+        with csock:
+            nb_msg = 0
+            while self.close_after is None or nb_msg < self.close_after:
+                data = csock.recv(1024)
+                if not data:
+                    return
+                csock.sendall(b'ack:' + data)
+                nb_msg += 1
+
+    def stop(self):
+        self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+
+
+@ddt.ddt
+class NetworkTargetTest(unittest.TestCase):
+
+    def _wait_for_feedback(self, tg, timeout=5):
+        t0 = time.time()
+        while not tg.is_feedback_received():
+            self.assertLess(time.time() - t0, timeout)
+            time.sleep(0.001)
+        fbk = tg.get_feedback()
+        entries = {ref: (data, status) for ref, data, status, _ in fbk.iter_and_cleanup_collector()}
+        fbk.cleanup()
+        return entries
+
+    @ddt.data('thread', 'asyncio')
+    def test_client_mode(self, engine):
+        srv = EchoServer()
+        srv.start()
+        tg = NetworkTarget(host='localhost', port=srv.port, hold_connection=True,
+                           listen_on_start=False, fbk_mode=Target.FBK_WAIT_UNTIL_RECV,
+                           fbk_timeout=2, engine=engine)
+        self.assertTrue(tg.start())
+        try:
+            for i in range(20):
+                msg = 'msg{:d}'.format(i).encode()
+                tg.send_data(Data(msg), from_fmk=True)
+                entries = self._wait_for_feedback(tg)
+                fbk_id = tg._default_fbk_id[('localhost', srv.port)]
+                self.assertEqual(entries[fbk_id], ([b'ack:' + msg], 0))
+                self.assertIsNotNone(tg.get_last_target_ack_date())
+        finally:
+            tg.stop()
+            srv.stop()
+
+    @ddt.data('thread', 'asyncio')
+    def test_server_mode(self, engine):
+        port = _free_port()
+        tg = NetworkTarget(host='localhost', port=port, server_mode=True, hold_connection=True,
+                           listen_on_start=False, fbk_mode=Target.FBK_WAIT_UNTIL_RECV,
+                           fbk_timeout=2, sending_delay=2, engine=engine)
+        self.assertTrue(tg.start())
+        client = None
+        try:
+            def connect():
+                time.sleep(0.2)
+                nonlocal client
+                client = socket.create_connection(('localhost', port))
+
+            connecting = threading.Thread(target=connect, daemon=True)
+            connecting.start()
+            for i in range(5):
+                msg = 'msg{:d}'.format(i).encode()
+                tg.send_data(Data(msg), from_fmk=True)
+                connecting.join()
+                self.assertEqual(client.recv(1024), msg)
+                client.sendall(b'ack:' + msg)
+                entries = self._wait_for_feedback(tg)
+                fbk_id = tg._default_fbk_id[('localhost', port)]
+                self.assertEqual(entries[fbk_id], ([b'ack:' + msg], 0))
+                if i == 0:
+                    self.assertIn(NetworkTarget.General_Info_ID, entries)
+        finally:
+            tg.stop()
+            if client is not None:
+                client.close()
+
+    @ddt.data('thread', 'asyncio')
+    def test_udp_server_mode(self, engine):
+        port = _free_port(socket.SOCK_DGRAM)
+        tg = NetworkTarget(host='localhost', port=port, socket_type=(socket.AF_INET, socket.SOCK_DGRAM),
+                           server_mode=True, hold_connection=True, listen_on_start=False,
+                           fbk_mode=Target.FBK_WAIT_UNTIL_RECV, fbk_timeout=2, sending_delay=2,
+                           engine=engine)
+        self.assertTrue(tg.start())
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        client.settimeout(2)
+        try:
+            def hello():
+                time.sleep(0.2)
+                client.sendto(b'hello', ('localhost', port))
+
+            threading.Thread(target=hello, daemon=True).start()
+            tg.send_data(Data(b'first'), from_fmk=True)
+            self.assertEqual(client.recv(1024), b'first')
+            client.sendto(b'ack:first', ('localhost', port))
+            entries = self._wait_for_feedback(tg)
+            fbk_id = tg._default_fbk_id[('localhost', port)]
+            # the data that revealed the client are part of the feedback
+            self.assertEqual(entries[fbk_id][0], [b'hello\nack:first'])
+
+            tg.send_data(Data(b'second'), from_fmk=True)
+            self.assertEqual(client.recv(1024), b'second')
+            client.sendto(b'ack:second', ('localhost', port))
+            entries = self._wait_for_feedback(tg)
+            self.assertEqual(entries[fbk_id][0], [b'ack:second'])
+        finally:
+            tg.stop()
+            client.close()
+
+    def test_asyncio_engine_does_not_spawn_threads(self):
+        srv = EchoServer()
+        srv.start()
+        tg = NetworkTarget(host='localhost', port=srv.port, hold_connection=True,
+                           listen_on_start=False, fbk_mode=Target.FBK_WAIT_UNTIL_RECV,
+                           engine='asyncio')
+        self.assertTrue(tg.start())
+        try:
+            tg.send_data(Data(b'warm-up'), from_fmk=True)
+            self._wait_for_feedback(tg)
+            threads = set(threading.enumerate())
+            for _ in range(10):
+                tg.send_data(Data(b'test'), from_fmk=True)
+                self._wait_for_feedback(tg)
+            # only the echo server threads may have been created
+            new_threads = set(threading.enumerate()) - threads
+            self.assertFalse([t for t in new_threads if not t.name.startswith('Thread-')])
+        finally:
+            tg.stop()
+            srv.stop()
+        self.assertIsNone(tg._loop)
+
+    def test_asyncio_engine_serves_clients_off_the_loop(self):
+        port = _free_port()
+        tg = NetworkTarget(host='localhost', port=port, server_mode=True, hold_connection=True,
+                           listen_on_start=False, fbk_mode=Target.FBK_WAIT_UNTIL_RECV,
+                           fbk_timeout=2, sending_delay=2, engine='asyncio')
+        serving_threads = []
+        handle_target_connection = tg._handle_target_connection
+
+        def handler(*args, **kwargs):
+            serving_threads.append(threading.current_thread().name)
+            return handle_target_connection(*args, **kwargs)
+
+        tg._handle_target_connection = handler
+        self.assertTrue(tg.start())
+        client = None
+        try:
+            def connect():
+                time.sleep(0.2)
+                nonlocal client
+                client = socket.create_connection(('localhost', port))
+
+            connecting = threading.Thread(target=connect, daemon=True)
+            connecting.start()
+            tg.send_data(Data(b'test'), from_fmk=True)
+            connecting.join()
+            self.assertEqual(client.recv(1024), b'test')
+            client.sendall(b'ack')
+            self._wait_for_feedback(tg)
+            self.assertTrue(serving_threads)
+            self.assertFalse([name for name in serving_threads if name == 'NET-LOOP'])
+        finally:
+            tg.stop()
+            if client is not None:
+                client.close()
+        self.assertIsNone(tg._srv_executor)
+
+    def test_invalid_engine(self):
+        with self.assertRaises(ValueError):
+            NetworkTarget(engine='unknown')
+
+    @ddt.data('thread', 'asyncio')
+    def test_connection_pool(self, engine):
+        srv = EchoServer(close_after=4)
+        srv.start()
+        tg = NetworkTarget(host='localhost', port=srv.port, listen_on_start=False,
+                           fbk_mode=Target.FBK_WAIT_UNTIL_RECV, engine=engine,
+                           connection_pool=True)
+        self.assertTrue(tg.start())
+        pool_fbk_id = 'Connection Pool - localhost:{:d}'.format(srv.port)
+        reports = {}
+        try:
+            for i in range(10):
+                msg = 'msg{:d}'.format(i).encode()
+                tg.send_data(Data(msg), from_fmk=True)
+                entries = self._wait_for_feedback(tg)
+                fbk_id = tg._default_fbk_id[('localhost', srv.port)]
+                self.assertEqual(entries[fbk_id], ([b'ack:' + msg], 0))
+                if pool_fbk_id in entries:
+                    reports[i] = entries[pool_fbk_id][0][-1]
+                # let the server close the connection after its 4th answer
+                time.sleep(0.05)
+        finally:
+            tg.stop()
+            srv.stop()
+
+        # a connection is closed by the server every 4 messages, and then discarded;
+        # the statistics are only reported when the pool changes
+        self.assertEqual(srv.connections, 3)
+        self.assertEqual(reports,
+                         {0: 'new: 1, reused: 0, reconnected: 0, discarded: 0, idle: 0',
+                          4: 'new: 2, reused: 3, reconnected: 0, discarded: 1, idle: 0',
+                          8: 'new: 3, reused: 6, reconnected: 0, discarded: 2, idle: 0'})
+
+    def test_connection_pool_stats_interval(self):
+        srv = EchoServer()
+        srv.start()
+        tg = NetworkTarget(host='localhost', port=srv.port, listen_on_start=False,
+                           fbk_mode=Target.FBK_WAIT_UNTIL_RECV, connection_pool=True)
+        tg.CONNECTION_POOL_STATS_INTERVAL = 3
+        self.assertTrue(tg.start())
+        pool_fbk_id = 'Connection Pool - localhost:{:d}'.format(srv.port)
+        reported = []
+        try:
+            for i in range(8):
+                tg.send_data(Data(b'test'), from_fmk=True)
+                if pool_fbk_id in self._wait_for_feedback(tg):
+                    reported.append(i)
+        finally:
+            tg.stop()
+            srv.stop()
+
+        self.assertEqual(reported, [0, 3, 6])
+
+    def test_connection_pool_not_supported(self):
+        with self.assertRaises(ValueError):
+            NetworkTarget(server_mode=True, connection_pool=True)
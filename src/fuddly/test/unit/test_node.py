@@ -81,3 +81,170 @@ class TestBitFieldCondition(unittest.TestCase):
     @ddt.unpack
     def test_invalid_with_both_arguments(self, sf, val, neg_val):
         self.assertRaises(Exception, BitFieldCondition, sf=sf, val=val, neg_val=neg_val)
+
+
+class TestNodeCopy(unittest.TestCase):
+
+    def _assert_shallow_copy(self, ni, new_ni):
+        self.assertIs(type(new_ni), type(ni))
+        self.assertIsNot(new_ni, ni)
+        for desc in type(ni)._get_slot_descriptors():
+            if desc.__name__ == '_graph_versions':
+                # the copy does not belong to the graphs of the original
+                self.assertIsNone(desc.__get__(new_ni))
+            elif hasattr(ni, desc.__name__):
+                self.assertIs(desc.__get__(new_ni), desc.__get__(ni), desc.__name__)
+            else:
+                self.assertFalse(hasattr(new_ni, desc.__name__), desc.__name__)
+
+    def test_node_internals_copy(self):
+        nodes = [
+            Node('typed', vt=fvt.UINT16_be(values=[1, 2])),
+            Node('nonterm', subnodes=[Node('sub', values=['A', 'B'])]),
+        ]
+        for n in nodes:
+            ni = n.cc
+            ni.absorb_helper = lambda blob, constraints, node_internals: None
+            new_ni = copy.copy(ni)
+            self._assert_shallow_copy(ni, new_ni)
+
+            # the copy can be modified without affecting the original
+            new_ni.absorb_helper = None
+            new_ni.set_attr(NodeInternals.Highlight)
+            self.assertIsNotNone(ni.absorb_helper)
+            self.assertFalse(ni.is_attr_set(NodeInternals.Highlight))
+            self.assertTrue(new_ni.is_attr_set(NodeInternals.Highlight))
+
+        # unset slots are kept unset
+        ni = NodeInternals_Empty()
+        del ni.absorb_helper
+        new_ni = copy.copy(ni)
+        self.assertFalse(hasattr(new_ni, 'absorb_helper'))
+        self._assert_shallow_copy(ni, new_ni)
+
+    def test_node_copy(self):
+        node = Node('n', vt=fvt.String(values=['abc']))
+        node.set_semantics(['sem'])
+        new_node = copy.copy(node)
+        self.assertIs(type(new_node), Node)
+        self.assertEqual(new_node.name, 'n')
+        self.assertIs(new_node.internals, node.internals)
+        self.assertIsNot(new_node.semantics, node.semantics)
+        self.assertEqual(str(new_node.semantics), str(node.semantics))
+
+    def test_node_user_attributes(self):
+        node = Node('n', values=['abc'])
+        self.assertIsNone(node.__getstate__()[0])
+        # nodes can still be tagged by user code
+        node.user_tag = 'tag'
+        new_node = copy.copy(node)
+        self.assertEqual(new_node.user_tag, 'tag')
+        new_node.user_tag = 'other'
+        self.assertEqual(node.user_tag, 'tag')
+
+
+class TestAbsorption(unittest.TestCase):
+
+    def test_chunks(self):
+        chunk = Node('chunk', subnodes=[
+            Node('len', vt=fvt.UINT8()),
+            Node('tag', vt=fvt.String(values=['AB', 'CD'])),
+            Node('data', vt=fvt.String(size=3)),
+        ])
+        top = Node('top')
+        top.set_subnodes_with_csts([
+            1, ['u>', [chunk, 1, -1], [Node('end', vt=fvt.String(values=['END'])), 1]]
+        ])
+        top.set_env(Env())
+        data = b'\x03ABxyz\x01CDqrsEND'
+        status, off, size, _ = top.absorb(data, constraints=AbsNoCsts(size=True, struct=True))
+        self.assertEqual((status, off, size), (AbsorbStatus.FullyAbsorbed, 0, len(data)))
+        self.assertEqual(top.to_bytes(), data)
+        self.assertEqual([n.to_bytes() for n in top['top/chunk.*/data$']], [b'xyz', b'qrs'])
+        self.assertEqual(top['top/chunk:2/tag$'][0].to_bytes(), b'CD')
+        self.assertEqual(top['top/chunk:2/len$'][0].get_raw_value(), 1)
+
+    def test_postponed_node(self):
+        pad = Node('pad', vt=fvt.String(min_sz=0, max_sz=20))
+        pad.set_attr(NodeInternals.Abs_Postpone)
+        top = Node('top')
+        top.set_subnodes_with_csts([
+            1, ['u>', [pad, 1], [Node('end', vt=fvt.String(values=['END'])), 1]]
+        ])
+        top.set_env(Env())
+        # the node following the postponed one is looked for within the whole remaining data
+        status, off, size, _ = top.absorb(b'garbageEND', constraints=AbsFullCsts())
+        self.assertEqual((status, off, size), (AbsorbStatus.FullyAbsorbed, 0, 10))
+        self.assertEqual(top['top/pad$'][0].to_bytes(), b'garbage')
+        self.assertEqual(top['top/end$'][0].to_bytes(), b'END')
+
+
+class TestReachableNodesCache(unittest.TestCase):
+
+    def setUp(self):
+        self.node = Node('top', subnodes=[
+            Node('int', vt=fvt.UINT8(values=[1, 2])),
+            Node('str', vt=fvt.String(values=['abc'])),
+            Node('sub', subnodes=[Node('sub_int', vt=fvt.UINT16_be(values=[3]))]),
+        ])
+        self.crit = NodeInternalsCriteria(mandatory_attrs=[NodeInternals.Mutable],
+                                          node_kinds=[NodeInternals_TypedValue])
+
+    def _get(self, name):
+        return self.node[name][0]
+
+    def _names(self, **kwargs):
+        return [n.name for n in self.node.get_reachable_nodes(**kwargs)]
+
+    def test_cache_hit(self):
+        names = self._names(internals_criteria=self.crit)
+        self.assertEqual(names, ['int', 'str', 'sub_int'])
+        with mock.patch.object(NodeInternals, 'match') as match:
+            nodes = self.node.get_reachable_nodes(internals_criteria=self.crit)
+            match.assert_not_called()
+        self.assertEqual([n.name for n in nodes], names)
+
+        # the returned list can be modified by the caller
+        nodes.pop()
+        self.assertEqual(self._names(internals_criteria=self.crit), names)
+
+    def test_cache_invalidation(self):
+        self._names(internals_criteria=self.crit)
+        self._get('int').clear_attr(NodeInternals.Mutable)
+        self.assertEqual(self._names(internals_criteria=self.crit), ['str', 'sub_int'])
+
+        sem_crit = NodeSemanticsCriteria(mandatory_criteria=['sem'])
+        self.assertEqual(self._names(semantics_criteria=sem_crit), [])
+        self._get('str').set_semantics(['sem'])
+        self.assertEqual(self._names(semantics_criteria=sem_crit), ['str'])
+
+        self._get('sub').set_subnodes_basic([Node('new_int', vt=fvt.UINT8(values=[4]))])
+        self.assertEqual(self._names(internals_criteria=self.crit), ['new_int', 'str'])
+
+    def test_graph_local_invalidation(self):
+        names = self._names(internals_criteria=self.crit)
+        # changes within other graphs, including the copies of this one
+        other = Node('other', subnodes=[Node('o_int', vt=fvt.UINT8(values=[5]))])
+        other.get_reachable_nodes(internals_criteria=self.crit)
+        other['other/o_int$'][0].clear_attr(NodeInternals.Mutable)
+        clone = self.node.get_clone()
+        clone['top/sub$'][0].set_subnodes_basic([Node('new_int', vt=fvt.UINT8(values=[4]))])
+        clone['top/str$'][0].clear_attr(NodeInternals.Mutable)
+        with mock.patch.object(NodeInternals, 'match') as match:
+            nodes = self.node.get_reachable_nodes(internals_criteria=self.crit)
+            match.assert_not_called()
+        self.assertEqual([n.name for n in nodes], names)
+
+        # a node shared with another graph invalidates both of them
+        other.add(self._get('sub'))
+        self.assertEqual([n.name for n in other.get_reachable_nodes(internals_criteria=self.crit)],
+                         ['sub_int'])
+        self._get('sub_int').clear_attr(NodeInternals.Mutable)
+        self.assertEqual(self._names(internals_criteria=self.crit), ['int', 'str'])
+        self.assertEqual(other.get_reachable_nodes(internals_criteria=self.crit), [])
+
+    def test_unversioned_criteria(self):
+        crit = NodeInternalsCriteria(node_kinds=[NodeInternals_TypedValue],
+                                     node_subkinds=[fvt.UINT8])
+        self.assertEqual(self._names(internals_criteria=crit), ['int'])
+        self.assertIsNone(self.node._reachable_nodes_cache)
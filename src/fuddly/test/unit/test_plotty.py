@@ -2,7 +2,14 @@
 import fuddly.tools.plotty.Formula as Formula
 import fuddly.tools.plotty.cli.parse.formula as parse_formula
 import fuddly.tools.plotty.cli.parse.range as parse_range
-
+from fuddly.tools.plotty.PlottyDatabase import PlottyDatabase
+from fuddly.framework.database import Database
+from fuddly.test import mock
+
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 import ddt
 
@@ -128,6 +135,80 @@ class PlottyTest(unittest.TestCase):
 
         self.assertSetEqual(set(result), expected_set)
 
+#endregion
+
+#region Database
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.fmkdb_path = os.path.join(cls.tmp_dir, 'fmkdb.db')
+        db = Database(fmkdb_path=cls.fmkdb_path)
+        db.start()
+        db.insert_data_model('dm')
+        for i in range(1, 301):
+            db.submit_sql_stmt(
+                "INSERT INTO DATA(ID, TYPE, DM_NAME, SIZE) VALUES(?, 'T', 'dm', ?);",
+                params=(i, 10 * i))
+        db.submit_sql_stmt(
+            "INSERT INTO ASYNC_DATA(CURRENT_DATA_ID, DM_NAME, SIZE) VALUES(NULL, 'dm', 1);")
+        for i in (250, 20, 20):
+            db.submit_sql_stmt(
+                "INSERT INTO ASYNC_DATA(CURRENT_DATA_ID, DM_NAME, SIZE) VALUES(?, 'dm', ?);",
+                params=(i, i + 1))
+        db.stop()
+
+    @classmethod
+    def tearDownClass(cls):
+        PlottyDatabase.close_all()
+        shutil.rmtree(cls.tmp_dir)
+
+
+    @ddt.data(
+        {'range_union': "1..4"},
+        {'range_union': "0..500|7"},
+        {'range_union': "5..10, 0..120|3, 100..120, 290..400"},
+        {'range_union': "400..500"},
+    )
+    @ddt.unpack
+    def test_should_request_data_within_ranges(self, range_union):
+        data_ids = parse_range.parse_int_range_union(range_union)
+        database = PlottyDatabase(self.fmkdb_path)
+
+        result = database.request('DATA', data_ids, 'ID', ['SIZE', 'ID'])
+
+        expected = [(10 * i, i) for i in range(1, 301) if any(i in r for r in data_ids)]
+        self.assertListEqual(result, expected)
+
+
+    def test_should_request_async_data_in_table_order(self):
+        database = PlottyDatabase(self.fmkdb_path)
+
+        result = database.request('ASYNC_DATA', [range(0, 300)], 'CURRENT_DATA_ID',
+                                  ['CURRENT_DATA_ID', 'SIZE'])
+
+        self.assertListEqual(result, [(250, 251), (20, 21), (20, 21)])
+        self.assertIsNone(database.request('DATA', [range(0, 10)], 'ID', ['UNKNOWN']))
+
+
+    def test_should_keep_database_open_between_requests(self):
+        database = PlottyDatabase(self.fmkdb_path)
+
+        with mock.patch.object(Database, 'start', autospec=True, side_effect=Database.start) as start:
+            database.close()
+            for _ in range(3):
+                self.assertListEqual(database.request('DATA', [range(1, 3)], 'ID', ['ID']),
+                                     [(1,), (2,)])
+            self.assertTrue(database.has_columns('DATA', ['ID', 'SIZE']))
+            self.assertEqual(start.call_count, 1)
+
+            db_handlers = [t for t in threading.enumerate() if t.name == 'db_handler']
+            database.close()
+            self.assertEqual(len([t for t in threading.enumerate() if t.name == 'db_handler']),
+                             len(db_handlers) - 1)
+            self.assertListEqual(database.request('DATA', [range(1, 2)], 'ID', ['ID']), [(1,)])
+            self.assertEqual(start.call_count, 2)
+
 #endregion
 
 
@@ -0,0 +1,124 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from fuddly.test import mock
+
+from fuddly.framework import plumbing
+from fuddly.framework.plumbing import ModuleIndex, LazyRegistry, HeadlessStats
+
+
+class TestModuleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.package_folder = os.path.join(self.folder, 'index_test_pkg')
+        os.mkdir(self.package_folder)
+        for name in ('__init__.py', 'dm.py', 'strategy.py'):
+            self._write(name, '# {:s}\n'.format(name))
+        sys.path.insert(0, self.folder)
+
+    def tearDown(self):
+        sys.path.remove(self.folder)
+        shutil.rmtree(self.folder)
+
+    def _write(self, name, content):
+        with open(os.path.join(self.package_folder, name), 'w') as f:
+            f.write(content)
+
+    def test_lookup(self):
+        index_path = os.path.join(self.folder, 'module_index')
+        stamp = ModuleIndex.get_stamp('index_test_pkg')
+        self.assertEqual([os.path.basename(s[0]) for s in stamp],
+                         ['__init__.py', 'dm.py', 'strategy.py'])
+        self.assertNotIn('index_test_pkg', sys.modules)
+
+        index = ModuleIndex(index_path)
+        self.assertIsNone(index.lookup('data_models:index_test_pkg', stamp))
+        index.record('data_models:index_test_pkg', stamp, 'test_dm')
+        index.save()
+
+        index = ModuleIndex(index_path)
+        self.assertEqual(index.lookup('data_models:index_test_pkg', stamp), 'test_dm')
+
+        # the entry is not valid anymore once the data model is modified
+        self._write('dm.py', '# modified data model\n')
+        new_stamp = ModuleIndex.get_stamp('index_test_pkg')
+        self.assertNotEqual(new_stamp, stamp)
+        self.assertIsNone(index.lookup('data_models:index_test_pkg', new_stamp))
+
+    def test_unknown_module(self):
+        self.assertIsNone(ModuleIndex.get_stamp('index_test_pkg.unknown'))
+        self.assertIsNone(ModuleIndex.get_stamp('unknown_index_test_pkg.unknown'))
+
+
+class TestLazyRegistry(unittest.TestCase):
+
+    def test_import_on_access(self):
+        pending = {'pending_dm': object()}
+        imported = []
+
+        def importer(name):
+            obj = pending.pop(name, None)
+            if obj is not None:
+                imported.append(name)
+                registry[name] = obj
+            return obj
+
+        registry = LazyRegistry(importer)
+        registry['dm'] = 'dm'
+        self.assertNotIn('pending_dm', registry)
+        self.assertIsNone(registry.get('unknown'))
+        self.assertRaises(KeyError, registry.__getitem__, 'unknown')
+
+        obj = pending['pending_dm']
+        self.assertIs(registry.get('pending_dm'), obj)
+        self.assertIs(registry['pending_dm'], obj)
+        self.assertEqual(imported, ['pending_dm'])
+
+
+class TestHeadlessStats(unittest.TestCase):
+
+    def test_periodic_stats(self):
+        now = [100.0]
+        with mock.patch.object(plumbing.time, 'monotonic', lambda: now[0]):
+            stats = HeadlessStats(period=10)
+            for i in range(49):
+                now[0] += 0.1
+                self.assertFalse(stats.add_case())
+            now[0] += 5.2
+            self.assertTrue(stats.add_case(anomalous=True))
+            self.assertEqual(stats.get_summary(),
+                             'Headless mode: 50 test cases sent (5.0/s over the last 10s), 1 anomalous')
+
+            # a new period starts
+            now[0] += 5
+            self.assertFalse(stats.add_case())
+            self.assertEqual((stats.cases, stats.anomalies), (51, 1))
+            self.assertEqual(stats.get_summary(final=True),
+                             'Headless mode: 51 test cases sent (3.4/s), 1 anomalous')
@@ -0,0 +1,132 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import contextlib
+import time
+import unittest
+
+from fuddly.framework.profiler import ExecutionProfiler, StageStats
+
+
+def busy_function(duration):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+class TestStageStats(unittest.TestCase):
+
+    def test_percentiles(self):
+        stats = StageStats()
+        self.assertIsNone(stats.mean)
+        self.assertIsNone(stats.percentile(50))
+        for d in range(1, 101):
+            stats.add(float(d))
+        self.assertEqual(stats.count, 100)
+        self.assertEqual(stats.mean, 50.5)
+        self.assertEqual((stats.min, stats.max), (1.0, 100.0))
+        self.assertEqual(stats.percentile(50), 50.0)
+        self.assertEqual(stats.percentile(99), 99.0)
+        self.assertEqual(stats.percentile(100), 100.0)
+
+    def test_max_samples(self):
+        stats = StageStats(max_samples=10)
+        for d in range(100):
+            stats.add(float(d))
+        self.assertEqual(stats.count, 100)
+        self.assertEqual(stats.min, 0.0)
+        # the percentiles only take into account the last samples
+        self.assertEqual(stats.percentile(1), 90.0)
+
+
+class TestExecutionProfiler(unittest.TestCase):
+
+    def test_disabled(self):
+        perf = ExecutionProfiler()
+        self.assertIsInstance(perf.measure('stage'), contextlib.nullcontext)
+        with perf.measure('stage'):
+            pass
+        self.assertEqual(list(perf.iter_stats()), [])
+        self.assertEqual(perf.elapsed, 0.0)
+
+    def test_measure_per_key(self):
+        perf = ExecutionProfiler()
+        perf.enable()
+        for key in ('gen_a', 'gen_b', 'gen_a'):
+            with perf.measure('generator', key=key):
+                busy_function(0.001)
+        with perf.measure('logging'):
+            pass
+        perf.disable()
+
+        stats = dict(((stage, key), st) for stage, key, st in perf.iter_stats())
+        self.assertEqual(list(stats), [('generator', None), ('generator', 'gen_a'),
+                                       ('generator', 'gen_b'), ('logging', None)])
+        self.assertEqual(stats[('generator', None)].count, 3)
+        self.assertEqual(stats[('generator', 'gen_a')].count, 2)
+        self.assertGreaterEqual(stats[('generator', None)].total, 0.003)
+        self.assertGreaterEqual(perf.elapsed, 0.003)
+
+        desc = perf.to_dict()
+        self.assertEqual(desc['stages']['generator']['stats']['count'], 3)
+        self.assertEqual(list(desc['stages']['generator']['keys']), ['gen_a', 'gen_b'])
+
+        perf.reset()
+        self.assertEqual(list(perf.iter_stats()), [])
+        self.assertEqual(perf.elapsed, 0.0)
+
+    def test_cprofile(self):
+        perf = ExecutionProfiler()
+        self.assertRaises(ValueError, perf.enable, profiled_stage='disruptor',
+                          profiling_mode='unknown')
+        perf.enable(profiled_stage='disruptor', profiling_mode='cprofile')
+        self.assertEqual(perf.get_profiling_stats(), [])
+        with perf.measure('disruptor'):
+            # nested measures of the profiled stage
+            with perf.measure('disruptor'):
+                busy_function(0.002)
+        with perf.measure('generator'):
+            busy_function(0.002)
+        perf.disable()
+
+        functions = [f['function'] for f in perf.get_profiling_stats(limit=100)]
+        self.assertTrue(any(f.endswith('(busy_function)') for f in functions))
+        ncalls = [f['ncalls'] for f in perf.get_profiling_stats(limit=100)
+                  if f['function'].endswith('(busy_function)')]
+        self.assertEqual(ncalls, [1])
+
+    def test_sampling(self):
+        perf = ExecutionProfiler()
+        perf.enable(profiled_stage='disruptor', profiling_mode='sampling',
+                    sampling_interval=0.001)
+        with perf.measure('disruptor'):
+            busy_function(0.2)
+        perf.disable()
+
+        # the whole stack of the test runner is sampled as well
+        functions = perf.get_profiling_stats(limit=1000)
+        self.assertTrue(functions)
+        busy = [f for f in functions if f['function'].endswith('(busy_function)')]
+        self.assertEqual(len(busy), 1)
+        self.assertGreater(busy[0]['self_samples'], 0)
+        self.assertEqual(perf.to_dict()['profiling_mode'], 'sampling')
@@ -0,0 +1,140 @@
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+import unittest
+import time
+
+from fuddly.framework.value_types import FuzzCasesTable, String, BitField, UINT8, UINT16_be, \
+    UINT64_be, INT_str, GZIP, fuzz_cases_table, _find_value_gaps
+from fuddly.framework.global_resources import AbsCsts, AbsFullCsts, AbsNoCsts
+
+
+class TestFuzzCasesTable(unittest.TestCase):
+
+    def setUp(self):
+        fuzz_cases_table.clear()
+
+    def test_lru_eviction(self):
+        table = FuzzCasesTable(maxsize=2)
+        table.get('a', lambda: (1,))
+        table.get('b', lambda: (2,))
+        self.assertEqual(table.get('a', lambda: None), (1,))
+        table.get('c', lambda: (3,))
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.get('b', lambda: 'recomputed'), 'recomputed')
+        self.assertEqual(table.get('c', lambda: None), (3,))
+        self.assertEqual(table.hits, 2)
+
+    def test_unhashable_key(self):
+        table = FuzzCasesTable()
+        self.assertEqual(table.get(([1],), lambda: (1,)), (1,))
+        self.assertEqual(len(table), 0)
+
+    def test_value_gaps(self):
+        self.assertEqual(_find_value_gaps([1, 2, 3, 4000]), (4, 3999))
+        self.assertEqual(_find_value_gaps([5, 1, 3]), (2, 4))
+        self.assertIsNone(_find_value_gaps([3, 1, 2]))
+
+    def test_int_cases_shared(self):
+        vt1 = UINT16_be(values=[1, 2, 3, 4000])
+        vt2 = UINT16_be(values=[1, 2, 3, 4000])
+        vt1.get_value()
+        vt2.get_value()
+        fvt1 = vt1.get_fuzzed_vt_list()[0]
+        fvt2 = vt2.get_fuzzed_vt_list()[0]
+        self.assertEqual(fvt1.values, [2, 0, 4, 3999, 4001, 65535, 32768, 32767])
+        self.assertEqual(fvt1.values, fvt2.values)
+        self.assertEqual(fuzz_cases_table.misses, 1)
+        self.assertEqual(fuzz_cases_table.hits, 1)
+
+    def test_int_specific_fuzzy_values_untouched(self):
+        vt = UINT8(values=[1, 2, 3])
+        vt.add_specific_fuzzy_vals([100])
+        vt.get_value()
+        vt.get_fuzzed_vt_list()
+        vt.get_fuzzed_vt_list()
+        self.assertEqual(vt.get_specific_fuzzy_vals(), [100])
+
+    def test_int_large_value_range(self):
+        vt = UINT64_be(values=[0, 10, 2**62])
+        vt.get_value()
+        start = time.time()
+        fvt = vt.get_fuzzed_vt_list()[0]
+        self.assertLess(time.time() - start, 1)
+        self.assertIn(1, fvt.values)
+        self.assertIn(2**62 - 1, fvt.values)
+
+    def test_string_cases_shared(self):
+        vt1 = String(values=['abcdef'], max_sz=20)
+        vt2 = String(values=['abcdef'], max_sz=20)
+        for vt in (vt1, vt2):
+            vt.get_value()
+            vt.enable_fuzz_mode()
+        # the first test case results from random bit corruption
+        self.assertEqual(vt1.values[1:], vt2.values[1:])
+        self.assertIn(b'abcdef' + b'A'*15, vt1.values)
+        self.assertEqual(fuzz_cases_table.misses, 1)
+        self.assertEqual(fuzz_cases_table.hits, 1)
+
+    def test_string_alphabet(self):
+        vt = String(values=['123'], alphabet='0123456789')
+        vt.get_value()
+        vt.enable_fuzz_mode()
+        unsupported = [v for v in vt.values if len(v) == 3 and v[:2] == b'12'
+                       and v[2:] not in b'0123456789']
+        self.assertTrue(unsupported)
+
+    def test_bitfield_cases_shared(self):
+        def make_bitfield():
+            return BitField(subfield_sizes=[4, 4, 8], subfield_values=[[1, 2, 3], None, [0, 200]],
+                            subfield_val_extremums=[None, [2, 9], None])
+        bf1 = make_bitfield()
+        bf2 = make_bitfield()
+        for bf in (bf1, bf2):
+            bf.get_value()
+            bf.enable_fuzz_mode()
+        self.assertEqual(bf1.subfield_vals, [[1, 15, 0, 2, 4], [2, 10, 1, 15, 0, 3],
+                                             [0, 255, 1, 199, 201]])
+        self.assertEqual(bf1.subfield_vals, bf2.subfield_vals)
+        self.assertEqual(fuzz_cases_table.misses, 3)
+        self.assertEqual(fuzz_cases_table.hits, 3)
+
+
+class TestAbsorbSpan(unittest.TestCase):
+
+    def test_fixed_size(self):
+        self.assertEqual(UINT16_be(values=[1]).absorb_span(AbsFullCsts()), 2)
+        self.assertEqual(BitField(subfield_sizes=[4, 4, 8]).absorb_span(AbsFullCsts()), 2)
+        # the size of the integer string is only known once matched
+        self.assertIsNone(INT_str(values=[12]).absorb_span(AbsFullCsts()))
+
+    def test_string(self):
+        self.assertEqual(String(values=['abc', 'de']).absorb_span(AbsFullCsts()), 3)
+        self.assertEqual(String(size=4).absorb_span(AbsFullCsts()), 4)
+        self.assertEqual(String(values=['ab']).absorb_span(AbsCsts(content=False, regexp=False)), 2)
+        # without the size constraint, the whole blob is read
+        self.assertIsNone(String(min_sz=1, max_sz=5).absorb_span(AbsNoCsts()))
+        # only single-byte codecs can be matched on a part of the blob
+        self.assertIsNone(String(max_sz=3, codec='utf-16-le').absorb_span(AbsFullCsts()))
+        # encoded strings need the whole blob to be decoded
+        self.assertIsNone(GZIP(values=['abc']).absorb_span(AbsFullCsts()))
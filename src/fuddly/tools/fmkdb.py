@@ -110,6 +110,12 @@ group.add_argument('--export-data', nargs=2, metavar=('FIRST_DATA_ID','LAST_DATA
                    help='Extract data from provided data ID range')
 group.add_argument('-e', '--export-one-data', type=int, metavar='DATA_ID',
                    help='Extract data from the provided data ID')
+group.add_argument('--export-archive', metavar='PATH',
+                   help='Extract data within the provided archive (.zip, .tar, .tar.gz, .tgz, '
+                        '.tar.bz2, .tar.xz) along with a JSON manifest, instead of the '
+                        'exported_data folder')
+group.add_argument('--export-writers', type=int, metavar='NB', default=1,
+                   help='Number of threads writing the extracted data files')
 group.add_argument('--remove-data', nargs=2, metavar=('FIRST_DATA_ID','LAST_DATA_ID'), type=int,
                    help='Remove data from provided data ID range and all related information from fmkDB')
 group.add_argument('-r', '--remove-one-data', type=int, metavar='DATA_ID',
@@ -201,6 +207,8 @@ def main():
 
     export_data = args.export_data
     export_one_data = args.export_one_data
+    export_archive = args.export_archive
+    export_writers = args.export_writers
     remove_data = args.remove_data
     remove_one_data = args.remove_one_data
 
@@ -230,7 +238,10 @@ def main():
         dm_list = None
         decoding_hints = None
 
-    fmkdb = Database(fmkdb_path=fmkdb)
+    # only the actions modifying the fmkDB open it for writing
+    read_only = add_analysis is None and disprove_impact is None \
+        and remove_data is None and remove_one_data is None
+    fmkdb = Database(fmkdb_path=fmkdb, read_only=read_only)
     ok = fmkdb.start()
     if not ok:
         print(colorize("*** ERROR: The database {:s} is invalid! ***".format(fmkdb.fmk_db_path),
@@ -312,9 +323,17 @@ def main():
     elif export_data is not None or export_one_data is not None:
 
         if export_data is not None:
-            fmkdb.export_data(first=export_data[0], last=export_data[1], colorized=colorized)
+            first, last = export_data
         else:
-            fmkdb.export_data(first=export_one_data, colorized=colorized)
+            first, last = export_one_data, None
+
+        try:
+            fmkdb.export_data(first=first, last=last, colorized=colorized,
+                              archive=export_archive, nb_writers=export_writers)
+        except ValueError as e:
+            print(colorize("*** ERROR: {!s} ***".format(e), rgb=Color.ERROR))
+            fmkdb.stop()
+            sys.exit(-1)
 
     elif remove_data is not None or remove_one_data is not None:
         handle_confirmation()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+################################################################################
+#
+#  Copyright 2014-2016 Eric Lacombe <eric.lacombe@security-labs.org>
+#
+################################################################################
+#
+#  This file is part of fuddly.
+#
+#  fuddly is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  fuddly is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with fuddly. If not, see <http://www.gnu.org/licenses/>
+#
+################################################################################
+
+"""
+Benchmark of the fmkDB analytics queries over a synthetic database.
+
+The synthetic database mimics fuzzing campaigns: each data has a few feedback entries from
+several sources, a small share of them carrying a negative status or some content, and
+some data have been analyzed by the user.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import sqlite3
+import datetime
+import argparse
+import tempfile
+
+from fuddly.framework.database import Database
+
+FBK_SOURCES = ['Target', 'Probe(health)', 'Probe(log)', 'Monitor']
+TARGETS = ['TestTarget [ID: 0]', 'TestTarget [ID: 1]', 'LocalTarget [ID: 2]']
+
+
+def populate(fmkdb_path, nb_data, nb_projects=4, fbk_per_data=3, impact_ratio=0.001,
+             fbk_content_ratio=0.05, analysis_ratio=0.0005, seed=0, batch_size=100000):
+    """
+    Create (or extend) a fmkDB with @nb_data synthetic data and their feedback.
+
+    Returns:
+        int: the number of feedback records
+    """
+    db = Database(fmkdb_path=fmkdb_path)
+    if not db.start():
+        raise ValueError('cannot create the fmkDB {:s}'.format(fmkdb_path))
+    db.stop()
+
+    rnd = random.Random(seed)
+    date = datetime.datetime(2024, 1, 1)
+    delta = datetime.timedelta(milliseconds=10)
+    con = sqlite3.connect(fmkdb_path, detect_types=sqlite3.PARSE_DECLTYPES)
+    con.execute('PRAGMA synchronous = OFF;')
+    first_id = (con.execute('SELECT MAX(ID) FROM DATA;').fetchone()[0] or 0) + 1
+    nb_fbk = 0
+    with con:
+        con.executemany('INSERT INTO PROJECT(NAME) VALUES(?);',
+                        [('prj_{:d}'.format(i),) for i in range(nb_projects)])
+        con.execute("INSERT INTO DATAMODEL(NAME) VALUES('synthetic');")
+        for start in range(first_id, first_id + nb_data, batch_size):
+            stop = min(start + batch_size, first_id + nb_data)
+            data, fbk, analysis = [], [], []
+            for data_id in range(start, stop):
+                sent_date = date + delta * data_id
+                data.append((data_id, 'tTYPE', 'synthetic', b'A' * 16, 16, sent_date, sent_date,
+                             rnd.choice(TARGETS), 'prj_{:d}'.format(data_id % nb_projects)))
+                for src in rnd.sample(FBK_SOURCES, fbk_per_data):
+                    r = rnd.random()
+                    status = -rnd.randint(1, 3) if r < impact_ratio else 0
+                    if r < fbk_content_ratio:
+                        content = 'error {:d}'.format(rnd.randint(0, 99)).encode()
+                    else:
+                        content = rnd.choice([None, b'', b'\n'])
+                    fbk.append((data_id, src, sent_date, content, status))
+                if rnd.random() < analysis_ratio:
+                    analysis.append((data_id, 'user analysis', sent_date, rnd.random() < 0.5))
+            con.executemany('INSERT INTO DATA(ID, TYPE, DM_NAME, CONTENT, SIZE, SENT_DATE, '
+                            'ACK_DATE, TARGET, PRJ_NAME) VALUES(?,?,?,?,?,?,?,?,?);', data)
+            con.executemany('INSERT INTO FEEDBACK(DATA_ID, SOURCE, DATE, CONTENT, STATUS) '
+                            'VALUES(?,?,?,?,?);', fbk)
+            con.executemany('INSERT INTO ANALYSIS(DATA_ID, CONTENT, DATE, IMPACT) '
+                            'VALUES(?,?,?,?);', analysis)
+            nb_fbk += len(fbk)
+    con.close()
+
+    return nb_fbk
+
+
+def run_queries(fmkdb_path, prj_name=None, fbk_src=None):
+    """
+    Returns:
+        dict: the duration of each analytics query, and the number of data it found
+    """
+    db = Database(fmkdb_path=fmkdb_path)
+    if not db.start():
+        raise ValueError('invalid fmkDB {:s}'.format(fmkdb_path))
+
+    results = {}
+    queries = [
+        ('data_with_impact', lambda: db.get_data_with_impact(prj_name=prj_name, fbk_src=fbk_src,
+                                                              display=False)),
+        ('data_without_fbk', lambda: db.get_data_without_fbk(prj_name=prj_name, fbk_src=fbk_src,
+                                                              display=False)),
+        ('data_with_specific_fbk', lambda: db.get_data_with_specific_fbk(
+            'error 42', prj_name=prj_name, fbk_src=fbk_src, display=False)),
+    ]
+    try:
+        for name, query in queries:
+            start = time.perf_counter()
+            data_list = query()
+            results[name] = (time.perf_counter() - start, len(data_list))
+    finally:
+        db.stop()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the fmkDB analytics queries')
+    parser.add_argument('--fmkdb', metavar='PATH',
+                        help='fmkDB to use (populated first if it does not exist)')
+    parser.add_argument('-n', '--nb-data', type=int, default=10000000,
+                        help='Number of synthetic data to create')
+    parser.add_argument('--project', metavar='PROJECT_NAME', help='Restrict the queries to a project')
+    parser.add_argument('--fbk-src', metavar='FEEDBACK_SOURCES',
+                        help='Restrict the feedback sources to consider (through a regexp)')
+    args = parser.parse_args(argv)
+
+    tmp_dir = None
+    fmkdb_path = args.fmkdb
+    if fmkdb_path is None:
+        tmp_dir = tempfile.mkdtemp()
+        fmkdb_path = os.path.join(tmp_dir, 'fmkDB_bench.db')
+
+    try:
+        if not os.path.isfile(fmkdb_path):
+            start = time.perf_counter()
+            nb_fbk = populate(fmkdb_path, args.nb_data)
+            print('*** fmkDB populated with {:d} data and {:d} feedback in {:.1f}s ***'
+                  .format(args.nb_data, nb_fbk, time.perf_counter() - start))
+
+        for name, (duration, nb) in run_queries(fmkdb_path, prj_name=args.project,
+                                                fbk_src=args.fbk_src).items():
+            print('{:<24s} {:>10.2f}s  ({:d} data)'.format(name, duration, nb))
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
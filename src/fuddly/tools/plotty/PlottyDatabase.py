@@ -1,32 +1,45 @@
-
 from fuddly.framework.database import Database
 
-from typing import Optional
+from typing import Any, Optional
 from fuddly.tools.plotty.globals import DBResult
 
 from fuddly.tools.plotty.utils import print_error
 
 
-class CachedDatabaseTable:
-
-    def __init__(
-            self,
-            name: str,
-            column_names: list[str],
-            values: DBResult
-    ):
-        self.name = name
-        self.column_names = column_names
-        self.values = values
-        self.__column_names_lookup_table = \
-            {column: i for i, column in enumerate(column_names)}
-
-    def get(self, data_ids: list[range], data_ids_column_name: str, column_names: list[str]) -> DBResult:
-        column_indexes = [self.__column_names_lookup_table[column] for column in column_names]
-        id_column_index = self.__column_names_lookup_table[data_ids_column_name]
-        filter_condition = lambda line: any(line[id_column_index] in interval for interval in data_ids)
-        right_id_lines = list(filter(filter_condition, self.values))
-        return [tuple(line[i] for i in column_indexes) for line in right_id_lines]
+def build_range_request(
+        table_name: str,
+        data_ids: list[range],
+        data_ids_column_name: str,
+        column_names: list[str]
+) -> Optional[tuple[str, list[Any]]]:
+    """
+    Build the SQL statement retrieving the given columns of the rows whose ID belongs to one
+    of the given ranges. The rows are ordered as they are stored within the table.
+    Return None if all the ranges are empty.
+    """
+    data_ids = [r for r in data_ids if len(r) > 0]
+    if len(data_ids) == 0:
+        return None
+
+    id_column = f'"{data_ids_column_name}"'
+    columns = ', '.join(f'"{column}"' for column in column_names)
+
+    if len(data_ids) == 1 and data_ids[0].step == 1:
+        statement = f"SELECT {columns} FROM {table_name} " \
+                    f"WHERE {id_column} >= ? AND {id_column} < ? ORDER BY rowid;"
+        params = [data_ids[0].start, data_ids[0].stop]
+    else:
+        # Each range is looked up through the index on the ID column, and the rows matching
+        # several (overlapping) ranges are only retrieved once
+        statement = f"WITH RANGES(START, STOP, STEP) AS (VALUES " \
+                    f"{', '.join(['(?, ?, ?)'] * len(data_ids))}) " \
+                    f"SELECT {columns} FROM {table_name} WHERE rowid IN (" \
+                    f"SELECT {table_name}.rowid FROM RANGES CROSS JOIN {table_name} " \
+                    f"ON {id_column} >= START AND {id_column} < STOP " \
+                    f"AND ({id_column} - START) % STEP == 0) ORDER BY rowid;"
+        params = [v for r in data_ids for v in (r.start, r.stop, r.step)]
+
+    return statement, params
 
 
 class PlottyDatabase(object):
@@ -47,48 +60,61 @@ class PlottyDatabase(object):
         """Given path is always considered to be valid"""
         if not self.__cached:
             self.path = path
-            self.__database = Database(path)
-            self.__cached_tables: dict[str, CachedDatabaseTable] = dict()
+            self.__database = Database(path, read_only=True)
+            self.__started = False
 
             self.__cached_databases[path] = self
             self.__cached = True
 
 
-    def __database_request(
-            self,
-            table_name: str
-    ) -> Optional[tuple[list[str], DBResult]]:
-        start_ok = self.__database.start()
-        if not start_ok:
-            print_error(f"The database '{self.path}' could not start")
-            return None
+    @classmethod
+    def close_all(cls):
+        for database in cls.__cached_databases.values():
+            database.close()
 
-        column_names = Database.column_names_from(self.__database, table_name)
 
-        database_answer = self.__database.execute_sql_statement(
-            f"SELECT * FROM {table_name};",
-        )
-        if database_answer is None:
-            return None
+    def __start(self) -> bool:
+        # The database is kept open until close() is called, so that the successive requests
+        # do not pay for its start (SQL handler thread, schema check)
+        if not self.__started:
+            self.__started = self.__database.start()
+            if not self.__started:
+                print_error(f"The database '{self.path}' could not start")
+        return self.__started
 
-        self.__database.stop()
 
-        return column_names, database_answer
+    def close(self):
+        if self.__started:
+            self.__database.stop()
+            self.__started = False
 
 
-    def __pull_table(self, table_name: str) -> bool:
-        database_answer = self.__database_request(table_name)
-        if database_answer is None:
-            return False
-        column_names, values = database_answer
+    def __database_request(
+            self,
+            table_name: str,
+            data_ids: list[range],
+            data_ids_column_name: str,
+            column_names: list[str]
+    ) -> Optional[DBResult]:
+        if not self.__start():
+            return None
 
-        new_table = CachedDatabaseTable(table_name, column_names, values)
-        self.__cached_tables[table_name] = new_table
+        if not self.has_columns(table_name, column_names + [data_ids_column_name]):
+            return None
 
-        return True
+        request = build_range_request(table_name, data_ids, data_ids_column_name, column_names)
+        if request is None:
+            database_answer = []
+        else:
+            statement, params = request
+            database_answer = self.__database.execute_sql_statement(statement, params=params)
+
+        return database_answer
 
 
     def has_columns(self, table_name: str, column_names: list[str]) -> bool:
+        if not self.__start():
+            return False
         existing_columns = self.__database.column_names_from(table_name)
         return all(column in existing_columns for column in column_names)
 
@@ -104,11 +130,9 @@ class PlottyDatabase(object):
         if len(data_ids) == 0 or len(column_names) == 0:
             return None
 
-        if table_name not in self.__cached_tables.keys():
-            pull_ok = self.__pull_table(table_name)
-            if not pull_ok:
-                print_error(f"The table {table_name} could not be retrieved")
-                return None
-
-        return self.__cached_tables[table_name].get(data_ids, data_ids_column_name, column_names)
-
+        return self.__database_request(
+            table_name,
+            data_ids,
+            data_ids_column_name,
+            column_names
+        )
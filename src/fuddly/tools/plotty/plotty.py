@@ -39,7 +39,10 @@ def get_points(
         column_names
     )
 
-    if is_typing_reference:
+    if data is None:
+        return None
+
+    if is_typing_reference and len(data) > 0:
         global x_type
         if len(PlottyOptions.formula.x_expression.variable_names) == 1:
             column_name = tuple(PlottyOptions.formula.x_expression.variable_names)[0]
@@ -52,9 +55,6 @@ def get_points(
             column_index = column_names.index(column_name)
             y_type = type(data[0][column_index])
 
-    if data is None:
-        return None
-    
     points_coordinates = []
     for entry in data:
         instanciation = \
@@ -153,6 +153,16 @@ def main():
     arguments.setup_parser()
     arguments.parse_arguments()
 
+    try:
+        figure = create_figure()
+    finally:
+        PlottyDatabase.close_all()
+
+    figure.plot_areas()
+    figure.show()
+
+
+def create_figure() -> PlottyFigure:
     main_area = create_figure_area(
         PlottyOptions.fmkdb[0],
         PlottyOptions.data_ids,
@@ -172,8 +182,7 @@ def main():
         )
         figure.add_area(area)
 
-    figure.plot_areas()
-    figure.show()
+    return figure
 
 
 if __name__ == "__main__":